@@ -78,12 +78,37 @@ app.get('/api/health', (req, res) => {
   res.json({ status: 'ok', timestamp: new Date().toISOString() });
 });
 
+// Conditional-GET passthrough for the image/snip proxies below: the
+// browser's If-None-Match goes upstream, and image-service's content-hash
+// ETag and Cache-Control come back, so a revalidated JPEG costs a 304 on
+// both hops instead of the full bytes twice.
+function conditionalRequestHeaders(req: express.Request): Record<string, string> {
+  const ifNoneMatch = req.get('If-None-Match');
+  return ifNoneMatch ? { 'If-None-Match': ifNoneMatch } : {};
+}
+
+function forwardCacheHeaders(
+  upstream: { headers: { get(name: string): string | null | undefined } },
+  res: express.Response,
+): void {
+  for (const name of ['ETag', 'Cache-Control']) {
+    const value = upstream.headers?.get(name.toLowerCase());
+    if (value) res.setHeader(name, value);
+  }
+}
+
 // Serve images without auth — <img> tags cannot send custom headers
 app.get('/api/images/:filename', async (req, res) => {
   try {
     const response = await fetch(
       `${IMAGE_SERVICE_URL}/images/${encodeURIComponent(req.params.filename)}`,
+      { headers: conditionalRequestHeaders(req) },
     );
+    if (response.status === 304) {
+      forwardCacheHeaders(response, res);
+      res.status(304).end();
+      return;
+    }
     if (!response.ok) {
       res.status(response.status).json({ error: 'Image not found' });
       return;
@@ -96,6 +121,7 @@ app.get('/api/images/:filename', async (req, res) => {
     // future upstream regression reintroducing a client-controlled
     // Content-Type on this public, unauthenticated route.
     res.setHeader('Content-Type', 'image/jpeg');
+    forwardCacheHeaders(response, res);
     const buffer = Buffer.from(await response.arrayBuffer());
     res.send(buffer);
   } catch (error) {
@@ -114,7 +140,13 @@ app.get('/api/snips/:filename', async (req, res) => {
   try {
     const response = await fetch(
       `${IMAGE_SERVICE_URL}/snips/${encodeURIComponent(req.params.filename)}`,
+      { headers: conditionalRequestHeaders(req) },
     );
+    if (response.status === 304) {
+      forwardCacheHeaders(response, res);
+      res.status(304).end();
+      return;
+    }
     if (!response.ok) {
       res.status(response.status).json({ error: 'Snip not found' });
       return;
@@ -122,6 +154,7 @@ app.get('/api/snips/:filename', async (req, res) => {
     // Hard-set, not forwarded — mirrors the /api/images proxy above
     // (2026-08 audit, for #228). Snips are always written as `.jpg`.
     res.setHeader('Content-Type', 'image/jpeg');
+    forwardCacheHeaders(response, res);
     const buffer = Buffer.from(await response.arrayBuffer());
     res.send(buffer);
   } catch (error) {
@@ -330,12 +363,13 @@ app.get('/api/modules/:id', async (req, res) => {
 });
 
 // Image listing (proxied to image-service). Forwards module_id/limit/
-// offset for newest-first pagination; response is the ImageUploadsPage
-// envelope ({ images, total }) from the contracts package.
+// cursor/offset for newest-first pagination; response is the
+// ImageUploadsPage envelope ({ images, next_cursor, total }) from the
+// contracts package.
 app.get('/api/images', async (req, res) => {
   try {
     const params = new URLSearchParams();
-    for (const key of ['module_id', 'limit', 'offset']) {
+    for (const key of ['module_id', 'limit', 'cursor', 'offset']) {
       const value = req.query[key];
       if (value !== undefined) params.set(key, String(value));
     }
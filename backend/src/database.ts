@@ -138,6 +138,11 @@ export class ModuleReadModel {
   // dashboard list and an immediate detail open) await the same promise
   // instead of each launching a duplicate four-endpoint fan-out.
   private inflight: Promise<AssembleResult> | null = null;
+  // Last 200 body per upstream URL with its ETag. duckdb-service answers
+  // a matching `If-None-Match` with a 304 decided from its per-table write
+  // counters — no SQL, no JSON — so a poll after an unchanged interval
+  // reuses the parsed body kept here instead of re-downloading it.
+  private validated = new Map<string, { etag: string; body: unknown }>();
 
   async listModules(): Promise<ModulesWithMeta> {
     const { items, heartbeatsFailed } = await this.assemble();
@@ -215,12 +220,23 @@ export class ModuleReadModel {
     // duckdb-service's error handlers put a useful `error` field there
     // and we lose it otherwise.
     const fetchJsonOk = async (url: string): Promise<unknown> => {
-      const r = await fetch(url);
+      const known = this.validated.get(url);
+      const r = await fetch(url, known ? { headers: { 'If-None-Match': known.etag } } : undefined);
+      if (r.status === 304 && known) {
+        return known.body;
+      }
       if (!r.ok) {
         const body = await r.text().catch(() => '');
         throw new Error(`upstream ${url} responded ${r.status}: ${body.slice(0, 200)}`);
       }
-      return r.json();
+      const body: unknown = await r.json();
+      const etag = r.headers?.get('etag');
+      if (etag) {
+        this.validated.set(url, { etag, body });
+      } else {
+        this.validated.delete(url);
+      }
+      return body;
     };
     const [modulesResult, nestsResult, progressResult, heartbeatsResult] = await Promise.allSettled(
       [
@@ -55,6 +55,25 @@ describe('GET /api/images/:filename', () => {
     expect(res.headers['content-type']).toContain('image/jpeg');
   });
 
+  it('passes If-None-Match upstream and relays a 304 with its ETag', async () => {
+    (globalThis.fetch as unknown as ReturnType<typeof vi.fn>).mockResolvedValue({
+      ok: false,
+      status: 304,
+      headers: new Map([
+        ['etag', '"abc123"'],
+        ['cache-control', 'no-cache'],
+      ]),
+    });
+
+    const res = await request(app)
+      .get('/api/images/esp_capture_20260601_120000.jpg')
+      .set('If-None-Match', '"abc123"');
+    expect(res.status).toBe(304);
+    expect(res.headers['etag']).toBe('"abc123"');
+    const [, init] = (globalThis.fetch as unknown as ReturnType<typeof vi.fn>).mock.calls[0];
+    expect(init.headers['If-None-Match']).toBe('"abc123"');
+  });
+
   it('forwards a 404 from image-service verbatim', async () => {
     // This only proves the proxy forwards whatever status image-service
     // returns — it mocks the 404, it doesn't exercise image-service's own
@@ -146,4 +146,40 @@ describe('ModuleReadModel — short-TTL assembly cache', () => {
 
     expect(fetchMock).toHaveBeenCalledTimes(FETCHES_PER_FANOUT * 2);
   });
+
+  it('revalidates with If-None-Match and reuses the body on a 304', async () => {
+    vi.useFakeTimers();
+    const seen: Array<string | undefined> = [];
+    const fetchMock = vi.fn(async (input: RequestInfo | URL, init?: RequestInit) => {
+      const url = String(input);
+      const ifNoneMatch = (init?.headers as Record<string, string> | undefined)?.['If-None-Match'];
+      if (url.endsWith('/modules')) {
+        seen.push(ifNoneMatch);
+        if (ifNoneMatch === '"v1"') {
+          return new Response(null, { status: 304, headers: { ETag: '"v1"' } });
+        }
+        return new Response(JSON.stringify({ modules: [upstreamModule()] }), {
+          status: 200,
+          headers: { ETag: '"v1"' },
+        });
+      }
+      if (url.includes('/heartbeats_summary')) {
+        return new Response(JSON.stringify({ summary: {} }), { status: 200 });
+      }
+      if (url.endsWith('/nests')) {
+        return new Response(JSON.stringify({ nests: [] }), { status: 200 });
+      }
+      return new Response(JSON.stringify({ progress: [] }), { status: 200 });
+    });
+    globalThis.fetch = fetchMock as unknown as typeof fetch;
+    const db = new ModuleReadModel();
+
+    await db.listModules();
+    vi.advanceTimersByTime(6000);
+    const { modules } = await db.listModules();
+
+    expect(seen).toEqual([undefined, '"v1"']);
+    expect(modules).toHaveLength(1);
+    expect(modules[0].id).toBe(VALID_ID);
+  });
 });
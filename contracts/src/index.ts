@@ -247,11 +247,14 @@ export interface ImageUpload {
 }
 
 // Paginated envelope. `total` is the full count matching the filter,
-// ignoring limit/offset — the admin UI uses it to decide whether to
-// render a "Load more" button.
+// ignoring limit/offset/cursor — the admin UI shows it as "N left".
+// `next_cursor` is an opaque keyset token: pass it back as `cursor` to
+// fetch the rows after this page; `null` once the listing is exhausted.
+// Optional because pre-cursor services omit it.
 export interface ImageUploadsPage {
   images: ImageUpload[];
   total: number;
+  next_cursor?: string | null;
 }
 
 // ---- Per-nest hole-detection snips (issue #165) ----
@@ -2,25 +2,35 @@ import logging
 import os
 import time
 
-from flask import Flask, g, request
+from flask import Flask, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
 from apscheduler.schedulers.background import BackgroundScheduler
 
 from db.schema import init_db
 from routes.admin_weather import admin_weather_bp
 from routes.detections import detections_bp
 from routes.health import health_bp
+from routes.ingest import ingest_bp, prune_ingest_keys
 from routes.logs import logs_bp
 from routes.measurements import measurements_bp
+from routes.metrics import metrics_bp
 from routes.modules import modules_bp
 from routes.nests import nests_bp
 from routes.progress import progress_bp
 from routes.heartbeats import heartbeats_bp
 from services.backup import run_backup
+from services.cold_archive import run_cold_archive_job
+from services.keepalive import KeepAliveRequestHandler
 from services.log_ring import init_persistence as init_log_persistence
 from services.log_ring import install as install_log_ring
 from services.log_ring import log_event
+from services.measurement_rollup import (
+    MEASUREMENTS_ROLLUP_INTERVAL_MIN,
+    run_measurement_maintenance,
+)
+from services import metrics
 from services.prod_guard import require_prod_key
-from services.silence_watcher import check_silence
+from services import shutdown, silence_watcher
 from services.weather_worker import run_weather_fetch
 
 # Tee stdout/stderr into the in-memory ring (#171) so the admin server-logs
@@ -51,7 +61,23 @@ log_event("info", "🗄 duckdb-service starting (DuckDB persistence)")
 # fallback — mirrors backend/src/auth.ts (2026-07 audit, for #204).
 require_prod_key()
 
+
+class _TimedJSONProvider(DefaultJSONProvider):
+    """Flask's default provider, with serialization time recorded per
+    endpoint (``http_json_serialize_seconds`` on ``/metrics``). Output is
+    byte-for-byte unchanged."""
+
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            endpoint = (request.endpoint if has_request_context() else None) or "-"
+            metrics.JSON_SERIALIZE.observe(time.perf_counter() - start, endpoint)
+
+
 app = Flask(__name__)
+app.json = _TimedJSONProvider(app)
 
 
 def _status_level(code: int) -> str:
@@ -76,7 +102,15 @@ def _access_log_finish(resp):
     # logger (#181), so this is the only access entry — no duplicate, no false-red.
     start = g.pop("_access_start", None)
     if start is not None:
-        ms = (time.perf_counter() - start) * 1000.0
+        elapsed = time.perf_counter() - start
+        ms = elapsed * 1000.0
+        # Keyed by endpoint name, not path, so /modules/<id> is one series.
+        metrics.HTTP_REQUEST.observe(
+            elapsed,
+            request.endpoint or "unmatched",
+            request.method,
+            str(resp.status_code),
+        )
         log_event(
             _status_level(resp.status_code),
             f"{request.method} {request.path} {resp.status_code} {ms:.1f}ms",
@@ -86,10 +120,12 @@ def _access_log_finish(resp):
 
 app.register_blueprint(health_bp)
 app.register_blueprint(logs_bp)
+app.register_blueprint(metrics_bp)
 app.register_blueprint(modules_bp)
 app.register_blueprint(nests_bp)
 app.register_blueprint(progress_bp)
 app.register_blueprint(detections_bp)
+app.register_blueprint(ingest_bp)
 app.register_blueprint(heartbeats_bp)
 app.register_blueprint(measurements_bp)
 app.register_blueprint(admin_weather_bp)
@@ -109,7 +145,22 @@ scheduler = BackgroundScheduler()
 scheduler.add_job(
     run_backup, "cron", day_of_week="sun", hour=3, minute=0, id="weekly_backup"
 )
-scheduler.add_job(check_silence, "interval", minutes=15, id="silence_watcher")
+# Measurement rollups + raw retention (services/measurement_rollup.py).
+# Reads stay exact between ticks (they add the un-rolled tail), so the
+# interval only bounds how much raw tail a chart read scans.
+scheduler.add_job(
+    run_measurement_maintenance,
+    "interval",
+    minutes=MEASUREMENTS_ROLLUP_INTERVAL_MIN,
+    id="measurement_rollup",
+)
+# Cold tier (services/cold_archive.py): a no-op unless
+# COLD_ARCHIVE_AFTER_DAYS is set. Nightly, ahead of the Sunday backup, so
+# the copy it takes no longer carries the archived months.
+scheduler.add_job(run_cold_archive_job, "cron", hour=2, minute=30, id="cold_archive")
+# Idempotency keys of replayable ingests (routes/ingest.py): only needed
+# as long as image-service's outbox can hold an upload back.
+scheduler.add_job(prune_ingest_keys, "cron", hour=2, minute=45, id="ingest_key_prune")
 # Weather worker (issue #111, ADR-017). Gated separately from the
 # blueprint registration: the admin backfill endpoint must remain
 # reachable even when the scheduled tick is disabled, so an operator
@@ -118,6 +169,13 @@ scheduler.add_job(check_silence, "interval", minutes=15, id="silence_watcher")
 if os.getenv("WEATHER_WORKER_ENABLED", "true").lower() == "true":
     scheduler.add_job(run_weather_fetch, "interval", minutes=60, id="weather_worker")
 scheduler.start()
+# Silence watcher (services/silence_watcher.py): its own timer thread, woken
+# at each module's silence deadline rather than a scheduler interval, fed
+# by the write routes' `touch()` calls.
+silence_watcher.start()
+# SIGTERM (compose stop) exits through atexit, which drains the Discord
+# queue and group-commit window and checkpoints the DB (services/shutdown.py).
+shutdown.install()
 
 if __name__ == "__main__":
     debug = os.getenv("DEBUG", "false").lower() == "true"
@@ -126,4 +184,13 @@ if __name__ == "__main__":
     # one worker for the stream's whole lifetime, so concurrent request handling is
     # required or an open admin tail would stall all other traffic. A future move
     # to gunicorn must keep per-stream concurrency (threaded/async workers).
-    app.run(host="0.0.0.0", port=8000, debug=debug, threaded=True)
+    # KeepAliveRequestHandler lets image-service's pooled session reuse its
+    # connections (werkzeug's own handler closes after every response); see
+    # services/keepalive.py.
+    app.run(
+        host="0.0.0.0",
+        port=8000,
+        debug=debug,
+        threaded=True,
+        request_handler=KeepAliveRequestHandler,
+    )
@@ -0,0 +1,97 @@
+"""Shared scaffolding for the duckdb-service benchmarks.
+
+Boots the real Flask app against a throwaway DuckDB file (same env
+contract as ``tests/conftest.py``'s ``fresh_db``: ``DUCKDB_PATH`` set
+before any service module imports, seed data and the weather worker
+off) and drives it through Flask's test client, so every number below
+includes routing, validation, locking, SQL and JSON serialization —
+everything except the socket.
+
+Not collected by pytest (no ``test_`` prefix); run a benchmark directly:
+
+    cd duckdb-service && python benchmarks/bench_connection.py
+"""
+
+from __future__ import annotations
+
+import contextlib
+import importlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+SERVICE_ROOT = Path(__file__).resolve().parent.parent
+if str(SERVICE_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVICE_ROOT))
+
+
+def boot_app(db_dir: str | None = None):
+    """Import ``app`` against a fresh DuckDB file; return the module."""
+    db_dir = db_dir or tempfile.mkdtemp(prefix="hf-bench-")
+    os.environ["DUCKDB_PATH"] = os.path.join(db_dir, "bench.duckdb")
+    os.environ["WEATHER_WORKER_ENABLED"] = "false"
+    os.environ.pop("SEED_DATA", None)
+    os.environ.pop("DISCORD_WEBHOOK_URL", None)
+    os.environ.pop("LOG_DIR", None)
+    app_module = importlib.import_module("app")
+    app_module.app.config.update(TESTING=True)
+    # The per-request access-log line would otherwise flood stdout and
+    # drown the results table; its cost is identical in every scenario.
+    app_module.log_event = lambda *_a, **_k: None
+    return app_module
+
+
+def insert_measurement_rows(module_mac: str, rows: list, source: str) -> int:
+    """One module's ``(ts, metric, value)`` rows in their own transaction,
+    one ``executemany`` — the weather worker's write before it batched
+    every module into one columnar insert. Kept for the "before" runs."""
+    if not rows:
+        return 0
+    from db.repository import write_transaction
+
+    with write_transaction() as con:
+        con.executemany(
+            "INSERT INTO measurements "
+            "(module_mac, ts, metric, value, source) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(module_mac, ts, metric, val, source) for (ts, metric, val) in rows],
+        )
+    return len(rows)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def quiet():
+    """Swallow the routes' own ``print`` diagnostics while measuring."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def time_calls(fn: Callable[[], object], iterations: int) -> list[float]:
+    """Run ``fn`` ``iterations`` times; return per-call latencies in ms."""
+    samples = []
+    with quiet():
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def summarize(label: str, samples: list[float]) -> str:
+    return (
+        f"{label:<42} n={len(samples):<5} "
+        f"mean={statistics.fmean(samples):8.2f}ms "
+        f"p50={percentile(samples, 50):8.2f}ms "
+        f"p99={percentile(samples, 99):8.2f}ms"
+    )
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""``POST /add_progress_for_module`` as ``nest_data`` grows.
+
+Seeds ``--nests`` nests (16 per module, the four bee types x
+``TARGET_NESTS_PER_TYPE``) plus one day of progress per nest straight into
+the tables, re-runs ``init_db`` so ``nest_id_seq`` / ``progress_id_seq``
+start past them, then reports:
+
+* **before** — the old per-nest id allocation, ``MAX(CAST(SUBSTR(nest_id,
+  6) AS INTEGER))`` over the whole table (SQL only; the old route ran it
+  16 times for a module's first upload);
+* a module's **first** upload — 16 nests allocated from the sequence and
+  16 progress rows, two columnar inserts;
+* a **steady-state** upload — 16 progress rows into existing nests, with
+  uuid and with sequence (``PROGRESS_ID_KIND=sequence``) progress ids.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_add_progress.py [--nests 200000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import itertools
+import sys
+import time
+
+from _harness import boot_app, quiet, summarize, time_calls
+
+_OLD_ALLOC_SQL = "SELECT MAX(CAST(SUBSTR(nest_id, 6) AS INTEGER)) FROM nest_data"
+
+_CLASSIFICATION = {
+    bee: {str(i): i % 2 for i in range(4)}
+    for bee in ("black_masked_bee", "resin_bee", "leafcutter_bee", "orchard_bee")
+}
+
+
+def _seed(connection, n_nests: int, fresh_modules: int) -> None:
+    n_modules = n_nests // 16
+    con = connection.get_conn()
+    try:
+        con.execute(
+            """
+            INSERT INTO module_configs (id, name, lat, lng, first_online)
+            SELECT printf('ee%010x', m), 'np-' || m, 48.0, 9.0, DATE '2024-01-01'
+              FROM range(?) t(m)
+            """,
+            [n_modules + fresh_modules],
+        )
+        con.execute(
+            """
+            INSERT INTO nest_data (nest_id, module_id, beeType)
+            SELECT printf('nest-%03d', n + 1),
+                   printf('ee%010x', n // 16),
+                   ['blackmasked', 'resin', 'leafcutter', 'orchard'][(n % 16) // 4 + 1]
+              FROM range(?) t(n)
+            """,
+            [n_modules * 16],
+        )
+        con.execute(
+            """
+            INSERT INTO daily_progress
+              (progress_id, nest_id, date, empty, sealed, hatched)
+            SELECT printf('prog-%03d', n + 1), printf('nest-%03d', n + 1),
+                   DATE '2024-06-01', 0, (n % 2) * 100, 0
+              FROM range(?) t(n)
+            """,
+            [n_modules * 16],
+        )
+    finally:
+        con.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nests", type=int, default=200_000)
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    schema = importlib.import_module("db.schema")
+    progress = sys.modules["routes.progress"]
+    client = app_module.app.test_client()
+
+    start = time.perf_counter()
+    _seed(connection, args.nests, args.iterations)
+    with quiet():
+        schema.init_db()
+    print(f"seeded {args.nests:,} nests in {time.perf_counter() - start:.1f}s\n")
+
+    def _old_alloc():
+        with connection.lock.read():
+            con = connection.get_conn()
+            try:
+                con.execute(_OLD_ALLOC_SQL).fetchone()
+            finally:
+                con.close()
+
+    fresh = (f"ee{m:010x}" for m in itertools.count(args.nests // 16))
+
+    def _post(module_id):
+        resp = client.post(
+            "/add_progress_for_module",
+            json={"module_id": module_id, "classification": _CLASSIFICATION},
+        )
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    print(
+        summarize(
+            "before: one MAX() id allocation (SQL)",
+            time_calls(_old_alloc, args.iterations),
+        )
+    )
+    print(
+        summarize(
+            "first upload (16 new nests)",
+            time_calls(lambda: _post(next(fresh)), args.iterations),
+        )
+    )
+    existing = "ee0000000000"
+    for kind in ("uuid", "sequence"):
+        progress.PROGRESS_ID_KIND = kind
+        print(
+            summarize(
+                f"steady-state upload ({kind} ids)",
+                time_calls(lambda: _post(existing), args.iterations),
+            )
+        )
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Weather backfill dedupe: Python timestamp sets vs. a temp-table anti-join.
+
+Seeds ``--modules`` modules x ``--years`` of hourly
+``open-meteo-backfill`` history (default 200 x 5 years = 26 M rows,
+three metrics) straight into ``measurements``, then dedupes one
+re-fetched ``--chunk-days`` chunk for the whole fleet in which every
+other hour is missing:
+
+* **before** — the old loop: per module, ``SELECT ts`` of its whole
+  ``temperature_c`` backfill history into a Python ``set``, filter the
+  chunk's rows against it, insert what's left;
+* **after** — ``_insert_backfill_gaps``: stage the chunk in a temp
+  table with one anti-join against the chunk's stored hours, insert.
+
+For each: wall time and peak Python heap (``tracemalloc``, measured on a
+separate untimed run since tracing slows everything down). The old
+peak grows with ``--years``; the new one doesn't.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_backfill_dedupe.py [--modules 200] [--years 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from _harness import boot_app, insert_measurement_rows, quiet
+
+HISTORY_START = datetime(2021, 1, 1)
+
+
+def _seed(connection, modules: int, years: int) -> None:
+    con = connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO measurements (module_mac, ts, metric, value, source) "
+            "SELECT printf('bd%010x', m), ? + to_hours(h), metric, 12.0, "
+            "'open-meteo-backfill' "
+            "FROM range(?) a(m), range(?) b(h), "
+            "(VALUES ('temperature_c'), ('humidity_pct'), ('precipitation_mm')) "
+            "v(metric)",
+            [HISTORY_START, modules, years * 8760],
+        )
+    finally:
+        con.close()
+
+
+def _punch_holes(connection, start: datetime, end: datetime) -> None:
+    # Every other hour of the chunk goes missing again.
+    con = connection.get_conn()
+    try:
+        con.execute(
+            "DELETE FROM measurements WHERE ts >= ? AND ts < ? AND hour(ts) % 2 = 0",
+            [start, end],
+        )
+    finally:
+        con.close()
+
+
+def _old_dedupe(worker, connection, rows) -> int:
+    """The pre-change ``_existing_backfill_timestamps`` + set filter."""
+    by_module: dict[str, list] = {}
+    for mac, ts, metric, value in rows:
+        by_module.setdefault(mac, []).append((ts, metric, value))
+    written = 0
+    for mac, module_rows in by_module.items():
+        with connection.lock.read():
+            con = connection.get_conn()
+            try:
+                existing = {
+                    r[0]
+                    for r in con.execute(
+                        "SELECT ts FROM measurements "
+                        "WHERE module_mac = ? AND metric = 'temperature_c' "
+                        "AND source = ?",
+                        [mac, worker._BACKFILL_SOURCE],
+                    ).fetchall()
+                }
+            finally:
+                con.close()
+        new_rows = [r for r in module_rows if r[0] not in existing]
+        written += insert_measurement_rows(mac, new_rows, worker._BACKFILL_SOURCE)
+    return written
+
+
+def _measure(label, run, reset):
+    reset()
+    started = time.perf_counter()
+    with quiet():
+        written = run()
+    elapsed = time.perf_counter() - started
+    reset()
+    tracemalloc.start()
+    with quiet():
+        run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(
+        f"{label:<30} {elapsed:7.2f}s  peak heap={peak / 1e6:7.1f}MB  "
+        f"{written} rows written"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--chunk-days", type=int, default=1)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    worker = importlib.import_module("services.weather_worker")
+    # The measurement rollup would otherwise start folding the seeded
+    # history into its buckets mid-run and compete for the DB.
+    app_module.scheduler.shutdown(wait=False)
+    started = time.perf_counter()
+    _seed(connection, args.modules, args.years)
+    print(
+        f"seeded {args.modules} modules x {args.years} years "
+        f"({args.modules * args.years * 8760 * 3:,} rows) "
+        f"in {time.perf_counter() - started:.0f}s"
+    )
+
+    end = HISTORY_START + timedelta(hours=args.years * 8760)
+    start = end - timedelta(days=args.chunk_days)
+    rows = [
+        (f"bd{m:010x}", start + timedelta(hours=h), metric, 12.0)
+        for m in range(args.modules)
+        for h in range(args.chunk_days * 24)
+        for metric in ("temperature_c", "humidity_pct", "precipitation_mm")
+    ]
+    print(f"re-fetched chunk: {len(rows):,} rows, half of them missing")
+
+    def reset():
+        _punch_holes(connection, start, end)
+
+    _measure(
+        "before: per-module ts sets",
+        lambda: _old_dedupe(worker, connection, rows),
+        reset,
+    )
+    _measure(
+        "after: temp-table anti-join",
+        lambda: sum(worker._insert_backfill_gaps(rows, start, end).values()),
+        reset,
+    )
+
+
+if __name__ == "__main__":
+    main()
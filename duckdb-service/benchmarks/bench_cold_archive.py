@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Live DB size and history reads before and after the Parquet cold tier.
+
+Seeds ``--modules`` modules with ``--days`` days of hourly heartbeats and
+hourly ``battery_pct`` measurements, then reports:
+
+* the live ``app.duckdb`` size after a ``CHECKPOINT`` (what
+  ``run_backup`` copies under the exclusive lock), before and after
+  ``run_cold_archive`` moves everything older than ``--keep-days``;
+* the archive run itself and the Parquet bytes it wrote;
+* ``GET /heartbeats/<id>?limit=500`` from ``module_heartbeats_all``, all
+  live vs. with most months in Parquet (the 500 newest reach back ~3
+  weeks, so the read still has to rule the archived files out).
+
+The response cache is off for the run so every request reaches DuckDB.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_cold_archive.py [--modules 50] [--days 365]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import time
+
+from _harness import boot_app, quiet, summarize, time_calls
+
+
+def _mac(i: int) -> str:
+    return f"bc{i:010x}"
+
+
+def _seed(connection, modules: int, days: int) -> int:
+    hours = days * 24
+    con = connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_configs (id, name, lat, lng, first_online) "
+            "SELECT printf('bc%010x', i), printf('m-%d', i), 48.0, 9.0, "
+            "DATE '2024-01-01' FROM range(?) t(i)",
+            [modules],
+        )
+        con.execute(
+            """
+            INSERT INTO module_heartbeats
+              (module_id, received_at, battery, rssi, uptime_ms, free_heap,
+               fw_version, reset_reason, boot_count)
+            SELECT printf('bc%010x', m.i),
+                   date_trunc('hour', now())::TIMESTAMP - to_hours(h.i),
+                   (h.i % 100)::INTEGER, -60, h.i * 3600000, 120000,
+                   'osmia', 'POWERON', m.i
+              FROM range(?) m(i), range(?) h(i)
+            """,
+            [modules, hours],
+        )
+        con.execute(
+            """
+            INSERT INTO measurements (module_mac, ts, metric, value, source)
+            SELECT printf('bc%010x', m.i),
+                   date_trunc('hour', now())::TIMESTAMP - to_hours(h.i),
+                   'battery_pct', (h.i % 100)::DOUBLE, 'esp-heartbeat'
+              FROM range(?) m(i), range(?) h(i)
+            """,
+            [modules, hours],
+        )
+    finally:
+        con.close()
+    return modules * hours
+
+
+def _checkpointed_size(connection) -> tuple[int, int]:
+    """(file bytes, bytes in used blocks) after a CHECKPOINT. DuckDB
+    reuses freed blocks but does not truncate the file."""
+    con = connection.get_conn()
+    try:
+        con.execute("CHECKPOINT")
+        block_size, used = con.execute(
+            "SELECT block_size, used_blocks FROM pragma_database_size()"
+        ).fetchone()
+    finally:
+        con.close()
+    return os.path.getsize(connection.DB_PATH), block_size * used
+
+
+def _tree_size(root: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(d, f))
+        for d, _, files in os.walk(root)
+        for f in files
+    )
+
+
+def _history(client):
+    url = f"/heartbeats/{_mac(0)}?limit=500"
+
+    def run():
+        resp = client.get(url)
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    return run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--keep-days", type=int, default=60)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    schema = importlib.import_module("db.schema")
+    archive = importlib.import_module("services.cold_archive")
+    importlib.import_module("routes._cache").cache.max_bytes = 0
+    client = app_module.app.test_client()
+    rows = _seed(connection, args.modules, args.days)
+    print(f"{args.modules} modules, ~{rows} heartbeats + {rows} measurements")
+
+    rollup = importlib.import_module("services.measurement_rollup")
+    rollup._LAG = rollup._LAG * 0
+    with quiet():
+        # Rollups first: they stay live, so they belong in both sizes.
+        rollup.run_rollup()
+        size_before = _checkpointed_size(connection)
+        live = time_calls(_history(client), args.iterations)
+        started = time.perf_counter()
+        moved = archive.run_cold_archive(days=args.keep_days)
+        elapsed = time.perf_counter() - started
+        size_after = _checkpointed_size(connection)
+        tiered = time_calls(_history(client), args.iterations)
+    parquet = _tree_size(schema.archive_dir())
+    print(
+        f"live DB file: {size_before[0] / 1e6:.1f}MB -> {size_after[0] / 1e6:.1f}MB, "
+        f"used blocks: {size_before[1] / 1e6:.1f}MB -> {size_after[1] / 1e6:.1f}MB "
+        f"(archive: {parquet / 1e6:.1f}MB Parquet)"
+    )
+    print(f"archive run: {moved} rows in {elapsed:.2f}s")
+    print(summarize("history, all live", live))
+    print(summarize("history, live + Parquet", tiered))
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Row vs. ``?format=columnar`` responses on the large list endpoints.
+
+Seeds ``--rows`` rows each into ``daily_progress``, ``nest_detections``
+(one module) and ``image_uploads``, then times the full request — SQL,
+row/column assembly and JSON serialization — for both shapes of:
+
+* ``GET /progress?limit=<rows>``
+* ``GET /detections/history?module_id=...``
+* ``GET /image_uploads`` (unpaginated)
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_columnar.py [--rows 100000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import time
+
+from _harness import boot_app, summarize, time_calls
+
+MODULE = "cc0000000001"
+
+
+def _seed(connection, n: int) -> None:
+    con = connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_configs (id, name, lat, lng, first_online) "
+            "VALUES (?, 'columnar', 48.0, 9.0, DATE '2024-01-01')",
+            [MODULE],
+        )
+        con.execute(
+            """
+            INSERT INTO nest_data (nest_id, module_id, beeType)
+            SELECT printf('nest-%03d', i + 1), ?, 'resin' FROM range(16) t(i)
+            """,
+            [MODULE],
+        )
+        con.execute(
+            """
+            INSERT INTO daily_progress
+              (progress_id, nest_id, date, empty, sealed, hatched)
+            SELECT printf('prog-%03d', i + 1), printf('nest-%03d', i % 16 + 1),
+                   DATE '2020-01-01' + (i // 16)::INTEGER, 0, (i % 101)::INTEGER, 0
+              FROM range(?) t(i)
+            """,
+            [n],
+        )
+        con.execute(
+            """
+            INSERT INTO nest_detections
+              (module_id, filename, bee_type, nest_index, bbox_x, bbox_y,
+               bbox_w, bbox_h, state, confidence, snip_filename, detected_at)
+            SELECT ?, printf('cap-%06d.jpg', i // 16), 'resin', i % 16,
+                   0.1, 0.2, 0.3, 0.3, 'sealed', 0.9,
+                   printf('cap-%06d-resin-%d.jpg', i // 16, i % 16),
+                   TIMESTAMP '2024-01-01' + to_seconds(i // 16)
+              FROM range(?) t(i)
+            """,
+            [MODULE, n],
+        )
+        con.execute(
+            """
+            INSERT INTO image_uploads (module_id, filename, uploaded_at)
+            SELECT ?, printf('img-%06d.jpg', i),
+                   TIMESTAMP '2024-01-01' + to_seconds(i)
+              FROM range(?) t(i)
+            """,
+            [MODULE, n],
+        )
+    finally:
+        con.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    client = app_module.app.test_client()
+
+    start = time.perf_counter()
+    _seed(connection, args.rows)
+    print(
+        f"seeded {args.rows:,} rows per table in {time.perf_counter() - start:.1f}s\n"
+    )
+
+    for label, url in (
+        ("/progress", f"/progress?limit={args.rows}"),
+        ("/detections/history", f"/detections/history?module_id={MODULE}"),
+        ("/image_uploads", "/image_uploads"),
+    ):
+        for fmt in ("rows", "columnar"):
+
+            def _get(url=url, fmt=fmt):
+                resp = client.get(f"{url}{'&' if '?' in url else '?'}format={fmt}")
+                assert resp.status_code == 200
+
+            print(summarize(f"{label} ({fmt})", time_calls(_get, args.iterations)))
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Per-request latency: connect-per-query vs. the shared handle + cursors.
+
+``db/connection.py`` used to open (and close) a full ``duckdb.connect``
+on every ``get_conn()`` call; it now keeps one process-wide handle and
+hands out a cursor per call. This benchmark runs the same representative
+routes both ways against the same seeded file:
+
+* **before** — ``get_conn()`` patched back to ``duckdb.connect(DB_PATH)``
+  with the shared handle closed, i.e. every query pays the file open,
+  catalog load and close-time checkpoint;
+* **after** — the shipped code path.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_connection.py [--modules 50] [--iterations 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+
+import duckdb
+from _harness import boot_app, quiet, summarize, time_calls
+
+
+def _seed(client, n_modules: int) -> list[str]:
+    macs = [f"bb{i:010x}" for i in range(n_modules)]
+    for i, mac in enumerate(macs):
+        resp = client.post(
+            "/new_module",
+            json={
+                "esp_id": mac,
+                "module_name": f"bench-{i}",
+                "latitude": 48.0 + i / 1000.0,
+                "longitude": 9.0,
+                "battery_level": 80,
+            },
+        )
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        client.post(
+            "/add_progress_for_module",
+            json={
+                "module_id": mac,
+                "classification": {"blackmasked": {"1": 1, "2": 0, "3": 1}},
+            },
+        )
+        client.post("/heartbeat", data={"mac": mac, "battery": "77"})
+    return macs
+
+
+def _scenarios(client, macs):
+    mac = macs[0]
+    return [
+        ("GET /modules", lambda: client.get("/modules")),
+        ("GET /heartbeats_summary", lambda: client.get("/heartbeats_summary")),
+        (
+            "GET /progress?module_id=<mac>",
+            lambda: client.get(f"/progress?module_id={mac}"),
+        ),
+        (
+            "POST /heartbeat",
+            lambda: client.post("/heartbeat", data={"mac": mac, "battery": "70"}),
+        ),
+        (
+            "POST /record_image",
+            lambda: client.post(
+                "/record_image", json={"module_id": mac, "filename": "bench.jpg"}
+            ),
+        ),
+    ]
+
+
+class _ConnectPerCall:
+    """Stand-in for the old handle: every ``cursor()`` is a full connect."""
+
+    def __init__(self, path: str):
+        self._path = path
+
+    def cursor(self):
+        return duckdb.connect(self._path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    client = app_module.app.test_client()
+    with quiet():
+        macs = _seed(client, args.modules)
+
+    results: dict[str, dict[str, list[float]]] = {}
+    for mode in ("before", "after"):
+        original = connection._shared_database
+        if mode == "before":
+            # Drop the shared handle so no cached DuckDB instance keeps the
+            # file open between calls — the pre-change steady state.
+            connection.close_database()
+            stand_in = _ConnectPerCall(connection.DB_PATH)
+            connection._shared_database = lambda stand_in=stand_in: stand_in
+        try:
+            for label, call in _scenarios(client, macs):
+                with quiet():
+                    call()  # warm-up
+                results.setdefault(label, {})[mode] = time_calls(call, args.iterations)
+        finally:
+            connection._shared_database = original
+
+    print(f"{args.modules} modules, {args.iterations} iterations per route\n")
+    for label, by_mode in results.items():
+        for mode in ("before", "after"):
+            print(summarize(f"{label} [{mode}]", by_mode[mode]))
+        print()
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Request and tick latency with the inline webhook vs. the Discord sender.
+
+Points ``DISCORD_WEBHOOK_URL`` at a local ``http.server`` that answers
+each post after ``--latency-ms`` (Discord's own round trip from a
+Raspberry Pi is ~100-300 ms, and up to the 5 s timeout when it's
+struggling), then reports:
+
+* ``POST /new_module`` for a new module, which posts the "New Hive
+  Module" message: the old inline ``requests.post`` vs. the queue;
+* a site-wide outage — ``--modules`` modules silent at once — through
+  ``check_silence``: how long the tick takes and how many webhook posts
+  it costs, inline vs. queued with digests.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_discord.py [--latency-ms 200] [--modules 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from _harness import boot_app, quiet, summarize, time_calls
+
+
+class _Hook(BaseHTTPRequestHandler):
+    latency_s = 0.2
+    posts = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency_s)
+        type(self).posts += 1
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *_args):
+        pass
+
+
+def _old_send(url):
+    # The pre-queue ``send_discord_message``: one fresh connection per
+    # post, on the caller's thread.
+    def send(content, digest=None):
+        try:
+            requests.post(url, json={"content": content}, timeout=5).raise_for_status()
+        except Exception as e:
+            print(f"Discord webhook failed: {e}")
+
+    return send
+
+
+def _register(client, counter):
+    def run():
+        counter[0] += 1
+        resp = client.post(
+            "/new_module",
+            json={
+                "esp_id": f"dc{counter[0]:010x}",
+                "module_name": f"m-{counter[0]}",
+                "latitude": 47.8,
+                "longitude": 9.6,
+                "battery_level": 80,
+            },
+        )
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    return run
+
+
+def _outage(connection, watcher):
+    """Mark every module unalerted and reload, so the next tick alerts all."""
+    con = connection.get_conn()
+    try:
+        con.execute("UPDATE module_configs SET last_silence_alert_at = NULL")
+    finally:
+        con.close()
+    watcher.load()
+    return datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(
+        seconds=watcher.SILENCE_THRESHOLD_S + 1
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    _Hook.latency_s = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Hook)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/hook"
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    discord = importlib.import_module("services.discord")
+    routes_modules = importlib.import_module("routes.modules")
+    watcher = importlib.import_module("services.silence_watcher")
+    discord.DISCORD_WEBHOOK_URL = url
+    client = app_module.app.test_client()
+    counter = [0]
+    print(f"webhook latency {args.latency_ms:.0f}ms, {args.modules}-module outage")
+
+    with quiet():
+        routes_modules.send_discord_message = _old_send(url)
+        inline = time_calls(_register(client, counter), args.iterations)
+        routes_modules.send_discord_message = discord.send_discord_message
+        queued = time_calls(_register(client, counter), args.iterations)
+        for _ in range(args.modules - 2 * args.iterations):
+            _register(client, counter)()
+        discord.flush()
+    print(summarize("POST /new_module, inline webhook", inline))
+    print(summarize("POST /new_module, queued", queued))
+
+    with quiet():
+        watcher.send_discord_message = _old_send(url)
+        now = _outage(connection, watcher)
+        before = _Hook.posts
+        started = time.perf_counter()
+        watcher.check_silence(now)
+        inline_s = time.perf_counter() - started
+        inline_posts = _Hook.posts - before
+
+        watcher.send_discord_message = discord.send_discord_message
+        now = _outage(connection, watcher)
+        before = _Hook.posts
+        started = time.perf_counter()
+        watcher.check_silence(now)
+        queued_s = time.perf_counter() - started
+        discord.flush()
+        delivered_s = time.perf_counter() - started
+        queued_posts = _Hook.posts - before
+    print(f"outage tick, inline: {inline_s * 1000:.0f}ms, {inline_posts} webhook posts")
+    print(
+        f"outage tick, queued: {queued_s * 1000:.1f}ms, {queued_posts} webhook "
+        f"post(s), digest delivered {delivered_s * 1000:.0f}ms after the tick "
+        f"started (window cut short by flush())"
+    )
+    print(f"sender counters: {discord.stats()}")
+    app_module.scheduler.shutdown(wait=False)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
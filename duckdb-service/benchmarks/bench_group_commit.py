@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Heartbeat-wave throughput: one commit per write vs. group commit.
+
+Fires ``--burst`` concurrent ``POST /heartbeat`` requests (the hourly
+fleet wave, compressed) from ``--threads`` client threads, once with
+``GROUP_COMMIT_WINDOW_MS=0`` (every heartbeat its own transaction — the
+pre-queue behaviour) and once per ``--windows`` value, and reports wall
+time, commits issued and per-request p50/p99.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_group_commit.py [--burst 2000] [--threads 32]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import queue
+import threading
+import time
+
+from _harness import boot_app, percentile, quiet
+
+
+def _wave(app, macs: list[str], threads: int) -> tuple[float, list[float]]:
+    work: queue.Queue[str] = queue.Queue()
+    for mac in macs:
+        work.put(mac)
+    latencies: list[float] = []
+    lat_lock = threading.Lock()
+
+    def _worker():
+        client = app.test_client()
+        while True:
+            try:
+                mac = work.get_nowait()
+            except queue.Empty:
+                return
+            start = time.perf_counter()
+            client.post("/heartbeat", data={"mac": mac, "battery": "80"})
+            elapsed = (time.perf_counter() - start) * 1000.0
+            with lat_lock:
+                latencies.append(elapsed)
+
+    pool = [threading.Thread(target=_worker) for _ in range(threads)]
+    start = time.perf_counter()
+    with quiet():
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+    return time.perf_counter() - start, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--windows", type=float, nargs="+", default=[2.0, 5.0, 10.0])
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    gc = importlib.import_module("db.group_commit")
+    client = app_module.app.test_client()
+    macs = [f"cc{i:010x}" for i in range(args.modules)]
+    with quiet():
+        for i, mac in enumerate(macs):
+            client.post(
+                "/new_module",
+                json={
+                    "esp_id": mac,
+                    "module_name": f"wave-{i}",
+                    "latitude": 48.0,
+                    "longitude": 9.0 + i / 1000.0,
+                    "battery_level": 80,
+                },
+            )
+    burst = [macs[i % len(macs)] for i in range(args.burst)]
+
+    print(f"{args.burst} heartbeats from {args.threads} threads\n")
+    for window in [0.0, *args.windows]:
+        gc.GROUP_COMMIT_WINDOW_MS = window
+        before = gc.stats()["batches"]
+        wall, lat = _wave(app_module.app, burst, args.threads)
+        commits = args.burst if window == 0 else gc.stats()["batches"] - before
+        print(
+            f"window={window:>5.1f}ms  wall={wall:6.2f}s  "
+            f"{args.burst / wall:7.0f} req/s  commits={commits:<6} "
+            f"p50={percentile(lat, 50):7.2f}ms p99={percentile(lat, 99):7.2f}ms"
+        )
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""``/heartbeats/<id>/gaps``: per-request ``LAG`` window vs. ``heartbeat_gaps``.
+
+Seeds ``--modules`` modules x ``--days`` of hourly heartbeats (default
+200 x 730 = 3.5 M rows, one missed hour in every 50) straight into
+``module_heartbeats``, runs the ``init_db`` backfill that fills
+``heartbeat_gaps`` from that history (timed — the one-off migration cost
+on an existing volume), then compares one module's gap read:
+
+* **before** — the old route's ``LAG(received_at) OVER (ORDER BY
+  received_at)`` over the module's whole history (SQL only);
+* **after** — the shipped route, a keyed ``LIMIT`` read of the table.
+
+Also reports ``POST /heartbeat`` latency, which now looks up the previous
+heartbeat in the same transaction. The response cache is off for the run
+so every request reaches DuckDB.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_heartbeat_gaps.py [--modules 200] [--days 730]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import time
+
+from _harness import boot_app, quiet, summarize, time_calls
+
+_OLD_GAPS_SQL = """
+    WITH ordered AS (
+        SELECT received_at,
+               LAG(received_at) OVER (ORDER BY received_at) AS prev_at
+          FROM module_heartbeats
+         WHERE module_id = ?
+    )
+    SELECT prev_at AS gap_start,
+           received_at AS gap_end,
+           EPOCH(received_at) - EPOCH(prev_at) AS gap_seconds
+      FROM ordered
+     WHERE prev_at IS NOT NULL
+       AND EPOCH(received_at) - EPOCH(prev_at) > 5400
+     ORDER BY received_at DESC
+     LIMIT 50
+"""
+
+
+def _seed(connection, n_modules: int, days: int) -> int:
+    con = connection.get_conn()
+    try:
+        con.execute(
+            """
+            INSERT INTO module_configs (id, name, lat, lng, first_online)
+            SELECT printf('ee%010x', m), 'gap-' || m, 48.0, 9.0, DATE '2024-01-01'
+              FROM range(?) t(m)
+            """,
+            [n_modules],
+        )
+        con.execute(
+            """
+            INSERT INTO module_heartbeats (module_id, received_at, battery)
+            SELECT printf('ee%010x', m),
+                   date_trunc('hour', now())::TIMESTAMP - to_hours(h),
+                   (h % 100)::INTEGER
+              FROM range(?) a(m), range(?) b(h)
+             WHERE h % 50 <> 7
+            """,
+            [n_modules, days * 24],
+        )
+        return con.execute("SELECT COUNT(*) FROM module_heartbeats").fetchone()[0]
+    finally:
+        con.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    schema = importlib.import_module("db.schema")
+    importlib.import_module("routes._cache").cache.max_bytes = 0
+    client = app_module.app.test_client()
+
+    start = time.perf_counter()
+    rows = _seed(connection, args.modules, args.days)
+    print(f"seeded {rows:,} heartbeats in {time.perf_counter() - start:.1f}s")
+
+    # One boot to run the other one-off backfills over the seeded history
+    # (latest heartbeat, #110 battery measurements), then pretend the
+    # volume predates `heartbeat_gaps` so the timed boot is that backfill
+    # alone.
+    with quiet():
+        schema.init_db()
+    con = connection.get_conn()
+    try:
+        con.execute("DELETE FROM heartbeat_gaps")
+        con.execute("DELETE FROM schema_migrations")
+    finally:
+        con.close()
+    start = time.perf_counter()
+    with quiet():
+        schema.init_db()
+    print(f"init_db backfill of heartbeat_gaps: {time.perf_counter() - start:.2f}s\n")
+
+    mac = "ee0000000000"
+
+    def _old():
+        with connection.lock.read():
+            con = connection.get_conn()
+            try:
+                con.execute(_OLD_GAPS_SQL, [mac]).fetchall()
+            finally:
+                con.close()
+
+    def _new():
+        assert client.get(f"/heartbeats/{mac}/gaps").status_code == 200
+
+    print(summarize("before: LAG window (SQL only)", time_calls(_old, args.iterations)))
+    print(
+        summarize("after: GET /heartbeats/<id>/gaps", time_calls(_new, args.iterations))
+    )
+    print(
+        summarize(
+            "POST /heartbeat (history + gap check + latest upsert)",
+            time_calls(
+                lambda: client.post("/heartbeat", data={"mac": mac, "battery": "70"}),
+                args.iterations,
+            ),
+        )
+    )
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
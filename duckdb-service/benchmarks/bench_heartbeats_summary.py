@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""``/heartbeats_summary``: full-history ARG_MAX fold vs. the latest table.
+
+Seeds ``--modules`` modules x ``--days`` of hourly heartbeats (default
+1000 x 365 = 8.76 M rows) straight into ``module_heartbeats``, runs the
+``init_db`` backfill that populates ``module_latest_heartbeat`` (timed —
+that's the one-off migration cost on an existing volume), then compares:
+
+* **before** — the old route's 12-aggregate ``ARG_MAX ... GROUP BY
+  module_id`` over the whole history;
+* **after** — the shipped route, which reads one row per module.
+
+Also reports ``POST /heartbeat`` latency, which now pays for the extra
+upsert in the same transaction.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_heartbeats_summary.py [--modules 1000] [--days 365]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import time
+
+from _harness import boot_app, quiet, summarize, time_calls
+
+_OLD_SUMMARY_SQL = """
+    SELECT module_id,
+           MAX(received_at) AS last_seen,
+           ARG_MAX(battery, received_at) AS battery,
+           ARG_MAX(rssi, received_at) AS rssi,
+           ARG_MAX(uptime_ms, received_at) AS uptime_ms,
+           ARG_MAX(free_heap, received_at) AS free_heap,
+           ARG_MAX(fw_version, received_at) AS fw_version,
+           ARG_MAX(reset_reason, received_at) AS reset_reason,
+           ARG_MAX(min_free_heap, received_at) AS min_free_heap,
+           ARG_MAX(boot_count, received_at) AS boot_count,
+           ARG_MAX(last_hb_fail_code, received_at) AS last_hb_fail_code,
+           ARG_MAX(last_hb_fail_count, received_at) AS last_hb_fail_count,
+           ARG_MAX(last_stage_before_reboot, received_at)
+               AS last_stage_before_reboot
+      FROM module_heartbeats
+  GROUP BY module_id
+"""
+
+
+def _seed(connection, n_modules: int, days: int) -> int:
+    con = connection.get_conn()
+    try:
+        con.execute(
+            """
+            INSERT INTO module_configs (id, name, lat, lng, first_online)
+            SELECT printf('dd%010x', m), 'hb-' || m, 48.0, 9.0, DATE '2024-01-01'
+              FROM range(?) t(m)
+            """,
+            [n_modules],
+        )
+        con.execute(
+            """
+            INSERT INTO module_heartbeats
+              (module_id, received_at, battery, rssi, uptime_ms, free_heap,
+               fw_version, reset_reason, min_free_heap, boot_count,
+               last_hb_fail_code, last_hb_fail_count, last_stage_before_reboot)
+            SELECT printf('dd%010x', m),
+                   TIMESTAMP '2024-01-01' + to_hours(h),
+                   CASE WHEN h % 7 = 0 THEN NULL ELSE (h % 100)::INTEGER END,
+                   -60 - (h % 30)::INTEGER,
+                   h * 3600000,
+                   150000,
+                   'carpenter',
+                   'POWERON',
+                   90000,
+                   h // 24,
+                   0,
+                   0,
+                   ''
+              FROM range(?) a(m), range(?) b(h)
+            """,
+            [n_modules, days * 24],
+        )
+        return con.execute("SELECT COUNT(*) FROM module_heartbeats").fetchone()[0]
+    finally:
+        con.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    schema = importlib.import_module("db.schema")
+    client = app_module.app.test_client()
+
+    start = time.perf_counter()
+    rows = _seed(connection, args.modules, args.days)
+    print(f"seeded {rows:,} heartbeats in {time.perf_counter() - start:.1f}s")
+
+    # A real pre-migration volume has long since run the one-time
+    # heartbeat -> measurements battery backfill (#110); mark it done so
+    # the timing below is the latest-heartbeat backfill alone.
+    con = connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO measurements (module_mac, ts, metric, value, source) "
+            "VALUES ('dd0000000000', now(), 'battery_pct', 0, "
+            "'esp-heartbeat-backfill')"
+        )
+    finally:
+        con.close()
+
+    start = time.perf_counter()
+    with quiet():
+        schema.init_db()
+    print(
+        f"init_db backfill of module_latest_heartbeat: {time.perf_counter() - start:.2f}s\n"
+    )
+
+    def _old():
+        with connection.lock.read():
+            con = connection.get_conn()
+            try:
+                con.execute(_OLD_SUMMARY_SQL).fetchall()
+            finally:
+                con.close()
+
+    def _new():
+        assert client.get("/heartbeats_summary").status_code == 200
+
+    print(
+        summarize("before: ARG_MAX fold (SQL only)", time_calls(_old, args.iterations))
+    )
+    print(
+        summarize("after: GET /heartbeats_summary", time_calls(_new, args.iterations))
+    )
+
+    mac = "dd0000000000"
+    print(
+        summarize(
+            "POST /heartbeat (history + latest upsert)",
+            time_calls(
+                lambda: client.post("/heartbeat", data={"mac": mac, "battery": "70"}),
+                args.iterations,
+            ),
+        )
+    )
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
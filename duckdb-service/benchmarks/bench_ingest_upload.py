@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""One upload's DB writes: per-step calls vs. one ``POST /ingest_upload``.
+
+Serves the app on a local socket (werkzeug, threaded — as in compose)
+rather than through the test client, because the point is the
+round-trips: image-service opens a connection per call. Registers
+``--modules`` modules, then records uploads the way image-service does:
+
+* ``per-step`` — ``POST /record_image``, ``/add_progress_for_module``,
+  ``/record_detections`` (``--snips`` rows) and
+  ``/modules/<id>/heartbeat``: four round-trips, two group-commit jobs
+  and two ``write_transaction()``s;
+* ``ingest`` — the same payload as one ``POST /ingest_upload``: one
+  round-trip, one group-commit job.
+
+Each is timed serially (per-upload latency) and as a wave of
+``--modules`` concurrent uploads (throughput, commits).
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_ingest_upload.py [--modules 50] [--snips 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from _harness import boot_app, quiet, summarize
+from werkzeug.serving import make_server
+
+CLASSIFICATION = {
+    species: {str(n): n % 2 for n in range(1, 5)}
+    for species in ("black_masked_bee", "leafcutter_bee", "orchard_bee", "resin_bee")
+}
+
+
+def _detections(filename: str, snips: int) -> list[dict]:
+    return [
+        {
+            "bee_type": "leafcutter",
+            "nest_index": i,
+            "bbox": [0.1, 0.2, 0.1, 0.1],
+            "state": "undetermined",
+            "confidence": 0.9,
+            "snip_filename": f"{filename[:-4]}-leafcutter_bee-{i}.jpg",
+        }
+        for i in range(1, snips + 1)
+    ]
+
+
+def _per_step(base, mac, filename, snips):
+    for path, body in (
+        ("/record_image", {"module_id": mac, "filename": filename}),
+        (
+            "/add_progress_for_module",
+            {"module_id": mac, "classification": CLASSIFICATION},
+        ),
+        (
+            "/record_detections",
+            {
+                "module_id": mac,
+                "filename": filename,
+                "detections": _detections(filename, snips),
+            },
+        ),
+        (f"/modules/{mac}/heartbeat", {"battery": 80}),
+    ):
+        requests.post(base + path, json=body, timeout=30).raise_for_status()
+
+
+def _ingest(base, mac, filename, snips):
+    requests.post(
+        base + "/ingest_upload",
+        json={
+            "module_id": mac,
+            "filename": filename,
+            "battery": 80,
+            "classification": CLASSIFICATION,
+            "detections": _detections(filename, snips),
+        },
+        timeout=30,
+    ).raise_for_status()
+
+
+def _serial(label, record, base, macs, snips, iterations):
+    samples = []
+    with quiet():
+        for i in range(iterations):
+            mac = macs[i % len(macs)]
+            started = time.perf_counter()
+            record(base, mac, f"{label}-{i}.jpg", snips)
+            samples.append((time.perf_counter() - started) * 1000.0)
+    return samples
+
+
+def _wave(label, record, base, macs, snips, group_commit):
+    before = group_commit.stats()["batches"]
+    started = time.perf_counter()
+    with quiet(), ThreadPoolExecutor(len(macs)) as pool:
+        list(
+            pool.map(
+                lambda mac: record(base, mac, f"{label}-wave-{mac}.jpg", snips), macs
+            )
+        )
+    elapsed = time.perf_counter() - started
+    commits = group_commit.stats()["batches"] - before
+    print(
+        f"{label + ' wave':<42} {len(macs)} uploads in {elapsed * 1000:7.0f}ms  "
+        f"({len(macs) / elapsed:6.1f} uploads/s, {commits} group commits)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--snips", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    app_module.scheduler.shutdown(wait=False)
+    group_commit = importlib.import_module("db.group_commit")
+    client = app_module.app.test_client()
+    macs = [f"b1{i:010x}" for i in range(args.modules)]
+    with quiet():
+        for mac in macs:
+            client.post(
+                "/new_module",
+                json={
+                    "esp_id": mac,
+                    "module_name": mac,
+                    "latitude": 47.8,
+                    "longitude": 9.6,
+                    "battery_level": 80,
+                },
+            )
+
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    print(f"{args.modules} modules, {args.snips} detection rows per upload")
+
+    for label, record in (("per-step", _per_step), ("ingest", _ingest)):
+        samples = _serial(label, record, base, macs, args.snips, args.iterations)
+        print(summarize(f"{label}, one upload", samples))
+    for label, record in (("per-step", _per_step), ("ingest", _ingest)):
+        _wave(label, record, base, macs, args.snips, group_commit)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
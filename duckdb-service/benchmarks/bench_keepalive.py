@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Calls from image-service: a connection per call vs. a kept-alive pool.
+
+Serves the app on a local socket twice, with werkzeug's own request
+handler and with ``KeepAliveRequestHandler`` (services/keepalive.py), and
+times serial calls the way image-service makes them:
+
+* ``before`` — module-level ``requests.get/post``: a fresh session, so a
+  TCP connect per call, and werkzeug closes the socket after each answer;
+* ``after`` — one shared ``requests.Session`` (image-service's
+  ``services/http_pool.py`` mounts the same urllib3 pool) against the
+  keep-alive handler.
+
+``GET /health`` is nearly free, so it shows the per-call connection cost
+on its own; ``POST /ingest_upload`` (no detections) is one upload's DB
+round-trip. The connection count is read from urllib3's pool.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_keepalive.py [--iterations 300]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import threading
+
+import requests
+from _harness import boot_app, quiet, summarize, time_calls
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+MAC = "b20000000001"
+
+
+def _connections(session: requests.Session) -> int:
+    pools = session.get_adapter("http://").poolmanager.pools
+    return sum(pools[key].num_connections for key in pools.keys())
+
+
+def _serve(app, handler):
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def _run(label, app, handler, pooled, iterations):
+    server, base = _serve(app, handler)
+    session = requests.Session()
+    get = session.get if pooled else requests.get
+    post = session.post if pooled else requests.post
+    counter = iter(range(10**9))
+    with quiet():
+        health = time_calls(lambda: get(f"{base}/health", timeout=5), iterations)
+        ingest = time_calls(
+            lambda: post(
+                f"{base}/ingest_upload",
+                json={
+                    "module_id": MAC,
+                    "filename": f"{label}-{next(counter)}.jpg",
+                    "battery": 80,
+                },
+                timeout=30,
+            ).raise_for_status(),
+            iterations,
+        )
+    server.shutdown()
+    print(summarize(f"{label}: GET /health", health))
+    print(summarize(f"{label}: POST /ingest_upload", ingest))
+    if pooled:
+        print(
+            f"{label}: {_connections(session)} TCP connections for {2 * iterations} calls"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    app_module.scheduler.shutdown(wait=False)
+    keepalive = importlib.import_module("services.keepalive")
+    with quiet():
+        app_module.app.test_client().post(
+            "/new_module",
+            json={
+                "esp_id": MAC,
+                "module_name": "bench",
+                "latitude": 47.8,
+                "longitude": 9.6,
+                "battery_level": 80,
+            },
+        )
+
+    _run("before", app_module.app, WSGIRequestHandler, False, args.iterations)
+    _run(
+        "after",
+        app_module.app,
+        keepalive.KeepAliveRequestHandler,
+        True,
+        args.iterations,
+    )
+
+
+if __name__ == "__main__":
+    main()
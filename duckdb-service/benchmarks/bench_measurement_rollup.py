@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""``GET /modules/<id>/measurements`` from raw rows vs. from the rollups.
+
+Seeds ``--modules`` modules with ``--days`` days of samples for three
+metrics, ``--per-hour`` per hour (ending now, so a 90-day read covers all
+of them), then
+times the 90-day ``hourly`` and ``daily`` reads of one module twice:
+
+* **raw** — before any rollup run, so every sample is still past the
+  watermark and the read aggregates them, as it did before the rollups;
+* **rollup** — after ``run_rollup()``: the read sums bucket rows.
+
+Also times the first (full-history) rollup run and an incremental tick
+after one heartbeat wave. The response cache is off for the run so every
+request reaches DuckDB.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_measurement_rollup.py [--modules 20] [--per-hour 12]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import time
+
+from _harness import boot_app, quiet, summarize, time_calls
+
+METRICS = ("battery_pct", "temperature_c", "humidity_pct")
+
+
+def _mac(i: int) -> str:
+    return f"bc{i:010x}"
+
+
+def _seed(connection, modules: int, days: int, per_hour: int) -> int:
+    samples = days * 24 * per_hour
+    step_s = 3600 // per_hour
+    con = connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_configs (id, name, lat, lng, first_online) "
+            "SELECT printf('bc%010x', i), printf('m-%d', i), 48.0, 9.0, "
+            "DATE '2024-01-01' FROM range(?) t(i)",
+            [modules],
+        )
+        con.execute(
+            """
+            INSERT INTO measurements (module_mac, ts, metric, value, source)
+            SELECT printf('bc%010x', m.i),
+                   date_trunc('hour', now())::TIMESTAMP - to_seconds(h.i * ?),
+                   k.metric, (h.i % 100)::DOUBLE, 'esp-heartbeat'
+              FROM range(?) m(i), range(?) h(i), unnest(?) k(metric)
+            """,
+            [step_s, modules, samples, list(METRICS)],
+        )
+    finally:
+        con.close()
+    return modules * samples * len(METRICS)
+
+
+def _read(client, interval: str):
+    url = f"/modules/{_mac(0)}/measurements?metric=battery_pct&interval={interval}&days=90"
+
+    def run():
+        resp = client.get(url)
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    return run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=20)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--per-hour", type=int, default=12)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    rollup = importlib.import_module("services.measurement_rollup")
+    importlib.import_module("routes._cache").cache.max_bytes = 0
+    client = app_module.app.test_client()
+    rows = _seed(connection, args.modules, args.days, args.per_hour)
+    print(f"{args.modules} modules, {rows} raw measurement rows")
+    # Rows stamped in the seed's instant would otherwise wait a tick.
+    rollup._LAG = rollup._LAG * 0
+
+    with quiet():
+        raw = {
+            i: time_calls(_read(client, i), args.iterations)
+            for i in ("hourly", "daily")
+        }
+        started = time.perf_counter()
+        rollup.run_rollup()
+        first_run = time.perf_counter() - started
+        rolled = {
+            i: time_calls(_read(client, i), args.iterations)
+            for i in ("hourly", "daily")
+        }
+        for m in range(args.modules):
+            client.post("/heartbeat", data={"mac": _mac(m), "battery": "70"})
+        started = time.perf_counter()
+        tick_rows = rollup.run_rollup()
+        tick = time.perf_counter() - started
+    for interval in ("hourly", "daily"):
+        print(summarize(f"raw {interval}", raw[interval]))
+        print(summarize(f"rollup {interval}", rolled[interval]))
+    print(f"first rollup run: {first_run * 1000:.0f}ms ({rows} rows)")
+    print(f"incremental tick: {tick * 1000:.1f}ms ({tick_rows} rows)")
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
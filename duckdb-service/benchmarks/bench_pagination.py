@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""``GET /image_uploads`` pages: ``offset`` vs. keyset ``cursor``, by depth.
+
+Seeds ``--rows`` uploads across 100 modules (default 1,000,000), re-runs
+``init_db`` so ``module_image_stats`` is backfilled, then times a
+``limit=50`` page at increasing depths, both ways:
+
+* **offset** — ``?limit=50&offset=<depth>``, the legacy pagination: a
+  top-(offset+50) scan plus a ``COUNT(*)`` for ``total``;
+* **cursor** — ``?limit=50&cursor=<token>``, the token for the row just
+  before ``depth`` (taken from the previous page's ``next_cursor`` in
+  real use; minted directly here), with ``total`` from the stats table.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_pagination.py [--rows 1000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import sys
+import time
+
+from _harness import boot_app, quiet, summarize, time_calls
+
+
+def _seed(connection, n: int) -> None:
+    con = connection.get_conn()
+    try:
+        con.execute(
+            """
+            INSERT INTO module_configs (id, name, lat, lng, first_online)
+            SELECT printf('bb%010x', m), 'page-' || m, 48.0, 9.0, DATE '2024-01-01'
+              FROM range(100) t(m)
+            """
+        )
+        con.execute(
+            """
+            INSERT INTO image_uploads (module_id, filename, uploaded_at)
+            SELECT printf('bb%010x', i % 100), printf('img-%07d.jpg', i),
+                   TIMESTAMP '2024-01-01' + to_seconds(i * 30)
+              FROM range(?) t(i)
+            """,
+            [n],
+        )
+    finally:
+        con.close()
+
+
+def _cursor_before(connection, modules, depth: int) -> str:
+    """The ``next_cursor`` a client holds after reading ``depth`` rows."""
+    con = connection.get_conn()
+    try:
+        ts, row_id = con.execute(
+            "SELECT uploaded_at, id FROM image_uploads "
+            "ORDER BY uploaded_at DESC, id DESC LIMIT 1 OFFSET ?",
+            [depth - 1],
+        ).fetchone()
+    finally:
+        con.close()
+    return modules._encode_image_cursor(ts, row_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    schema = importlib.import_module("db.schema")
+    modules = sys.modules["routes.modules"]
+    client = app_module.app.test_client()
+
+    start = time.perf_counter()
+    _seed(connection, args.rows)
+    with quiet():
+        schema.init_db()
+    print(f"seeded {args.rows:,} uploads in {time.perf_counter() - start:.1f}s\n")
+
+    def _get(url):
+        resp = client.get(url)
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    for depth in (0, args.rows // 10, args.rows // 2, args.rows - 50):
+        offset_url = f"/image_uploads?limit=50&offset={depth}"
+        token = _cursor_before(connection, modules, depth) if depth else ""
+        cursor_url = f"/image_uploads?limit=50&cursor={token}"
+        print(
+            summarize(
+                f"offset  depth={depth:>9,}",
+                time_calls(lambda url=offset_url: _get(url), args.iterations),
+            )
+        )
+        print(
+            summarize(
+                f"cursor  depth={depth:>9,}",
+                time_calls(lambda url=cursor_url: _get(url), args.iterations),
+            )
+        )
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
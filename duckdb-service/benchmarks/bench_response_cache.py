@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Dashboard read fan-out with and without the response cache.
+
+Seeds ``--modules`` modules with 16 nests and ``--days`` days of progress
+each, then times the requests one dashboard view makes — ``/modules``,
+``/nests``, ``/progress``, ``/heartbeats_summary`` — three ways:
+
+* **uncached** — ``RESPONSE_CACHE_MAX_BYTES=0`` semantics (the cache's
+  budget set to 0 for the run);
+* **hit** — the same requests against a warm cache, no writes between;
+* **revalidated** — the same requests sending back each response's
+  ``ETag`` in ``If-None-Match``: a ``304`` from the table counters alone;
+* **heartbeat wave** — every iteration first posts one ``/heartbeat``, so
+  ``/heartbeats_summary`` (and ``/modules``, whose tables the heartbeat
+  also writes) miss while ``/nests`` and ``/progress`` keep hitting.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_response_cache.py [--modules 50] [--days 90]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+
+from _harness import boot_app, quiet, summarize, time_calls
+
+ENDPOINTS = ("/modules", "/nests", "/progress", "/heartbeats_summary")
+
+
+def _mac(i: int) -> str:
+    return f"bc{i:010x}"
+
+
+def _seed(connection, modules: int, days: int) -> None:
+    con = connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_configs (id, name, lat, lng, first_online) "
+            "SELECT printf('bc%010x', i), printf('m-%d', i), 48.0, 9.0, "
+            "DATE '2024-01-01' FROM range(?) t(i)",
+            [modules],
+        )
+        con.execute(
+            "INSERT INTO nest_data (nest_id, module_id, beeType) "
+            "SELECT printf('nest-%06d', i), printf('bc%010x', i // 16), 'resin' "
+            "FROM range(?) t(i)",
+            [modules * 16],
+        )
+        con.execute(
+            """
+            INSERT INTO daily_progress
+              (progress_id, nest_id, date, empty, sealed, hatched)
+            SELECT printf('prog-%09d', i), printf('nest-%06d', i % ?),
+                   DATE '2024-01-01' + (i // ?)::INTEGER, 0, (i % 101)::INTEGER, 0
+              FROM range(?) t(i)
+            """,
+            [modules * 16, modules * 16, modules * 16 * days],
+        )
+    finally:
+        con.close()
+
+
+def _view(client, heartbeat_mac: str | None = None):
+    def run():
+        if heartbeat_mac is not None:
+            client.post("/heartbeat", data={"mac": heartbeat_mac, "battery": "70"})
+        for url in ENDPOINTS:
+            resp = client.get(url)
+            resp.get_data()
+            assert resp.status_code == 200, url
+
+    return run
+
+
+def _revalidate(client):
+    etags = {url: client.get(url).headers["ETag"] for url in ENDPOINTS}
+
+    def run():
+        for url, etag in etags.items():
+            resp = client.get(url, headers={"If-None-Match": etag})
+            assert resp.status_code == 304, url
+
+    return run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    response_cache = importlib.import_module("routes._cache").cache
+    client = app_module.app.test_client()
+    _seed(connection, args.modules, args.days)
+    print(
+        f"{args.modules} modules, {args.modules * 16} nests, "
+        f"{args.modules * 16 * args.days} progress rows; "
+        f"one dashboard view = {len(ENDPOINTS)} GETs"
+    )
+
+    budget = response_cache.max_bytes
+    with quiet():
+        response_cache.max_bytes = 0
+        uncached = time_calls(_view(client), args.iterations)
+        response_cache.max_bytes = budget
+        _view(client)()
+        warm = time_calls(_view(client), args.iterations)
+        revalidated = time_calls(_revalidate(client), args.iterations)
+        wave = time_calls(_view(client, _mac(0)), args.iterations)
+    print(summarize("uncached", uncached))
+    print(summarize("cache hit", warm))
+    print(summarize("revalidated (304)", revalidated))
+    print(summarize("heartbeat wave", wave))
+    stats = response_cache.stats()
+    print(f"cache: {stats['entries']} entries, {stats['bytes'] / 1e6:.1f}MB")
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
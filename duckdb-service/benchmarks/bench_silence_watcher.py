@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Silence watcher: the old 15-minute fleet scan vs. the liveness index.
+
+Seeds ``--modules`` modules x ``--days`` of hourly heartbeats and one
+upload per module-day straight into the DB, then reports:
+
+* **before** — the old ``check_silence`` query (two correlated ``MAX()``
+  subqueries per module over ``image_uploads`` and ``module_heartbeats``),
+  timed with the write lock held, as the old tick held it;
+* **after** — the boot-time ``load()`` (once per process, read lock
+  only), the ``touch()`` each write route now pays, and a tick over an
+  idle fleet (nothing due: no DB work at all);
+* alert latency — ``--alerting`` modules go silent on a shortened
+  threshold; how long after its deadline each alert reaches the Discord
+  hook. The old scan fired up to one 15-minute interval late.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_silence_watcher.py [--modules 1000] [--days 365]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import time
+
+from _harness import boot_app, percentile, quiet, summarize, time_calls
+
+_OLD_SCAN_SQL = """
+    SELECT m.id,
+           m.name,
+           m.last_seen_at,
+           m.last_silence_alert_at,
+           (SELECT MAX(uploaded_at)
+              FROM image_uploads
+             WHERE module_id = m.id) AS last_image_at,
+           (SELECT MAX(received_at)
+              FROM module_heartbeats
+             WHERE module_id = m.id) AS last_hb_at
+      FROM module_configs m
+"""
+
+
+def _seed(connection, n_modules: int, days: int) -> int:
+    con = connection.get_conn()
+    try:
+        con.execute(
+            """
+            INSERT INTO module_configs (id, name, lat, lng, first_online)
+            SELECT printf('ab%010x', m), 'sw-' || m, 48.0, 9.0, DATE '2024-01-01'
+              FROM range(?) t(m)
+            """,
+            [n_modules],
+        )
+        con.execute(
+            """
+            INSERT INTO module_heartbeats (module_id, received_at, battery)
+            SELECT printf('ab%010x', m),
+                   date_trunc('hour', now())::TIMESTAMP - to_hours(h), 80
+              FROM range(?) a(m), range(?) b(h)
+            """,
+            [n_modules, days * 24],
+        )
+        con.execute(
+            """
+            INSERT INTO image_uploads (module_id, filename, uploaded_at)
+            SELECT printf('ab%010x', m), printf('ab%010x-%d.jpg', m, d),
+                   date_trunc('day', now())::TIMESTAMP - to_days(d)
+              FROM range(?) a(m), range(?) b(d)
+            """,
+            [n_modules, days],
+        )
+        return con.execute("SELECT COUNT(*) FROM module_heartbeats").fetchone()[0]
+    finally:
+        con.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--alerting", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    schema = importlib.import_module("db.schema")
+    watcher = importlib.import_module("services.silence_watcher")
+
+    start = time.perf_counter()
+    rows = _seed(connection, args.modules, args.days)
+    print(f"seeded {rows:,} heartbeats in {time.perf_counter() - start:.1f}s")
+    with quiet():
+        # Fills the per-module summary tables the index loads from.
+        schema.init_db()
+        con = connection.get_conn()
+        try:
+            con.execute(
+                "INSERT INTO module_image_stats "
+                "(module_id, real_image_count, last_image_at) "
+                "SELECT module_id, COUNT(*), MAX(uploaded_at) FROM image_uploads "
+                "GROUP BY module_id ON CONFLICT DO NOTHING"
+            )
+        finally:
+            con.close()
+
+    def _old():
+        with connection.lock:
+            con = connection.get_conn()
+            try:
+                con.execute(_OLD_SCAN_SQL).fetchall()
+            finally:
+                con.close()
+
+    print(
+        summarize(
+            "before: fleet scan (write lock held)", time_calls(_old, args.iterations)
+        )
+    )
+    print(summarize("after: load() at boot", time_calls(watcher.load, 5)))
+    with quiet():
+        watcher.check_silence()  # settle the boot-time "everyone due" pass
+    print(
+        summarize(
+            "after: touch() per write",
+            time_calls(lambda: watcher.touch("ab0000000000"), 1000),
+        )
+    )
+    print(
+        summarize(
+            "after: idle tick", time_calls(watcher.check_silence, args.iterations)
+        )
+    )
+
+    # Alert latency on the real timer thread: these modules' deadlines
+    # all fall 1 s after their touch.
+    sent: list[float] = []
+    watcher.send_discord_message = lambda _msg, **_kw: sent.append(time.monotonic())
+    watcher.SILENCE_THRESHOLD_S = 1.0
+    touched = time.monotonic()
+    for m in range(args.alerting):
+        watcher.touch(f"ab{m:010x}")
+    while len(sent) < args.alerting and time.monotonic() - touched < 30:
+        time.sleep(0.01)
+    late_ms = [(t - touched - 1.0) * 1000 for t in sent]
+    print(
+        f"alert latency past the threshold: {len(sent)}/{args.alerting} alerts, "
+        f"p50={percentile(late_ms, 50):.1f}ms p99={percentile(late_ms, 99):.1f}ms "
+        "(old scan: up to 15 min)"
+    )
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Streamed vs. materialized ``GET /progress``: first byte, total, memory.
+
+Seeds ``--rows`` ``daily_progress`` rows (default 100,000 — the
+``limit`` cap, so both calls return the same rows), then compares:
+
+* **materialized** — ``/progress?limit=<rows>``, the ``jsonify`` path
+  that builds every row dict and the whole JSON string first;
+* **streamed** — ``/progress`` with no ``limit``, encoded and sent in
+  ``STREAM_BATCH_ROWS`` batches.
+
+For each: time to the first body chunk, time to the last, and peak
+Python heap (``tracemalloc``, measured on a separate untimed run since
+tracing slows everything down).
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_streaming.py [--rows 100000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import statistics
+import time
+import tracemalloc
+
+from _harness import boot_app, quiet
+
+MODULE = "5e0000000001"
+
+
+def _seed(connection, n: int) -> None:
+    con = connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_configs (id, name, lat, lng, first_online) "
+            "VALUES (?, 'stream', 48.0, 9.0, DATE '2024-01-01')",
+            [MODULE],
+        )
+        con.execute(
+            "INSERT INTO nest_data (nest_id, module_id, beeType) "
+            "SELECT printf('nest-%03d', i + 1), ?, 'resin' FROM range(16) t(i)",
+            [MODULE],
+        )
+        con.execute(
+            """
+            INSERT INTO daily_progress
+              (progress_id, nest_id, date, empty, sealed, hatched)
+            SELECT printf('prog-%03d', i + 1), printf('nest-%03d', i % 16 + 1),
+                   DATE '2000-01-01' + (i // 16)::INTEGER, 0, (i % 101)::INTEGER, 0
+              FROM range(?) t(i)
+            """,
+            [n],
+        )
+    finally:
+        con.close()
+
+
+def _fetch(client, url: str) -> tuple[float, float, int]:
+    """Return (ms to first chunk, ms to last chunk, body bytes)."""
+    start = time.perf_counter()
+    resp = client.get(url, buffered=False)
+    first = None
+    size = 0
+    for chunk in resp.response:
+        if first is None:
+            first = time.perf_counter()
+        size += len(chunk)
+    resp.close()
+    end = time.perf_counter()
+    return (first - start) * 1000.0, (end - start) * 1000.0, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    # Every iteration must read the table, not a cached body.
+    importlib.import_module("routes._cache").cache.max_bytes = 0
+    client = app_module.app.test_client()
+    _seed(connection, args.rows)
+
+    for label, url in (
+        ("materialized", f"/progress?limit={args.rows}"),
+        ("streamed", "/progress"),
+    ):
+        with quiet():
+            runs = [_fetch(client, url) for _ in range(args.iterations)]
+            tracemalloc.start()
+            _fetch(client, url)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(
+            f"{label:<13} first byte={statistics.median(r[0] for r in runs):8.1f}ms "
+            f"total={statistics.median(r[1] for r in runs):8.1f}ms "
+            f"body={runs[0][2] / 1e6:6.1f}MB peak heap={peak / 1e6:7.1f}MB"
+        )
+    app_module.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Weather backfill: per-module 30-day chunks vs. packed months + cache.
+
+Registers ``--modules`` modules spread over ``--gardens`` locations and
+points the worker at a local ``http.server`` stand-in for the Archive
+endpoint that answers each call after ``--latency-ms`` with hourly data
+for every location asked for. Then runs a ``--days`` backfill:
+
+* ``before`` — the pre-change loop, reproduced here: per module, one
+  ``requests.get`` per 30-day chunk and an insert per chunk;
+* ``after`` — ``run_weather_backfill``: per calendar month, one call for
+  up to ``WEATHER_LOCATIONS_PER_REQUEST`` grid cells on the worker pool,
+  completed months kept in the on-disk cache, one insert per month.
+
+Each is run cold and then again over the same window (everything
+already stored — the "operator clicked backfill twice" case), and the
+``after`` side once more after registering one module at a known garden.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_weather_backfill.py [--modules 20] [--days 45]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from _harness import boot_app, insert_measurement_rows, quiet
+
+
+class _Archive(BaseHTTPRequestHandler):
+    latency_s = 0.1
+    calls = 0
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        start = datetime.fromisoformat(query["start_date"][0])
+        end = datetime.fromisoformat(query["end_date"][0]) + timedelta(days=1)
+        hours = [
+            start + timedelta(hours=h) for h in range(int((end - start).days * 24))
+        ]
+        body = {
+            "hourly": {
+                "time": [h.isoformat(timespec="minutes") for h in hours],
+                "temperature_2m": [12.0] * len(hours),
+                "relative_humidity_2m": [60] * len(hours),
+                "precipitation": [0.0] * len(hours),
+            }
+        }
+        n = len(query["latitude"][0].split(","))
+        raw = json.dumps([body] * n if n > 1 else body).encode()
+        time.sleep(self.latency_s)
+        type(self).calls += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *_args):
+        pass
+
+
+def _seed(connection, modules: int, gardens: int, offset: int = 0) -> None:
+    con = connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_configs (id, name, lat, lng, first_online) "
+            "SELECT printf('wb%010x', i), printf('m-%d', i), "
+            "round(47.0 + (i % ?) * 0.05, 2), round(9.0 + (i % ?) * 0.05, 2), "
+            "DATE '2025-01-01' FROM range(?, ?) t(i)",
+            [gardens, gardens, offset, offset + modules],
+        )
+    finally:
+        con.close()
+
+
+def _old_backfill(worker, connection, days: int) -> None:
+    """The pre-change ``_run_weather_backfill_locked`` loop."""
+    end = (worker._now_utc() - timedelta(days=worker._ARCHIVE_LAG_DAYS)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    for mac, lat, lng, first_online in worker._read_modules_with_location():
+        start = worker._backfill_start_for_module(first_online, days)
+        con = connection.get_conn()
+        try:
+            existing = {
+                r[0]
+                for r in con.execute(
+                    "SELECT ts FROM measurements WHERE module_mac = ? "
+                    "AND metric = 'temperature_c' AND source = ?",
+                    [mac, worker._BACKFILL_SOURCE],
+                ).fetchall()
+            }
+        finally:
+            con.close()
+        cursor = start
+        while cursor < end:
+            chunk_end = min(cursor + timedelta(days=30), end)
+            rows = worker.fetch_open_meteo(
+                lat, lng, mode="archive", start=cursor, end=chunk_end
+            )
+            new_rows = [r for r in rows if r[0] not in existing]
+            insert_measurement_rows(mac, new_rows, worker._BACKFILL_SOURCE)
+            existing.update(r[0] for r in new_rows)
+            cursor = chunk_end
+
+
+def _run(label, run, connection):
+    before = _Archive.calls
+    started = time.perf_counter()
+    with quiet():
+        run()
+    elapsed = time.perf_counter() - started
+    con = connection.get_conn()
+    try:
+        rows = con.execute(
+            "SELECT COUNT(*) FROM measurements WHERE source = 'open-meteo-backfill'"
+        ).fetchone()[0]
+    finally:
+        con.close()
+    print(
+        f"{label:<34} {elapsed:7.2f}s  "
+        f"{_Archive.calls - before:5d} HTTP calls  {rows} rows stored"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=20)
+    parser.add_argument("--gardens", type=int, default=5)
+    parser.add_argument("--days", type=int, default=45)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    _Archive.latency_s = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Archive)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    worker = importlib.import_module("services.weather_worker")
+    worker._ARCHIVE_URL = f"http://127.0.0.1:{server.server_port}/v1/archive"
+    _seed(connection, args.modules, args.gardens)
+    print(
+        f"{args.modules} modules at {args.gardens} gardens, {args.days}-day "
+        f"backfill, {args.latency_ms:.0f}ms per call"
+    )
+
+    def old():
+        _old_backfill(worker, connection, args.days)
+
+    def new():
+        worker.run_weather_backfill(days=args.days)
+
+    _run("before: cold", old, connection)
+    _run("before: re-run", old, connection)
+    con = connection.get_conn()
+    try:
+        con.execute("DELETE FROM measurements")
+    finally:
+        con.close()
+    _run("after: cold (empty cache)", new, connection)
+    _run("after: re-run", new, connection)
+    _seed(connection, 1, args.gardens, offset=args.modules)
+    _run("after: +1 module at a known garden", new, connection)
+    app_module.scheduler.shutdown(wait=False)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""One live weather tick: per-module serial fetch vs. grid-deduped pool.
+
+Registers ``--modules`` modules spread over ``--gardens`` locations (the
+coarsened coordinates of modules at one garden are identical) and points
+the worker at a local ``http.server`` stand-in for the Forecast endpoint
+that answers each call after ``--latency-ms`` with ``past_days`` of
+hourly data. Then times a tick for modules that are one hour behind
+(the steady state):
+
+* ``before`` — the pre-change loop, reproduced here: per module a
+  ``MAX(ts)`` watermark query, a ``requests.get`` on a fresh connection
+  and its own insert transaction;
+* ``after`` — ``run_weather_fetch``: one grouped watermark query, one
+  location per grid cell, ``WEATHER_LOCATIONS_PER_REQUEST`` locations
+  per call on ``WEATHER_FETCH_WORKERS`` threads over a pooled session,
+  one bulk insert. ``--locations-per-request 1`` shows the pool alone.
+
+Usage (from ``duckdb-service/``)::
+
+    python benchmarks/bench_weather_fetch.py [--modules 200] [--gardens 40]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from _harness import boot_app, insert_measurement_rows, quiet
+
+
+class _Forecast(BaseHTTPRequestHandler):
+    latency_s = 0.1
+    calls = 0
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        past_days = int(query["past_days"][0])
+        now = datetime.now(timezone.utc).replace(
+            tzinfo=None, minute=0, second=0, microsecond=0
+        )
+        hours = [now - timedelta(hours=h) for h in range(past_days * 24, 0, -1)]
+        location = {
+            "hourly": {
+                "time": [h.isoformat(timespec="minutes") for h in hours],
+                "temperature_2m": [12.0] * len(hours),
+                "relative_humidity_2m": [60] * len(hours),
+                "precipitation": [0.0] * len(hours),
+            }
+        }
+        # Several comma-separated locations: a list, one body each.
+        n = len(query["latitude"][0].split(","))
+        body = json.dumps([location] * n if n > 1 else location).encode()
+        time.sleep(self.latency_s)
+        type(self).calls += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+def _seed(connection, modules: int, gardens: int, behind_hours: int) -> None:
+    con = connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_configs (id, name, lat, lng, first_online) "
+            "SELECT printf('wf%010x', i), printf('m-%d', i), "
+            "round(47.0 + (i % ?) * 0.05, 2), round(9.0 + (i % ?) * 0.05, 2), "
+            "DATE '2025-01-01' FROM range(?) t(i)",
+            [gardens, gardens, modules],
+        )
+        con.execute(
+            "INSERT INTO measurements (module_mac, ts, metric, value, source) "
+            "SELECT printf('wf%010x', i), "
+            "date_trunc('hour', now())::TIMESTAMP - to_hours(?), "
+            "'temperature_c', 10.0, 'open-meteo' FROM range(?) t(i)",
+            [behind_hours, modules],
+        )
+    finally:
+        con.close()
+
+
+def _old_tick(worker, url):
+    """The pre-change ``run_weather_fetch`` loop."""
+    modules = worker._read_modules_with_location()
+    now_hour = worker._floor_hour(worker._now_utc())
+    for mac, lat, lng, _ in modules:
+        with worker.lock.read():
+            con = worker.get_conn()
+            try:
+                latest = con.execute(
+                    "SELECT MAX(ts) FROM measurements "
+                    "WHERE module_mac = ? AND source IN (?, ?)",
+                    [mac, worker._LIVE_SOURCE, worker._BACKFILL_SOURCE],
+                ).fetchone()[0]
+            finally:
+                con.close()
+        start = worker._floor_hour(latest) + timedelta(hours=1)
+        if start >= now_hour:
+            continue
+        resp = requests.get(
+            url,
+            params={
+                "latitude": f"{lat:.4f}",
+                "longitude": f"{lng:.4f}",
+                "past_days": 2,
+                "forecast_days": 0,
+                "hourly": worker._HOURLY_PARAM,
+                "timezone": "UTC",
+            },
+            timeout=10,
+        )
+        rows = worker._parse_open_meteo(resp.json(), start, now_hour)
+        insert_measurement_rows(mac, rows, worker._LIVE_SOURCE)
+
+
+def _reset(connection, behind_hours: int) -> None:
+    # Back to "one hour behind" so both ticks fetch the same window.
+    con = connection.get_conn()
+    try:
+        con.execute(
+            "DELETE FROM measurements WHERE source = 'open-meteo' "
+            "AND ts > date_trunc('hour', now())::TIMESTAMP - to_hours(?)",
+            [behind_hours],
+        )
+    finally:
+        con.close()
+
+
+def _tick(label, run, connection):
+    before = _Forecast.calls
+    started = time.perf_counter()
+    with quiet():
+        run()
+    elapsed = time.perf_counter() - started
+    con = connection.get_conn()
+    try:
+        rows = con.execute(
+            "SELECT COUNT(*) FROM measurements WHERE source = 'open-meteo'"
+        ).fetchone()[0]
+    finally:
+        con.close()
+    print(
+        f"{label:<38} {elapsed * 1000:8.0f}ms  "
+        f"{_Forecast.calls - before:4d} HTTP calls  {rows} rows stored"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--gardens", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--behind-hours", type=int, default=2)
+    parser.add_argument("--locations-per-request", type=int, default=None)
+    args = parser.parse_args()
+
+    _Forecast.latency_s = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Forecast)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/forecast"
+
+    app_module = boot_app()
+    connection = importlib.import_module("db.connection")
+    worker = importlib.import_module("services.weather_worker")
+    worker._FORECAST_URL = url
+    if args.locations_per_request:
+        worker._LOCATIONS_PER_REQUEST = args.locations_per_request
+    # boot_app turns the scheduled worker off; the tick itself checks too.
+    os.environ["WEATHER_WORKER_ENABLED"] = "true"
+    _seed(connection, args.modules, args.gardens, args.behind_hours)
+    print(
+        f"{args.modules} modules at {args.gardens} gardens, "
+        f"{args.behind_hours - 1} h behind, {args.latency_ms:.0f}ms per call"
+    )
+
+    _tick("before: serial, per module", lambda: _old_tick(worker, url), connection)
+    _reset(connection, args.behind_hours)
+    _tick(
+        f"after: {worker._FETCH_WORKERS} workers, "
+        f"{worker._LOCATIONS_PER_REQUEST} cells/call",
+        worker.run_weather_fetch,
+        connection,
+    )
+    app_module.scheduler.shutdown(wait=False)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,298 @@
+import atexit
 import os
 import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
 import duckdb
 
+from db import table_versions
+from services import metrics
+
 DB_PATH = os.getenv("DUCKDB_PATH", "./data/app.duckdb")
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
-lock = threading.Lock()
+
+class DatabaseLock:
+    """Reader/writer discipline for the shared database handle.
+
+    Three modes, because DuckDB's MVCC already isolates readers from an
+    in-flight writer and only writer-vs-writer (conflicting UPDATEs,
+    ``TransactionException``) and a handful of "nobody may look right
+    now" operations actually need mutual exclusion:
+
+    * ``with lock.read():`` — shared. Any number of readers run at once,
+      each on its own cursor and MVCC snapshot, concurrently with a
+      writer. Only an ``exclusive()`` section (or one waiting to start)
+      holds them off.
+    * ``with lock:`` — a write. Writers are serialized against each
+      other exactly like the old global ``threading.Lock``, but no longer
+      wait for readers — a slow ``/detections/history`` scan can't stall
+      the fleet's heartbeats. ``acquire``/``release`` keep the old
+      ``Lock`` API for the write side.
+    * ``with lock.exclusive():`` — a write that also drains and holds
+      off every reader: schema migrations, the autocommit
+      compensating-restore dance in ``set_display_name`` (ADR-013) and
+      the module-delete cascade, whose intermediate states must never be
+      observed, and the backup's ``CHECKPOINT`` (which blocks on any open
+      DuckDB transaction *and* stalls new ones while it waits). A pending
+      exclusive section stops new readers from entering so a steady read
+      load can't starve it.
+
+    Not re-entrant: never take ``lock`` or ``exclusive()`` while already
+    holding either on the same thread. Taking ``read()`` inside a write
+    section is fine.
+
+    The three context-manager forms record wait and hold time per mode
+    (``db_lock_wait_seconds`` / ``db_lock_hold_seconds`` on ``/metrics``).
+    The bare ``acquire``/``release`` pair is left untimed — only the
+    backup's non-blocking "is a write in flight?" probe uses it.
+    """
+
+    def __init__(self) -> None:
+        self._writer = threading.Lock()
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._exclusive = False
+        # Only the writer-lock holder touches this, so no extra guard.
+        self._write_entered_at = 0.0
+
+    # ---- write side (the old ``threading.Lock`` surface) ----
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        return self._writer.acquire(blocking, timeout)
+
+    def release(self) -> None:
+        self._writer.release()
+
+    def locked(self) -> bool:
+        return self._writer.locked()
+
+    def __enter__(self):
+        start = time.perf_counter()
+        self._writer.acquire()
+        self._write_entered_at = entered = time.perf_counter()
+        metrics.LOCK_WAIT.observe(entered - start, "write")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        held = time.perf_counter() - self._write_entered_at
+        self._writer.release()
+        metrics.LOCK_HOLD.observe(held, "write")
+
+    # ---- shared side ----
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        start = time.perf_counter()
+        with self._cond:
+            while self._exclusive:
+                self._cond.wait()
+            self._readers += 1
+        entered = time.perf_counter()
+        metrics.LOCK_WAIT.observe(entered - start, "read")
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+            metrics.LOCK_HOLD.observe(time.perf_counter() - entered, "read")
+
+    # ---- exclusive side ----
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        # Writer lock first, then drain readers: writers only ever hold the
+        # writer lock and readers only the condition, so there is no
+        # lock-order cycle.
+        start = time.perf_counter()
+        with self._writer:
+            with self._cond:
+                self._exclusive = True
+                while self._readers:
+                    self._cond.wait()
+            entered = time.perf_counter()
+            metrics.LOCK_WAIT.observe(entered - start, "exclusive")
+            try:
+                yield
+            finally:
+                with self._cond:
+                    self._exclusive = False
+                    self._cond.notify_all()
+                metrics.LOCK_HOLD.observe(time.perf_counter() - entered, "exclusive")
+
+
+lock = DatabaseLock()
+
+# One process-wide DuckDB handle, opened lazily on first use and kept for
+# the life of the process. Every ``get_conn()`` call used to be a full
+# ``duckdb.connect(DB_PATH)`` — open the file, take DuckDB's file lock,
+# load the catalog, replay the WAL — followed by a ``close()`` that
+# auto-checkpointed on the way out. That round trip is ~15-20 ms on a
+# small file and dominated per-request latency for every route
+# (``benchmarks/bench_connection.py`` measures before/after). A cursor on
+# an open handle is a new DuckDB connection to the *same* in-memory
+# database instance: no file I/O, no catalog load, sub-millisecond.
+#
+# Side effect worth knowing: DuckDB's cross-process file lock is now held
+# for the whole lifetime of the serving process instead of only while a
+# request happens to be running. A second OS process (e.g. a
+# ``docker compose exec ... python -c "import duckdb; ..."``) can no
+# longer slot a connection into an idle gap — it fails fast with a lock
+# error, which is the safer failure for the manual-backup scenario
+# ADR-031 warns about.
+_database = None
+_database_guard = threading.Lock()
+
+
+def _shared_database():
+    global _database
+    db = _database
+    if db is None:
+        with _database_guard:
+            if _database is None:
+                _database = duckdb.connect(DB_PATH)
+                # A different database (first open, a reopen after
+                # ``close_database``, a restored file) — nothing cached
+                # from a previous handle may be served against it.
+                table_versions.bump_all()
+            db = _database
+    return db
 
 
 def get_conn():
-    return duckdb.connect(DB_PATH)
+    """Return a fresh cursor on the process-wide database handle.
+
+    Each call hands the calling thread its own cursor, so concurrent
+    request threads never share a DuckDB connection object (which is not
+    thread-safe). Callers keep the existing lifecycle — ``con.close()``
+    closes only the cursor, never the shared handle — and pick the
+    ``lock`` mode matching what they do with it (see ``DatabaseLock``).
+    Transactions are per cursor: a ``BEGIN`` on one cursor is invisible
+    to the others until it commits.
+
+    The cursor comes wrapped in an ``InstrumentedCursor`` that times each
+    statement for ``/metrics`` and reports committed writes to
+    ``db.table_versions``; it is otherwise a drop-in stand-in.
+    """
+    start = time.perf_counter()
+    cur = _shared_database().cursor()
+    metrics.CURSOR_OPEN.observe(time.perf_counter() - start)
+    return InstrumentedCursor(cur)
+
+
+class InstrumentedCursor:
+    """Thin proxy over a DuckDB cursor that times statements and counts rows.
+
+    ``execute``/``executemany`` return the proxy (DuckDB returns the cursor
+    itself), so ``con.execute(...).fetchall()`` chains keep working and the
+    fetch is attributed to the statement that produced it. Everything else
+    — ``description``, ``close``, ``fetchdf`` ... — is forwarded untouched.
+
+    It also follows the cursor's transaction state to tell
+    ``db.table_versions`` which tables changed: an autocommit write is
+    reported as soon as it succeeds, writes after ``BEGIN`` are held until
+    ``commit()`` (or a ``COMMIT`` statement) and dropped on rollback or on
+    ``close()`` of an uncommitted transaction, which DuckDB rolls back.
+    """
+
+    __slots__ = ("_cur", "_statement", "_in_txn", "_dirty")
+
+    def __init__(self, cur) -> None:
+        self._cur = cur
+        self._statement = "other"
+        self._in_txn = False
+        self._dirty: frozenset[str] = frozenset()
+
+    def _timed(self, method, sql, args, kwargs):
+        statement = metrics.fingerprint(sql) if isinstance(sql, str) else "other"
+        start = time.perf_counter()
+        try:
+            method(sql, *args, **kwargs)
+        finally:
+            metrics.QUERY.observe(time.perf_counter() - start, statement)
+        self._statement = statement
+        if isinstance(sql, str):
+            self._track(sql)
+        return self
+
+    def _track(self, sql: str) -> None:
+        control, tables = table_versions.classify(sql)
+        if control == "begin":
+            self._in_txn = True
+        elif control == "commit":
+            self._publish()
+        elif control == "rollback":
+            self._in_txn, self._dirty = False, frozenset()
+        elif tables:
+            if self._in_txn:
+                self._dirty |= tables
+            else:
+                table_versions.bump(tables)
+
+    def _publish(self) -> None:
+        dirty, self._in_txn, self._dirty = self._dirty, False, frozenset()
+        if dirty:
+            table_versions.bump(dirty)
+
+    def commit(self):
+        self._cur.commit()
+        self._publish()
+
+    def rollback(self):
+        self._in_txn, self._dirty = False, frozenset()
+        self._cur.rollback()
+
+    def execute(self, sql, *args, **kwargs):
+        return self._timed(self._cur.execute, sql, args, kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        return self._timed(self._cur.executemany, sql, args, kwargs)
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        metrics.QUERY_ROWS.observe(0 if row is None else 1, self._statement)
+        return row
+
+    def fetchall(self):
+        rows = self._cur.fetchall()
+        metrics.QUERY_ROWS.observe(len(rows), self._statement)
+        return rows
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cur.fetchmany(*args, **kwargs)
+        metrics.QUERY_ROWS.observe(len(rows), self._statement)
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._cur.close()
+
+
+def close_database() -> None:
+    """Close the shared handle (and with it every outstanding cursor).
+
+    Used by the test fixture between tests so per-test tmp files don't
+    each keep a DuckDB instance (and its worker threads) alive; the next
+    ``get_conn()`` reopens lazily. Closing the last connection to a file
+    checkpoints it, exactly like the old per-call ``close()`` did.
+    """
+    global _database
+    with _database_guard:
+        if _database is not None:
+            _database.close()
+            _database = None
+
+
+# Close (and so checkpoint) the shared handle on a clean interpreter exit
+# instead of leaving the DuckDB instance to be torn down during
+# interpreter finalization, with its worker threads still live. Registered at import, so it runs AFTER any later-
+# registered handler that still needs the database (``db.group_commit``'s
+# drain): atexit is LIFO. A bare SIGTERM skips atexit; a compose stop gets
+# here only through the handler app.py installs (services/shutdown.py).
+atexit.register(close_database)
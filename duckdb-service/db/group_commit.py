@@ -0,0 +1,258 @@
+"""Group-commit write-behind queue for high-frequency inserts.
+
+``post_heartbeat``, ``post_measurements``, ``record_detections`` and
+``record_image`` each used to open their own ``write_transaction()``, so
+the fleet's hourly heartbeat wave became one BEGIN/COMMIT (and one WAL
+fsync) per device, serialized on the write lock. Those handlers now hand
+their statements to ``submit()`` as a ``job(con)`` callable; a single
+committer thread gathers every job that arrives within
+``GROUP_COMMIT_WINDOW_MS`` (up to ``GROUP_COMMIT_MAX_BATCH`` jobs) and
+runs the whole batch in ONE ``write_transaction()``. A thousand
+concurrent heartbeats become a handful of commits.
+
+Latency/durability knob — ``GROUP_COMMIT_ACK``:
+
+* ``commit`` (default): ``submit`` blocks until the batch holding the job
+  has committed and returns the job's result (or re-raises its
+  exception). A 200 still means "on disk", and a read issued after the
+  response sees the write (read-after-write). Costs up to one window of
+  extra latency per request.
+* ``enqueue``: ``submit`` returns as soon as the job is queued. Lowest
+  latency, but a crash (or SIGKILL) loses up to one window of
+  already-acknowledged writes, and an immediate read may not see them
+  yet. A compose stop doesn't: app.py turns SIGTERM into a normal exit
+  (``services/shutdown.py``), and the atexit drain below commits the
+  window first. A caller that
+  needs read-after-write regardless passes ``wait=True``.
+
+``GROUP_COMMIT_WINDOW_MS=0`` disables the queue entirely: ``submit`` runs
+the job in its own ``write_transaction()`` on the calling thread — the
+pre-queue behaviour.
+
+Failure isolation: if any job in a batch raises, the batch transaction is
+rolled back and every job in it is retried alone in its own transaction,
+so one bad write fails only its own caller. Jobs must therefore be pure
+DB work (safe to re-run after a rollback) and must never call ``submit``
+themselves — the committer would wait on itself.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from db.repository import write_transaction
+from services import metrics
+
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "5"))
+GROUP_COMMIT_ACK = os.getenv("GROUP_COMMIT_ACK", "commit").strip().lower()
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "500"))
+# Bounded so a wedged disk turns into request back-pressure (``put``
+# blocks) instead of unbounded memory growth.
+_MAX_PENDING = 10_000
+
+Job = Callable[[Any], Any]
+
+
+class _Pending:
+    __slots__ = ("job", "done", "result", "error")
+
+    def __init__(self, job: Job) -> None:
+        self.job = job
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+_queue: queue.Queue[_Pending] = queue.Queue(maxsize=_MAX_PENDING)
+_committer: threading.Thread | None = None
+_committer_guard = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"batches": 0, "jobs": 0, "retried_batches": 0, "failed_jobs": 0}
+
+
+def submit(job: Job, *, wait: bool | None = None) -> Any:
+    """Run ``job(con)`` inside a group-committed write transaction.
+
+    ``wait=None`` follows ``GROUP_COMMIT_ACK``; ``True`` always blocks for
+    the commit and returns the job's result; ``False`` returns ``None``
+    as soon as the job is queued.
+    """
+    if GROUP_COMMIT_WINDOW_MS <= 0:
+        with write_transaction() as con:
+            return job(con)
+
+    if wait is None:
+        wait = GROUP_COMMIT_ACK != "enqueue"
+    pending = _Pending(job)
+    _ensure_committer()
+    _queue.put(pending)
+    if not wait:
+        return None
+    pending.done.wait()
+    if pending.error is not None:
+        raise pending.error
+    return pending.result
+
+
+def submit_many(jobs: list[Job]) -> list[tuple[Any, BaseException | None]]:
+    """Run each job like ``submit(job, wait=True)`` and return one
+    ``(result, error)`` per job, in order, instead of raising.
+
+    The jobs are queued back to back, so they normally share a commit;
+    one that raises is isolated by the retry-alone rule above and fails
+    only its own slot.
+    """
+    if GROUP_COMMIT_WINDOW_MS <= 0:
+        out: list[tuple[Any, BaseException | None]] = []
+        for job in jobs:
+            try:
+                with write_transaction() as con:
+                    out.append((job(con), None))
+            except Exception as e:
+                out.append((None, e))
+        return out
+
+    pendings = [_Pending(job) for job in jobs]
+    _ensure_committer()
+    for pending in pendings:
+        _queue.put(pending)
+    for pending in pendings:
+        pending.done.wait()
+    return [(p.result, p.error) for p in pendings]
+
+
+def flush(timeout: float | None = None) -> bool:
+    """Block until every job queued before this call has committed.
+
+    The queue is FIFO, so committing a no-op marker proves everything
+    ahead of it is done. Returns False on timeout.
+    """
+    if GROUP_COMMIT_WINDOW_MS <= 0 or _committer is None:
+        return True
+    # ``unfinished_tasks`` counts queued AND in-flight jobs (each is
+    # ``task_done()``-ed only once its batch has settled).
+    if _queue.unfinished_tasks == 0:
+        return True
+    marker = _Pending(lambda _con: None)
+    _ensure_committer()
+    _queue.put(marker)
+    return marker.done.wait(timeout)
+
+
+def stats() -> dict[str, int]:
+    """Counters since process start: batches committed, jobs run, etc."""
+    with _stats_lock:
+        out = dict(_stats)
+    out["pending"] = _queue.qsize()
+    return out
+
+
+def _bump(**deltas: int) -> None:
+    with _stats_lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+
+
+def _ensure_committer() -> None:
+    global _committer
+    if _committer is not None and _committer.is_alive():
+        return
+    with _committer_guard:
+        if _committer is None or not _committer.is_alive():
+            _committer = threading.Thread(target=_run, name="group-commit", daemon=True)
+            _committer.start()
+
+
+def _collect() -> list[_Pending]:
+    batch = [_queue.get()]
+    deadline = time.monotonic() + GROUP_COMMIT_WINDOW_MS / 1000.0
+    while len(batch) < GROUP_COMMIT_MAX_BATCH:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run() -> None:
+    while True:
+        batch = _collect()
+        try:
+            _commit(batch)
+        except BaseException as e:  # never let the committer thread die
+            for pending in batch:
+                if not pending.done.is_set():
+                    pending.error = e
+                    pending.done.set()
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def _commit(batch: list[_Pending]) -> None:
+    results: list[Any] = []
+    try:
+        with write_transaction() as con:
+            for pending in batch:
+                results.append(pending.job(con))
+    except Exception:
+        # Something in the batch failed and the whole transaction rolled
+        # back. Re-run each job alone so only the offending one fails.
+        _bump(retried_batches=1)
+        for pending in batch:
+            _commit_alone(pending)
+        _bump(batches=len(batch), jobs=len(batch))
+        return
+
+    for pending, result in zip(batch, results, strict=True):
+        pending.result = result
+        pending.done.set()
+    _bump(batches=1, jobs=len(batch))
+    metrics.GROUP_COMMIT_BATCH.observe(len(batch))
+
+
+def _commit_alone(pending: _Pending) -> None:
+    try:
+        with write_transaction() as con:
+            pending.result = pending.job(con)
+    except Exception as e:
+        pending.error = e
+        _bump(failed_jobs=1)
+        # Nobody may be waiting (ack=enqueue) — make the loss visible.
+        print(f"[group_commit] write failed: {type(e).__name__}: {e}")
+    finally:
+        pending.done.set()
+
+
+def _collect_metrics():
+    snapshot = stats()
+    yield from metrics.counter_lines(
+        "db_group_commit_pending_jobs",
+        "Jobs queued for the group-commit committer.",
+        snapshot["pending"],
+        kind="gauge",
+    )
+    for key in ("batches", "jobs", "retried_batches", "failed_jobs"):
+        yield from metrics.counter_lines(
+            f"db_group_commit_{key}_total",
+            f"Group-commit {key.replace('_', ' ')} since process start.",
+            snapshot[key],
+        )
+
+
+metrics.register_collector(_collect_metrics)
+
+# Drain on interpreter shutdown so an ``enqueue``-acked write still in the
+# window isn't silently dropped on a clean stop. atexit doesn't run on a
+# bare SIGTERM; a compose stop reaches this only through the handler
+# app.py installs (services/shutdown.py).
+atexit.register(flush, 5.0)
@@ -3,6 +3,12 @@
 Centralises the ``with lock: con = get_conn(); ...; con.close()`` lifecycle
 that every route used to repeat, plus the dict-zipping of cursor results.
 
+Reads (``query_*``) take ``lock.read()`` and run concurrently with each
+other and with a writer, each on its own cursor and MVCC snapshot;
+``write_transaction`` takes the write side, so writers stay serialized.
+See ``db.connection.DatabaseLock`` for the exclusive mode the few
+"nobody may look" sites use.
+
 The helpers resolve ``lock`` and ``get_conn`` via the ``db.connection`` module
 at *call time* (rather than capturing them at import time). This keeps the
 test fixture's ``importlib.reload(db.connection)`` swap working without
@@ -28,10 +34,33 @@ def _rows_as_dicts(cur) -> list[dict]:
     return [dict(zip(cols, row)) for row in cur.fetchall()]
 
 
+def fetch_columns(cur) -> dict[str, list]:
+    """Drain a cursor into ``{column: [values, ...]}``, one list per column.
+
+    The columnar counterpart of ``_rows_as_dicts`` for large reads: the
+    transpose is a single C-level ``zip(*rows)`` over the tuples DuckDB
+    already built, with no per-row dict, and the JSON encoder then walks
+    a handful of flat lists instead of N objects repeating every key.
+    Values are the same Python objects the row path returns, so a
+    column serializes exactly like the matching row field.
+
+    (No Arrow/NumPy: neither is a dependency, and ``fetchnumpy`` would
+    hand DATE columns back as ``datetime64`` rather than ``date``.)
+    """
+    cols = [d[0] for d in cur.description]
+    rows = cur.fetchall()
+    if not rows:
+        return {col: [] for col in cols}
+    return {
+        col: list(values)
+        for col, values in zip(cols, zip(*rows, strict=True), strict=True)
+    }
+
+
 def query_all(sql: str, params: tuple = ()) -> list[dict]:
     """Run a SELECT and return rows as dicts (col -> value)."""
     c = _conn_module()
-    with c.lock:
+    with c.lock.read():
         con = c.get_conn()
         try:
             cur = con.execute(sql, params)
@@ -40,10 +69,91 @@ def query_all(sql: str, params: tuple = ()) -> list[dict]:
             con.close()
 
 
+def query_columns(sql: str, params: tuple = ()) -> dict[str, list]:
+    """Run a SELECT and return ``{column: [values, ...]}`` (see
+    ``fetch_columns``). Same locking as ``query_all``."""
+    c = _conn_module()
+    with c.lock.read():
+        con = c.get_conn()
+        try:
+            return fetch_columns(con.execute(sql, params))
+        finally:
+            con.close()
+
+
+# Rows per batch `iter_batches` yields: bounds a streamed response's JSON
+# text to one batch at a time.
+STREAM_BATCH_ROWS = 1000
+# Rows per keyset page `iter_batches` reads under one short read lock:
+# bounds the Python-side tuples held to one page.
+STREAM_PAGE_ROWS = 10_000
+
+
+def iter_batches(
+    select: str,
+    params: tuple = (),
+    *,
+    key: tuple[str, ...],
+    descending: bool = False,
+    batch_size: int = STREAM_BATCH_ROWS,
+    page_size: int = STREAM_PAGE_ROWS,
+) -> Iterator[list[tuple]]:
+    """Yield a SELECT's rows, ordered by ``key``, as lists of at most
+    ``batch_size`` tuples.
+
+    For responses streamed to the client (routes/_format.py's
+    ``stream_json_rows``). ``select`` has no ORDER BY and must return the
+    ``key`` columns, which together must be unique (add the primary key as
+    a tiebreaker). Rows are read in keyset pages of ``page_size``: each
+    page is one query under its own short read lock, resuming strictly
+    after the last key handed out, and is fetched whole before anything
+    is yielded. So no lock or open DuckDB result is held across client
+    I/O. Both matter: an open result pins its snapshot, which stalls a
+    CHECKPOINT, and a waiting ``lock.exclusive()`` (backups,
+    ``delete_module``, ``set_display_name``) holds off every new reader,
+    so a slow download would stall all reads. The cost is that pages see
+    separate snapshots: a row written mid-stream shows up if it sorts
+    after the cursor.
+
+    Nothing runs until the first ``next()``.
+    """
+    c = _conn_module()
+    order = ", ".join(f"{k} {'DESC' if descending else 'ASC'}" for k in key)
+    resume = (
+        f"WHERE ({', '.join(key)}) {'<' if descending else '>'} "
+        f"({', '.join('?' * len(key))})"
+    )
+    after: list | None = None
+    key_at: list[int] = []
+    while True:
+        sql = f"SELECT * FROM ({select}) AS _page"
+        page_params = list(params)
+        if after is not None:
+            sql += f" {resume}"
+            page_params += after
+        sql += f" ORDER BY {order} LIMIT ?"
+        page_params.append(page_size)
+        with c.lock.read():
+            con = c.get_conn()
+            try:
+                cur = con.execute(sql, page_params)
+                if not key_at:
+                    names = [d[0] for d in cur.description]
+                    key_at = [names.index(k) for k in key]
+                page = cur.fetchall()
+            finally:
+                con.close()
+        for start in range(0, len(page), batch_size):
+            yield page[start : start + batch_size]
+        if len(page) < page_size:
+            return
+        after = [page[-1][i] for i in key_at]
+
+
 def query_one(sql: str, params: tuple = ()) -> dict | None:
     """Run a SELECT expected to return 0-1 rows; None if empty."""
     c = _conn_module()
-    with c.lock:
+    with c.lock.read():
         con = c.get_conn()
         try:
             cur = con.execute(sql, params)
@@ -57,7 +167,7 @@ def query_one(sql: str, params: tuple = ()) -> dict | None:
 def query_scalar(sql: str, params: tuple = ()) -> Any:
     """Run a SELECT expected to return one cell. None if no row."""
     c = _conn_module()
-    with c.lock:
+    with c.lock.read():
         con = c.get_conn()
         try:
             row = con.execute(sql, params).fetchone()
@@ -68,8 +178,11 @@ def query_scalar(sql: str, params: tuple = ()) -> Any:
 
 @contextmanager
 def write_transaction() -> Iterator[Any]:
-    """Acquire lock, open conn, BEGIN explicit transaction, yield it,
-    commit on success / rollback on exception, close.
+    """Acquire the write lock, open conn, BEGIN explicit transaction,
+    yield it, commit on success / rollback on exception, close.
+
+    Only other writers wait on the lock; concurrent ``query_*`` readers
+    keep running against their pre-commit snapshot.
 
     Yields the live DuckDB connection so callers can run multiple
     statements in the same transaction (e.g. ``add_progress_for_module``
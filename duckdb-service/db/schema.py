@@ -2,7 +2,7 @@ import math
 import os
 from datetime import datetime, timedelta, timezone
 
-from db.connection import lock, get_conn
+from db.connection import DB_PATH, lock, get_conn
 from models.geo import PUBLIC_COORD_DECIMALS
 
 
@@ -86,6 +86,16 @@ _DAILY_PROGRESS_DDL = """
 
 _DAILY_PROGRESS_COLUMNS = "progress_id, nest_id, date, empty, sealed, hatched"
 
+# Sequences behind the `nest-NNN` / `prog-NNN` string ids. `nest_data`
+# ids used to be allocated with `MAX(CAST(SUBSTR(nest_id, 6) AS INTEGER))`
+# per missing nest — a full scan plus string parsing that grew with the
+# table. (sequence, table, id column, id prefix)
+_ID_SEQUENCES = (
+    ("nest_id_seq", "nest_data", "nest_id", "nest-"),
+    ("progress_id_seq", "daily_progress", "progress_id", "prog-"),
+)
+
+
 # Per-module time-series store (issue #110). Append-only event table; the
 # (module_mac, ts, metric, source) combination is a natural soft key but
 # we deliberately do NOT enforce uniqueness — a transient duplicate is
@@ -107,15 +117,175 @@ _MEASUREMENTS_DDL = """
         ts         TIMESTAMP   NOT NULL,
         metric     VARCHAR(40) NOT NULL,
         value      DOUBLE      NOT NULL,
-        source     VARCHAR(40) NOT NULL
+        source     VARCHAR(40) NOT NULL,
+        ingested_at TIMESTAMP  DEFAULT CURRENT_TIMESTAMP
     )
 """
 
 _MEASUREMENTS_COLUMNS = "module_mac, ts, metric, value, source"
 
+# Hourly / daily rollups of `measurements` (one DDL, two tables), kept
+# current by `services/measurement_rollup.py` and read by
+# `GET /modules/<id>/measurements` so a chart costs O(buckets), not
+# O(samples). Sum + count rather than an average so a late batch can be
+# merged into an existing bucket without the raw rows it was built from
+# (which retention may already have dropped); `value_min`/`value_max`
+# merge with LEAST/GREATEST the same way. Per `source` like the raw
+# table — the read sums across sources, exactly as AVG over the raw rows
+# did.
+_MEASUREMENT_ROLLUP_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        module_mac   VARCHAR(20) NOT NULL,
+        metric       VARCHAR(40) NOT NULL,
+        source       VARCHAR(40) NOT NULL,
+        bucket       TIMESTAMP   NOT NULL,
+        sample_count BIGINT      NOT NULL,
+        value_sum    DOUBLE      NOT NULL,
+        value_min    DOUBLE      NOT NULL,
+        value_max    DOUBLE      NOT NULL,
+        PRIMARY KEY (module_mac, metric, bucket, source)
+    )
+"""
+
+
+# Live tables with a Parquet cold tier (`services/cold_archive.py`), each
+# mapped to the view that unions it with its archived months. Readers that
+# must see full history (`/heartbeats/<id>`, the `heartbeat_gaps` backfill)
+# read the view; writers and the hot paths keep using the table.
+ARCHIVED_TABLES = {
+    "module_heartbeats": "module_heartbeats_all",
+    "measurements": "measurements_all",
+}
+
+
+def archive_dir() -> str:
+    # Next to the DB by default, like `services/backup.py`'s BACKUP_DIR.
+    return os.getenv("COLD_ARCHIVE_DIR") or os.path.join(
+        os.path.dirname(DB_PATH) or ".", "archive"
+    )
+
+
+def refresh_archive_views(con) -> None:
+    """(Re)create every ``ARCHIVED_TABLES`` view over the live table plus
+    the Parquet files ``cold_archive_manifest`` lists for it.
+
+    The manifest, not a directory glob, decides what a view reads: a file
+    whose archive run never committed (crash between ``COPY`` and
+    ``COMMIT``) is never listed, so its rows are not counted twice, and a
+    restored DB backup sees exactly the files it had archived. DuckDB
+    binds a view's column list at creation, so this runs again at the end
+    of ``init_db`` — after any column migration on the live table. A
+    listed file that has gone missing is skipped with a warning rather
+    than failing every read of the view.
+    """
+    root = archive_dir()
+    # Even with the archive off: the off-host sync unit rsyncs this path,
+    # and a missing source would abort it.
+    os.makedirs(root, exist_ok=True)
+    for table, view in ARCHIVED_TABLES.items():
+        files = [
+            os.path.join(root, rel)
+            for (rel,) in con.execute(
+                "SELECT path FROM cold_archive_manifest WHERE table_name = ? "
+                "ORDER BY path",
+                [table],
+            ).fetchall()
+        ]
+        present = [f for f in files if os.path.exists(f)]
+        if len(present) < len(files):
+            print(
+                f"WARNING: {len(files) - len(present)} archived {table} file(s) "
+                f"missing under {root} — {view} reads without them"
+            )
+        sql = f"SELECT * FROM {table}"
+        if present:
+            listing = ", ".join("'" + f.replace("'", "''") + "'" for f in present)
+            # BY NAME: files written before a column migration lack the
+            # new column and read it as NULL.
+            sql += (
+                " UNION ALL BY NAME SELECT * FROM "
+                f"read_parquet([{listing}], union_by_name = true)"
+            )
+        con.execute(f"CREATE OR REPLACE VIEW {view} AS {sql}")
+
+
+# Heartbeat-gap threshold (issue #172, option 3). The steady-state heartbeat
+# fires hourly, so a healthy module's consecutive `received_at` rows sit ~1 h
+# apart. A gap wider than this means heartbeats stopped reaching the server —
+# the device was power-/WiFi-down, hung before the send, or the call timed out
+# (none of which the firmware can self-report, since a failed heartbeat never
+# round-trips). 90 min = one missed hourly ping plus margin, and stays well
+# under the 2 h liveness watchdog so a reboot loop's silent window surfaces as a
+# gap rather than being masked by the recovery reboot. Applied by
+# `post_heartbeat` as each heartbeat lands and by `backfill_heartbeat_gaps`.
+HEARTBEAT_GAP_THRESHOLD_S = 90 * 60
+
+
+def backfill_heartbeat_gaps(con) -> int:
+    """Insert every gap in the heartbeat history that `heartbeat_gaps` is
+    missing; returns how many were added.
+
+    The full-history `LAG` window the gap read used to run per request,
+    once over every module (ADR-034). Reads `module_heartbeats_all`, so
+    months already in the Parquet archive count. Idempotent: a gap that is
+    already recorded is left alone.
+    """
+    return con.execute(
+        """
+        INSERT INTO heartbeat_gaps (module_id, gap_start, gap_end, gap_seconds)
+        SELECT module_id, prev_at, received_at,
+               EPOCH(received_at) - EPOCH(prev_at)
+          FROM (
+                SELECT module_id, received_at,
+                       LAG(received_at) OVER (
+                           PARTITION BY module_id ORDER BY received_at
+                       ) AS prev_at
+                  FROM module_heartbeats_all
+               )
+         WHERE prev_at IS NOT NULL
+           AND EPOCH(received_at) - EPOCH(prev_at) > ?
+        ON CONFLICT DO NOTHING
+        """,
+        [HEARTBEAT_GAP_THRESHOLD_S],
+    ).fetchone()[0]
+
+
+def _sync_id_sequence(con, seq, table, column, prefix):
+    """Create `seq` (or move it forward) so it hands out ids past every
+    `<prefix><n>` already in `table`.
+
+    Runs on every boot, after seeding: rows can arrive without going
+    through the sequence (seed data, a restored backup, a manual fix), and
+    a stale sequence would hand out a primary key that already exists.
+
+    `duckdb_sequences().last_value` means "last handed out" within a
+    session but "next to hand out" after a reopen, so the next id is at
+    least `last_value` either way — comparing against that is safe, and at
+    worst re-creates a sequence that was one short of needing it.
+    """
+    max_n = (
+        con.execute(
+            f"SELECT MAX(TRY_CAST(SUBSTR({column}, {len(prefix) + 1}) AS BIGINT)) "
+            f"FROM {table} WHERE {column} LIKE '{prefix}%'"
+        ).fetchone()[0]
+        or 0
+    )
+    row = con.execute(
+        "SELECT start_value, last_value FROM duckdb_sequences() "
+        "WHERE sequence_name = ?",
+        (seq,),
+    ).fetchone()
+    if row is not None:
+        start_value, last_value = row
+        if max(start_value, last_value or 0) > max_n:
+            return
+        con.execute(f"DROP SEQUENCE {seq}")
+    # START must be a literal; `max_n` is an int from the query above.
+    con.execute(f"CREATE SEQUENCE {seq} START {max_n + 1}")
+
 
 def init_db():
-    with lock:
+    with lock.exclusive():
         con = get_conn()
 
         # FK-chained tables share their DDL with the issue-#69 migration
@@ -140,6 +310,25 @@ def init_db():
             CREATE INDEX IF NOT EXISTS idx_progress_date ON daily_progress(date);
             CREATE INDEX IF NOT EXISTS idx_image_module ON image_uploads(module_id);
 
+            -- Per-module upload aggregates for `GET /modules`, which used to
+            -- LEFT JOIN + GROUP BY the whole upload history on every fleet
+            -- assembly. Maintained by `record_image` (+1), `delete_image_upload`
+            -- (-n, MAX recomputed for that module) and the module-delete
+            -- cascade; backfilled at the end of `init_db`; rebuilt from
+            -- scratch by `python -m services.image_stats`.
+            --
+            -- `first_upload_at` is the first-upload marker `record_image`
+            -- checks and sets (O(1) per upload) so image-service no longer
+            -- counts the module's whole `daily_progress` history on every
+            -- upload just to compare it with zero. Never cleared by image
+            -- deletes, only by the module-delete cascade.
+            CREATE TABLE IF NOT EXISTS module_image_stats (
+                module_id VARCHAR(20) PRIMARY KEY,
+                real_image_count BIGINT NOT NULL DEFAULT 0,
+                last_image_at TIMESTAMP,
+                first_upload_at TIMESTAMP
+            );
+
             CREATE SEQUENCE IF NOT EXISTS module_heartbeats_seq START 1;
             CREATE TABLE IF NOT EXISTS module_heartbeats (
                 id INTEGER PRIMARY KEY DEFAULT nextval('module_heartbeats_seq'),
@@ -160,6 +349,28 @@ def init_db():
             CREATE INDEX IF NOT EXISTS idx_heartbeat_module ON module_heartbeats(module_id);
             CREATE INDEX IF NOT EXISTS idx_heartbeat_received ON module_heartbeats(received_at);
 
+            -- One row per module: the latest heartbeat, folded field-by-field
+            -- exactly like the old `ARG_MAX(..., received_at)` summary scan
+            -- (NULLs never overwrite). Upserted by `post_heartbeat` in the
+            -- same transaction as the history row; `/heartbeats_summary`
+            -- reads only this table. Backfilled from history at the end of
+            -- `init_db`.
+            CREATE TABLE IF NOT EXISTS module_latest_heartbeat (
+                module_id VARCHAR(20) PRIMARY KEY,
+                received_at TIMESTAMP NOT NULL,
+                battery INTEGER,
+                rssi INTEGER,
+                uptime_ms BIGINT,
+                free_heap INTEGER,
+                fw_version VARCHAR(40),
+                reset_reason VARCHAR(16),
+                min_free_heap INTEGER,
+                boot_count BIGINT,
+                last_hb_fail_code INTEGER,
+                last_hb_fail_count INTEGER,
+                last_stage_before_reboot VARCHAR(64)
+            );
+
             -- Per-nest hole detections + snips (#165). One row per detected
             -- hole per upload; full history is retained (no upsert) so the
             -- phase-3 time-lapse (#166) can scrub a nest across days. `bbox_*`
@@ -194,10 +405,8 @@ def init_db():
         # edit can't drift between the fresh-DB and migrated-DB paths.
         # Indices: the (module_mac, metric, ts) composite covers the
         # read endpoint's WHERE/GROUP-BY; `idx_measurements_ts` covers
-        # the retention scan documented in
-        # `docs/08-crosscutting-concepts/measurement-retention.md` (no
-        # retention job is implemented yet — the index is cheap and
-        # avoids a follow-up DDL once one lands).
+        # the retention scan in `services/measurement_rollup.py` (see
+        # `docs/08-crosscutting-concepts/measurement-retention.md`).
         con.execute(
             _MEASUREMENTS_DDL.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1)
         )
@@ -208,6 +417,98 @@ def init_db():
             CREATE INDEX IF NOT EXISTS idx_measurements_ts ON measurements(ts);
             """
         )
+        # `ingested_at` is the rollup's watermark column: `ts` is the
+        # producer's clock and arrives out of order (weather backfills
+        # write last year's hours today), arrival order does not. Gated
+        # like the column migrations below; DuckDB fills the existing
+        # rows with the ALTER's NOW(), so the first rollup run after the
+        # upgrade picks up the whole history.
+        measurement_cols = {
+            c[1] for c in con.execute("PRAGMA table_info(measurements)").fetchall()
+        }
+        if "ingested_at" not in measurement_cols:
+            con.execute(
+                "ALTER TABLE measurements ADD COLUMN ingested_at TIMESTAMP "
+                "DEFAULT CURRENT_TIMESTAMP"
+            )
+        for rollup_table in ("measurements_hourly", "measurements_daily"):
+            con.execute(_MEASUREMENT_ROLLUP_DDL.format(table=rollup_table))
+        # Single row: every `measurements` row with `ingested_at` at or
+        # below `watermark` is folded into both rollups.
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS measurements_rollup_state (
+                id        INTEGER PRIMARY KEY,
+                watermark TIMESTAMP NOT NULL
+            );
+            INSERT INTO measurements_rollup_state (id, watermark)
+                VALUES (1, TIMESTAMP '1970-01-01') ON CONFLICT DO NOTHING;
+            """
+        )
+        # One row per Parquet file in the cold tier (`services/
+        # cold_archive.py`); `path` is relative to `archive_dir()` so the
+        # data directory can move. Views over it are (re)built at the end
+        # of this function.
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cold_archive_manifest (
+                path        VARCHAR PRIMARY KEY,
+                table_name  VARCHAR   NOT NULL,
+                month       VARCHAR(7) NOT NULL,
+                row_count   BIGINT    NOT NULL,
+                min_ts      TIMESTAMP,
+                max_ts      TIMESTAMP,
+                archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        # One row per silent window between two consecutive heartbeats of a
+        # module (ADR-034). Appended by `post_heartbeat` in the heartbeat's
+        # own transaction; filled from existing history once, at the end of
+        # this function. Keyed on the heartbeat that closed the gap, so a
+        # retried write or a second backfill is a no-op.
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS heartbeat_gaps (
+                module_id   VARCHAR(20) NOT NULL,
+                gap_start   TIMESTAMP   NOT NULL,
+                gap_end     TIMESTAMP   NOT NULL,
+                gap_seconds BIGINT      NOT NULL,
+                PRIMARY KEY (module_id, gap_end)
+            )
+            """
+        )
+        # Idempotency keys of applied `POST /ingest_upload(s)` calls
+        # (routes/ingest.py). image-service's outbox replays an upload
+        # until it sees the answer, so an upload whose answer was lost
+        # arrives again under the same key; the stored answer is returned
+        # and nothing is written twice. Pruned after
+        # `INGEST_KEY_RETENTION_DAYS`; deliberately NOT cleared by the
+        # module-delete cascade, so a late replay for a deleted module
+        # stays a no-op instead of bringing its rows back.
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingest_keys (
+                ingest_key   VARCHAR PRIMARY KEY,
+                module_id    VARCHAR(20) NOT NULL,
+                first_upload BOOLEAN   NOT NULL,
+                inserted     INTEGER   NOT NULL,
+                heartbeat    BOOLEAN   NOT NULL,
+                ingested_at  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        # One-time data migrations that have run on this DB, by name — for
+        # the ones with no row of their own to test for (an empty
+        # `heartbeat_gaps` may just mean a fleet without gaps).
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name       VARCHAR PRIMARY KEY,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
 
         # Additive column migrations for older DBs (gated on
         # `PRAGMA table_info` rather than try/except so a healthy fresh
@@ -613,7 +914,7 @@ def init_db():
                     )
 
             # Seed a heartbeat history with a deliberate gap on one canonical
-            # module (issue #172 option 3) so the derived `/heartbeats/<id>/gaps`
+            # module (issue #172 option 3) so the `/heartbeats/<id>/gaps`
             # read and its dashboard card have demo data — and so the Playwright
             # spec can assert the gap renders end-to-end. The `/heartbeat`
             # ingestion API stamps `received_at = now()`, so a >90 min gap can
@@ -648,6 +949,19 @@ def init_db():
                         "loop:livenessReboot",
                     ],
                 )
+                # Written alongside, as `post_heartbeat` would have when the
+                # second heartbeat arrived.
+                con.execute(
+                    "INSERT INTO heartbeat_gaps "
+                    "(module_id, gap_start, gap_end, gap_seconds) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT DO NOTHING",
+                    [
+                        "000000000005",
+                        now - timedelta(hours=4, minutes=5),
+                        now - timedelta(minutes=5),
+                        4 * 3600,
+                    ],
+                )
                 print("✅ Seeded heartbeat gap for module 000000000005")
 
             # Seed a per-nest detection history for the #166 time-lapse: five
@@ -706,4 +1020,72 @@ def init_db():
                     "module 000000000002 (#166 time-lapse demo)"
                 )
 
+        # Backfill `module_latest_heartbeat` for every module that has
+        # heartbeat history but no latest row: all of them on the first boot
+        # after the table was introduced, only the demo module on a boot that
+        # just seeded its backdated heartbeats above (hence after seeding).
+        # A steady-state boot finds nothing missing and inserts nothing. This
+        # is the one remaining full-history ARG_MAX fold, and it runs once.
+        missing = con.execute(
+            """
+            INSERT INTO module_latest_heartbeat
+              (module_id, received_at, battery, rssi, uptime_ms, free_heap,
+               fw_version, reset_reason, min_free_heap, boot_count,
+               last_hb_fail_code, last_hb_fail_count, last_stage_before_reboot)
+            SELECT module_id,
+                   MAX(received_at),
+                   ARG_MAX(battery, received_at),
+                   ARG_MAX(rssi, received_at),
+                   ARG_MAX(uptime_ms, received_at),
+                   ARG_MAX(free_heap, received_at),
+                   ARG_MAX(fw_version, received_at),
+                   ARG_MAX(reset_reason, received_at),
+                   ARG_MAX(min_free_heap, received_at),
+                   ARG_MAX(boot_count, received_at),
+                   ARG_MAX(last_hb_fail_code, received_at),
+                   ARG_MAX(last_hb_fail_count, received_at),
+                   ARG_MAX(last_stage_before_reboot, received_at)
+              FROM module_heartbeats
+             WHERE module_id NOT IN (SELECT module_id FROM module_latest_heartbeat)
+          GROUP BY module_id
+            """
+        ).fetchone()[0]
+        if missing:
+            print(f"✅ Backfilled module_latest_heartbeat for {missing} module(s)")
+
+        # Same shape for `module_image_stats`: seed every module with upload
+        # history but no stats row (all of them on the first boot after the
+        # table was introduced). Drift in rows that DO exist is
+        # `services/image_stats.py`'s job, not a boot-time scan.
+        missing = con.execute(
+            """
+            INSERT INTO module_image_stats
+              (module_id, real_image_count, last_image_at, first_upload_at)
+            SELECT module_id, COUNT(*), MAX(uploaded_at), MIN(uploaded_at)
+              FROM image_uploads
+             WHERE module_id NOT IN (SELECT module_id FROM module_image_stats)
+          GROUP BY module_id
+            """
+        ).fetchone()[0]
+        if missing:
+            print(f"✅ Backfilled module_image_stats for {missing} module(s)")
+
+        for spec in _ID_SEQUENCES:
+            _sync_id_sequence(con, *spec)
+
+        refresh_archive_views(con)
+
+        # Gaps in the history that predates `heartbeat_gaps` (ADR-034):
+        # after the views, so archived months are included. Runs once;
+        # from then on `post_heartbeat` keeps the table current.
+        applied = con.execute(
+            "SELECT 1 FROM schema_migrations WHERE name = 'heartbeat_gaps_backfill'"
+        ).fetchone()
+        if applied is None:
+            added = backfill_heartbeat_gaps(con)
+            con.execute(
+                "INSERT INTO schema_migrations (name) VALUES ('heartbeat_gaps_backfill')"
+            )
+            print(f"✅ Backfilled heartbeat_gaps: {added} gap(s) from history")
+
         con.close()
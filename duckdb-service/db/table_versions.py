@@ -0,0 +1,107 @@
+"""Per-table write counters — what ``routes/_cache.py`` keys responses on.
+
+Every ``get_conn()`` cursor (``db.connection.InstrumentedCursor``) reports
+the tables its writes touched, and the counter of each one is bumped once
+the write is durable: straight after the statement for an autocommit
+write, at ``COMMIT`` for one inside ``BEGIN`` (``write_transaction``, the
+group-commit batches), never for a rolled-back one. So every write path —
+``write_transaction``, the autocommit FK dances under ``lock.exclusive()``
+(ADR-013), the silence watcher, ``init_db`` — invalidates without having
+to remember to.
+
+A cached response stores the counters of the tables it read, taken
+*before* its query ran. A write committing while that query is in flight
+bumps past the stored value, so the entry is already stale the moment it
+lands; the reverse order — bump first, commit later — is the one that
+could pin stale data, and is why nothing bumps before COMMIT returns.
+
+The tables a statement writes are found by a regex over the SQL (cached
+per statement text, like the metrics fingerprints): ``INSERT [OR ...]
+INTO t``, ``UPDATE t ... SET``, ``DELETE FROM t``, ``MERGE INTO t``,
+``TRUNCATE t``, ``COPY t FROM``. Schema DDL (``CREATE``/``ALTER``/``DROP``
+of anything but a temp object) bumps every table at once, as does opening
+a database handle — a cached response never outlives the database it was
+read from.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections.abc import Iterable
+from functools import lru_cache
+
+# Marker in a statement's table set meaning "could have changed anything".
+ALL = "*"
+
+_lock = threading.Lock()
+_versions: dict[str, int] = {}
+# Starts at a clock reading, not 0, so a re-imported copy of this module
+# (the test fixtures purge ``db.*``) never hands out a version tuple that
+# an entry cached under the previous copy already carries.
+_epoch = time.monotonic_ns()
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_CONTROL_RE = re.compile(
+    r"^\s*(?:(BEGIN|START\s+TRANSACTION)|(COMMIT|END)|(ROLLBACK|ABORT))\b", re.I
+)
+_DDL_RE = re.compile(
+    r"^\s*(?:CREATE|ALTER|DROP)\b(?!\s+(?:OR\s+REPLACE\s+)?TEMP(?:ORARY)?\b)", re.I
+)
+_NAME = r"(?:\w+\.)?\"?(\w+)\"?"
+_WRITE_RES = (
+    re.compile(rf"\bINSERT\s+(?:OR\s+\w+\s+)?INTO\s+{_NAME}", re.I),
+    # `UPDATE t SET` — the table name must be followed by SET, which also
+    # keeps `ON CONFLICT ... DO UPDATE SET col = ...` from matching.
+    re.compile(rf"\bUPDATE\s+{_NAME}\s+SET\b", re.I),
+    re.compile(rf"\bDELETE\s+FROM\s+{_NAME}", re.I),
+    re.compile(rf"\bMERGE\s+INTO\s+{_NAME}", re.I),
+    re.compile(rf"\bTRUNCATE\s+(?:TABLE\s+)?{_NAME}", re.I),
+    re.compile(rf"\bCOPY\s+{_NAME}\s+FROM\b", re.I),
+)
+
+
+@lru_cache(maxsize=2048)
+def classify(sql: str) -> tuple[str | None, frozenset[str]]:
+    """``(control, tables)`` for one statement.
+
+    ``control`` is ``"begin"``, ``"commit"``, ``"rollback"`` or ``None``;
+    ``tables`` is what the statement writes (lower-cased), ``{ALL}`` for
+    schema DDL, empty for a read.
+    """
+    text = _COMMENT_RE.sub(" ", _STRING_RE.sub("''", sql))
+    control = _CONTROL_RE.match(text)
+    if control:
+        return ("begin", "commit", "rollback")[control.lastindex - 1], frozenset()
+    if _DDL_RE.match(text):
+        return None, frozenset((ALL,))
+    return None, frozenset(
+        m.group(1).lower() for pattern in _WRITE_RES for m in pattern.finditer(text)
+    )
+
+
+def bump(tables: Iterable[str]) -> None:
+    """Record a committed write to ``tables`` (``ALL`` bumps everything)."""
+    global _epoch
+    with _lock:
+        for table in tables:
+            if table == ALL:
+                _epoch += 1
+            else:
+                _versions[table] = _versions.get(table, 0) + 1
+
+
+def bump_all() -> None:
+    bump((ALL,))
+
+
+def current(tables: tuple[str, ...]) -> tuple[int, ...]:
+    """The counters for ``tables``, prefixed by the global epoch.
+
+    Lock-free: each lookup is atomic and counters only grow, so a torn
+    read can only look *older* than the truth — a spurious miss, never a
+    stale hit.
+    """
+    return (_epoch, *(_versions.get(table, 0) for table in tables))
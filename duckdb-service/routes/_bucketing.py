@@ -20,7 +20,9 @@ gap-fill sentinel. The incident is recorded in chapter 11
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+
+from flask import request
 
 
 # Bucket sizes for time-bucketed read endpoints. The gap-fill cursor in
@@ -45,3 +47,17 @@ def floor_to_interval(ts: datetime, interval: str) -> datetime:
         return ts.replace(minute=0, second=0, microsecond=0)
     # daily
     return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def current_bucket() -> datetime | None:
+    """The bucket "now" falls in, for the request's ``interval`` param.
+
+    The ``vary=`` of ``@cached`` bucketed reads (routes/_cache.py): their
+    window ends at the current bucket, so a cached response — and its
+    ETag — is only good until the next bucket starts. ``None`` for an
+    invalid interval, which the view rejects anyway.
+    """
+    interval = request.args.get("interval", "hourly")
+    if interval not in INTERVAL_STEP:
+        return None
+    return floor_to_interval(datetime.now(timezone.utc).replace(tzinfo=None), interval)
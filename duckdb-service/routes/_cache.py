@@ -0,0 +1,348 @@
+"""Response cache for the dashboard's read endpoints.
+
+Every public dashboard view fans out to ``/modules``, ``/nests``,
+``/progress``, ``/heartbeats_summary`` and, per module opened,
+``/detections`` and ``/modules/<id>/measurements`` — but those tables
+only change when a module uploads or heartbeats. ``@cached(*tables)``
+keeps the finished response body of such a view, keyed on the endpoint,
+its path arguments and its (sorted) query string, and serves it again
+until one of ``tables`` is written: ``db.table_versions`` counts committed
+writes per table, an entry remembers the counters it was built at, and a
+lookup that finds them moved drops the entry instead of serving it. A
+write to ``measurements`` leaves ``/modules`` cached; a thousand visitors
+between two heartbeats cost one query per endpoint.
+
+Memory is bounded by body bytes (``RESPONSE_CACHE_MAX_BYTES``, LRU
+eviction; ``0`` turns the cache off). A response bigger than
+``RESPONSE_CACHE_MAX_ENTRY_BYTES`` is served but not kept, so one huge
+list can't flush everything else. Only 200s are cached.
+
+Concurrent misses on the same key and versions don't stampede: the first
+request fills the entry, the rest wait for it (up to ``_FILL_WAIT_S``)
+and are served the result. Streamed responses (routes/_format.py) still
+stream — the body is collected as it goes out and stored once the last
+chunk is sent; a client that hangs up early just leaves nothing cached.
+Nobody waits on a streamed fill, since it lasts as long as the slowest
+client takes to read it.
+
+Views whose output depends on more than the tables and the request
+(e.g. the current time) pass ``vary=`` — a callable whose result joins
+the key. Hits and misses are reported per endpoint on ``/metrics``
+(``response_cache_requests_total``), as are evictions and the cache size.
+Responses carry ``X-Cache: hit|miss``.
+
+The same key and versions name a strong ``ETag`` on every 200 (with the
+cache on or off): a poller that sends it back in ``If-None-Match`` gets
+a ``304`` decided from the in-memory counters alone — no lock, no
+cursor, no SQL — until a table the view reads is written.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+
+from flask import Response, make_response, request
+
+from services import metrics
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 << 20)))
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(
+    os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(RESPONSE_CACHE_MAX_BYTES // 4))
+)
+# How long a request waits on someone else's in-flight fill of the same
+# entry before giving up and running the view itself.
+_FILL_WAIT_S = 10.0
+# Rough per-entry bookkeeping (key, versions, object headers) counted
+# against the byte budget on top of the body.
+_ENTRY_OVERHEAD = 256
+
+
+class _Entry:
+    __slots__ = ("versions", "body", "status", "mimetype", "size")
+
+    def __init__(self, versions, body: bytes, status: int, mimetype: str) -> None:
+        self.versions = versions
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.size = len(body) + _ENTRY_OVERHEAD
+
+
+class ResponseCache:
+    """Byte-bounded LRU of response bodies, validated by table versions."""
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._bytes = 0
+        # (key, versions) -> set when that fill is stored or abandoned.
+        self._fills: dict[tuple, threading.Event] = {}
+        self._requests: dict[tuple[str, str], int] = {}
+        self._evictions = 0
+
+    def lookup(self, key: Hashable, versions: tuple, endpoint: str):
+        """One of ``("hit", entry)``, ``("fill", None)`` — the caller now
+        owns the fill and must ``store`` or ``release`` — or ``("wait",
+        event)`` while another request fills it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.versions == versions:
+                    self._entries.move_to_end(key)
+                    self._count(endpoint, "hit")
+                    return "hit", entry
+                if entry.versions < versions:
+                    # Built before the latest write to one of its tables.
+                    self._drop(key)
+                    result = "stale"
+                else:
+                    # Newer than this request's snapshot (it raced a write
+                    # and lost); leave it for the requests that follow.
+                    result = "miss"
+            else:
+                result = "miss"
+            event = self._fills.get((key, versions))
+            if event is not None:
+                return "wait", event
+            self._fills[(key, versions)] = threading.Event()
+            self._count(endpoint, result)
+            return "fill", None
+
+    def store(self, key: Hashable, entry: _Entry, endpoint: str) -> None:
+        with self._lock:
+            if entry.size > self.max_entry_bytes:
+                self._count(endpoint, "oversize")
+            else:
+                current = self._entries.get(key)
+                if current is None or current.versions <= entry.versions:
+                    if current is not None:
+                        self._drop(key)
+                    self._entries[key] = entry
+                    self._bytes += entry.size
+                    while self._bytes > self.max_bytes and self._entries:
+                        self._drop(next(iter(self._entries)))
+                        self._evictions += 1
+        self.release(key, entry.versions)
+
+    def release(self, key: Hashable, versions: tuple) -> None:
+        """End a fill (idempotent) and wake whoever waits on it."""
+        with self._lock:
+            event = self._fills.pop((key, versions), None)
+        if event is not None:
+            event.set()
+
+    def count(self, endpoint: str, result: str) -> None:
+        with self._lock:
+            self._count(endpoint, result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": dict(self._requests),
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    # Callers hold ``_lock``.
+    def _drop(self, key: Hashable) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+    def _count(self, endpoint: str, result: str) -> None:
+        self._requests[(endpoint, result)] = (
+            self._requests.get((endpoint, result), 0) + 1
+        )
+
+
+cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_ENTRY_BYTES)
+
+
+def cached(*tables: str, vary: Callable[[], Hashable] | None = None):
+    """Cache a GET view's 200 responses until one of ``tables`` is written,
+    and tag them with an ETag that ``If-None-Match`` can revalidate.
+
+    ``tables`` must name every table the view reads — a table left out is
+    a write the cached response will never notice.
+    """
+
+    def decorate(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            endpoint = request.endpoint or "-"
+            key = (
+                endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                vary() if vary is not None else None,
+            )
+            # Taken BEFORE the query runs: a write that commits meanwhile
+            # bumps past these, so the entry is born stale rather than
+            # serving pre-write rows under post-write versions.
+            versions = _table_versions().current(tables)
+            etag = _etag(key, versions)
+            if request.if_none_match.contains_weak(etag):
+                # The client's copy was built from these exact table
+                # versions: answer from memory, DuckDB never sees it.
+                cache.count(endpoint, "not_modified")
+                resp = Response(status=304)
+                resp.set_etag(etag)
+                return resp
+            if cache.max_bytes <= 0:
+                return _with_etag(make_response(view(*args, **kwargs)), etag)
+            state, found = cache.lookup(key, versions, endpoint)
+            if state == "wait":
+                found.wait(_FILL_WAIT_S)
+                state, found = cache.lookup(key, versions, endpoint)
+                if state == "wait":
+                    # Still not there — don't queue behind it twice.
+                    cache.count(endpoint, "miss")
+                    resp = make_response(view(*args, **kwargs))
+                    return _tag(_with_etag(resp, etag), "miss")
+            if state == "hit":
+                resp = Response(
+                    found.body, status=found.status, mimetype=found.mimetype
+                )
+                return _tag(_with_etag(resp, etag), "hit")
+            try:
+                resp = make_response(view(*args, **kwargs))
+            except BaseException:
+                cache.release(key, versions)
+                raise
+            if resp.status_code != 200:
+                cache.release(key, versions)
+            elif resp.is_streamed:
+                # Not ``resp.status_code`` inside ``_store``: the closure
+                # would then hold the response that holds it, and the cycle
+                # leaves the wrapped generator to the GC — which closes it
+                # outside the request context it was streaming in.
+                status, mimetype = resp.status_code, resp.mimetype
+
+                def _store(body: bytes | None) -> None:
+                    if body is None:
+                        cache.count(endpoint, "oversize")
+                    else:
+                        entry = _Entry(versions, body, status, mimetype)
+                        cache.store(key, entry, endpoint)
+
+                resp.response = _Collecting(resp.response, _store)
+                # Don't hold concurrent misses behind a body that is only
+                # as fast as this client reads it: they run their own
+                # (equally lazy) query instead of waiting.
+                cache.release(key, versions)
+            else:
+                entry = _Entry(
+                    versions, resp.get_data(), resp.status_code, resp.mimetype
+                )
+                cache.store(key, entry, endpoint)
+            return _tag(_with_etag(resp, etag), "miss")
+
+        return wrapper
+
+    return decorate
+
+
+def _table_versions():
+    # Resolved per call, like ``db.repository._conn_module``: the module a
+    # reimported ``db.connection`` reports writes to is the one to read.
+    from db import table_versions
+
+    return table_versions
+
+
+def _etag(key: Hashable, versions: tuple) -> str:
+    # Strong: the same key at the same table versions is the same bytes.
+    # The epoch in ``versions`` changes on every restart, so a tag never
+    # outlives the process that issued it.
+    return hashlib.blake2b(repr((key, versions)).encode(), digest_size=16).hexdigest()
+
+
+def _with_etag(resp: Response, etag: str) -> Response:
+    if resp.status_code == 200:
+        resp.set_etag(etag)
+    return resp
+
+
+def _tag(resp: Response, result: str) -> Response:
+    resp.headers["X-Cache"] = result
+    return resp
+
+
+class _Collecting:
+    """Pass a streamed body's chunks through unchanged; once the last one
+    has been sent, hand ``on_complete`` the joined body — or ``None`` if
+    it outgrew the per-entry cap, past which collecting stops (streaming
+    doesn't).
+
+    A class rather than a generator so ``close()`` always reaches the
+    wrapped iterable, started or not: ``stream_with_context`` generators
+    must be closed by the response, inside its context, not later by GC.
+    """
+
+    def __init__(self, chunks, on_complete: Callable[[bytes | None], None]) -> None:
+        self._chunks = chunks
+        self._it = iter(chunks)
+        self._on_complete = on_complete
+        self._parts: list[bytes] | None = []
+        self._size = 0
+
+    def __iter__(self) -> Iterator:
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._it)
+        except StopIteration:
+            parts, self._parts = self._parts, None
+            self._on_complete(None if parts is None else b"".join(parts))
+            raise
+        if self._parts is not None:
+            data = chunk.encode() if isinstance(chunk, str) else chunk
+            self._size += len(data)
+            if self._size <= cache.max_entry_bytes:
+                self._parts.append(data)
+            else:
+                self._parts = None
+        return chunk
+
+    def close(self) -> None:
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _collect_metrics():
+    snapshot = cache.stats()
+    yield from metrics.labelled_lines(
+        "response_cache_requests_total",
+        "Cached-endpoint requests by result (hit, miss, stale = invalidated "
+        "by a write, oversize = too big to keep, not_modified = 304).",
+        ("endpoint", "result"),
+        snapshot["requests"],
+    )
+    yield from metrics.counter_lines(
+        "response_cache_evictions_total",
+        "Entries evicted to stay under RESPONSE_CACHE_MAX_BYTES.",
+        snapshot["evictions"],
+    )
+    yield from metrics.counter_lines(
+        "response_cache_entries",
+        "Responses currently cached.",
+        snapshot["entries"],
+        kind="gauge",
+    )
+    yield from metrics.counter_lines(
+        "response_cache_bytes",
+        "Bytes currently held by the response cache.",
+        snapshot["bytes"],
+        kind="gauge",
+    )
+
+
+metrics.register_collector(_collect_metrics)
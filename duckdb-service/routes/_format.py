@@ -0,0 +1,106 @@
+"""Response shaping shared by the large list endpoints.
+
+``stream_json_rows`` streams an unbounded row list in batches; below it,
+``?format=`` parsing.
+
+Streaming
+---------
+``GET /progress`` without ``limit``, ``GET /image_uploads`` without
+``limit`` and ``GET /nests`` used to build the whole row list, then the
+whole JSON string, before sending a byte — memory and time-to-first-byte
+grew with the table (image-service's ``list_images`` docstring records
+the >5 s timeout this caused). They now stream: rows are read in keyset
+pages, each under its own short read lock
+(``db.repository.iter_batches``), and sent ``STREAM_BATCH_ROWS`` at a
+time, each batch encoded just before it goes out. The bytes are what
+``jsonify`` produced for the same rows — same provider, sorted keys,
+compact separators, trailing newline — so clients can't tell
+(outside DEBUG, where ``jsonify`` indents and the stream doesn't).
+The access log and ``http_request_seconds`` stop the clock when the view
+returns, i.e. after the first batch, not after the last byte.
+
+Columnar
+--------
+
+``GET /progress``, ``GET /detections/history`` and ``GET /image_uploads``
+answer in the usual row shape (a list of objects) by default. With
+``?format=columnar`` the list is replaced, under the same envelope key,
+by one array per column::
+
+    {"progress": {"progress_id": [...], "nest_id": [...], ...}}
+
+Same values, same order, same JSON encoding per value — only transposed.
+For 100k-row reads that skips building (and serializing) one dict per
+row, which dominated the row path's CPU. Every other key of the
+envelope (e.g. ``total``) is unchanged.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+FORMATS = ("rows", "columnar")
+
+
+def stream_json_rows(
+    key: str,
+    batches: Iterator[list[tuple]],
+    *,
+    columns: tuple[str, ...] = (),
+    row: Callable[[tuple], Any] | None = None,
+    tail: dict | None = None,
+) -> Response:
+    """Stream ``{"<key>": [row, ...], **tail}`` from ``batches``.
+
+    Each tuple becomes ``row(tuple)`` if given, else ``dict(zip(columns,
+    tuple))``, ``columns`` naming the SELECT list in order. ``tail``
+    holds the envelope's other keys; they must sort after ``key`` (the
+    provider sorts keys, and the stream writes ``key`` first). The first
+    batch is fetched here, before any header is sent, so a failing query
+    still raises in the view and becomes a normal error response.
+    """
+    if tail and any(k < key for k in tail):
+        raise ValueError(f"tail keys must sort after {key!r}")
+    # `jsonify`'s compact form. (Under DEBUG it would indent instead; the
+    # stream stays compact — same JSON value, different whitespace.)
+    provider = current_app.json
+
+    def dumps(obj):
+        return provider.dumps(obj, separators=(",", ":"))
+
+    to_obj = row or (lambda r: dict(zip(columns, r, strict=True)))
+    first = next(batches, None)
+
+    def generate():
+        yield "{" + dumps(key) + ":["
+        batch, sep = first, ""
+        while batch:
+            # One dumps() per batch; strip its [ ] and splice.
+            yield sep + dumps([to_obj(r) for r in batch])[1:-1]
+            batch, sep = next(batches, None), ","
+        rest = "".join(
+            f",{dumps(k)}:{dumps(v)}" for k, v in sorted((tail or {}).items())
+        )
+        yield f"]{rest}}}\n"
+
+    resp = Response(stream_with_context(generate()), mimetype=provider.mimetype)
+    # Stops ``batches`` however the response ends (drained, client gone
+    # mid-stream, never iterated), so no further page is queried. No lock
+    # or cursor is open between pages for it to release.
+    resp.call_on_close(batches.close)
+    return resp
+
+
+def wants_columnar():
+    """Return ``(columnar, None)``, or ``(None, (response, 400))`` for an
+    unknown ``format`` value."""
+    raw = request.args.get("format", "rows")
+    if raw not in FORMATS:
+        return None, (
+            jsonify({"error": "'format' must be 'rows' or 'columnar'"}),
+            400,
+        )
+    return raw == "columnar", None
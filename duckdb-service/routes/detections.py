@@ -18,8 +18,11 @@ from datetime import datetime, timezone
 from flask import Blueprint, jsonify, request
 from pydantic import ValidationError
 
-from db.repository import query_all, write_transaction
+from db import group_commit
+from db.repository import query_all, query_columns
 from models.module_id import ModuleId
+from routes._cache import cached
+from routes._format import wants_columnar
 
 detections_bp = Blueprint("detections", __name__)
 
@@ -57,6 +60,59 @@ def _bbox4(bbox) -> tuple[float, float, float, float]:
     return (0.0, 0.0, 0.0, 0.0)
 
 
+def _detection_rows(
+    canonical: str, filename: str, detections: list, now_utc: str
+) -> list[tuple]:
+    """Validate one capture's inbound detections into insert-ready tuples.
+
+    Non-dict items and rows with an invalid ``state`` or no
+    ``snip_filename`` are skipped, not fatal.
+    """
+    rows = []
+    for det in detections:
+        if not isinstance(det, dict):
+            continue
+        state = det.get("state")
+        snip_filename = det.get("snip_filename")
+        if state not in _VALID_STATES or not snip_filename:
+            continue
+        bx, by, bw, bh = _bbox4(det.get("bbox"))
+        rows.append(
+            (
+                canonical,
+                filename,
+                str(det.get("bee_type", "")),
+                int(det.get("nest_index", 0) or 0),
+                bx,
+                by,
+                bw,
+                bh,
+                state,
+                float(det.get("confidence", 0.0) or 0.0),
+                str(snip_filename),
+                now_utc,
+            )
+        )
+    return rows
+
+
+def _insert_detections(con, rows: list[tuple]) -> None:
+    """Insert ``_detection_rows`` output on the caller's transaction.
+    Shared by ``POST /record_detections`` and ``POST /ingest_upload``
+    (routes/ingest.py)."""
+    if rows:
+        con.executemany(
+            """
+            INSERT INTO nest_detections
+                (module_id, filename, bee_type, nest_index,
+                 bbox_x, bbox_y, bbox_w, bbox_h,
+                 state, confidence, snip_filename, detected_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+
+
 @detections_bp.post("/record_detections")
 def record_detections():
     """Append nest-detection rows for one capture.
@@ -79,47 +135,21 @@ def record_detections():
     now_utc = (
         datetime.now(timezone.utc).replace(tzinfo=None).strftime("%Y-%m-%d %H:%M:%S")
     )
-    inserted = 0
     try:
-        with write_transaction() as con:
-            for det in detections:
-                if not isinstance(det, dict):
-                    continue
-                state = det.get("state")
-                snip_filename = det.get("snip_filename")
-                if state not in _VALID_STATES or not snip_filename:
-                    continue
-                bx, by, bw, bh = _bbox4(det.get("bbox"))
-                con.execute(
-                    """
-                    INSERT INTO nest_detections
-                        (module_id, filename, bee_type, nest_index,
-                         bbox_x, bbox_y, bbox_w, bbox_h,
-                         state, confidence, snip_filename, detected_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        canonical,
-                        filename,
-                        str(det.get("bee_type", "")),
-                        int(det.get("nest_index", 0) or 0),
-                        bx,
-                        by,
-                        bw,
-                        bh,
-                        state,
-                        float(det.get("confidence", 0.0) or 0.0),
-                        str(snip_filename),
-                        now_utc,
-                    ),
-                )
-                inserted += 1
+        rows = _detection_rows(canonical, filename, detections, now_utc)
+        inserted = len(rows)
+
+        # Rows are validated up front so the queued job is pure DB work;
+        # one capture's detections still land in a single commit, shared
+        # with whatever else arrived in the same window (db/group_commit.py).
+        group_commit.submit(lambda con: _insert_detections(con, rows))
         return jsonify({"message": "Detections recorded", "inserted": inserted}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @detections_bp.get("/detections")
+@cached("nest_detections")
 def list_detections():
     """Return the per-nest snips from a module's **most recent capture**.
 
@@ -197,7 +227,27 @@ def _row_to_dict(r) -> dict:
     }
 
 
+# `{bbox}` is the four bbox columns (row shape) or one list column
+# (columnar shape) — see `list_detection_history`.
+_HISTORY_SQL = """
+    SELECT module_id, filename, bee_type, nest_index,
+           {bbox},
+           state, confidence, snip_filename, detected_at
+    FROM (
+        SELECT n.*, ROW_NUMBER() OVER (
+            PARTITION BY n.filename, n.bee_type, n.nest_index
+            ORDER BY n.id DESC
+        ) AS rn
+        FROM nest_detections n
+        WHERE n.module_id = ?
+    ) t
+    WHERE rn = 1
+    ORDER BY detected_at ASC, filename, bee_type, nest_index
+"""
+
+
 @detections_bp.get("/detections/history")
+@cached("nest_detections")
 def list_detection_history():
     """Return a module's **full per-capture detection history**, oldest first (#166).
 
@@ -223,8 +273,10 @@ def list_detection_history():
     distinct dates); if a capture-time field ever rides the detection payload,
     order by that instead.
 
-    Query: ``?module_id=``. Wire shape mirrors ``GET /detections``:
-    ``{"detections": [{...}, ...]}``.
+    Query: ``?module_id=``, optional ``?format=columnar`` (routes/_format.py).
+    Wire shape mirrors ``GET /detections``: ``{"detections": [{...}, ...]}``;
+    columnar: ``{"detections": {"module_id": [...], ..., "bbox": [[x, y, w,
+    h], ...], "detected_at": [...]}}``.
     """
     raw_module_id = request.args.get("module_id")
     if not raw_module_id:
@@ -232,24 +284,22 @@ def list_detection_history():
     canonical, err = _canonicalize_or_400(raw_module_id)
     if err is not None:
         return err
+    columnar, err = wants_columnar()
+    if err:
+        return err
 
-    rows = query_all(
-        """
-        SELECT module_id, filename, bee_type, nest_index,
-               bbox_x, bbox_y, bbox_w, bbox_h,
-               state, confidence, snip_filename, detected_at
-        FROM (
-            SELECT n.*, ROW_NUMBER() OVER (
-                PARTITION BY n.filename, n.bee_type, n.nest_index
-                ORDER BY n.id DESC
-            ) AS rn
-            FROM nest_detections n
-            WHERE n.module_id = ?
-        ) t
-        WHERE rn = 1
-        ORDER BY detected_at ASC, filename, bee_type, nest_index
-        """,
+    if not columnar:
+        rows = query_all(
+            _HISTORY_SQL.format(bbox="bbox_x, bbox_y, bbox_w, bbox_h"), (canonical,)
+        )
+        detections = [_row_to_dict(r) for r in rows]
+        return jsonify(detections=detections), 200
+
+    # DuckDB assembles the bbox lists; only `detected_at` needs a Python
+    # pass, to match the row shape's `str()` byte for byte.
+    cols = query_columns(
+        _HISTORY_SQL.format(bbox="[bbox_x, bbox_y, bbox_w, bbox_h] AS bbox"),
         (canonical,),
     )
-    detections = [_row_to_dict(r) for r in rows]
-    return jsonify(detections=detections), 200
+    cols["detected_at"] = list(map(str, cols["detected_at"]))
+    return jsonify(detections=cols), 200
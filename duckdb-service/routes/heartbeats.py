@@ -3,13 +3,60 @@ from datetime import datetime, timezone
 from flask import Blueprint, jsonify, request
 from pydantic import ValidationError
 
+from db import group_commit
 from db.connection import lock, get_conn
-from db.repository import query_one, write_transaction
+from db.repository import query_one
+from db.schema import HEARTBEAT_GAP_THRESHOLD_S
 from models.geo import coarsen_coord
 from models.module_id import ModuleId
+from routes._cache import cached
+from services import silence_watcher
 
 heartbeats_bp = Blueprint("heartbeats", __name__)
 
+# Per-heartbeat fields mirrored into `module_latest_heartbeat` (one row per
+# module, see `db/schema.py`). Order = column order of the summary read.
+_LATEST_FIELDS = (
+    "battery",
+    "rssi",
+    "uptime_ms",
+    "free_heap",
+    "fw_version",
+    "reset_reason",
+    "min_free_heap",
+    "boot_count",
+    "last_hb_fail_code",
+    "last_hb_fail_count",
+    "last_stage_before_reboot",
+)
+
+# Upsert that keeps `module_latest_heartbeat` equal to what the old
+# `ARG_MAX(field, received_at) ... GROUP BY module_id` fold over the whole
+# history returned. ARG_MAX skips rows whose field is NULL, so a field only
+# moves when the new heartbeat carries a value — hence the COALESCE (an
+# older firmware that omits `battery` must not blank the last real reading;
+# the dense-zero #172 streak fields still overwrite). A heartbeat that
+# commits out of order (older `received_at` than the stored row — possible
+# across one group-commit window) only fills fields that are still NULL.
+# Every SET expression reads the pre-update row, so `received_at` can be
+# assigned last-wins with GREATEST.
+_LATEST_UPSERT = """
+    INSERT INTO module_latest_heartbeat (module_id, received_at, {cols})
+    VALUES (?, ?, {marks})
+    ON CONFLICT (module_id) DO UPDATE SET
+      {sets},
+      received_at = GREATEST(excluded.received_at, module_latest_heartbeat.received_at)
+""".format(
+    cols=", ".join(_LATEST_FIELDS),
+    marks=", ".join("?" for _ in _LATEST_FIELDS),
+    sets=",\n      ".join(
+        f"{f} = CASE WHEN excluded.received_at >= module_latest_heartbeat.received_at "
+        f"THEN COALESCE(excluded.{f}, module_latest_heartbeat.{f}) "
+        f"ELSE COALESCE(module_latest_heartbeat.{f}, excluded.{f}) END"
+        for f in _LATEST_FIELDS
+    ),
+)
+
 
 def _to_int(value, default=None):
     if value is None or value == "":
@@ -207,7 +254,29 @@ def post_heartbeat():
     # two tables. PR B's senior-reviewer caught the same shape in
     # `set_display_name`'s dance — see the `write_transaction`
     # docstring for the receipts.
-    with write_transaction() as con:
+    #
+    # The transaction is group-committed (`db/group_commit.py`): the
+    # fleet's hourly wave lands as a few batched commits instead of one
+    # per device. Atomicity per heartbeat is unchanged — a job that
+    # raises rolls its batch back and is retried alone, so it still
+    # commits either both rows or neither.
+    heartbeat_row = [
+        mac,
+        received_at,
+        battery,
+        rssi,
+        uptime_ms,
+        free_heap,
+        fw_version,
+        reset_reason,
+        min_free_heap,
+        boot_count,
+        last_hb_fail_code,
+        last_hb_fail_count,
+        last_stage_before_reboot,
+    ]
+
+    def _write(con):
         con.execute(
             """
             INSERT INTO module_heartbeats
@@ -216,22 +285,30 @@ def post_heartbeat():
                last_hb_fail_code, last_hb_fail_count, last_stage_before_reboot)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            [
-                mac,
-                received_at,
-                battery,
-                rssi,
-                uptime_ms,
-                free_heap,
-                fw_version,
-                reset_reason,
-                min_free_heap,
-                boot_count,
-                last_hb_fail_code,
-                last_hb_fail_count,
-                last_stage_before_reboot,
-            ],
+            heartbeat_row,
         )
+        # The module's previous heartbeat, read before the upsert below
+        # moves it: a silence wider than the threshold since then becomes
+        # a `heartbeat_gaps` row in this same transaction (ADR-034). One
+        # primary-key lookup instead of a window over the whole history at
+        # read time. A heartbeat that commits out of order (older than the
+        # stored one, within one group-commit window) closes no gap.
+        prev = con.execute(
+            "SELECT received_at FROM module_latest_heartbeat WHERE module_id = ?",
+            [mac],
+        ).fetchone()
+        if prev is not None:
+            silent_s = (received_at - prev[0]).total_seconds()
+            if silent_s > HEARTBEAT_GAP_THRESHOLD_S:
+                con.execute(
+                    "INSERT INTO heartbeat_gaps "
+                    "(module_id, gap_start, gap_end, gap_seconds) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT DO NOTHING",
+                    [mac, prev[0], received_at, int(silent_s)],
+                )
+        # Same transaction as the history row, so `/heartbeats_summary`
+        # (which reads only this table) can never disagree with it.
+        con.execute(_LATEST_UPSERT, heartbeat_row)
 
         # Dual-write into the per-module measurements store (issue
         # #110). The `measurements` table is the canonical home for
@@ -300,42 +377,48 @@ def post_heartbeat():
                     # server is the enforcement boundary and cannot trust the
                     # firmware to have already rounded (old firmware, spoofed
                     # heartbeat). See `models/geo.py`.
-                    lat = coarsen_coord(lat)
-                    lng = coarsen_coord(lng)
+                    coarse_lat = coarsen_coord(lat)
+                    coarse_lng = coarsen_coord(lng)
                     con.execute(
                         "UPDATE module_configs SET lat = ?, lng = ?, "
                         "updated_at = NOW() WHERE id = ?",
-                        [lat, lng, mac],
+                        [coarse_lat, coarse_lng, mac],
                     )
                     print(
                         f"[heartbeat] patched module_configs lat/lng for {mac} "
-                        f"from (0,0) -> ({lat},{lng}) acc={acc}"
+                        f"from (0,0) -> ({coarse_lat},{coarse_lng}) acc={acc}"
                     )
 
+    group_commit.submit(_write)
+    silence_watcher.touch(mac, received_at)
     return jsonify({"ok": True}), 200
 
 
 @heartbeats_bp.get("/heartbeats/<module_id>")
+@cached("module_heartbeats", "cold_archive_manifest")
 def get_heartbeats(module_id):
     """Return the latest N heartbeats for a module, newest first."""
     limit = _to_int(request.args.get("limit"), default=50) or 50
     limit = max(1, min(limit, 500))
 
-    with lock:
+    with lock.read():
         con = get_conn()
-        rows = con.execute(
-            """
-            SELECT received_at, battery, rssi, uptime_ms, free_heap, fw_version,
-                   reset_reason, min_free_heap, boot_count,
-                   last_hb_fail_code, last_hb_fail_count,
-                   last_stage_before_reboot
-              FROM module_heartbeats
-             WHERE module_id = ?
-             ORDER BY received_at DESC
-             LIMIT ?
-            """,
-            [module_id, limit],
-        ).fetchall()
+        try:
+            rows = con.execute(
+                """
+                SELECT received_at, battery, rssi, uptime_ms, free_heap, fw_version,
+                       reset_reason, min_free_heap, boot_count,
+                       last_hb_fail_code, last_hb_fail_count,
+                       last_stage_before_reboot
+                  FROM module_heartbeats_all
+                 WHERE module_id = ?
+                 ORDER BY received_at DESC
+                 LIMIT ?
+                """,
+                [module_id, limit],
+            ).fetchall()
+        finally:
+            con.close()
 
     return jsonify(
         {
@@ -360,54 +443,40 @@ def get_heartbeats(module_id):
     )
 
 
-# Heartbeat-gap threshold (issue #172, option 3). The steady-state heartbeat
-# fires hourly, so a healthy module's consecutive `received_at` rows sit ~1 h
-# apart. A gap wider than this means heartbeats stopped reaching the server —
-# the device was power-/WiFi-down, hung before the send, or the call timed out
-# (none of which the firmware can self-report, since a failed heartbeat never
-# round-trips). 90 min = one missed hourly ping plus margin, and stays well
-# under the 2 h liveness watchdog so a reboot loop's silent window surfaces as a
-# gap rather than being masked by the recovery reboot.
-_GAP_THRESHOLD_S = 90 * 60
-
-
 @heartbeats_bp.get("/heartbeats/<module_id>/gaps")
+@cached("heartbeat_gaps")
 def get_heartbeat_gaps(module_id):
-    """Derived, read-only heartbeat-gap timeline for a module (issue #172,
-    option 3). Computes intervals between consecutive `received_at` rows in
-    `module_heartbeats` and returns those wider than `_GAP_THRESHOLD_S` — the
-    server-side complement to the device-reported `last_hb_fail_*` streak: it
-    surfaces the silent windows the device could NOT report (power loss, hang,
-    timeout) because the heartbeat never reached us.
-
-    Read-only: no schema, no new writer (ADR-005 keeps `module_configs`
-    single-writer; this derives from the already-persisted timeline so it can
-    never drift). Newest gap first.
+    """Heartbeat-gap timeline for a module (issue #172, option 3): the
+    silent windows wider than `HEARTBEAT_GAP_THRESHOLD_S` between
+    consecutive heartbeats — the server-side complement to the
+    device-reported `last_hb_fail_*` streak: it surfaces the silences the
+    device could NOT report (power loss, hang, timeout) because the
+    heartbeat never reached us.
+
+    Reads `heartbeat_gaps`, which `post_heartbeat` appends to as each
+    heartbeat closes a gap (ADR-034, superseding the per-request `LAG`
+    window of ADR-025): a keyed `LIMIT` read, whatever the length of the
+    history. Newest gap first. Gaps in months since moved to the Parquet
+    archive stay in the table.
     """
     limit = _to_int(request.args.get("limit"), default=50) or 50
     limit = max(1, min(limit, 500))
 
-    with lock:
+    with lock.read():
         con = get_conn()
-        rows = con.execute(
-            """
-            WITH ordered AS (
-                SELECT received_at,
-                       LAG(received_at) OVER (ORDER BY received_at) AS prev_at
-                  FROM module_heartbeats
+        try:
+            rows = con.execute(
+                """
+                SELECT gap_start, gap_end, gap_seconds
+                  FROM heartbeat_gaps
                  WHERE module_id = ?
-            )
-            SELECT prev_at AS gap_start,
-                   received_at AS gap_end,
-                   EPOCH(received_at) - EPOCH(prev_at) AS gap_seconds
-              FROM ordered
-             WHERE prev_at IS NOT NULL
-               AND EPOCH(received_at) - EPOCH(prev_at) > ?
-             ORDER BY received_at DESC
-             LIMIT ?
-            """,
-            [module_id, _GAP_THRESHOLD_S, limit],
-        ).fetchall()
+                 ORDER BY gap_end DESC
+                 LIMIT ?
+                """,
+                [module_id, limit],
+            ).fetchall()
+        finally:
+            con.close()
 
     return jsonify(
         {
@@ -425,48 +494,34 @@ def get_heartbeat_gaps(module_id):
 
 
 @heartbeats_bp.get("/heartbeats_summary")
+@cached("module_latest_heartbeat")
 def get_heartbeats_summary():
     """Latest heartbeat per module — used to compute lastSeenAt on the
-    /modules list endpoint without N+1 queries."""
-    with lock:
+    /modules list endpoint without N+1 queries.
+
+    Reads the one-row-per-module `module_latest_heartbeat` table that
+    `post_heartbeat` upserts, instead of folding 12 `ARG_MAX` aggregates
+    over the entire `module_heartbeats` history on every dashboard load
+    (cost linear in fleet size x months of hourly pings; see
+    `benchmarks/bench_heartbeats_summary.py`)."""
+    with lock.read():
         con = get_conn()
-        rows = con.execute(
-            """
-            SELECT module_id,
-                   MAX(received_at) AS last_seen,
-                   ARG_MAX(battery, received_at) AS battery,
-                   ARG_MAX(rssi, received_at) AS rssi,
-                   ARG_MAX(uptime_ms, received_at) AS uptime_ms,
-                   ARG_MAX(free_heap, received_at) AS free_heap,
-                   ARG_MAX(fw_version, received_at) AS fw_version,
-                   ARG_MAX(reset_reason, received_at) AS reset_reason,
-                   ARG_MAX(min_free_heap, received_at) AS min_free_heap,
-                   ARG_MAX(boot_count, received_at) AS boot_count,
-                   ARG_MAX(last_hb_fail_code, received_at) AS last_hb_fail_code,
-                   ARG_MAX(last_hb_fail_count, received_at) AS last_hb_fail_count,
-                   ARG_MAX(last_stage_before_reboot, received_at)
-                       AS last_stage_before_reboot
-              FROM module_heartbeats
-          GROUP BY module_id
-            """
-        ).fetchall()
+        try:
+            rows = con.execute(
+                f"""
+                SELECT module_id, received_at, {", ".join(_LATEST_FIELDS)}
+                  FROM module_latest_heartbeat
+                """
+            ).fetchall()
+        finally:
+            con.close()
 
     return jsonify(
         {
             "summary": {
                 r[0]: {
                     "last_seen": r[1].isoformat() if r[1] else None,
-                    "battery": r[2],
-                    "rssi": r[3],
-                    "uptime_ms": r[4],
-                    "free_heap": r[5],
-                    "fw_version": r[6],
-                    "reset_reason": r[7],
-                    "min_free_heap": r[8],
-                    "boot_count": r[9],
-                    "last_hb_fail_code": r[10],
-                    "last_hb_fail_count": r[11],
-                    "last_stage_before_reboot": r[12],
+                    **dict(zip(_LATEST_FIELDS, r[2:], strict=True)),
                 }
                 for r in rows
             }
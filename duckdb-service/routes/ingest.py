@@ -0,0 +1,311 @@
+"""Combined upload ingest: one round-trip for everything an upload writes.
+
+image-service used to make four or five calls per ``/upload`` — ``POST
+/record_image`` (and, without its ``first_upload`` flag, a ``GET
+/modules/<id>/progress_count``), ``POST /add_progress_for_module``,
+``POST /record_detections`` and ``POST /modules/<id>/heartbeat`` — each
+with its own HTTP round-trip, its own JSON parse and, for progress and
+the heartbeat, its own ``write_transaction()``. ``POST /ingest_upload``
+takes the whole outcome of one upload and applies it as ONE group-commit
+job (db/group_commit.py), so it lands in a single transaction shared with
+whatever else arrived in the same window, and is all-or-nothing: a
+failure leaves no half-recorded upload behind.
+
+``POST /ingest_uploads`` takes a batch of the same bodies: image-service's
+outbox (image-service/services/outbox.py) replays its backlog through it
+after duckdb-service was unreachable, one job per upload so that a bad
+upload fails alone.
+
+Replays are made safe by an idempotency key. An upload that carries
+``ingest_key`` is recorded in ``ingest_keys`` in the same transaction as
+its rows. If the key is already there, the stored answer is returned and
+nothing is written again, so an upload whose answer was lost in a timeout
+or a restart can be sent again.
+
+The writes are the same helpers the single-purpose routes use, so the
+two paths can't drift; those routes stay for older image-service builds
+and for tooling.
+"""
+
+import os
+from datetime import date, datetime, timedelta, timezone
+
+from flask import Blueprint, jsonify, request
+from pydantic import ValidationError
+
+from db import group_commit
+from db.repository import write_transaction
+from models.progress import ClassificationOutput
+from routes.detections import _detection_rows, _insert_detections
+from routes.modules import (
+    _canonicalize_or_400,
+    _is_battery,
+    _write_image_upload,
+    _write_upload_heartbeat,
+)
+from routes.progress import _resolve_classification, _write_progress
+from services import silence_watcher
+
+ingest_bp = Blueprint("ingest", __name__)
+
+INGEST_BATCH_MAX = int(os.getenv("INGEST_BATCH_MAX", "200"))
+INGEST_KEY_RETENTION_DAYS = int(os.getenv("INGEST_KEY_RETENTION_DAYS", "30"))
+
+_MAX_KEY_LEN = 128
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class _Invalid(ValueError):
+    """A body that must be answered with 400 (the message is the error).
+
+    ``response`` is a ready ``(json, 400)`` for the single-upload route
+    when a helper already built one (``_canonicalize_or_400``).
+    """
+
+    def __init__(self, message: str, response=None) -> None:
+        super().__init__(message)
+        self.response = response
+
+
+def _prepare(data) -> dict:
+    """Validate one upload body into what ``_apply`` writes.
+
+    Everything is checked here, before the DB is touched, so a 400
+    writes nothing. Raises ``_Invalid``.
+    """
+    if not isinstance(data, dict):
+        raise _Invalid("request body must be a JSON object")
+    raw_module_id = data.get("module_id")
+    filename = data.get("filename")
+    if not raw_module_id or not filename:
+        raise _Invalid("module_id and filename required")
+    canonical, err = _canonicalize_or_400(raw_module_id)
+    if err is not None:
+        raise _Invalid("invalid module id", err)
+
+    key = data.get("ingest_key")
+    if key is not None and (
+        not isinstance(key, str) or not key or len(key) > _MAX_KEY_LEN
+    ):
+        raise _Invalid(f"ingest_key must be a string of 1-{_MAX_KEY_LEN} chars")
+
+    battery = data.get("battery")
+    if battery is not None and not _is_battery(battery):
+        raise _Invalid("battery must be an int in [0, 100]")
+
+    wanted = []
+    if data.get("classification") is not None:
+        try:
+            payload = ClassificationOutput(
+                module_id=canonical, classification=data["classification"]
+            )
+        except ValidationError:
+            raise _Invalid("invalid classification payload") from None
+        wanted = _resolve_classification(payload)
+
+    detections = data.get("detections")
+    if detections is None:
+        detections = []
+    elif not isinstance(detections, list):
+        raise _Invalid("detections must be a list")
+
+    # UTC for the upload and detection rows, as `/record_image` stamps
+    # them; the progress `date` and `first_online` stay local, as their
+    # own routes write them. A replayed upload carries `uploaded_at`,
+    # when image-service received it, so a backlog drained after an
+    # outage lands on the day it was captured, not the day it arrived.
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    at = now
+    if data.get("uploaded_at") is not None:
+        try:
+            at = datetime.fromisoformat(str(data["uploaded_at"]))
+        except ValueError:
+            raise _Invalid("uploaded_at must be an ISO timestamp (UTC)") from None
+        if at.tzinfo is not None:
+            at = at.astimezone(timezone.utc).replace(tzinfo=None)
+        at = min(at, now)
+    uploaded_at = at.strftime(_TS_FORMAT)
+    if at == now:
+        today = date.today().isoformat()
+    else:
+        today = at.replace(tzinfo=timezone.utc).astimezone().date().isoformat()
+
+    return {
+        "key": key,
+        "module_id": canonical,
+        "filename": filename,
+        "battery": battery,
+        "wanted": wanted,
+        "rows": _detection_rows(canonical, filename, detections, uploaded_at),
+        "uploaded_at": uploaded_at,
+        "today": today,
+        "now": now.strftime(_TS_FORMAT),
+    }
+
+
+def _apply(con, upload: dict) -> tuple[dict, bool]:
+    """Write one prepared upload on the caller's group-commit connection.
+
+    Returns ``(answer, applied)``; ``applied`` is False for a replay of a
+    key that is already recorded, whose stored answer is returned.
+    """
+    key = upload["key"]
+    if key is not None:
+        seen = con.execute(
+            "SELECT first_upload, inserted, heartbeat FROM ingest_keys "
+            "WHERE ingest_key = ?",
+            (key,),
+        ).fetchone()
+        if seen is not None:
+            answer = {"first_upload": seen[0], "inserted": seen[1]}
+            return {**answer, "heartbeat": seen[2], "replayed": True}, False
+
+    canonical = upload["module_id"]
+    # An unregistered module still gets its image and detection rows, as
+    # from `/record_image` and `/record_detections`. Its progress and
+    # heartbeat are skipped, where those routes fail or answer 404:
+    # `nest_data` references `module_configs`, and the foreign-key error
+    # would otherwise roll the whole upload back.
+    registered = (
+        con.execute(
+            "SELECT 1 FROM module_configs WHERE id = ?", (canonical,)
+        ).fetchone()
+        is not None
+    )
+    # Image row first: `first_upload` must be decided before this
+    # upload's own progress rows exist (its EXISTS probe would
+    # otherwise always see them).
+    first_upload = _write_image_upload(
+        con, canonical, upload["filename"], upload["uploaded_at"]
+    )
+    if upload["wanted"] and registered:
+        _write_progress(con, canonical, upload["wanted"], upload["today"])
+    _insert_detections(con, upload["rows"])
+    touched = 0
+    if upload["battery"] is not None and registered:
+        touched = _write_upload_heartbeat(con, canonical, upload["battery"])
+    answer = {
+        "first_upload": first_upload,
+        "inserted": len(upload["rows"]),
+        "heartbeat": touched > 0,
+    }
+    if key is not None:
+        con.execute(
+            "INSERT INTO ingest_keys (ingest_key, module_id, first_upload, "
+            "inserted, heartbeat, ingested_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                canonical,
+                first_upload,
+                answer["inserted"],
+                answer["heartbeat"],
+                upload["now"],
+            ),
+        )
+    return answer, True
+
+
+def _touch(upload: dict) -> None:
+    silence_watcher.touch(
+        upload["module_id"], datetime.strptime(upload["uploaded_at"], _TS_FORMAT)
+    )
+
+
+@ingest_bp.post("/ingest_upload")
+def ingest_upload():
+    """Record one upload: image row, progress, detections and heartbeat.
+
+    Body: ``{"module_id", "filename", "battery"?, "classification"?,
+    "detections"?, "ingest_key"?, "uploaded_at"?}`` — ``classification``
+    as for ``/add_progress_for_module``, ``detections`` as for
+    ``/record_detections``; a missing part is skipped. Everything is
+    validated before the DB is touched, so a 400 writes nothing.
+
+    Returns ``{"first_upload", "inserted", "heartbeat"}``: the
+    ``/record_image`` flag (decided before this upload's progress rows
+    exist), the number of detection rows kept, and whether a
+    ``module_configs`` row took the heartbeat (False for an unregistered
+    module, where ``/modules/<id>/heartbeat`` answers 404; its progress
+    is skipped too, and its image and detections still recorded). A repeated
+    ``ingest_key`` answers the first call's values plus ``"replayed":
+    true`` and writes nothing.
+    """
+    try:
+        upload = _prepare(request.get_json(silent=True))
+    except _Invalid as e:
+        return e.response or (jsonify({"error": str(e)}), 400)
+
+    try:
+        # Waits for the commit whatever GROUP_COMMIT_ACK says, like
+        # `/record_image`: the caller needs `first_upload`.
+        answer, applied = group_commit.submit(
+            lambda con: _apply(con, upload), wait=True
+        )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if applied:
+        _touch(upload)
+    return jsonify({"message": "Upload ingested", **answer}), 200
+
+
+@ingest_bp.post("/ingest_uploads")
+def ingest_uploads():
+    """Record a batch of uploads, in order, normally in one transaction.
+
+    Body: ``{"uploads": [<an /ingest_upload body>, ...]}``, at most
+    ``INGEST_BATCH_MAX``. Answers ``{"results": [...]}`` in the same
+    order: each one is an ``/ingest_upload`` answer, or
+    ``{"error": ...}`` for an upload that failed validation, or
+    ``{"error": ..., "write_failed": true}`` for one whose write raised.
+    Each upload is its own group-commit job, so a failing one is rolled
+    back and reported alone while the rest of the batch is recorded.
+    ``ingest_key`` is echoed on every result.
+    """
+    data = request.get_json(silent=True)
+    uploads = data.get("uploads") if isinstance(data, dict) else None
+    if not isinstance(uploads, list):
+        return jsonify({"error": "uploads must be a list"}), 400
+    if len(uploads) > INGEST_BATCH_MAX:
+        return jsonify({"error": f"at most {INGEST_BATCH_MAX} uploads"}), 400
+
+    results: list[dict] = []
+    prepared: list[tuple[int, dict]] = []
+    for body in uploads:
+        key = body.get("ingest_key") if isinstance(body, dict) else None
+        try:
+            prepared.append((len(results), _prepare(body)))
+            results.append({"ingest_key": key})
+        except _Invalid as e:
+            results.append({"ingest_key": key, "error": str(e)})
+
+    jobs = [lambda con, upload=upload: _apply(con, upload) for _, upload in prepared]
+    written = group_commit.submit_many(jobs) if jobs else []
+    for (slot, upload), (outcome, error) in zip(prepared, written, strict=True):
+        if error is not None:
+            print(f"[ingest_uploads] write failed for {upload['filename']}: {error}")
+            results[slot].update({"error": str(error), "write_failed": True})
+            continue
+        answer, applied = outcome
+        results[slot].update(answer)
+        if applied:
+            _touch(upload)
+    return jsonify({"results": results}), 200
+
+
+def prune_ingest_keys() -> int:
+    """Delete idempotency keys older than ``INGEST_KEY_RETENTION_DAYS``.
+
+    A key only has to outlive the longest a replay can be delayed, which
+    is how long image-service's outbox can hold an upload. Returns the
+    number of keys deleted.
+    """
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+        days=INGEST_KEY_RETENTION_DAYS
+    )
+    with write_transaction() as con:
+        deleted = con.execute(
+            "DELETE FROM ingest_keys WHERE ingested_at < ?", (cutoff,)
+        ).fetchone()[0]
+    if deleted:
+        print(f"[ingest_keys] pruned {deleted} key(s) older than {cutoff:%Y-%m-%d}")
+    return deleted
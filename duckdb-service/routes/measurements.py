@@ -36,9 +36,11 @@ from typing import Any
 from flask import Blueprint, jsonify, request
 from pydantic import ValidationError
 
-from db.repository import query_all, query_one, write_transaction
+from db import group_commit
+from db.repository import query_all, query_one
 from models.module_id import ModuleId
-from routes._bucketing import INTERVAL_STEP, floor_to_interval
+from routes._bucketing import INTERVAL_STEP, current_bucket, floor_to_interval
+from routes._cache import cached
 
 
 measurements_bp = Blueprint("measurements", __name__)
@@ -193,17 +195,28 @@ def post_measurements():
             return jsonify(payload), status
         rows.append(row)
 
-    with write_transaction() as con:
+    def _write(con):
         con.executemany(
             "INSERT INTO measurements (module_mac, ts, metric, value, source) "
             "VALUES (?, ?, ?, ?, ?)",
             rows,
         )
 
+    # Group-committed with concurrent writers (`db/group_commit.py`); the
+    # batch stays all-or-nothing because the job is one executemany.
+    group_commit.submit(_write)
     return jsonify({"inserted": len(rows)}), 200
 
 
 @measurements_bp.get("/modules/<module_id>/measurements")
+@cached(
+    "module_configs",
+    "measurements",
+    "measurements_hourly",
+    "measurements_daily",
+    "measurements_rollup_state",
+    vary=current_bucket,
+)
 def get_measurements(module_id: str):
     """Bucketed measurement read with dense-fill.
 
@@ -267,6 +280,14 @@ def get_measurements(module_id: str):
     # positional). Branch in Python — `interval` is whitelisted above so
     # this is not a SQL-injection vector.
     trunc_unit = "hour" if interval == "hourly" else "day"
+    rollup_table = (
+        "measurements_hourly" if interval == "hourly" else "measurements_daily"
+    )
+    # Rolled-up buckets (`services/measurement_rollup.py`) plus the raw
+    # rows that arrived since the last rollup run — one statement, so the
+    # watermark, the rollup and the tail come from the same snapshot and
+    # no row is counted twice or missed. The tail is only minutes of
+    # arrivals, so the read is O(buckets), not O(samples in the window).
     # ::TIMESTAMP cast is load-bearing — see `routes/_bucketing.py`
     # docstring and chapter 11 "date_trunc('day', ts) returns DATE not
     # TIMESTAMP" for the incident. Without the cast, daily-mode keys
@@ -274,18 +295,32 @@ def get_measurements(module_id: str):
     # "YYYY-MM-DDT00:00:00" keys.
     rows = query_all(
         f"""
-        SELECT date_trunc('{trunc_unit}', ts)::TIMESTAMP AS bucket,
-               AVG(value) AS avg_value,
-               COUNT(*) AS sample_count
-        FROM measurements
-        WHERE module_mac = ?
-          AND metric = ?
-          AND ts >= ?
-          AND ts <  ?
+        SELECT bucket,
+               SUM(value_sum) / SUM(sample_count) AS avg_value,
+               SUM(sample_count) AS sample_count
+        FROM (
+            SELECT bucket, value_sum, sample_count
+            FROM {rollup_table}
+            WHERE module_mac = ?
+              AND metric = ?
+              AND bucket >= ?
+              AND bucket <  ?
+            UNION ALL
+            SELECT date_trunc('{trunc_unit}', ts)::TIMESTAMP AS bucket,
+                   value AS value_sum,
+                   1 AS sample_count
+            FROM measurements
+            WHERE module_mac = ?
+              AND metric = ?
+              AND ts >= ?
+              AND ts <  ?
+              AND ingested_at > (SELECT watermark FROM measurements_rollup_state
+                                  WHERE id = 1)
+        )
         GROUP BY bucket
         ORDER BY bucket
         """,
-        (canonical, metric, start, end),
+        (canonical, metric, start, end, canonical, metric, start, end),
     )
 
     counts_by_bucket: dict[str, dict] = {}
@@ -0,0 +1,37 @@
+"""Prometheus-text timing metrics for duckdb-service.
+
+``GET /metrics`` renders the in-process histograms from ``services/metrics.py``
+— lock wait/hold per mode, cursor open, SQL time and rows per statement
+fingerprint, group-commit batching, request and JSON-serialization time per
+endpoint — so a slow dashboard can be pinned on the DB, the lock or Flask.
+
+Admin-gated like ``/logs`` (the port is published on the dev host and the
+fingerprints describe the schema). Accepts the machine credential either as
+``X-Admin-Key`` or as ``Authorization: Bearer <key>``, the form a Prometheus
+``scrape_config`` ``authorization:`` block sends.
+"""
+
+import hmac
+
+from flask import Blueprint, Response, jsonify, request
+
+from routes.logs import _resolve_key
+from services import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _provided_key() -> str:
+    auth = request.headers.get("Authorization", "")
+    if auth.lower().startswith("bearer "):
+        return auth[7:].strip()
+    return request.headers.get("X-Admin-Key", "")
+
+
+@metrics_bp.get("/metrics")
+def get_metrics():
+    if not hmac.compare_digest(_provided_key(), _resolve_key()):
+        return jsonify({"error": "unauthorized"}), 401
+    return Response(metrics.render(), status=200, content_type=_CONTENT_TYPE)
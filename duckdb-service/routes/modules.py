@@ -1,12 +1,24 @@
+import base64
 from datetime import datetime, timedelta, timezone
 from flask import Blueprint, jsonify, request
 from pydantic import ValidationError
 
+from db import group_commit
 from db.connection import lock, get_conn
-from db.repository import query_all, query_scalar, query_one, write_transaction
+from db.repository import (
+    fetch_columns,
+    iter_batches,
+    query_all,
+    query_scalar,
+    query_one,
+    write_transaction,
+)
 from models.module import ModuleData
 from models.module_id import ModuleId
-from routes._bucketing import INTERVAL_STEP, floor_to_interval
+from routes._bucketing import INTERVAL_STEP, current_bucket, floor_to_interval
+from routes._cache import cached
+from routes._format import stream_json_rows, wants_columnar
+from services import cold_archive, silence_watcher
 from services.discord import send_discord_message
 
 
@@ -212,6 +224,8 @@ def add_module():
             final_lng = float(final_lng)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    # Re-registration is a liveness event (it bumped `last_seen_at`).
+    silence_watcher.touch(mac_str, name=final_name)
 
     # Discord only on first registration (2026-08 audit, for #229): the
     # unconditional post let anyone spam the webhook by re-posting the
@@ -341,8 +355,9 @@ def set_display_name(module_id):
     # UPDATE proceed past the now-unreferenced parent row. Atomicity
     # is provided at the Python layer instead: on any failure we
     # restore the child rows from the in-memory snapshot before
-    # re-raising. The global `lock` is held for the duration so no
-    # concurrent writer can race with the half-deleted state.
+    # re-raising. `lock.exclusive()` is held for the duration so no
+    # concurrent writer can race with — and no concurrent reader can
+    # observe — the half-deleted state.
     #
     # The compensating-restore approach trades full transactional
     # atomicity for a recovery semantics that's "best-effort and
@@ -373,13 +388,14 @@ def set_display_name(module_id):
     #   - `display_name` is a non-FK, non-PK column. The end state
     #     preserves every `nest_data.module_id → module_configs.id`
     #     reference (children re-inserted with identical `module_id`).
-    #   - duckdb-service serialises writes via a global `lock` (see
-    #     db/connection.py); we hold it for the whole dance, so no
-    #     concurrent reader/writer sees the half-deleted state.
+    #   - duckdb-service serialises writes via `db.connection.lock`;
+    #     we hold its exclusive mode for the whole dance (drains readers
+    #     too — plain writes don't), so no concurrent reader/writer sees
+    #     the half-deleted state.
     #   - Bounded blast radius: only this module's children move
     #     (the `WHERE module_id = ?` filter pins it). Typical modules
     #     carry <20 nests and <200 progress rows over their lifetime.
-    with lock:
+    with lock.exclusive():
         con = get_conn()
         try:
             existing = con.execute(
@@ -569,7 +585,8 @@ def delete_module(module_id):
     would 404 against those modules. We canonicalise the input and also
     derive its decimal equivalent, matching either.
 
-    Also clears `module_heartbeats` and `measurements` — the previous
+    Also clears `module_heartbeats`, `heartbeat_gaps` and `measurements`
+    (their rollups and their Parquet archive included) — the previous
     version deleted only nests/progress/images/config and left orphan
     telemetry behind.
     """
@@ -578,7 +595,10 @@ def delete_module(module_id):
         return err
     legacy_decimal = str(int(canonical, 16))  # same MAC as a uint64 string
     ids = (canonical, legacy_decimal)
-    with lock:
+    # Exclusive, not a plain write: the cascade below runs as individual
+    # autocommit DELETEs (reverse-FK order), so a concurrent reader could
+    # otherwise see the module with its nests gone but its config intact.
+    with lock.exclusive():
         con = get_conn()
         try:
             existing = con.execute(
@@ -587,6 +607,10 @@ def delete_module(module_id):
             if not existing:
                 return jsonify({"error": "Module not found"}), 404
 
+            # Archived telemetry first: it rewrites Parquet files, the
+            # likeliest step to fail, and a failure here leaves the live
+            # rows and the archive untouched (it is its own transaction).
+            cold_archive.purge_module(con, ids)
             # Reverse-FK order; both id forms; every table that references
             # the module so nothing is orphaned.
             con.execute(
@@ -596,10 +620,19 @@ def delete_module(module_id):
             )
             con.execute("DELETE FROM nest_data WHERE module_id IN (?, ?)", ids)
             con.execute("DELETE FROM image_uploads WHERE module_id IN (?, ?)", ids)
+            con.execute("DELETE FROM module_image_stats WHERE module_id IN (?, ?)", ids)
             con.execute("DELETE FROM module_heartbeats WHERE module_id IN (?, ?)", ids)
+            con.execute(
+                "DELETE FROM module_latest_heartbeat WHERE module_id IN (?, ?)", ids
+            )
+            con.execute("DELETE FROM heartbeat_gaps WHERE module_id IN (?, ?)", ids)
             con.execute("DELETE FROM measurements WHERE module_mac IN (?, ?)", ids)
+            for rollup in ("measurements_hourly", "measurements_daily"):
+                con.execute(f"DELETE FROM {rollup} WHERE module_mac IN (?, ?)", ids)
             con.execute("DELETE FROM module_configs WHERE id IN (?, ?)", ids)
             con.commit()
+            for mid in ids:
+                silence_watcher.forget(mid)
             return jsonify({"message": f"Module {canonical} deleted"}), 200
         except Exception as e:
             con.rollback()
@@ -608,6 +641,56 @@ def delete_module(module_id):
             con.close()
 
 
+def _write_image_upload(con, canonical: str, filename: str, now_utc: str) -> bool:
+    """Insert one `image_uploads` row and bump `module_image_stats`.
+
+    Returns True iff this is the module's first upload. Shared by
+    `POST /record_image` and `POST /ingest_upload` (routes/ingest.py);
+    runs inside the caller's group-commit job.
+    """
+    # First-upload detection (image-service's Discord "first photo"
+    # ping). Used to be a `GET /modules/<id>/progress_count` per upload
+    # — a COUNT over the module's entire `daily_progress` history just
+    # to compare it with zero. Now a PK lookup on the marker; only the
+    # very first upload per module (marker still NULL) pays for an
+    # EXISTS probe, which stops at the first progress row and keeps
+    # pre-marker modules (progress but no `image_uploads` history,
+    # e.g. from before #58) from being announced as new.
+    marker = con.execute(
+        "SELECT first_upload_at FROM module_image_stats WHERE module_id = ?",
+        (canonical,),
+    ).fetchone()
+    first_upload = marker is None or marker[0] is None
+    if first_upload:
+        first_upload = not con.execute(
+            "SELECT EXISTS (SELECT 1 FROM daily_progress p "
+            "JOIN nest_data n ON p.nest_id = n.nest_id WHERE n.module_id = ?)",
+            (canonical,),
+        ).fetchone()[0]
+
+    con.execute(
+        "INSERT INTO image_uploads (module_id, filename, uploaded_at) VALUES (?, ?, ?)",
+        (canonical, filename, now_utc),
+    )
+    # Keep `GET /modules`' aggregates and the marker current in the same
+    # transaction (see `module_image_stats` in db/schema.py).
+    con.execute(
+        """
+        INSERT INTO module_image_stats
+          (module_id, real_image_count, last_image_at, first_upload_at)
+        VALUES (?, 1, ?, ?)
+        ON CONFLICT (module_id) DO UPDATE SET
+          real_image_count = module_image_stats.real_image_count + 1,
+          last_image_at = GREATEST(module_image_stats.last_image_at,
+                                   excluded.last_image_at),
+          first_upload_at = COALESCE(module_image_stats.first_upload_at,
+                                     excluded.first_upload_at)
+        """,
+        (canonical, now_utc, now_utc),
+    )
+    return first_upload
+
+
 @modules_bp.post("/record_image")
 def record_image():
     data = request.get_json(silent=True) or {}
@@ -618,62 +701,124 @@ def record_image():
     canonical, err = _canonicalize_or_400(raw_module_id)
     if err is not None:
         return err
+    # UTC, NOT naive-local. The `activity_timeseries` reader
+    # computes its window against `datetime.now(timezone.utc)`;
+    # if the writer stamps in container-local time (which is
+    # what `datetime.now()` does — UTC today only because the
+    # python:3.x-slim image happens to default to UTC), setting
+    # `TZ=Europe/Berlin` on the container in prod would put
+    # writes 1-2 hours past the reader's window upper bound.
+    # The schema's `DEFAULT CURRENT_TIMESTAMP` carries the same
+    # naive-local risk; chapter-11 entry to follow.
+    now_utc = (
+        datetime.now(timezone.utc).replace(tzinfo=None).strftime("%Y-%m-%d %H:%M:%S")
+    )
+
     try:
-        with write_transaction() as con:
-            # UTC, NOT naive-local. The `activity_timeseries` reader
-            # computes its window against `datetime.now(timezone.utc)`;
-            # if the writer stamps in container-local time (which is
-            # what `datetime.now()` does — UTC today only because the
-            # python:3.x-slim image happens to default to UTC), setting
-            # `TZ=Europe/Berlin` on the container in prod would put
-            # writes 1-2 hours past the reader's window upper bound.
-            # The schema's `DEFAULT CURRENT_TIMESTAMP` carries the same
-            # naive-local risk; chapter-11 entry to follow.
-            now_utc = (
-                datetime.now(timezone.utc)
-                .replace(tzinfo=None)
-                .strftime("%Y-%m-%d %H:%M:%S")
-            )
-            con.execute(
-                "INSERT INTO image_uploads (module_id, filename, uploaded_at) VALUES (?, ?, ?)",
-                (canonical, filename, now_utc),
-            )
-        return jsonify({"message": "Image recorded"}), 200
+        # Group-committed (db/group_commit.py) alongside the detections
+        # and heartbeats the same upload burst produces. Always waits for
+        # the commit, whatever GROUP_COMMIT_ACK says: the caller needs
+        # `first_upload`, and the committer runs jobs one after another,
+        # so two racing uploads of a new module can't both claim it.
+        first_upload = group_commit.submit(
+            lambda con: _write_image_upload(con, canonical, filename, now_utc),
+            wait=True,
+        )
+        silence_watcher.touch(
+            canonical, datetime.strptime(now_utc, "%Y-%m-%d %H:%M:%S")
+        )
+        return jsonify({"message": "Image recorded", "first_upload": first_upload}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @modules_bp.delete("/image_uploads/<filename>")
 def delete_image_upload(filename):
-    with lock:
-        con = get_conn()
-        try:
-            existing = con.execute(
-                "SELECT filename FROM image_uploads WHERE filename = ?", (filename,)
-            ).fetchone()
-            if not existing:
+    try:
+        # One transaction for the delete and the `module_image_stats`
+        # adjustment, so `GET /modules` never sees one without the other.
+        with write_transaction() as con:
+            # `filename` isn't unique, so this may span several rows (and,
+            # in principle, modules).
+            removed = con.execute(
+                "SELECT module_id, COUNT(*) FROM image_uploads "
+                "WHERE filename = ? GROUP BY module_id",
+                (filename,),
+            ).fetchall()
+            if not removed:
                 return jsonify({"error": "Image not found"}), 404
             con.execute("DELETE FROM image_uploads WHERE filename = ?", (filename,))
-            con.commit()
-            return jsonify({"message": "Image record deleted"}), 200
-        except Exception as e:
-            return jsonify({"error": str(e)}), 500
-        finally:
-            con.close()
+            for module_id, n in removed:
+                # Decrement the count; `last_image_at` can't be decremented,
+                # so recompute it from this module's remaining uploads
+                # (`idx_image_module`, one module's history — admin-only path).
+                con.execute(
+                    """
+                    UPDATE module_image_stats
+                       SET real_image_count = GREATEST(real_image_count - ?, 0),
+                           last_image_at = (SELECT MAX(uploaded_at)
+                                              FROM image_uploads
+                                             WHERE module_id = ?)
+                     WHERE module_id = ?
+                    """,
+                    (n, module_id, module_id),
+                )
+        return jsonify({"message": "Image record deleted"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _encode_image_cursor(uploaded_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for ``/image_uploads``: the last row's sort key.
+
+    Callers must treat it as a token — the encoding (url-safe base64 of
+    ``<uploaded_at iso>|<id>``) is free to change.
+    """
+    raw = f"{uploaded_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_image_cursor(token: str):
+    """Inverse of ``_encode_image_cursor``; ``None`` for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        ts, row_id = raw.decode().split("|")
+        return datetime.fromisoformat(ts), int(row_id)
+    except ValueError:  # covers binascii.Error and UnicodeDecodeError
+        return None
 
 
 @modules_bp.get("/image_uploads")
+@cached("image_uploads", "module_image_stats")
 def list_image_uploads():
     """List image uploads, newest first, with optional pagination.
 
     Query params:
       * module_id — filter to one module's uploads.
       * limit     — page size (1..500). Omit to return every row.
-      * offset    — rows to skip (>=0), for "load more" pagination.
-
-    Wire shape: ``{"images": [...], "total": N}`` where ``total`` is the
-    full count matching the filter, *ignoring* limit/offset — the admin
-    UI needs it to decide whether to show a "Load more" button.
+      * cursor    — keyset pagination: the ``next_cursor`` of the previous
+                    page. Present-but-empty (``cursor=``) starts a walk at
+                    page one. Defaults ``limit`` to 500; not combinable
+                    with ``offset``.
+      * offset    — rows to skip (>=0). Legacy "load more" pagination; a
+                    deep offset costs a top-(offset+limit) scan, so new
+                    callers should follow ``next_cursor`` instead.
+      * format    — ``rows`` (default) or ``columnar``: ``images`` becomes
+                    ``{"module_id": [...], "filename": [...],
+                    "uploaded_at": [...]}`` (routes/_format.py).
+
+    Wire shape: ``{"images": [...], "next_cursor": str|null, "total": N}``
+    where ``total`` is the full count matching the filter, *ignoring*
+    limit/offset/cursor — the admin UI needs it for its "N of M" label —
+    and ``next_cursor`` resumes after the last row returned (``null`` once
+    the listing is exhausted).
+
+    In cursor mode ``total`` is read from ``module_image_stats`` (one row,
+    or a SUM over one row per module) instead of ``COUNT(*)`` over the
+    upload history, so no page — first or ten-thousandth — scans more than
+    the rows older than its cursor. The stats table is kept in step by
+    every write path and reconciled nightly (services/image_stats.py);
+    offset mode keeps the exact COUNT(*) for existing callers.
 
     The ``LIMIT`` fixes the slow-list incident: an un-paginated
     ``ORDER BY uploaded_at DESC`` over a bloated ``image_uploads`` table
@@ -692,6 +837,7 @@ def list_image_uploads():
             return err
     raw_limit = request.args.get("limit")
     raw_offset = request.args.get("offset")
+    raw_cursor = request.args.get("cursor")
     MAX_LIMIT = 500
     if raw_limit is None:
         limit = None  # caller explicitly opted into "all rows" (back-compat)
@@ -708,37 +854,110 @@ def list_image_uploads():
         offset = max(0, int(raw_offset)) if raw_offset is not None else 0
     except ValueError:
         offset = 0
+    after = None
+    if raw_cursor is not None:
+        if raw_offset is not None:
+            return jsonify({"error": "cursor and offset are mutually exclusive"}), 400
+        if raw_cursor:
+            after = _decode_image_cursor(raw_cursor)
+            if after is None:
+                return jsonify({"error": "invalid cursor"}), 400
+        if limit is None:
+            limit = MAX_LIMIT
+    columnar, err = wants_columnar()
+    if err:
+        return err
 
     where = "WHERE module_id = ?" if module_id else ""
     where_params = [module_id] if module_id else []
-    with lock:
-        con = get_conn()
+    if raw_cursor is None:
+        total_sql = f"SELECT COUNT(*) FROM image_uploads {where}"
+        total_params = list(where_params)
+    elif module_id:
+        total_sql = (
+            "SELECT COALESCE((SELECT real_image_count FROM module_image_stats "
+            "WHERE module_id = ?), 0)"
+        )
+        total_params = [module_id]
+    else:
+        total_sql = "SELECT COALESCE(SUM(real_image_count), 0) FROM module_image_stats"
+        total_params = []
+    page_params = list(where_params)
+    if after is not None:
+        # "Strictly after the last row handed out" in (uploaded_at DESC,
+        # id DESC) order. Spelled out rather than as the row-value
+        # `(uploaded_at, id) < (?, ?)` so the bare `uploaded_at <= ?`
+        # conjunct reaches the zonemap: row groups newer than the cursor
+        # (all earlier pages) are skipped unread, which OFFSET can't do.
+        where = (
+            f"{where} {'AND' if where else 'WHERE'} uploaded_at <= ? "
+            "AND (uploaded_at < ? OR id < ?)"
+        )
+        page_params += [after[0], after[0], after[1]]
+    # `id DESC` is a stable tiebreaker, NOT decoration: with only
+    # `uploaded_at DESC`, two uploads sharing a timestamp (same
+    # second/microsecond) sort in an undefined order that can differ
+    # between the page-1 query and the page-2 query — so LIMIT/OFFSET
+    # paging would duplicate one row and skip another. `id` is the
+    # monotonic insertion sequence (capture order), so `uploaded_at DESC,
+    # id DESC` is a strict total order: newest capture first,
+    # deterministic across pages — and the keyset the cursor encodes.
+    select = f"SELECT module_id, filename, uploaded_at, id FROM image_uploads {where}"
+    sql = f"{select} ORDER BY uploaded_at DESC, id DESC"
+
+    if limit is None and not columnar:
+        # The un-paginated back-compat call: streamed in batches rather
+        # than built whole (routes/_format.py), same bytes on the wire.
         try:
-            total = con.execute(
-                f"SELECT COUNT(*) FROM image_uploads {where}", where_params
-            ).fetchone()[0]
-            # `id DESC` is a stable tiebreaker, NOT decoration: with only
-            # `uploaded_at DESC`, two uploads sharing a timestamp (same
-            # second/microsecond) sort in an undefined order that can
-            # differ between the page-1 query and the page-2 query — so
-            # LIMIT/OFFSET paging would duplicate one row and skip
-            # another. `id` is the monotonic insertion sequence (capture
-            # order), so `uploaded_at DESC, id DESC` is a strict total
-            # order: newest capture first, deterministic across pages.
-            sql = (
-                "SELECT module_id, filename, uploaded_at "
-                f"FROM image_uploads {where} ORDER BY uploaded_at DESC, id DESC"
+            total = query_scalar(total_sql, tuple(total_params))
+            return stream_json_rows(
+                "images",
+                iter_batches(
+                    select,
+                    tuple(page_params),
+                    key=("uploaded_at", "id"),
+                    descending=True,
+                ),
+                row=lambda r: {
+                    "module_id": r[0],
+                    "filename": r[1],
+                    "uploaded_at": str(r[2]),
+                },
+                tail={"next_cursor": None, "total": total},
             )
-            query_params = list(where_params)
-            if limit is not None:
-                sql += " LIMIT ? OFFSET ?"
-                query_params += [limit, offset]
-            rows = con.execute(sql, query_params).fetchall()
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    if limit is not None:
+        # One row past the page tells us whether a next page exists
+        # without a second query.
+        sql += " LIMIT ? OFFSET ?"
+        page_params += [limit + 1, offset]
+    with lock.read():
+        con = get_conn()
+        try:
+            total = con.execute(total_sql, total_params).fetchone()[0]
+            cur = con.execute(sql, page_params)
+            next_cursor = None
+            if columnar:
+                images = fetch_columns(cur)
+                ids = images.pop("id")
+                if limit is not None and len(ids) > limit:
+                    images = {k: v[:limit] for k, v in images.items()}
+                    next_cursor = _encode_image_cursor(
+                        images["uploaded_at"][-1], ids[limit - 1]
+                    )
+                images["uploaded_at"] = list(map(str, images["uploaded_at"]))
+                return jsonify(images=images, next_cursor=next_cursor, total=total), 200
+            rows = cur.fetchall()
+            if limit is not None and len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = _encode_image_cursor(rows[-1][2], rows[-1][3])
             images = [
                 {"module_id": r[0], "filename": r[1], "uploaded_at": str(r[2])}
                 for r in rows
             ]
-            return jsonify(images=images, total=total), 200
+            return jsonify(images=images, next_cursor=next_cursor, total=total), 200
         except Exception as e:
             return jsonify({"error": str(e)}), 500
         finally:
@@ -746,6 +965,7 @@ def list_image_uploads():
 
 
 @modules_bp.get("/modules")
+@cached("module_configs", "module_image_stats")
 def get_modules():
     try:
         # Explicit column list (no `SELECT m.*`) so adding a column to
@@ -756,20 +976,20 @@ def get_modules():
         # `homepage/src/lib/displayLabel.ts` — we deliberately do not
         # collapse `display_name`/`name` server-side so the admin UI
         # can show both.
+        #
+        # `real_image_count` / `last_image_at` come from the pre-aggregated
+        # `module_image_stats` (one row per module), so this is O(modules)
+        # rather than a LEFT JOIN + GROUP BY over the entire upload history.
         modules = query_all(
             """
             SELECT m.id, m.name, m.display_name, m.lat, m.lng, m.first_online,
                    m.battery_level, m.image_count, m.email,
                    m.updated_at, m.last_seen_at,
                    m.last_silence_alert_at,
-                   COUNT(i.id) AS real_image_count,
-                   MAX(i.uploaded_at) AS last_image_at
+                   COALESCE(s.real_image_count, 0) AS real_image_count,
+                   s.last_image_at
             FROM module_configs m
-            LEFT JOIN image_uploads i ON m.id = i.module_id
-            GROUP BY m.id, m.name, m.display_name, m.lat, m.lng, m.first_online,
-                     m.battery_level, m.image_count, m.email,
-                     m.updated_at, m.last_seen_at,
-                     m.last_silence_alert_at
+            LEFT JOIN module_image_stats s ON s.module_id = m.id
             """
         )
         return jsonify(modules=modules), 200
@@ -787,6 +1007,7 @@ def get_modules():
 
 
 @modules_bp.get("/modules/<module_id>/progress_count")
+@cached("daily_progress", "nest_data")
 def progress_count(module_id):
     canonical, err = _canonicalize_or_400(module_id)
     if err is not None:
@@ -812,6 +1033,7 @@ _floor_to_interval = floor_to_interval
 
 
 @modules_bp.get("/modules/<module_id>/activity_timeseries")
+@cached("module_configs", "image_uploads", vary=current_bucket)
 def activity_timeseries(module_id):
     """Bucketed image-upload counts for the dashboard weather chart.
 
@@ -915,6 +1137,44 @@ def activity_timeseries(module_id):
     )
 
 
+def _is_battery(value) -> bool:
+    """An int percentage in [0, 100] (bools are ints in Python; not here)."""
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 100
+
+
+def _write_upload_heartbeat(con, canonical: str, battery: int) -> int:
+    """Refresh `battery_level` and bump `image_count` for one upload.
+
+    Returns the number of `module_configs` rows touched (0 for an unknown
+    module). Shared by `POST /modules/<id>/heartbeat` and
+    `POST /ingest_upload` (routes/ingest.py).
+    """
+    now = datetime.now().strftime("%Y-%m-%d")
+    # COALESCE-guarded so the heartbeat fills `first_online` only
+    # on the first NULL — `add_module` is the real writer (on
+    # INSERT). The schema declares `NOT NULL`, so this branch is
+    # unreachable in production but defensive against legacy /
+    # manually-inserted rows. Background: issue #75.
+    #
+    # `updated_at` is bumped (row was touched). `last_seen_at` is
+    # NOT bumped here — the legacy /modules/<id>/heartbeat route
+    # records battery + image_count metadata; the new heartbeat
+    # path (`heartbeats.py::post_heartbeat`) writes to the dedicated
+    # `module_heartbeats` table, which the backend folds into
+    # liveness separately. See issue #97 / PR B split.
+    return con.execute(
+        """
+        UPDATE module_configs
+        SET battery_level = ?,
+            first_online = COALESCE(first_online, ?),
+            image_count = image_count + 1,
+            updated_at = NOW()
+        WHERE id = ?
+        """,
+        (battery, now, canonical),
+    ).fetchone()[0]
+
+
 @modules_bp.post("/modules/<module_id>/heartbeat")
 def heartbeat(module_id):
     canonical, err = _canonicalize_or_400(module_id)
@@ -924,39 +1184,12 @@ def heartbeat(module_id):
     json_data = request.get_json(silent=True) or {}
     battery = json_data.get("battery")
 
-    if (
-        not isinstance(battery, int)
-        or isinstance(battery, bool)
-        or not (0 <= battery <= 100)
-    ):
+    if not _is_battery(battery):
         return jsonify({"error": "battery must be an int in [0, 100]"}), 400
 
     if query_one("SELECT 1 FROM module_configs WHERE id = ?", (canonical,)) is None:
         return jsonify({"error": "Module not found"}), 404
 
-    now = datetime.now().strftime("%Y-%m-%d")
     with write_transaction() as con:
-        # COALESCE-guarded so the heartbeat fills `first_online` only
-        # on the first NULL — `add_module` is the real writer (on
-        # INSERT). The schema declares `NOT NULL`, so this branch is
-        # unreachable in production but defensive against legacy /
-        # manually-inserted rows. Background: issue #75.
-        #
-        # `updated_at` is bumped (row was touched). `last_seen_at` is
-        # NOT bumped here — the legacy /modules/<id>/heartbeat route
-        # records battery + image_count metadata; the new heartbeat
-        # path (`heartbeats.py::post_heartbeat`) writes to the dedicated
-        # `module_heartbeats` table, which the backend folds into
-        # liveness separately. See issue #97 / PR B split.
-        con.execute(
-            """
-            UPDATE module_configs
-            SET battery_level = ?,
-                first_online = COALESCE(first_online, ?),
-                image_count = image_count + 1,
-                updated_at = NOW()
-            WHERE id = ?
-            """,
-            (battery, now, canonical),
-        )
+        _write_upload_heartbeat(con, canonical, battery)
     return jsonify({"ok": True}), 200
@@ -1,11 +1,23 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint
 
-from db.repository import query_all
+from db.repository import iter_batches
+from routes._cache import cached
+from routes._format import stream_json_rows
 
 nests_bp = Blueprint("nests", __name__)
 
+_NEST_COLUMNS = ("nest_id", "module_id", "beeType")
+
 
 @nests_bp.get("/nests")
+@cached("nest_data")
 def get_nests():
-    nests = query_all("SELECT * FROM nest_data")
-    return jsonify(nests=nests), 200
+    # Unbounded (every nest of every module), so streamed in batches
+    # rather than built whole — see routes/_format.py.
+    return stream_json_rows(
+        "nests",
+        iter_batches(
+            f"SELECT {', '.join(_NEST_COLUMNS)} FROM nest_data", key=("nest_id",)
+        ),
+        columns=_NEST_COLUMNS,
+    )
@@ -1,11 +1,14 @@
+import os
 from datetime import date, datetime
 from uuid import uuid4
 from flask import Blueprint, jsonify, request
 from pydantic import ValidationError
 
-from db.repository import query_all, write_transaction
+from db.repository import iter_batches, query_all, query_columns, write_transaction
 from models.module_id import ModuleId
 from models.progress import ClassificationOutput, BEE_TYPE_MAP, TARGET_NESTS_PER_TYPE
+from routes._cache import cached
+from routes._format import stream_json_rows, wants_columnar
 
 progress_bp = Blueprint("progress", __name__)
 
@@ -14,6 +17,17 @@ progress_bp = Blueprint("progress", __name__)
 # date-ascending (see the ordering note below). 2026-07 audit, for #205.
 _LIMIT_CAP = 100_000
 
+# `daily_progress.progress_id` flavour for new rows. The default `uuid`
+# keeps the historical random 36-char ids; `sequence` draws short
+# `prog-NNN` ids (the seed-data shape) from `progress_id_seq`, which keeps
+# the primary-key index smaller and its inserts append-ordered. The column
+# stays VARCHAR either way, so existing rows and readers are unaffected and
+# the two kinds can coexist on one volume.
+PROGRESS_ID_KIND = os.getenv("PROGRESS_ID_KIND", "uuid").strip().lower()
+
+# The wire columns of `GET /progress`, in order.
+_PROGRESS_COLUMNS = ("progress_id", "nest_id", "date", "empty", "sealed", "hatched")
+
 
 def _parse_iso_date(raw: str, field: str):
     """Parse `YYYY-MM-DD` identically on every Python in the CI matrix.
@@ -39,6 +53,7 @@ def _parse_iso_date(raw: str, field: str):
 
 
 @progress_bp.get("/progress")
+@cached("daily_progress", "nest_data")
 def get_progress():
     """List daily_progress rows, optionally filtered (for #205).
 
@@ -46,12 +61,16 @@ def get_progress():
       * ``module_id`` — canonical or legacy MAC form; filters via nest_data.
       * ``since`` / ``until`` — inclusive ISO date bounds on ``date``.
       * ``limit`` — keep only the most recent N rows (capped).
+      * ``format`` — ``rows`` (default) or ``columnar``; see routes/_format.py.
 
     Ordering contract: rows are returned **date-ascending** (ties broken
     by nest_id). This is load-bearing — `backend/src/database.ts`'s
     `totalHatches` roll-up reads each nest's LAST array element as the
     latest row, so `limit` trims the oldest rows, never the newest.
     """
+    columnar, err = wants_columnar()
+    if err:
+        return err
     where, params = [], []
 
     module_raw = request.args.get("module_id")
@@ -87,22 +106,123 @@ def get_progress():
         limit = min(limit, _LIMIT_CAP)
 
     clause = f" WHERE {' AND '.join(where)}" if where else ""
+    cols = ", ".join(_PROGRESS_COLUMNS)
     if limit is None:
-        sql = f"SELECT * FROM daily_progress{clause} ORDER BY date ASC, nest_id"
+        select = f"SELECT {cols} FROM daily_progress{clause}"
+        sql = f"{select} ORDER BY date ASC, nest_id"
+        if not columnar:
+            # The unbounded legacy call: streamed in batches instead of
+            # built whole (routes/_format.py), same bytes on the wire.
+            # `progress_id` only breaks ties the keyset paging needs broken.
+            return stream_json_rows(
+                "progress",
+                iter_batches(
+                    select, tuple(params), key=("date", "nest_id", "progress_id")
+                ),
+                columns=_PROGRESS_COLUMNS,
+            )
     else:
         # Keep the most recent rows, then restore ascending order.
         sql = (
-            "SELECT * FROM ("
-            f"SELECT * FROM daily_progress{clause} "
+            f"SELECT {cols} FROM ("
+            f"SELECT {cols} FROM daily_progress{clause} "
             "ORDER BY date DESC, nest_id LIMIT ?"
             ") ORDER BY date ASC, nest_id"
         )
         params.append(limit)
 
-    progress = query_all(sql, tuple(params))
+    progress = (query_columns if columnar else query_all)(sql, tuple(params))
     return jsonify(progress=progress), 200
 
 
+def _resolve_classification(payload: ClassificationOutput) -> list:
+    """Map a validated payload to ``[(db bee type, sealed fractions)]``.
+
+    Unknown bee types are dropped; each list is padded to
+    ``TARGET_NESTS_PER_TYPE`` with its last value.
+    """
+    wanted = []
+    for bee_type_payload, sealed_values in payload.classification.items():
+        db_bee_type = BEE_TYPE_MAP.get(bee_type_payload)
+        if db_bee_type is None:
+            continue
+        sealed_list = list(sealed_values.values())
+        while len(sealed_list) < TARGET_NESTS_PER_TYPE:
+            sealed_list.append(sealed_list[-1])
+        wanted.append((db_bee_type, sealed_list))
+    return wanted
+
+
+def _write_progress(con, module_id: str, wanted: list, today: str) -> None:
+    """Insert today's progress rows for ``wanted`` (``_resolve_classification``),
+    creating the module's missing nests first. Shared by
+    ``POST /add_progress_for_module`` and ``POST /ingest_upload``
+    (routes/ingest.py); runs on the caller's connection and transaction.
+    """
+    # The nest ↔ sealed-value pairing follows plain string order of
+    # `nest_id`, as it always has: existing modules whose ids span
+    # `nest-999`/`nest-1000` keep their pairing (`nest-1000` < `nest-999`).
+    nests_by_type = {}
+    for nest_id, bee_type in con.execute(
+        "SELECT nest_id, beeType FROM nest_data WHERE module_id = ? ORDER BY nest_id",
+        (module_id,),
+    ).fetchall():
+        nests_by_type.setdefault(bee_type, []).append(nest_id)
+
+    # Create missing nests up to target count, ids from `nest_id_seq`
+    # (db/schema.py) instead of a MAX() scan per nest.
+    missing = [
+        bee_type
+        for bee_type, _ in wanted
+        for _ in range(TARGET_NESTS_PER_TYPE - len(nests_by_type.get(bee_type, [])))
+    ]
+    if missing:
+        new_ids = [
+            f"nest-{str(n).zfill(3)}"
+            for (n,) in con.execute(
+                "SELECT nextval('nest_id_seq') FROM range(?)", (len(missing),)
+            ).fetchall()
+        ]
+        con.execute(
+            "INSERT INTO nest_data (nest_id, module_id, beeType) "
+            "SELECT unnest(?), ?, unnest(?)",
+            (new_ids, module_id, missing),
+        )
+        for nest_id, bee_type in zip(new_ids, missing, strict=True):
+            nests_by_type.setdefault(bee_type, []).append(nest_id)
+        # New nests take their place in that order now, so the first
+        # upload pairs them the way every later one (reading them back)
+        # will.
+        for nest_ids in nests_by_type.values():
+            nest_ids.sort()
+
+    # Insert progress entries — one columnar insert (list parameters
+    # unnested server-side) rather than a round-trip per row.
+    nest_ids, sealed_vals = [], []
+    for bee_type, sealed_list in wanted:
+        # A module with more nests than values (or fewer) pairs up to the
+        # shorter list, as it always has.
+        for nest_id, sealed in zip(nests_by_type[bee_type], sealed_list, strict=False):
+            nest_ids.append(nest_id)
+            sealed_vals.append(int(sealed * 100))
+    if nest_ids:
+        if PROGRESS_ID_KIND == "sequence":
+            id_sql, id_params = (
+                "printf('prog-%03d', nextval('progress_id_seq'))",
+                (),
+            )
+        else:
+            id_sql, id_params = "unnest(?)", ([str(uuid4()) for _ in nest_ids],)
+        con.execute(
+            f"""
+            INSERT INTO daily_progress
+                (progress_id, nest_id, date, empty, sealed, hatched)
+            SELECT {id_sql}, unnest(?), ?::DATE, 0, unnest(?), 0
+            """,
+            (*id_params, nest_ids, today, sealed_vals),
+        )
+
+
 @progress_bp.post("/add_progress_for_module")
 def add_progress_for_module():
     # Clean 400s on malformed input (for #205) — this route predated the
@@ -119,47 +239,13 @@ def add_progress_for_module():
     module_id = payload.module_id.root
     today = date.today().isoformat()
 
+    # Resolve the payload to (bee type, per-nest sealed fractions) before
+    # touching the DB, so the transaction below is a fixed handful of
+    # statements: one nest lookup, at most one id allocation + nest insert
+    # (a module's first classification), and one insert for every
+    # progress row of the upload.
+    wanted = _resolve_classification(payload)
     with write_transaction() as con:
-        for bee_type_payload, sealed_values in payload.classification.items():
-            db_bee_type = BEE_TYPE_MAP.get(bee_type_payload)
-            if db_bee_type is None:
-                continue
-
-            # Get existing nests for this module + bee type
-            existing_nests = con.execute(
-                "SELECT nest_id FROM nest_data WHERE module_id = ? AND beeType = ? ORDER BY nest_id",
-                (module_id, db_bee_type),
-            ).fetchall()
-            existing_nest_ids = [row[0] for row in existing_nests]
-
-            # Create missing nests up to target count
-            while len(existing_nest_ids) < TARGET_NESTS_PER_TYPE:
-                max_id_row = con.execute(
-                    "SELECT MAX(CAST(SUBSTR(nest_id, 6) AS INTEGER)) FROM nest_data"
-                ).fetchone()
-                next_id = (max_id_row[0] or 0) + 1
-                new_nest_id = f"nest-{str(next_id).zfill(3)}"
-
-                con.execute(
-                    "INSERT INTO nest_data (nest_id, module_id, beeType) VALUES (?, ?, ?)",
-                    (new_nest_id, module_id, db_bee_type),
-                )
-                existing_nest_ids.append(new_nest_id)
-
-            # Insert progress entries
-            sealed_list = list(sealed_values.values())
-            while len(sealed_list) < TARGET_NESTS_PER_TYPE:
-                sealed_list.append(sealed_list[-1])
-
-            for nest_id, sealed in zip(existing_nest_ids, sealed_list):
-                sealed_val = int(sealed * 100)
-                con.execute(
-                    """
-                    INSERT INTO daily_progress
-                        (progress_id, nest_id, date, empty, sealed, hatched)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    """,
-                    (str(uuid4()), nest_id, today, 0, sealed_val, 0),
-                )
+        _write_progress(con, module_id, wanted, today)
 
     return {"success": True}
@@ -116,9 +116,14 @@ def _check_free_space(backup_dir: str) -> None:
 
 
 def _checkpoint_and_copy(raw_copy_path: str) -> float:
-    """Hold the global write lock only long enough to CHECKPOINT + copy."""
+    """Hold the database lock exclusively only long enough to CHECKPOINT + copy.
+
+    Exclusive, not just the write side: DuckDB's CHECKPOINT waits for every
+    open transaction (readers included) and stalls new ones while it
+    waits, so in-flight readers are drained first; and no writer may touch
+    the file while ``copy2`` reads it."""
     start = time.monotonic()
-    with lock:
+    with lock.exclusive():
         conn = get_conn()
         try:
             conn.execute("CHECKPOINT")
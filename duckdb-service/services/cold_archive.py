@@ -0,0 +1,274 @@
+"""Parquet cold tier for ``module_heartbeats`` and ``measurements``.
+
+Old heartbeats and raw measurements are rarely read but make up most of
+``app.duckdb``: every weekly ``run_backup`` copies and gzips them again,
+under the exclusive lock for the copy. With ``COLD_ARCHIVE_AFTER_DAYS``
+> 0 (default 0, off), ``run_cold_archive`` moves every whole calendar
+month older than that out of the live table into zstd Parquet under
+``archive_dir()`` (``COLD_ARCHIVE_DIR``, default ``archive/`` next to
+the DB)::
+
+    archive/module_heartbeats/month=2025-03/20260401T023000-1a2b3c4d.parquet
+
+One transaction per (table, month): ``COPY`` the rows out, read the file
+back and check the count, record it in ``cold_archive_manifest``,
+``DELETE`` the rows, rebuild the ``*_all`` view — and if any step fails
+the transaction rolls back and the file is removed. Files are written
+once and never appended to; a later straggler for an archived month gets
+a file of its own. DuckDB reuses the freed blocks but never truncates
+its file: the live DB stops growing rather than shrinking
+(``benchmarks/bench_cold_archive.py``).
+
+``module_heartbeats_all`` / ``measurements_all`` (``db/schema.py``'s
+``refresh_archive_views``) union the live table with the manifest's
+files, so ``/heartbeats/<id>`` sees full history. The gap timeline
+needs no view (``heartbeat_gaps`` is written as heartbeats land and is
+never archived), nor do measurement charts: they read the rollups
+(``services/measurement_rollup.py``), and only rolled-up rows are
+archived.
+
+What stays live regardless of age: each module's newest heartbeat (the
+silence watcher's ``MAX(received_at)``) and whatever
+``measurement_rollup.EXPIRABLE`` keeps (``*-backfill`` sources, each
+source's newest row, anything not rolled up yet).
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from db.repository import query_all, write_transaction
+from db.schema import ARCHIVED_TABLES, archive_dir, refresh_archive_views
+from services.measurement_rollup import EXPIRABLE, run_rollup
+
+# (table, time column, module column, rows eligible for the archive — one
+# ``?``: the cutoff).
+_SPECS = (
+    (
+        "module_heartbeats",
+        "received_at",
+        "module_id",
+        """
+        received_at < ?
+        AND received_at < (SELECT MAX(h.received_at) FROM module_heartbeats h
+                            WHERE h.module_id = module_heartbeats.module_id)
+        """,
+    ),
+    ("measurements", "ts", "module_mac", EXPIRABLE),
+)
+assert {spec[0] for spec in _SPECS} == set(ARCHIVED_TABLES)
+
+
+def archive_after_days() -> int:
+    return int(os.getenv("COLD_ARCHIVE_AFTER_DAYS", "0"))
+
+
+def _month_start(ts: datetime) -> datetime:
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(start: datetime) -> datetime:
+    return start.replace(
+        year=start.year + start.month // 12, month=start.month % 12 + 1
+    )
+
+
+def _quote(path: str) -> str:
+    # COPY's target can't be a bind parameter.
+    return "'" + path.replace("'", "''") + "'"
+
+
+def _new_file(table: str, month: str) -> tuple[str, str]:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    rel = os.path.join(
+        table, f"month={month}", f"{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+    )
+    return rel, os.path.join(archive_dir(), rel)
+
+
+def _write_file(con, full: str, ts_col: str, select: str, params: list) -> tuple:
+    """COPY ``select`` into ``full``; return (rows, min, max of ``ts_col``)
+    as read back from the file itself."""
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    con.execute(
+        f"COPY ({select}) TO {_quote(full)} (FORMAT parquet, COMPRESSION zstd)",
+        params,
+    )
+    return con.execute(
+        f"SELECT COUNT(*), MIN({ts_col}), MAX({ts_col}) "
+        f"FROM read_parquet({_quote(full)})"
+    ).fetchone()
+
+
+def _archive_month(spec: tuple, cutoff: datetime, month: datetime) -> int:
+    table, ts_col, module_col, eligible = spec
+    label = month.strftime("%Y-%m")
+    where = f"({eligible}) AND {ts_col} >= ? AND {ts_col} < ?"
+    params = [cutoff, month, _next_month(month)]
+    rel, full = _new_file(table, label)
+    try:
+        with write_transaction() as con:
+            expected = con.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE {where}", params
+            ).fetchone()[0]
+            if not expected:
+                return 0
+            # Sorted so each row group's min/max on the module column lets
+            # a per-module read of the view skip the rest of the file.
+            written, lo, hi = _write_file(
+                con,
+                full,
+                ts_col,
+                f"SELECT * FROM {table} WHERE {where} ORDER BY {module_col}, {ts_col}",
+                params,
+            )
+            if written != expected:
+                raise RuntimeError(f"{rel}: wrote {written} rows, expected {expected}")
+            con.execute(
+                "INSERT INTO cold_archive_manifest "
+                "(path, table_name, month, row_count, min_ts, max_ts) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [rel, table, label, written, lo, hi],
+            )
+            deleted = con.execute(
+                f"DELETE FROM {table} WHERE {where}", params
+            ).fetchone()[0]
+            if deleted != expected:
+                raise RuntimeError(
+                    f"{table} {label}: deleted {deleted} rows, archived {expected}"
+                )
+            refresh_archive_views(con)
+    except BaseException:
+        # Rolled back: the manifest never listed the file, remove it.
+        if os.path.exists(full):
+            os.remove(full)
+        raise
+    return expected
+
+
+def _pending_months(spec: tuple, cutoff: datetime) -> list[datetime]:
+    table, ts_col, _, eligible = spec
+    rows = query_all(
+        f"SELECT DISTINCT date_trunc('month', {ts_col})::TIMESTAMP AS month "
+        f"FROM {table} WHERE {eligible} ORDER BY month",
+        (cutoff,),
+    )
+    return [r["month"] for r in rows]
+
+
+def run_cold_archive(days: int | None = None) -> int:
+    """Move every whole month older than ``days`` (default from
+    ``COLD_ARCHIVE_AFTER_DAYS``; ``0`` disables) to Parquet. Returns the
+    number of rows moved.
+
+    The cutoff is rounded down to a month start, so a month is archived
+    in one go rather than a day at a time — one file per month, not one
+    per run.
+    """
+    days = archive_after_days() if days is None else days
+    if days <= 0:
+        return 0
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff = _month_start(now - timedelta(days=days))
+    # Only rolled-up measurements are eligible; fold in the latest first.
+    run_rollup()
+    moved = 0
+    for spec in _SPECS:
+        table_moved = 0
+        for month in _pending_months(spec, cutoff):
+            table_moved += _archive_month(spec, cutoff, month)
+        if table_moved:
+            print(
+                f"🧊 Archived {table_moved} {spec[0]} row(s) before "
+                f"{cutoff:%Y-%m} to {archive_dir()}",
+                flush=True,
+            )
+        moved += table_moved
+    return moved
+
+
+def run_cold_archive_job() -> None:
+    """Scheduler entry point."""
+    try:
+        run_cold_archive()
+    except Exception as e:
+        # Each month commits on its own, so whatever moved before the
+        # failure stays moved; the next run picks up the rest.
+        print(f"[cold_archive] run failed: {e}", flush=True)
+
+
+def purge_module(con, ids) -> int:
+    """Drop a deleted module's rows from the archive, on ``con`` inside
+    the caller's lock (``routes/modules.py``'s ``delete_module``).
+
+    Every file holding the module's rows is rewritten without them (or
+    dropped if nothing else is left) and the manifest and views point at
+    the new files. That is one transaction of its own: the caller's
+    cascade runs in autocommit (DuckDB rejects deleting a parent row in
+    the transaction that deleted its children), so there is no caller
+    transaction to join. If a step fails, the manifest rolls back and
+    the files written so far are removed, as in ``_archive_month``; once
+    it commits, the replaced files are removed. Returns how many files
+    were replaced.
+    """
+    root = archive_dir()
+    modules = {spec[0]: spec for spec in _SPECS}
+    replaced, written_files = [], []
+    con.execute("BEGIN")
+    try:
+        listed = con.execute(
+            "SELECT path, table_name, month FROM cold_archive_manifest ORDER BY path"
+        ).fetchall()
+        for rel, table, month in listed:
+            _, ts_col, module_col, _ = modules[table]
+            full = os.path.join(root, rel)
+            if not os.path.exists(full):
+                continue
+            hits = con.execute(
+                f"SELECT COUNT(*) FROM read_parquet({_quote(full)}) "
+                f"WHERE {module_col} IN (?, ?)",
+                list(ids),
+            ).fetchone()[0]
+            if not hits:
+                continue
+            con.execute("DELETE FROM cold_archive_manifest WHERE path = ?", [rel])
+            new_rel, new_full = _new_file(table, month)
+            written_files.append(new_full)
+            written, lo, hi = _write_file(
+                con,
+                new_full,
+                ts_col,
+                f"SELECT * FROM read_parquet({_quote(full)}) "
+                f"WHERE {module_col} NOT IN (?, ?)",
+                list(ids),
+            )
+            if written:
+                con.execute(
+                    "INSERT INTO cold_archive_manifest "
+                    "(path, table_name, month, row_count, min_ts, max_ts) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [new_rel, table, month, written, lo, hi],
+                )
+            else:
+                os.remove(new_full)
+            replaced.append(full)
+        if replaced:
+            refresh_archive_views(con)
+        con.commit()
+    except BaseException:
+        try:
+            con.rollback()
+        except Exception:
+            # Already torn down; the original error is the useful one.
+            pass
+        # Rolled back: the manifest never listed these files.
+        for path in written_files:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    # Committed: the manifest no longer names the old files.
+    for path in replaced:
+        os.remove(path)
+    return len(replaced)
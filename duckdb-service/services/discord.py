@@ -1,6 +1,48 @@
+"""Discord webhook notifications, sent from a background thread.
+
+``send_discord_message`` used to ``requests.post`` inline: registration
+(``POST /new_module``) waited on Discord before answering the module,
+``run_backup`` waited after the copy, and the silence watcher posted one
+webhook per module — 50 serial calls, each up to a 5 s timeout, when a
+power cut silences a site. Now it only enqueues and returns; one sender
+thread does the HTTP:
+
+* **Bounded queue** (``DISCORD_QUEUE_MAX``, default 1000). A caller never
+  blocks: if Discord is down long enough to fill it, new messages are
+  dropped and counted (``discord_dropped_total`` on ``/metrics``) — a
+  notification is not worth back-pressure on a request thread.
+* **One ``requests.Session``**, so consecutive posts reuse the TLS
+  connection to Discord instead of a handshake each.
+* **Rate-limit-aware retry.** A 429 waits the ``Retry-After`` Discord
+  sends; a 5xx or connection error backs off exponentially; up to
+  ``_MAX_ATTEMPTS`` tries. Another 4xx is final (a revoked webhook won't
+  start working on retry). A success with ``X-RateLimit-Remaining: 0``
+  waits out ``X-RateLimit-Reset-After`` before the next post, so a burst
+  doesn't hit the 429 at all.
+* **Digests.** A message sent with ``digest=<header>`` is held for
+  ``DISCORD_DIGEST_WINDOW_S`` (default 60) from the first one; everything
+  that arrived under the same header in that window goes out as one
+  message, ``header.format(n=...)`` over the individual lines — "🔴 **50
+  modules down**", not fifty posts. A window with a single message sends
+  it unchanged.
+
+Delivery is best-effort, as it always was: failures are printed, never
+raised on the caller's path. ``flush()`` drains the queue (and any open
+digest) — the tests and the atexit hook use it.
+"""
+
+from __future__ import annotations
+
+import atexit
 import os
+import queue
+import threading
+import time
+
 import requests
 
+from services import metrics
+
 # No baked-in fallback: a webhook URL is a bearer credential, and a
 # committed default ships it to every clone (2026-07 audit, for #201 —
 # the previously committed webhook was rotated). Unset means Discord
@@ -12,13 +54,224 @@ if not DISCORD_WEBHOOK_URL:
         "WARNING: DISCORD_WEBHOOK_URL is not set — Discord notifications are disabled"
     )
 
+DISCORD_QUEUE_MAX = int(os.getenv("DISCORD_QUEUE_MAX", "1000"))
+DISCORD_DIGEST_WINDOW_S = float(os.getenv("DISCORD_DIGEST_WINDOW_S", "60"))
+
+_TIMEOUT_S = 5
+_MAX_ATTEMPTS = 5
+_BACKOFF_S = 1.0
+# Never sleep longer than this on one Retry-After / backoff: a wedged
+# webhook shouldn't park the sender for an hour.
+_MAX_WAIT_S = 60.0
+# Discord rejects a message whose content is longer than this.
+_MAX_CONTENT = 2000
+# Retry waits go through here (the tests record them instead of sleeping).
+_sleep = time.sleep
+
+
+class _Message:
+    __slots__ = ("content", "digest", "done")
+
+    def __init__(self, content, digest, done=None) -> None:
+        self.content = content
+        self.digest = digest
+        # Set on a flush marker only.
+        self.done: threading.Event | None = done
 
-def send_discord_message(content: str):
+
+_queue: queue.Queue[_Message] = queue.Queue(maxsize=DISCORD_QUEUE_MAX)
+_session = requests.Session()
+_sender: threading.Thread | None = None
+_sender_guard = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"sent": 0, "failed": 0, "dropped": 0, "retries": 0, "coalesced": 0}
+
+
+def send_discord_message(content: str, digest: str | None = None) -> None:
+    """Queue ``content`` for the webhook and return at once.
+
+    ``digest`` is a header with an ``{n}`` placeholder; messages sharing
+    it within one ``DISCORD_DIGEST_WINDOW_S`` are sent as one.
+    """
     if not DISCORD_WEBHOOK_URL:
         print(f"Discord message skipped (no webhook URL): {content[:80]}...")
         return
+    _ensure_sender()
     try:
-        resp = requests.post(DISCORD_WEBHOOK_URL, json={"content": content}, timeout=5)
-        resp.raise_for_status()
-    except Exception as e:
-        print(f"Discord webhook failed: {e}")
+        _queue.put_nowait(_Message(content, digest))
+    except queue.Full:
+        _bump(dropped=1)
+        print(f"Discord queue full, message dropped: {content[:80]}...")
+
+
+def flush(timeout: float | None = None) -> bool:
+    """Block until everything queued before this call has been sent (or
+    given up on), open digests included. Returns False on timeout."""
+    if _sender is None or _queue.unfinished_tasks == 0:
+        return True
+    marker = _Message(None, None, threading.Event())
+    _ensure_sender()
+    # A flush may wait for room; only callers that asked for the wait do.
+    _queue.put(marker)
+    return marker.done.wait(timeout)
+
+
+def stats() -> dict[str, int]:
+    """Counters since process start: messages sent, failed, dropped, etc."""
+    with _stats_lock:
+        out = dict(_stats)
+    out["pending"] = _queue.qsize()
+    return out
+
+
+def _bump(**deltas: int) -> None:
+    with _stats_lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+
+
+def _ensure_sender() -> None:
+    global _sender
+    if _sender is not None and _sender.is_alive():
+        return
+    with _sender_guard:
+        if _sender is None or not _sender.is_alive():
+            _sender = threading.Thread(target=_run, name="discord", daemon=True)
+            _sender.start()
+
+
+def _run() -> None:
+    # header -> lines held for the open digest window (insertion-ordered).
+    # Held messages stay unfinished on the queue until they go out, so
+    # ``flush()``'s fast path can't return over an open window.
+    digests: dict[str, list[str]] = {}
+    window_end = 0.0
+    while True:
+        timeout = None
+        if digests:
+            timeout = max(0.0, window_end - time.monotonic())
+        try:
+            msg = _queue.get(timeout=timeout)
+        except queue.Empty:
+            msg = None
+        done = 0 if msg is None else 1
+        try:
+            if msg is None or msg.done is not None:
+                # Window closed, or a flush wants everything out now.
+                held = list(digests.items())
+                digests.clear()
+                done += sum(len(lines) for _, lines in held)
+                for header, lines in held:
+                    _deliver(_render_digest(header, lines))
+                if msg is not None:
+                    msg.done.set()
+            elif msg.digest is None:
+                _deliver(msg.content)
+            else:
+                if not digests:
+                    window_end = time.monotonic() + DISCORD_DIGEST_WINDOW_S
+                digests.setdefault(msg.digest, []).append(msg.content)
+                done = 0
+        except Exception as e:  # never let the sender thread die
+            print(f"Discord sender error: {type(e).__name__}: {e}")
+        finally:
+            for _ in range(done):
+                _queue.task_done()
+
+
+def _render_digest(header: str, lines: list[str]) -> str:
+    if len(lines) == 1:
+        return lines[0]
+    _bump(coalesced=len(lines) - 1)
+    return header.format(n=len(lines)) + "\n" + "\n".join(lines)
+
+
+def _chunks(content: str) -> list[str]:
+    """Split at line breaks into pieces Discord accepts; a single line
+    over the limit is cut."""
+    out: list[str] = []
+    current = ""
+    for line in content.split("\n"):
+        line = line[:_MAX_CONTENT]
+        if current and len(current) + 1 + len(line) > _MAX_CONTENT:
+            out.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    out.append(current)
+    return out
+
+
+def _deliver(content: str) -> None:
+    for chunk in _chunks(content):
+        if _post(chunk):
+            _bump(sent=1)
+        else:
+            _bump(failed=1)
+
+
+def _post(content: str) -> bool:
+    url = DISCORD_WEBHOOK_URL
+    if not url:
+        return False
+    for attempt in range(_MAX_ATTEMPTS):
+        wait = _BACKOFF_S * 2**attempt
+        try:
+            resp = _session.post(url, json={"content": content}, timeout=_TIMEOUT_S)
+        except requests.RequestException as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            if resp.status_code == 429:
+                error = "429 rate limited"
+                wait = _header_seconds(resp, "Retry-After", wait)
+            elif resp.status_code >= 500:
+                error = f"HTTP {resp.status_code}"
+            elif resp.status_code >= 400:
+                print(f"Discord webhook failed: HTTP {resp.status_code}")
+                return False
+            else:
+                if resp.headers.get("X-RateLimit-Remaining") == "0":
+                    _sleep(
+                        min(
+                            _header_seconds(resp, "X-RateLimit-Reset-After", 0),
+                            _MAX_WAIT_S,
+                        )
+                    )
+                return True
+        if attempt + 1 == _MAX_ATTEMPTS:
+            break
+        _bump(retries=1)
+        _sleep(min(wait, _MAX_WAIT_S))
+    print(f"Discord webhook failed after {_MAX_ATTEMPTS} attempts: {error}")
+    return False
+
+
+def _header_seconds(resp, name: str, default: float) -> float:
+    try:
+        return max(0.0, float(resp.headers[name]))
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
+def _collect_metrics():
+    snapshot = stats()
+    yield from metrics.counter_lines(
+        "discord_pending_messages",
+        "Discord messages queued for the sender thread.",
+        snapshot["pending"],
+        kind="gauge",
+    )
+    for key in ("sent", "failed", "dropped", "retries", "coalesced"):
+        yield from metrics.counter_lines(
+            f"discord_{key}_total",
+            f"Discord messages {key} since process start.",
+            snapshot[key],
+        )
+
+
+metrics.register_collector(_collect_metrics)
+
+# Send what's queued on a clean stop instead of losing it with the daemon
+# thread; an open digest goes out early. SIGTERM from compose only reaches
+# this because app.py installs services/shutdown.py's handler.
+atexit.register(flush, 10.0)
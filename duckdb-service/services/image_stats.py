@@ -0,0 +1,87 @@
+"""Rebuild the pre-aggregated `module_image_stats` table from scratch.
+
+`GET /modules` reads `real_image_count` / `last_image_at` from
+`module_image_stats`, which `record_image`, `delete_image_upload` and the
+module-delete cascade maintain incrementally. Anything that writes
+`image_uploads` behind those routes' backs — a manual SQL fix, a restore
+of an older backup into a newer schema, a future writer that forgets the
+stats — leaves the aggregates drifted. This recomputes every row from
+`image_uploads` in one write transaction, so concurrent readers see either
+the old aggregates or the new ones, never a half-rebuilt table.
+
+Run it with the service stopped (the serving process holds DuckDB's file
+lock for its whole lifetime; see `db/connection.py`)::
+
+    cd duckdb-service && DUCKDB_PATH=/data/app.duckdb python -m services.image_stats
+"""
+
+from __future__ import annotations
+
+from db.repository import write_transaction
+
+# Modules whose stored aggregates disagree with the upload history. A
+# stats row with no uploads left is correct at 0 / NULL (it is kept for
+# its `first_upload_at` marker).
+_DRIFT_SQL = """
+    SELECT COUNT(*)
+      FROM (SELECT module_id,
+                   COUNT(*) AS real_image_count,
+                   MAX(uploaded_at) AS last_image_at
+              FROM image_uploads
+          GROUP BY module_id) AS truth
+      FULL OUTER JOIN module_image_stats AS s USING (module_id)
+     WHERE COALESCE(truth.real_image_count, 0)
+               IS DISTINCT FROM COALESCE(s.real_image_count, 0)
+        OR truth.last_image_at IS DISTINCT FROM s.last_image_at
+"""
+
+
+def reconcile_image_stats() -> dict:
+    """Recompute `module_image_stats` from `image_uploads`.
+
+    The two aggregates are overwritten; `first_upload_at` is only filled
+    where missing (with the module's oldest upload), never moved — it
+    records that the first-upload ping already went out.
+
+    Returns ``{"modules": <rows after rebuild>, "drifted": <rows that
+    were wrong or missing before>}``.
+    """
+    with write_transaction() as con:
+        drifted = con.execute(_DRIFT_SQL).fetchone()[0]
+        con.execute(
+            """
+            UPDATE module_image_stats
+               SET real_image_count = 0, last_image_at = NULL
+             WHERE module_id NOT IN (SELECT module_id FROM image_uploads)
+            """
+        )
+        con.execute(
+            """
+            INSERT INTO module_image_stats
+              (module_id, real_image_count, last_image_at, first_upload_at)
+            SELECT module_id, COUNT(*), MAX(uploaded_at), MIN(uploaded_at)
+              FROM image_uploads
+          GROUP BY module_id
+            ON CONFLICT (module_id) DO UPDATE SET
+              real_image_count = excluded.real_image_count,
+              last_image_at = excluded.last_image_at,
+              first_upload_at = COALESCE(module_image_stats.first_upload_at,
+                                         excluded.first_upload_at)
+            """
+        )
+        modules = con.execute("SELECT COUNT(*) FROM module_image_stats").fetchone()[0]
+    return {"modules": modules, "drifted": drifted}
+
+
+if __name__ == "__main__":
+    from db.schema import init_db
+
+    # init_db first so a volume from before `module_image_stats` existed
+    # gets the table (and its boot-time backfill) instead of a
+    # CatalogException.
+    init_db()
+    result = reconcile_image_stats()
+    print(
+        f"✅ module_image_stats rebuilt: {result['modules']} module(s), "
+        f"{result['drifted']} drifted row(s) corrected"
+    )
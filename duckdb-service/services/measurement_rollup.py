@@ -0,0 +1,149 @@
+"""Hourly / daily rollups and raw-row retention for ``measurements``.
+
+``GET /modules/<id>/measurements`` used to ``AVG`` the raw rows of up to
+90 days on every request. Two rollup tables (``measurements_hourly``,
+``measurements_daily`` — DDL in ``db/schema.py``) now hold one row per
+(module, metric, source, bucket) with sample count, sum, min and max,
+and the read route sums those instead.
+
+**Incremental, from a watermark.** ``run_rollup`` folds in exactly the
+raw rows whose ``ingested_at`` lies in ``(watermark, now - _LAG]`` and
+moves the watermark to the upper bound, all in one transaction: a row is
+rolled up once, however old its ``ts``. New buckets are inserted,
+existing ones merged (``sample_count``/``value_sum`` add up, min/max via
+LEAST/GREATEST), so a late weather backfill lands in last year's buckets
+without re-reading them. The job holds the write lock like every other
+writer, so no transaction that stamped an earlier ``ingested_at`` can
+still be uncommitted; ``_LAG`` keeps a row stamped in the same instant
+as the upper bound for the next run instead of losing it.
+
+Between runs the read route adds the not-yet-rolled-up tail (rows past
+the watermark, read in the same statement as the rollup so both come
+from one snapshot) — a chart is never a run behind.
+
+**Retention.** With ``MEASUREMENTS_RETENTION_DAYS`` > 0 (default 0,
+keep forever), ``run_retention`` deletes raw rows whose ``ts`` is older
+than that — but only rows already rolled up, and never a ``*-backfill``
+source: those are imported history the boot backfill and the weather
+backfill dedupe against (see
+``docs/08-crosscutting-concepts/measurement-retention.md``) — nor the
+newest row of a (module, source), which the weather worker resumes from
+after a module has been quiet for longer than the retention window. The
+rollups themselves are kept.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta, timezone
+
+from db.repository import write_transaction
+
+MEASUREMENTS_ROLLUP_INTERVAL_MIN = int(
+    os.getenv("MEASUREMENTS_ROLLUP_INTERVAL_MIN", "5")
+)
+
+# Rows stamped this close to the run's own clock wait for the next run.
+_LAG = timedelta(seconds=1)
+
+# (table, date_trunc unit) per rollup.
+ROLLUPS = (("measurements_hourly", "hour"), ("measurements_daily", "day"))
+
+_MERGE = """
+    INSERT INTO {table}
+        (module_mac, metric, source, bucket,
+         sample_count, value_sum, value_min, value_max)
+    SELECT module_mac, metric, source,
+           date_trunc('{unit}', ts)::TIMESTAMP AS bucket,
+           COUNT(*), SUM(value), MIN(value), MAX(value)
+      FROM measurements
+     WHERE ingested_at > ? AND ingested_at <= ?
+     GROUP BY module_mac, metric, source, bucket
+    ON CONFLICT (module_mac, metric, bucket, source) DO UPDATE SET
+        sample_count = sample_count + excluded.sample_count,
+        value_sum    = value_sum + excluded.value_sum,
+        value_min    = LEAST(value_min, excluded.value_min),
+        value_max    = GREATEST(value_max, excluded.value_max)
+"""
+
+# Raw rows that may leave the live table — deleted by retention, moved to
+# Parquet by `services/cold_archive.py`. One ``?``: the ``ts`` cutoff.
+EXPIRABLE = """
+    ts < ?
+    AND ingested_at <= (SELECT watermark FROM measurements_rollup_state
+                         WHERE id = 1)
+    AND source NOT LIKE '%-backfill'
+    AND ts < (SELECT MAX(m.ts) FROM measurements m
+               WHERE m.module_mac = measurements.module_mac
+                 AND m.source = measurements.source)
+"""
+
+
+def retention_days() -> int:
+    return int(os.getenv("MEASUREMENTS_RETENTION_DAYS", "0"))
+
+
+def run_rollup() -> int:
+    """Fold every raw row past the watermark into both rollups.
+
+    Returns the number of raw rows folded in. Nothing is written (and
+    the watermark stays put) when there are none, so an idle tick
+    doesn't invalidate the cached measurement reads.
+    """
+    with write_transaction() as con:
+        low = con.execute(
+            "SELECT watermark FROM measurements_rollup_state WHERE id = 1"
+        ).fetchone()[0]
+        # Same clock and cast as the column default that stamped the rows.
+        high = con.execute("SELECT CURRENT_TIMESTAMP::TIMESTAMP").fetchone()[0] - _LAG
+        pending = con.execute(
+            "SELECT COUNT(*) FROM measurements "
+            "WHERE ingested_at > ? AND ingested_at <= ?",
+            [low, high],
+        ).fetchone()[0]
+        if not pending:
+            return 0
+        for table, unit in ROLLUPS:
+            con.execute(_MERGE.format(table=table, unit=unit), [low, high])
+        con.execute(
+            "UPDATE measurements_rollup_state SET watermark = ? WHERE id = 1",
+            [high],
+        )
+    return pending
+
+
+def run_retention(days: int | None = None) -> int:
+    """Delete rolled-up raw rows older than ``days`` (default from
+    ``MEASUREMENTS_RETENTION_DAYS``; ``0`` keeps everything).
+
+    Rolls up first, so the rows about to age out are covered. Returns
+    the number of raw rows deleted.
+    """
+    days = retention_days() if days is None else days
+    if days <= 0:
+        return 0
+    run_rollup()
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    with write_transaction() as con:
+        deleted = con.execute(
+            f"DELETE FROM measurements WHERE {EXPIRABLE}", [cutoff]
+        ).fetchone()[0]
+    if deleted:
+        print(
+            f"🧹 Dropped {deleted} raw measurement row(s) older than {days} days "
+            "(rollups kept)",
+            flush=True,
+        )
+    return deleted
+
+
+def run_measurement_maintenance() -> None:
+    """Scheduler entry point: roll up, then apply retention."""
+    try:
+        run_rollup()
+        run_retention()
+    except Exception as e:
+        # Swallow like the other scheduled jobs: a failed tick must not
+        # kill the scheduler thread; the next one retries from the same
+        # watermark.
+        print(f"[measurement_rollup] tick failed: {e}", flush=True)
@@ -0,0 +1,262 @@
+"""In-process timing histograms, rendered as Prometheus text on ``/metrics``.
+
+``_access_log_finish`` logs the total milliseconds per request, but not where
+they went. These histograms split that total into the parts a slow dashboard
+can actually be blamed on:
+
+* ``db_lock_wait_seconds`` / ``db_lock_hold_seconds`` — per ``DatabaseLock``
+  mode (``read`` / ``write`` / ``exclusive``): queueing behind other requests
+  versus time spent inside the critical section.
+* ``db_cursor_open_seconds`` — ``get_conn()``.
+* ``db_query_seconds`` / ``db_query_rows`` — every ``execute``/``executemany``
+  on a ``get_conn()`` cursor, labelled by a statement fingerprint (literals
+  and whitespace normalized away, so the label set is the set of distinct
+  statements in the code, not in the data), plus rows fetched per statement.
+* ``http_request_seconds`` / ``http_json_serialize_seconds`` — per Flask
+  endpoint; the remainder after lock + SQL + JSON is Flask/Python.
+
+Deliberately dependency-free (no ``prometheus_client``): a fixed-bucket
+histogram behind one small lock per metric is all the exposition needs, and
+observing costs a dict lookup plus a bisect. Values are process-cumulative
+and reset on restart, which Prometheus' ``rate()``/``histogram_quantile()``
+handle natively.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+
+SECONDS_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+ROWS_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+# A fingerprint is a label value; cap the distinct ones so a statement built
+# from data (an IN-list of varying length, say) can't grow the exposition
+# without bound. Overflow is folded into one "other" series.
+_MAX_FINGERPRINTS = 500
+_FINGERPRINT_LEN = 160
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(
+        self, name: str, help_text: str, labels: tuple[str, ...], buckets: tuple
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[idx] += 1
+            series[-1] += value
+
+    def snapshot(self) -> dict[tuple[str, ...], list[float]]:
+        with self._lock:
+            return {k: list(v) for k, v in self._series.items()}
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, series in sorted(self.snapshot().items()):
+            base = list(zip(self.labels, label_values, strict=True))
+            running = 0
+            # ``series`` runs on past the buckets (+Inf count, sum).
+            for bound, count in zip(self.buckets, series, strict=False):
+                running += count
+                yield _sample(
+                    f"{self.name}_bucket", base + [("le", _num(bound))], running
+                )
+            running += series[len(self.buckets)]
+            yield _sample(f"{self.name}_bucket", base + [("le", "+Inf")], running)
+            yield _sample(f"{self.name}_sum", base, series[-1])
+            yield _sample(f"{self.name}_count", base, running)
+
+
+_registry: dict[str, Histogram] = {}
+_registry_lock = threading.Lock()
+# Extra exposition lines computed at scrape time (e.g. group-commit counters).
+_collectors: list[Callable[[], Iterable[str]]] = []
+
+
+def histogram(
+    name: str,
+    help_text: str,
+    labels: tuple[str, ...] = (),
+    buckets: tuple = SECONDS_BUCKETS,
+) -> Histogram:
+    """Get-or-create a histogram. Idempotent, so module reloads are safe."""
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Histogram(name, help_text, labels, buckets)
+        return metric
+
+
+def register_collector(fn: Callable[[], Iterable[str]]) -> None:
+    with _registry_lock:
+        if fn not in _collectors:
+            _collectors.append(fn)
+
+
+def render() -> str:
+    """Whole registry in Prometheus text exposition format 0.0.4."""
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+        collectors = list(_collectors)
+    lines: list[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for collect in collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+
+def counter_lines(name: str, help_text: str, value: float, kind: str = "counter"):
+    """Exposition lines for a single unlabelled counter/gauge."""
+    return [
+        f"# HELP {name} {help_text}",
+        f"# TYPE {name} {kind}",
+        _sample(name, [], value),
+    ]
+
+
+def labelled_lines(
+    name: str,
+    help_text: str,
+    labels: tuple[str, ...],
+    values: dict[tuple[str, ...], float],
+    kind: str = "counter",
+):
+    """Exposition lines for a labelled counter/gauge: one sample per key of
+    ``values`` (a tuple of label values, in ``labels`` order)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for label_values, value in sorted(values.items()):
+        lines.append(_sample(name, list(zip(labels, label_values, strict=True)), value))
+    return lines
+
+
+# ---------- statement fingerprints ----------
+
+_COMMENT_RE = re.compile(r"--[^\n]*")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WS_RE = re.compile(r"\s+")
+_fingerprints_seen: set[str] = set()
+
+
+@lru_cache(maxsize=2048)
+def _normalize(sql: str) -> str:
+    fp = _COMMENT_RE.sub(" ", sql)
+    fp = _STRING_RE.sub("?", fp)
+    fp = _NUMBER_RE.sub("?", fp)
+    fp = _IN_LIST_RE.sub("(?+)", fp)
+    fp = _WS_RE.sub(" ", fp).strip()
+    return fp[:_FINGERPRINT_LEN]
+
+
+def fingerprint(sql: str) -> str:
+    """Literal- and whitespace-free label for ``sql``, cardinality-capped."""
+    fp = _normalize(sql)
+    if fp in _fingerprints_seen:
+        return fp
+    with _registry_lock:
+        if len(_fingerprints_seen) >= _MAX_FINGERPRINTS:
+            return "other"
+        _fingerprints_seen.add(fp)
+    return fp
+
+
+# ---------- exposition helpers ----------
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return repr(value)
+    return str(value)
+
+
+def _sample(name: str, labels: list[tuple[str, str]], value: float) -> str:
+    if labels:
+        body = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+        return f"{name}{{{body}}} {_num(value)}"
+    return f"{name} {_num(value)}"
+
+
+# ---------- the service's metrics ----------
+
+LOCK_WAIT = histogram(
+    "db_lock_wait_seconds",
+    "Time spent waiting to enter a DatabaseLock section.",
+    ("mode",),
+)
+LOCK_HOLD = histogram(
+    "db_lock_hold_seconds",
+    "Time spent inside a DatabaseLock section.",
+    ("mode",),
+)
+CURSOR_OPEN = histogram(
+    "db_cursor_open_seconds",
+    "Time for get_conn() to hand out a cursor (includes the first open).",
+)
+QUERY = histogram(
+    "db_query_seconds",
+    "DuckDB execute/executemany time by statement fingerprint.",
+    ("statement",),
+)
+QUERY_ROWS = histogram(
+    "db_query_rows",
+    "Rows fetched per statement, by statement fingerprint.",
+    ("statement",),
+    ROWS_BUCKETS,
+)
+GROUP_COMMIT_BATCH = histogram(
+    "db_group_commit_batch_jobs",
+    "Jobs committed per group-commit transaction.",
+    (),
+    ROWS_BUCKETS,
+)
+HTTP_REQUEST = histogram(
+    "http_request_seconds",
+    "Flask request time by endpoint, method and status.",
+    ("endpoint", "method", "status"),
+)
+JSON_SERIALIZE = histogram(
+    "http_json_serialize_seconds",
+    "Time spent serializing JSON response bodies, by endpoint.",
+    ("endpoint",),
+)
@@ -0,0 +1,35 @@
+"""Turn SIGTERM into a normal interpreter exit.
+
+The container runs ``python app.py`` as PID 1, and ``docker compose
+stop`` sends it SIGTERM. Python's default action for SIGTERM ends the
+process at once, without running atexit handlers. Those handlers do the
+shutdown work: ``services.discord`` sends what is queued,
+``db.group_commit`` commits writes already acknowledged under
+``GROUP_COMMIT_ACK=enqueue``, and ``db.connection`` closes (and so
+checkpoints) the shared DuckDB handle.
+
+``install()`` makes SIGTERM raise ``SystemExit(0)`` in the main thread
+instead. That unwinds ``app.run`` like Ctrl-C would, and the atexit
+handlers run on the way out. Their timeouts add up to more than the 10 s
+compose waits by default before SIGKILL, so both compose files set
+``stop_grace_period: 30s`` for this service.
+"""
+
+from __future__ import annotations
+
+import signal
+import sys
+import threading
+
+
+def _exit(signum, frame):
+    sys.exit(0)
+
+
+def install() -> bool:
+    """Install the SIGTERM handler. Returns False (and does nothing) off
+    the main thread, where Python doesn't allow setting one."""
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signal.SIGTERM, _exit)
+    return True
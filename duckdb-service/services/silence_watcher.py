@@ -1,17 +1,38 @@
 """
-Silence watcher — periodic check that fires Discord alerts when a module
-goes quiet, and a recovery message when it comes back.
+Silence watcher — fires Discord alerts when a module goes quiet, and a
+recovery message when it comes back.
 
 Considers any of three liveness signals: module re-registration
 (`module_configs.last_seen_at`), most recent image upload, most recent
 heartbeat. Whichever is freshest wins. (Pre-#97 split this read
 `module_configs.updated_at`; that column is now row-metadata only —
 see chapter 11 "updated_at semantic overload".)
+
+Event-driven. The freshest signal per module lives in memory: `load()`
+reads it once at boot, and the write routes report every new one through
+`touch()` after their commit (`POST /new_module`, `POST /heartbeat`,
+`POST /record_image`). Each module has one deadline — when it will cross
+`SILENCE_THRESHOLD_S`, when a standing alert may re-fire, or "now" when
+an alerted module was just heard from — kept in a min-heap. A timer
+thread sleeps until the earliest deadline and evaluates only the modules
+that are due, so an alert is raised within a second of the threshold
+instead of on the next 15-minute fleet scan, and nothing scans the fleet
+or holds the DB lock to find out. The only DB work left is the
+`last_silence_alert_at` write when an alert fires or clears. Alerts are
+queued on the Discord sender with a digest header, so the tick never
+waits on the webhook and a burst of modules going quiet together is one
+message. The digest holds them until its window closes, so the post
+reaches Discord up to `DISCORD_DIGEST_WINDOW_S` (default 60 s) after the
+threshold.
 """
 
-from datetime import datetime
+from __future__ import annotations
+
+import heapq
+import threading
+from datetime import datetime, timedelta, timezone
 
-from db.connection import lock, get_conn
+from db.repository import query_all, write_transaction
 from services.discord import send_discord_message
 
 # A module is "silent" once nothing has been heard from it for this long.
@@ -20,6 +41,41 @@ SILENCE_THRESHOLD_S = 3 * 3600  # 3 hours
 # Don't re-fire a silence alert more often than this for the same module.
 REALERT_INTERVAL_S = 6 * 3600  # 6 hours
 
+# When recording a tick's alerts fails, its modules come due again this
+# much later; nothing is sent and no in-memory state changes until then.
+WRITE_RETRY_S = 60
+
+# Digest headers (``services/discord.py``) for alerts that land in the
+# same window.
+DOWN_DIGEST = "🔴 **{n} modules down**"
+BACK_DIGEST = "🟢 **{n} modules back**"
+
+
+class _Module:
+    __slots__ = ("name", "last_seen", "alerted_at", "due")
+
+    def __init__(self, name, last_seen, alerted_at) -> None:
+        self.name = name
+        self.last_seen = last_seen
+        self.alerted_at = alerted_at
+        # The one live heap entry for this module; older entries for it
+        # are skipped when popped (lazy deletion).
+        self.due: datetime | None = None
+
+
+_cond = threading.Condition()
+_modules: dict[str, _Module] = {}
+_deadlines: list[tuple[datetime, str]] = []
+_timer: threading.Thread | None = None
+# One tick at a time, from popping the deadlines to the last Discord send:
+# a direct `check_silence()` that races the timer thread waits for the
+# thread's tick to finish instead of returning before its alerts are out.
+_tick = threading.Lock()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 def _fmt_age(seconds: float) -> str:
     if seconds < 3600:
@@ -29,73 +85,191 @@ def _fmt_age(seconds: float) -> str:
     return f"{seconds / 86400:.1f}d"
 
 
-def check_silence():
-    now = datetime.now()
-    silence_alerts = []
-    recovery_alerts = []
+def _schedule(module_id: str, m: _Module, due: datetime | None) -> None:
+    # Caller holds `_cond`.
+    if due is None or due == m.due:
+        return
+    m.due = due
+    heapq.heappush(_deadlines, (due, module_id))
+    _cond.notify()
+
 
-    with lock:
-        con = get_conn()
-        rows = con.execute(
-            """
-            SELECT m.id,
-                   m.name,
-                   m.last_seen_at,
-                   m.last_silence_alert_at,
-                   (SELECT MAX(uploaded_at)
-                      FROM image_uploads
-                     WHERE module_id = m.id) AS last_image_at,
-                   (SELECT MAX(received_at)
-                      FROM module_heartbeats
-                     WHERE module_id = m.id) AS last_hb_at
-              FROM module_configs m
-            """
-        ).fetchall()
-
-        for row in rows:
-            mid, name, last_seen_at, alerted_at, last_image_at, last_hb_at = row
+def load() -> int:
+    """(Re)build the index from the DB. Returns the number of modules.
 
+    The one fleet-wide read left, at boot. The per-module latest upload
+    and heartbeat come from the one-row-per-module summary tables
+    (`module_image_stats`, `module_latest_heartbeat`), not from a `MAX()`
+    over each history. Every module is due at once, so a module that went
+    quiet (or recovered) while the service was down is settled on the
+    first tick, with `last_silence_alert_at` still suppressing re-alerts.
+    """
+    rows = query_all(
+        """
+        SELECT m.id, m.name, m.last_seen_at, m.last_silence_alert_at,
+               s.last_image_at, h.received_at AS last_hb_at
+          FROM module_configs m
+          LEFT JOIN module_image_stats s ON s.module_id = m.id
+          LEFT JOIN module_latest_heartbeat h ON h.module_id = m.id
+        """
+    )
+    now = _utcnow()
+    with _cond:
+        _modules.clear()
+        _deadlines.clear()
+        for r in rows:
             # lastSeenAt = freshest of the three liveness signals; ignore NULLs.
             candidates = [
-                t for t in (last_seen_at, last_image_at, last_hb_at) if t is not None
+                t
+                for t in (r["last_seen_at"], r["last_image_at"], r["last_hb_at"])
+                if t is not None
             ]
-            if not candidates:
-                continue  # never seen — don't alert; setup is in progress.
-            last_seen = max(candidates)
-            age_s = (now - last_seen).total_seconds()
-
-            if age_s > SILENCE_THRESHOLD_S:
-                # Currently silent.
-                if (
-                    alerted_at is None
-                    or (now - alerted_at).total_seconds() > REALERT_INTERVAL_S
-                ):
-                    silence_alerts.append((mid, name, last_seen, age_s))
+            m = _Module(
+                r["name"],
+                max(candidates) if candidates else None,
+                r["last_silence_alert_at"],
+            )
+            _modules[r["id"]] = m
+            _schedule(r["id"], m, now)
+    return len(rows)
+
+
+def touch(module_id: str, at: datetime | None = None, name: str | None = None) -> None:
+    """Record that `module_id` was heard from at `at` (default now, UTC).
+
+    Called by the write routes after their commit. `name` is passed by
+    registration, which is also the only call that may add a module the
+    index doesn't know yet — an upload or heartbeat for an unregistered
+    id is ignored, as the old scan over `module_configs` ignored it.
+    """
+    at = at or _utcnow()
+    with _cond:
+        m = _modules.get(module_id)
+        if m is None:
+            if name is None:
+                return
+            m = _modules[module_id] = _Module(name, None, None)
+        elif name is not None:
+            m.name = name
+        if m.last_seen is None or at > m.last_seen:
+            m.last_seen = at
+        # An alerted module is due now, for its recovery message; any
+        # other just moves its silence deadline out.
+        due = at if m.alerted_at is not None else None
+        if due is None and m.last_seen is not None:
+            due = m.last_seen + timedelta(seconds=SILENCE_THRESHOLD_S)
+        _schedule(module_id, m, due)
+    _ensure_timer()
+
+
+def forget(module_id: str) -> None:
+    """Drop a deleted module; its pending deadline is skipped when popped."""
+    with _cond:
+        _modules.pop(module_id, None)
+
+
+def _evaluate(module_id: str, m: _Module, now: datetime, alerts, recoveries):
+    # Caller holds `_cond`. Returns the module's next deadline, assuming
+    # the alert or recovery it queues is recorded; `m.alerted_at` itself
+    # only changes once it is (`_check`).
+    if m.last_seen is None:
+        return None  # never seen — don't alert; setup is in progress.
+    age_s = (now - m.last_seen).total_seconds()
+    if age_s >= SILENCE_THRESHOLD_S:
+        # Currently silent.
+        if (
+            m.alerted_at is None
+            or (now - m.alerted_at).total_seconds() >= REALERT_INTERVAL_S
+        ):
+            alerts.append((module_id, m.name, m.last_seen, age_s))
+            return now + timedelta(seconds=REALERT_INTERVAL_S)
+        return m.alerted_at + timedelta(seconds=REALERT_INTERVAL_S)
+    # Currently alive. If we previously raised a silence alert, it has now
+    # recovered — fire one recovery message and clear state.
+    if m.alerted_at is not None:
+        recoveries.append((module_id, m.name, (now - m.alerted_at).total_seconds()))
+    return m.last_seen + timedelta(seconds=SILENCE_THRESHOLD_S)
+
+
+def check_silence(now: datetime | None = None) -> None:
+    """Evaluate every module whose deadline has passed by `now`.
+
+    Run by the timer thread as deadlines come due; callable directly
+    (tests pass a future `now`). Touches only due modules, never the
+    fleet.
+    """
+    with _tick:
+        _check(now or _utcnow())
+
+
+def _check(now: datetime) -> None:
+    silence_alerts = []
+    recovery_alerts = []
+    with _cond:
+        while _deadlines and _deadlines[0][0] <= now:
+            due, mid = heapq.heappop(_deadlines)
+            m = _modules.get(mid)
+            if m is None or m.due != due:
+                continue  # deleted, or rescheduled since this was pushed
+            m.due = None
+            nxt = _evaluate(mid, m, now, silence_alerts, recovery_alerts)
+            _schedule(mid, m, nxt)
+
+    if silence_alerts or recovery_alerts:
+        # Alert state stays in `module_configs` (ADR-005) so a restart
+        # doesn't re-fire, and `GET /modules` can show it. One short write
+        # for the whole tick. Memory follows only once it has committed, so
+        # a failed write leaves no alert that was never recorded or sent.
+        try:
+            with write_transaction() as con:
+                for mid, *_ in silence_alerts:
                     con.execute(
-                        "UPDATE module_configs SET last_silence_alert_at = ? WHERE id = ?",
+                        "UPDATE module_configs SET last_silence_alert_at = ? "
+                        "WHERE id = ?",
                         [now, mid],
                     )
-            else:
-                # Currently alive. If we previously raised a silence alert,
-                # it has now recovered — fire one recovery message and clear state.
-                if alerted_at is not None:
-                    downtime_s = (now - alerted_at).total_seconds()
-                    recovery_alerts.append((mid, name, downtime_s))
+                for mid, *_ in recovery_alerts:
                     con.execute(
-                        "UPDATE module_configs SET last_silence_alert_at = NULL WHERE id = ?",
+                        "UPDATE module_configs SET last_silence_alert_at = NULL "
+                        "WHERE id = ?",
                         [mid],
                     )
+        except Exception:
+            retry = now + timedelta(seconds=WRITE_RETRY_S)
+            with _cond:
+                for mid, *_ in silence_alerts + recovery_alerts:
+                    m = _modules.get(mid)
+                    if m is not None:
+                        _schedule(mid, m, retry)
+            raise
+        with _cond:
+            for mid, _name, last_seen, _age in silence_alerts:
+                m = _modules.get(mid)
+                if m is None:
+                    continue
+                m.alerted_at = now
+                if m.last_seen != last_seen:
+                    # Heard from since: due now for its recovery.
+                    _schedule(mid, m, now)
+            for mid, *_ in recovery_alerts:
+                m = _modules.get(mid)
+                if m is not None:
+                    m.alerted_at = None
 
-    # Send Discord OUTSIDE the DB lock — HTTP can stall.
+    # Queued, not posted: the Discord sender coalesces every alert of the
+    # same kind in its digest window into one message, so a site-wide
+    # power cut is one "N modules down" post instead of N.
     for mid, name, last_seen, age_s in silence_alerts:
         send_discord_message(
             f"🔴 **{name} is down** — silent for {_fmt_age(age_s)}\n"
-            f"   id: `{mid}` · last seen: `{last_seen.isoformat(timespec='seconds')}`"
+            f"   id: `{mid}` · last seen: `{last_seen.isoformat(timespec='seconds')}`",
+            digest=DOWN_DIGEST,
         )
     for mid, name, downtime_s in recovery_alerts:
         send_discord_message(
             f"🟢 **{name} is back** — recovered after {_fmt_age(downtime_s)}\n"
-            f"   id: `{mid}`"
+            f"   id: `{mid}`",
+            digest=BACK_DIGEST,
         )
 
     if silence_alerts or recovery_alerts:
@@ -103,3 +277,37 @@ def check_silence():
             f"[silence_watcher] alerts sent: {len(silence_alerts)} silent, "
             f"{len(recovery_alerts)} recovered"
         )
+
+
+def _run() -> None:
+    while True:
+        with _cond:
+            while True:
+                timeout = None
+                if _deadlines:
+                    timeout = (_deadlines[0][0] - _utcnow()).total_seconds()
+                    if timeout <= 0:
+                        break
+                # Woken early by `_schedule` when a nearer deadline lands.
+                _cond.wait(timeout)
+        try:
+            check_silence()
+        except Exception as e:
+            # The deadlines were consumed; the modules come due again at
+            # their next deadline (or on their next signal).
+            print(f"[silence_watcher] check failed: {e}", flush=True)
+
+
+def _ensure_timer() -> None:
+    global _timer
+    with _cond:
+        if _timer is None or not _timer.is_alive():
+            _timer = threading.Thread(target=_run, name="silence-watcher", daemon=True)
+            _timer.start()
+
+
+def start() -> None:
+    """Load the index and start the timer thread (`app.py`, at boot)."""
+    n = load()
+    _ensure_timer()
+    print(f"[silence_watcher] watching {n} module(s)")
@@ -7,34 +7,64 @@ one-shot ``run_weather_backfill`` (triggered by the admin endpoint
 in ``routes/admin_weather.py``) pulls historical observations from
 the Open-Meteo Archive endpoint with ``source='open-meteo-backfill'``.
 
-Mirror of ``services/silence_watcher.py``'s pattern: read modules
-under the DB lock, run HTTP and INSERTs outside the lock, swallow
+Read modules under the DB lock, run HTTP and INSERTs outside the lock
+(like ``services/silence_watcher.py``'s Discord sends), swallow
 per-module exceptions so a single failing call doesn't wedge the
 scheduler thread.
+
+The live tick is fleet-shaped, not per-module: one grouped watermark
+query, one Open-Meteo location per ``PUBLIC_COORD_DECIMALS`` grid cell
+(modules at the same garden share coarsened coordinates, and a ~1 km
+cell is finer than the model grid anyway), up to
+``WEATHER_LOCATIONS_PER_REQUEST`` locations packed into each call
+(Open-Meteo takes comma-separated ``latitude``/``longitude`` lists), the
+calls on a bounded thread pool over one pooled session, and one bulk
+insert.
+
+The backfill fetches whole calendar months per cell and keeps every
+completed month's raw archive response on disk under
+``weather_cache_dir()``, named by a hash of (endpoint, cell, date range,
+fields). A re-run, or a new module at an already-known location, reads
+those months from disk instead of the network.
+
+Both endpoints are overridable (``OPEN_METEO_FORECAST_URL``,
+``OPEN_METEO_ARCHIVE_URL``) so tests and benchmarks can point the worker
+at a local stand-in.
 """
 
 from __future__ import annotations
 
 import datetime as _dt
+import gzip
+import hashlib
+import json
 import os
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from db.connection import get_conn, lock
+from db.connection import DB_PATH, get_conn, lock
 from db.repository import write_transaction
+from models.geo import PUBLIC_COORD_DECIMALS
 
 # Single-shot guard for ``run_weather_backfill``. Two simultaneous admin
-# triggers would each read the same ``existing`` set and re-insert the
-# same chunks (``measurements`` has no UNIQUE constraint per ADR-016 —
-# duplicates are quietly allowed by design). The lock keeps the second
+# triggers would each anti-join against the same stored hours before
+# either commits and re-insert the same chunks (``measurements`` has no
+# UNIQUE constraint per ADR-016 — duplicates are quietly allowed by
+# design). The lock keeps the second
 # caller from racing; admin endpoint returns a 409-shaped envelope.
 _backfill_lock = threading.Lock()
 
 
-_FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
-_ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+_FORECAST_URL = os.getenv(
+    "OPEN_METEO_FORECAST_URL", "https://api.open-meteo.com/v1/forecast"
+)
+_ARCHIVE_URL = os.getenv(
+    "OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive"
+)
 
 # Open-Meteo hourly fields → our `metric` column values. Keep this
 # list aligned with the `source` table in
@@ -59,15 +89,31 @@ _ARCHIVE_LAG_DAYS = 5
 # explicit-backfill endpoint's job.
 _DEFAULT_LOOKBACK_DAYS = int(os.getenv("WEATHER_DEFAULT_LOOKBACK_DAYS", "7"))
 
-# Archive request chunk size. The API tolerates wider ranges fine;
-# chunking limits the blast radius of a transient upstream failure.
-_BACKFILL_CHUNK_DAYS = 30
+# Archive requests cover one calendar month. The API tolerates wider
+# ranges fine; chunking limits the blast radius of a transient upstream
+# failure, and a fixed boundary (rather than N days from each run's
+# start) gives a completed month the same cache key on every run.
 
 # Forecast endpoint's `past_days` ceiling per Open-Meteo's docs.
 _FORECAST_PAST_DAYS_MAX = 92
 
 _HTTP_TIMEOUT_S = 10
 
+# Locations packed into one Open-Meteo call. Each adds ~20 bytes to the
+# URL and one hourly series to the response.
+_LOCATIONS_PER_REQUEST = max(1, int(os.getenv("WEATHER_LOCATIONS_PER_REQUEST", "50")))
+
+# Concurrent Open-Meteo calls per live tick. Bounded so a large fleet
+# doesn't open hundreds of sockets at a free API at once.
+_FETCH_WORKERS = max(1, int(os.getenv("WEATHER_FETCH_WORKERS", "8")))
+
+# One session for every call: the pool threads reuse its keep-alive
+# connections (one per worker) instead of a TLS handshake per module.
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_maxsize=_FETCH_WORKERS)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
 
 def _enabled() -> bool:
     return os.getenv("WEATHER_WORKER_ENABLED", "true").lower() == "true"
@@ -108,6 +154,16 @@ def _is_plausible_location(lat, lng) -> bool:
     return True
 
 
+def _month_start(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(start: datetime) -> datetime:
+    return start.replace(
+        year=start.year + start.month // 12, month=start.month % 12 + 1
+    )
+
+
 def _first_online_to_dt(first_online) -> datetime | None:
     """DuckDB's DATE column surfaces as ``datetime.date``; the legacy
     seed inserts and the registration UPSERT both write date-only
@@ -140,6 +196,25 @@ def fetch_open_meteo(
     One retry on ``requests.RequestException``; the second failure
     raises so the caller's per-module try/except can log and move on.
     """
+    body = _get_bodies([(lat, lng)], mode=mode, start=start, end=end)[0]
+    return _parse_open_meteo(body, start, end)
+
+
+def _get_bodies(
+    locations: list[tuple[float, float]],
+    *,
+    mode: str,
+    start: datetime,
+    end: datetime,
+) -> list[dict]:
+    """One Open-Meteo call for every ``(lat, lng)`` in ``locations``;
+    returns the raw per-location bodies in the same order.
+
+    With more than one location Open-Meteo answers a JSON list, one
+    object per location; anything else is an error for the whole call.
+    """
+    lats = ",".join(f"{lat:.4f}" for lat, _ in locations)
+    lngs = ",".join(f"{lng:.4f}" for _, lng in locations)
     if mode == "forecast":
         # Forecast endpoint serves past + future via past_days /
         # forecast_days. We never want future values so forecast_days=0.
@@ -148,8 +223,8 @@ def fetch_open_meteo(
         gap_days = (end - start).total_seconds() / 86400.0
         past_days = max(1, min(_FORECAST_PAST_DAYS_MAX, int(gap_days) + 2))
         params = {
-            "latitude": f"{lat:.4f}",
-            "longitude": f"{lng:.4f}",
+            "latitude": lats,
+            "longitude": lngs,
             "past_days": past_days,
             "forecast_days": 0,
             "hourly": _HOURLY_PARAM,
@@ -158,8 +233,8 @@ def fetch_open_meteo(
         url = _FORECAST_URL
     elif mode == "archive":
         params = {
-            "latitude": f"{lat:.4f}",
-            "longitude": f"{lng:.4f}",
+            "latitude": lats,
+            "longitude": lngs,
             "start_date": start.date().isoformat(),
             "end_date": end.date().isoformat(),
             "hourly": _HOURLY_PARAM,
@@ -171,14 +246,93 @@ def fetch_open_meteo(
 
     for attempt in range(2):
         try:
-            resp = requests.get(url, params=params, timeout=_HTTP_TIMEOUT_S)
+            resp = _session.get(url, params=params, timeout=_HTTP_TIMEOUT_S)
             resp.raise_for_status()
-            return _parse_open_meteo(resp.json(), start, end)
+            body = resp.json()
+            break
         except requests.RequestException:
             if attempt == 1:
                 raise
-    # Unreachable — the loop either returns or re-raises.
-    return []
+    if len(locations) == 1:
+        return body if isinstance(body, list) and len(body) == 1 else [body]
+    if not isinstance(body, list) or len(body) != len(locations):
+        raise ValueError(f"expected {len(locations)} locations in the response")
+    return body
+
+
+def _fetch_packed(
+    locations: list[tuple[float, float]],
+    *,
+    mode: str,
+    start: datetime,
+    end: datetime,
+) -> list[dict | Exception]:
+    """``_get_bodies`` with per-location failure isolation: if the packed
+    call fails, each location is retried on its own (as
+    ``db/group_commit`` re-runs a failed batch's jobs alone), so one bad
+    location costs only itself. Failures come back as the exception in
+    that location's slot rather than raising."""
+    try:
+        return _get_bodies(locations, mode=mode, start=start, end=end)
+    except Exception as e:
+        if len(locations) == 1:
+            return [e]
+    out: list[dict | Exception] = []
+    for location in locations:
+        try:
+            out.extend(_get_bodies([location], mode=mode, start=start, end=end))
+        except Exception as e:
+            out.append(e)
+    return out
+
+
+def _batches(items: list, size: int) -> list[list]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def weather_cache_dir() -> str:
+    # Next to the DB by default, like `db/schema.py`'s archive_dir().
+    return os.getenv("WEATHER_CACHE_DIR") or os.path.join(
+        os.path.dirname(DB_PATH) or ".", "weather-cache"
+    )
+
+
+def _cache_path(cell: tuple[float, float], start: datetime, end: datetime) -> str:
+    """Content address of one cell's archive response for one range:
+    everything that determines the body goes into the hash, so a
+    changed endpoint or field list can never be served a stale file."""
+    key = json.dumps(
+        [
+            _ARCHIVE_URL,
+            _HOURLY_PARAM,
+            cell,
+            start.date().isoformat(),
+            end.date().isoformat(),
+        ]
+    )
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return os.path.join(weather_cache_dir(), digest[:2], f"{digest}.json.gz")
+
+
+def _cache_read(path: str) -> dict | None:
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        # Truncated or corrupt: refetch (and overwrite) rather than fail.
+        print(f"[weather_worker] ignoring unreadable cache file {path}: {e}")
+        return None
+
+
+def _cache_write(path: str, body: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(body, f, separators=(",", ":"))
+    # Atomic: a reader sees the whole file or none.
+    os.replace(tmp, path)
 
 
 def _parse_open_meteo(
@@ -227,10 +381,9 @@ def _read_modules_with_location() -> list[tuple[str, float, float, datetime | No
     """Snapshot all modules with a plausible fix under the DB lock.
 
     Returns a list of ``(mac, lat, lng, first_online_dt)``. The lock
-    is released before the caller starts HTTP — the same shape as
-    ``silence_watcher.check_silence``.
+    is released before the caller starts HTTP.
     """
-    with lock:
+    with lock.read():
         con = get_conn()
         try:
             # ORDER BY id is load-bearing for deterministic iteration —
@@ -251,10 +404,11 @@ def _read_modules_with_location() -> list[tuple[str, float, float, datetime | No
     return out
 
 
-def _latest_weather_ts(module_mac: str) -> datetime | None:
-    """Watermark — the most recent ``ts`` already in the measurements
-    store for this module from either the live worker or the backfill.
-    The live worker's next fetch starts at ``latest_ts + 1h``.
+def _latest_weather_ts_by_module() -> dict[str, datetime]:
+    """Watermarks — the most recent ``ts`` already in the measurements
+    store per module from either the live worker or the backfill, in
+    one grouped query. The live worker's next fetch starts at
+    ``latest_ts + 1h``; a module with no weather rows is absent.
 
     Spans all three metrics (no metric filter) so a trailing hour with
     a null ``temperature_2m`` but non-null ``humidity`` / ``precip``
@@ -265,67 +419,134 @@ def _latest_weather_ts(module_mac: str) -> datetime | None:
     has to count the hour as "we've been here" regardless. Idempotency
     contract from ADR-017's "Worker" section depends on this.
     """
-    with lock:
+    with lock.read():
         con = get_conn()
         try:
-            row = con.execute(
-                "SELECT MAX(ts) FROM measurements "
-                "WHERE module_mac = ? AND source IN (?, ?)",
-                [module_mac, _LIVE_SOURCE, _BACKFILL_SOURCE],
-            ).fetchone()
+            rows = con.execute(
+                "SELECT module_mac, MAX(ts) FROM measurements "
+                "WHERE source IN (?, ?) GROUP BY module_mac",
+                [_LIVE_SOURCE, _BACKFILL_SOURCE],
+            ).fetchall()
         finally:
             con.close()
-    return row[0] if row and row[0] is not None else None
+    return {mac: ts for mac, ts in rows if ts is not None}
+
 
+def _grid_cell(lat: float, lng: float) -> tuple[float, float]:
+    """The public-coordinate grid cell a module sits in. Stored
+    coordinates are already coarsened to this precision (``db/schema``'s
+    migration, ``ModuleData._coarsen``), so modules registered at the
+    same garden land in the same cell."""
+    return (round(lat, PUBLIC_COORD_DECIMALS), round(lng, PUBLIC_COORD_DECIMALS))
 
-def _existing_backfill_timestamps(module_mac: str) -> set[datetime]:
-    """Distinct ``ts`` values already imported as ``open-meteo-backfill``.
 
-    Used to dedupe within a backfill chunk so a re-run inserts only
-    the gap rows. Picks the ``temperature_c`` metric specifically
-    because the worker writes all three metrics in lockstep — if the
-    timestamp exists for one, it exists for the others.
+def _insert_backfill_gaps(
+    rows: list[tuple[str, datetime, str, float]],
+    start: datetime,
+    end: datetime,
+) -> dict[str, int]:
+    """Insert the backfill rows for ``[start, end)`` whose hour isn't
+    imported yet; return the rows written per module.
+
+    Set-based: the fetched rows are staged in a temp table with one
+    anti-join against the hours already stored for
+    ``source='open-meteo-backfill'``, and the insert copies what's left.
+    The anti-join reads only ``temperature_c`` in ``[start, end)`` — the
+    worker writes the three metrics in lockstep, and the range keeps the
+    scan to the chunk's row groups. (Backfill rows never leave the live
+    table: retention and the cold archive skip ``*-backfill`` sources.)
+    Memory is one chunk's rows, whatever the depth of a module's
+    history.
     """
-    with lock:
-        con = get_conn()
-        try:
-            rows = con.execute(
-                "SELECT ts FROM measurements "
-                "WHERE module_mac = ? AND metric = 'temperature_c' "
-                "AND source = ?",
-                [module_mac, _BACKFILL_SOURCE],
+    if not rows:
+        return {}
+    macs, stamps, metrics, values = (list(col) for col in zip(*rows, strict=True))
+    with write_transaction() as con:
+        # Temp tables are per cursor: this one goes away with the
+        # transaction's cursor. No DROP — `db.table_versions` would read
+        # it as schema DDL and flush every cached response.
+        con.execute(
+            "CREATE TEMP TABLE weather_backfill_gaps AS "
+            "SELECT f.* FROM ("
+            "  SELECT unnest(?::VARCHAR[]) AS module_mac, "
+            "         unnest(?::TIMESTAMP[]) AS ts, "
+            "         unnest(?::VARCHAR[]) AS metric, "
+            "         unnest(?::DOUBLE[]) AS value"
+            ") f ANTI JOIN ("
+            "  SELECT module_mac, ts FROM measurements "
+            "   WHERE metric = 'temperature_c' AND source = ? "
+            "     AND ts >= ? AND ts < ?"
+            ") e ON e.module_mac = f.module_mac AND e.ts = f.ts",
+            [macs, stamps, metrics, values, _BACKFILL_SOURCE, start, end],
+        )
+        written = dict(
+            con.execute(
+                "SELECT module_mac, COUNT(*) FROM weather_backfill_gaps GROUP BY 1"
             ).fetchall()
-        finally:
-            con.close()
-    return {r[0] for r in rows}
+        )
+        con.execute(
+            "INSERT INTO measurements (module_mac, ts, metric, value, source) "
+            "SELECT module_mac, ts, metric, value, ? FROM weather_backfill_gaps",
+            [_BACKFILL_SOURCE],
+        )
+    return written
 
 
-def _insert_measurement_rows(
-    module_mac: str,
-    rows: list[tuple[datetime, str, float]],
-    source: str,
-) -> int:
+def _bulk_insert(rows: list[tuple[str, datetime, str, float]], source: str) -> int:
+    """Insert ``(module_mac, ts, metric, value)`` rows for many modules
+    as one columnar statement (list parameters unnested server-side, as
+    ``routes/progress.py`` does) in one transaction."""
     if not rows:
         return 0
+    macs, stamps, metrics, values = (list(col) for col in zip(*rows, strict=True))
     with write_transaction() as con:
-        con.executemany(
-            "INSERT INTO measurements "
-            "(module_mac, ts, metric, value, source) "
-            "VALUES (?, ?, ?, ?, ?)",
-            [(module_mac, ts, metric, val, source) for (ts, metric, val) in rows],
+        con.execute(
+            "INSERT INTO measurements (module_mac, ts, metric, value, source) "
+            "SELECT unnest(?::VARCHAR[]), unnest(?::TIMESTAMP[]), "
+            "unnest(?::VARCHAR[]), unnest(?::DOUBLE[]), ?",
+            [macs, stamps, metrics, values, source],
         )
     return len(rows)
 
 
+def _insert_packed(
+    groups: list[tuple[list[str], list[tuple[str, datetime, str, float]]]],
+    source: str,
+) -> int:
+    """``_bulk_insert`` every group's rows at once, with per-group failure
+    isolation: if the shared insert fails, each group (one grid cell's
+    modules) is inserted on its own, as ``_fetch_packed`` retries a
+    failed packed call per location, so one bad row costs only its cell.
+    A failed group is logged; its modules' watermarks stay put, so the
+    next tick fetches them again. Returns the rows written."""
+    try:
+        return _bulk_insert([r for _, rows in groups for r in rows], source)
+    except Exception as e:
+        if len(groups) == 1:
+            print(f"[weather_worker] insert failed for {', '.join(groups[0][0])}: {e}")
+            return 0
+    written = 0
+    for macs, rows in groups:
+        try:
+            written += _bulk_insert(rows, source)
+        except Exception as e:
+            print(f"[weather_worker] insert failed for {', '.join(macs)}: {e}")
+    return written
+
+
 def run_weather_fetch() -> None:
     """Hourly scheduler entry — gap-fill live weather observations.
 
     For each module with a plausible fix, computes the missing window
     since the latest existing measurement (or default lookback for
-    fresh modules), fetches from Open-Meteo Forecast, and INSERTs
-    rows tagged ``source='open-meteo'``. Per-module exceptions are
-    caught and logged so the scheduler thread survives a transient
-    upstream outage.
+    fresh modules). Modules are bucketed by grid cell; each cell is one
+    location in a packed Open-Meteo Forecast call (up to
+    ``WEATHER_LOCATIONS_PER_REQUEST`` per call, the calls on a pool of
+    ``WEATHER_FETCH_WORKERS`` threads), and every member gets the rows
+    inside its own window. All rows land in one insert tagged
+    ``source='open-meteo'`` (per cell if that fails, ``_insert_packed``).
+    A cell whose fetch or insert failed is logged and its modules retry
+    on the next tick; the rest still write.
     """
     if not _enabled():
         return
@@ -335,11 +556,12 @@ def run_weather_fetch() -> None:
         return
 
     now_hour = _floor_hour(_now_utc())
-    fetched_modules = 0
-    inserted_rows = 0
+    watermarks = _latest_weather_ts_by_module()
 
+    # cell -> (fetch coordinates, [(mac, window start)]), in module order.
+    cells: dict[tuple[float, float], tuple[tuple[float, float], list]] = {}
     for mac, lat, lng, _first_online in modules:
-        latest_ts = _latest_weather_ts(mac)
+        latest_ts = watermarks.get(mac)
         if latest_ts is None:
             start = now_hour - timedelta(days=_DEFAULT_LOOKBACK_DAYS)
         else:
@@ -349,27 +571,53 @@ def run_weather_fetch() -> None:
             start = _floor_hour(latest_ts) + timedelta(hours=1)
         if start >= now_hour:
             continue
-        try:
-            rows = fetch_open_meteo(
-                lat, lng, mode="forecast", start=start, end=now_hour
-            )
-        except Exception as e:
-            print(f"[weather_worker] fetch failed for {mac}: {e}")
-            continue
-        if not rows:
-            continue
-        try:
-            written = _insert_measurement_rows(mac, rows, _LIVE_SOURCE)
-        except Exception as e:
-            print(f"[weather_worker] insert failed for {mac}: {e}")
-            continue
-        fetched_modules += 1
-        inserted_rows += written
+        # The cell is fetched at its first module's coordinates — equal
+        # to the cell's own for any row written since coarsening.
+        cells.setdefault(_grid_cell(lat, lng), ((lat, lng), []))[1].append((mac, start))
+    if not cells:
+        return
+
+    def fetch(batch):
+        # One `past_days` for the whole call, wide enough for the
+        # furthest-behind cell; each cell is cut to its own window below.
+        start = min(s for _, members in batch for _, s in members)
+        coords = [cell_coords for cell_coords, _ in batch]
+        return _fetch_packed(coords, mode="forecast", start=start, end=now_hour)
+
+    batches = _batches(list(cells.values()), _LOCATIONS_PER_REQUEST)
+    # One (macs, rows) group per fetched cell, for `_insert_packed`.
+    groups: list[tuple[list[str], list[tuple[str, datetime, str, float]]]] = []
+    fetched_modules = 0
+    with ThreadPoolExecutor(
+        max_workers=min(_FETCH_WORKERS, len(batches)), thread_name_prefix="weather"
+    ) as pool:
+        futures = [(b, pool.submit(fetch, b)) for b in batches]
+        for cells_in_call, future in futures:
+            for (_coords, members), body in zip(
+                cells_in_call, future.result(), strict=True
+            ):
+                if isinstance(body, Exception):
+                    macs = ", ".join(mac for mac, _ in members)
+                    print(f"[weather_worker] fetch failed for {macs}: {body}")
+                    continue
+                cell_start = min(s for _, s in members)
+                rows = _parse_open_meteo(body, cell_start, now_hour)
+                cell_macs, cell_rows = [], []
+                for mac, start in members:
+                    mine = [(mac, ts, m, v) for ts, m, v in rows if ts >= start]
+                    if mine:
+                        fetched_modules += 1
+                        cell_macs.append(mac)
+                        cell_rows.extend(mine)
+                if cell_rows:
+                    groups.append((cell_macs, cell_rows))
+
+    inserted_rows = _insert_packed(groups, _LIVE_SOURCE) if groups else 0
 
     if fetched_modules or inserted_rows:
         print(
-            f"[weather_worker] live: touched {fetched_modules} modules, "
-            f"wrote {inserted_rows} rows"
+            f"[weather_worker] live: touched {fetched_modules} modules in "
+            f"{len(cells)} grid cell(s), wrote {inserted_rows} rows"
         )
 
 
@@ -404,8 +652,8 @@ def run_weather_backfill(*, days: int | None = None) -> dict:
     ``WEATHER_WORKER_ENABLED`` is false (the env var gates the
     scheduled tick at boot, not the operator-initiated path). A
     concurrent second call returns immediately with an explicit
-    ``errors`` entry rather than silently corrupting the in-memory
-    ``existing`` dedup set.
+    ``errors`` entry rather than racing the first one's dedupe and
+    double-inserting.
     """
     acquired = _backfill_lock.acquire(blocking=False)
     if not acquired:
@@ -420,8 +668,56 @@ def run_weather_backfill(*, days: int | None = None) -> dict:
         _backfill_lock.release()
 
 
+def _archive_month(
+    pool: ThreadPoolExecutor,
+    cells: dict[tuple[float, float], None],
+    month: datetime,
+    chunk_end: datetime,
+) -> tuple[dict, int]:
+    """Raw archive bodies for ``cells`` over ``[month, chunk_end)``.
+
+    Returns ``({cell: body | Exception}, cells fetched over the network)``.
+    A completed month (``chunk_end`` is the next month's first day) is
+    read from the on-disk cache when present and written to it when
+    fetched; the month still inside the archive lag is always fetched,
+    since its range grows every day.
+    """
+    complete = chunk_end == _next_month(month)
+    bodies: dict = {}
+    missing = []
+    for cell in cells:
+        body = _cache_read(_cache_path(cell, month, chunk_end)) if complete else None
+        if body is None:
+            missing.append(cell)
+        else:
+            bodies[cell] = body
+    futures = [
+        (b, pool.submit(_fetch_packed, b, mode="archive", start=month, end=chunk_end))
+        for b in _batches(missing, _LOCATIONS_PER_REQUEST)
+    ]
+    for cells_in_call, future in futures:
+        for cell, body in zip(cells_in_call, future.result(), strict=True):
+            bodies[cell] = body
+            if complete and not isinstance(body, Exception):
+                try:
+                    _cache_write(_cache_path(cell, month, chunk_end), body)
+                except OSError as e:
+                    print(f"[weather_worker] cache write failed: {e}")
+    return bodies, len(missing)
+
+
 def _run_weather_backfill_locked(*, days: int | None) -> dict:
-    """Body of ``run_weather_backfill``. Caller holds ``_backfill_lock``."""
+    """Body of ``run_weather_backfill``. Caller holds ``_backfill_lock``.
+
+    Month by month: every grid cell that a module's window reaches into
+    that month is fetched once (from the cache, or in packed calls on
+    the worker pool), each module keeps the hours inside its own window,
+    and ``_insert_backfill_gaps`` writes the ones not already stored in
+    one set-based transaction. A
+    module whose cell fails to fetch, or whose insert fails, is reported
+    in ``errors`` and skipped for the remaining months; what it wrote
+    before stays written, and a re-run picks up from there.
+    """
     modules = _read_modules_with_location()
     # Archive trails real time by ~5 days; round down to the previous
     # midnight so chunk boundaries align with the API's date params.
@@ -429,41 +725,56 @@ def _run_weather_backfill_locked(*, days: int | None) -> dict:
         hour=0, minute=0, second=0, microsecond=0
     )
 
-    modules_touched = 0
-    rows_written = 0
-    errors: list[dict] = []
-
+    # (mac, cell, window start) for every module with something to fetch.
+    plans = []
     for mac, lat, lng, first_online in modules:
-        try:
-            start = _backfill_start_for_module(first_online, days)
-            if start >= end:
-                continue
-            existing = _existing_backfill_timestamps(mac)
-            module_rows_written = 0
-            cursor = start
-            while cursor < end:
-                chunk_end = min(cursor + timedelta(days=_BACKFILL_CHUNK_DAYS), end)
-                rows = fetch_open_meteo(
-                    lat, lng, mode="archive", start=cursor, end=chunk_end
-                )
-                new_rows = [r for r in rows if r[0] not in existing]
-                module_rows_written += _insert_measurement_rows(
-                    mac, new_rows, _BACKFILL_SOURCE
-                )
-                # Track in-memory so the next chunk's filter is correct
-                # without re-querying.
-                existing.update(r[0] for r in new_rows)
-                cursor = chunk_end
-            if module_rows_written:
-                modules_touched += 1
-                rows_written += module_rows_written
-        except Exception as e:
-            print(f"[weather_worker] backfill failed for {mac}: {e}")
-            errors.append({"module_mac": mac, "error": str(e)})
-
+        start = _backfill_start_for_module(first_online, days)
+        if start < end:
+            plans.append((mac, _grid_cell(lat, lng), start))
+
+    written: dict[str, int] = {}
+    failed: dict[str, str] = {}
+    network_calls = 0
+    month = _month_start(min((p[2] for p in plans), default=end))
+    with ThreadPoolExecutor(
+        max_workers=_FETCH_WORKERS, thread_name_prefix="weather"
+    ) as pool:
+        while month < end:
+            chunk_end = min(_next_month(month), end)
+            active = [p for p in plans if p[2] < chunk_end and p[0] not in failed]
+            cells = dict.fromkeys(cell for _, cell, _ in active)
+            bodies, fetched = _archive_month(pool, cells, month, chunk_end)
+            network_calls += fetched
+            batch: list[tuple[str, datetime, str, float]] = []
+            macs = []
+            for mac, cell, start in active:
+                body = bodies[cell]
+                if isinstance(body, Exception):
+                    failed[mac] = str(body)
+                    continue
+                rows = _parse_open_meteo(body, max(start, month), chunk_end)
+                batch.extend((mac, ts, metric, val) for ts, metric, val in rows)
+                macs.append(mac)
+            try:
+                month_written = _insert_backfill_gaps(batch, month, chunk_end)
+            except Exception as e:
+                for mac in macs:
+                    failed[mac] = str(e)
+            else:
+                for mac, n in month_written.items():
+                    written[mac] = written.get(mac, 0) + n
+            month = _next_month(month)
+
+    errors = []
+    for mac, error in failed.items():
+        print(f"[weather_worker] backfill failed for {mac}: {error}")
+        errors.append({"module_mac": mac, "error": error})
+    modules_touched = sum(1 for n in written.values() if n)
+    rows_written = sum(written.values())
     print(
         f"[weather_worker] backfill: touched {modules_touched} modules, "
-        f"wrote {rows_written} rows, {len(errors)} errors"
+        f"wrote {rows_written} rows, {len(errors)} errors, "
+        f"{network_calls} cell-month(s) fetched, rest from the cache"
     )
     return {
         "modules_touched": modules_touched,
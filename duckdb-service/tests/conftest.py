@@ -46,6 +46,7 @@ def _purge_service_modules() -> None:
         "app",
         "routes.progress",
         "routes.detections",
+        "routes.ingest",
         "routes.nests",
         "routes.modules",
         "routes.measurements",
@@ -55,6 +56,7 @@ def _purge_service_modules() -> None:
         "routes._bucketing",
         "routes",
         "services.backup",
+        "services.cold_archive",
         "services.silence_watcher",
         "services.discord",
         "services.weather_worker",
@@ -96,11 +98,11 @@ def fresh_db(tmp_path, monkeypatch):
     # Replace the discord webhook with a spy BEFORE routes.modules imports
     # ``send_discord_message`` from it. Keep the pre-patch function around
     # for the rare test that wants to observe the REAL implementation
-    # (e.g. asserting on the actual ``requests.post`` call shape).
+    # (e.g. asserting on the actual webhook post shape).
     real_send_discord_message = discord.send_discord_message
     discord_calls: list[str] = []
 
-    def _fake_send(content: str) -> None:
+    def _fake_send(content: str, digest: str | None = None) -> None:
         discord_calls.append(content)
 
     monkeypatch.setattr(discord, "send_discord_message", _fake_send)
@@ -115,11 +117,11 @@ def fresh_db(tmp_path, monkeypatch):
     importlib.import_module("routes.measurements")
 
     # services.backup and services.silence_watcher both do ``from
-    # services.discord import send_discord_message`` (and, for
-    # silence_watcher, ``from db.connection import lock, get_conn`` too) —
-    # same bound-name-captured-at-import-time problem as routes.modules.
-    # Both must be in the purge list above AND reimported here, or they
-    # silently keep a previous test's stale ``lock``/``get_conn``/spy.
+    # services.discord import send_discord_message`` — same
+    # bound-name-captured-at-import-time problem as routes.modules (and
+    # silence_watcher's liveness index is per-import state). Both must be
+    # in the purge list above AND reimported here, or they silently keep a
+    # previous test's stale spy (or index).
     backup = importlib.import_module("services.backup")
     monkeypatch.setattr(backup, "send_discord_message", _fake_send)
 
@@ -141,7 +143,12 @@ def fresh_db(tmp_path, monkeypatch):
         backup=backup,
         silence_watcher=silence_watcher,
     )
-    return ns
+    yield ns
+
+    # ``db.connection`` keeps one process-wide DuckDB handle open for the
+    # life of the module. Close it so each test's tmp file doesn't leave a
+    # DuckDB instance (and its worker threads) behind for the whole run.
+    connection.close_database()
 
 
 @pytest.fixture
@@ -285,7 +285,7 @@ def test_run_backup_negative_keep_clamps_to_at_least_one(
 def test_run_backup_never_sends_db_file_to_discord(fresh_db, monkeypatch, tmp_path):
     """Restores the REAL ``send_discord_message`` (fresh_db's fixture spies
     it out by default for every test) so this test observes the actual
-    ``requests.post`` call shape, instead of a spy that would pass even if
+    webhook post's shape, instead of a spy that would pass even if
     ``run_backup`` called something else entirely.
     """
     _configure(monkeypatch, tmp_path)
@@ -301,11 +301,12 @@ def test_run_backup_never_sends_db_file_to_discord(fresh_db, monkeypatch, tmp_pa
 
     def _spying_post(url, **kwargs):
         calls.append(kwargs)
-        return types.SimpleNamespace(raise_for_status=lambda: None)
+        return types.SimpleNamespace(status_code=204, headers={})
 
-    monkeypatch.setattr(fresh_db.discord.requests, "post", _spying_post)
+    monkeypatch.setattr(fresh_db.discord._session, "post", _spying_post)
 
     fresh_db.backup.run_backup()
+    assert fresh_db.discord.flush(5)
 
     assert len(calls) == 1
     assert "files" not in calls[0]
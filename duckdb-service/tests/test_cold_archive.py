@@ -0,0 +1,273 @@
+"""Tests for the Parquet cold tier (``services/cold_archive.py``) and the
+``*_all`` views over it (``db/schema.py``'s ``refresh_archive_views``)."""
+
+from __future__ import annotations
+
+import importlib
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+MAC_A = "aabbccddeeff"
+MAC_B = "112233445566"
+
+
+@pytest.fixture(autouse=True)
+def _no_lag(monkeypatch):
+    rollup = importlib.import_module("services.measurement_rollup")
+    monkeypatch.setattr(rollup, "_LAG", timedelta(0))
+
+
+def _archive():
+    return importlib.import_module("services.cold_archive")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def _exec(fresh_db, sql, params=()):
+    con = fresh_db.connection.get_conn()
+    try:
+        return con.execute(sql, params).fetchall()
+    finally:
+        con.close()
+
+
+def _seed_module(fresh_db, mac):
+    _exec(
+        fresh_db,
+        "INSERT INTO module_configs (id, name, lat, lng, first_online) "
+        "VALUES (?, ?, 47.8, 9.6, '2024-01-01')",
+        (mac, f"m-{mac}"),
+    )
+
+
+def _seed_heartbeats(fresh_db, mac, times):
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_heartbeats (module_id, received_at, battery) "
+            "SELECT ?, unnest(?::TIMESTAMP[]), 80",
+            (mac, list(times)),
+        )
+        fresh_db.schema.backfill_heartbeat_gaps(con)
+    finally:
+        con.close()
+
+
+def _history(now):
+    """Hourly heartbeats 200..100 days back with one 5 h hole, plus a
+    recent one — two gaps in total, one of them in archived months."""
+    old = [
+        now - timedelta(days=200) + timedelta(hours=h)
+        for h in range(100 * 24)
+        if not 500 <= h < 505
+    ]
+    return old + [now - timedelta(hours=1)]
+
+
+def test_off_by_default(fresh_db, monkeypatch):
+    monkeypatch.delenv("COLD_ARCHIVE_AFTER_DAYS", raising=False)
+    _seed_module(fresh_db, MAC_A)
+    _seed_heartbeats(fresh_db, MAC_A, [_now() - timedelta(days=400), _now()])
+    assert _archive().run_cold_archive() == 0
+    assert _exec(fresh_db, "SELECT COUNT(*) FROM module_heartbeats") == [(2,)]
+
+
+def test_heartbeats_move_to_monthly_parquet_and_reads_are_unchanged(client, fresh_db):
+    _seed_module(fresh_db, MAC_A)
+    now = _now()
+    _seed_heartbeats(fresh_db, MAC_A, _history(now))
+    gaps = client.get(f"/heartbeats/{MAC_A}/gaps").get_json()
+    latest = client.get(f"/heartbeats/{MAC_A}?limit=500").get_json()
+    assert len(gaps["gaps"]) == 2
+
+    moved = _archive().run_cold_archive(days=90)
+
+    cutoff = _archive()._month_start(now - timedelta(days=90))
+    assert (
+        moved
+        == _exec(
+            fresh_db,
+            "SELECT COUNT(*) FROM module_heartbeats_all WHERE received_at < ?",
+            (cutoff,),
+        )[0][0]
+    )
+    assert _exec(
+        fresh_db,
+        "SELECT COUNT(*) FROM module_heartbeats WHERE received_at < ?",
+        (cutoff,),
+    ) == [(0,)]
+    manifest = _exec(
+        fresh_db,
+        "SELECT path, month, row_count FROM cold_archive_manifest "
+        "WHERE table_name = 'module_heartbeats' ORDER BY month",
+    )
+    assert sum(n for _, _, n in manifest) == moved
+    # One file per month, in a hive-style month= directory, zstd.
+    assert len({m for _, m, _ in manifest}) == len(manifest)
+    root = fresh_db.schema.archive_dir()
+    for rel, month, _ in manifest:
+        assert f"month={month}" in rel
+        full = os.path.join(root, rel)
+        codecs = _exec(
+            fresh_db, f"SELECT DISTINCT compression FROM parquet_metadata('{full}')"
+        )
+        assert codecs == [("ZSTD",)]
+
+    assert client.get(f"/heartbeats/{MAC_A}/gaps").get_json() == gaps
+    assert client.get(f"/heartbeats/{MAC_A}?limit=500").get_json() == latest
+    # The history backfill sees archived months too.
+    _exec(fresh_db, "DELETE FROM heartbeat_gaps")
+    con = fresh_db.connection.get_conn()
+    try:
+        assert fresh_db.schema.backfill_heartbeat_gaps(con) == 2
+    finally:
+        con.close()
+    assert client.get(f"/heartbeats/{MAC_A}/gaps").get_json() == gaps
+    # Nothing left to move.
+    assert _archive().run_cold_archive(days=90) == 0
+
+
+def test_newest_heartbeat_stays_live(fresh_db):
+    # The silence watcher reads MAX(received_at) from the live table.
+    _seed_module(fresh_db, MAC_A)
+    last = _now() - timedelta(days=300)
+    _seed_heartbeats(fresh_db, MAC_A, [last - timedelta(hours=1), last])
+    assert _archive().run_cold_archive(days=30) == 1
+    assert _exec(fresh_db, "SELECT received_at FROM module_heartbeats") == [(last,)]
+
+
+def test_measurements_archive_only_rolled_up_non_backfill_rows(client, fresh_db):
+    _seed_module(fresh_db, MAC_A)
+    old = _now() - timedelta(days=120)
+    for i, source in enumerate(["esp-heartbeat"] * 3 + ["esp-heartbeat-backfill"]):
+        _exec(
+            fresh_db,
+            "INSERT INTO measurements (module_mac, ts, metric, value, source) "
+            "VALUES (?, ?, 'battery_pct', ?, ?)",
+            (MAC_A, old + timedelta(hours=i), 50.0 + i, source),
+        )
+    _exec(
+        fresh_db,
+        "INSERT INTO measurements (module_mac, ts, metric, value, source) "
+        "VALUES (?, ?, 'battery_pct', 90.0, 'esp-heartbeat')",
+        (MAC_A, _now()),
+    )
+    url = f"/modules/{MAC_A}/measurements?metric=battery_pct&interval=daily&days=90"
+    before = client.get(url).get_json()
+
+    # run_cold_archive rolls up first, so the old rows are eligible.
+    assert _archive().run_cold_archive(days=60) == 3
+    assert _exec(fresh_db, "SELECT source FROM measurements ORDER BY ts") == [
+        ("esp-heartbeat-backfill",),
+        ("esp-heartbeat",),
+    ]
+    assert _exec(fresh_db, "SELECT COUNT(*) FROM measurements_all") == [(5,)]
+    assert client.get(url).get_json() == before
+
+
+def test_failed_run_leaves_live_rows_and_no_file(fresh_db, monkeypatch):
+    _seed_module(fresh_db, MAC_A)
+    _seed_heartbeats(
+        fresh_db, MAC_A, [_now() - timedelta(days=100), _now() - timedelta(hours=1)]
+    )
+
+    def _boom(con):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(_archive(), "refresh_archive_views", _boom)
+    with pytest.raises(RuntimeError, match="disk full"):
+        _archive().run_cold_archive(days=30)
+
+    assert _exec(fresh_db, "SELECT COUNT(*) FROM module_heartbeats") == [(2,)]
+    assert _exec(fresh_db, "SELECT COUNT(*) FROM cold_archive_manifest") == [(0,)]
+    root = fresh_db.schema.archive_dir()
+    assert not [f for _, _, files in os.walk(root) for f in files]
+
+
+def test_views_survive_restart_and_skip_a_missing_file(fresh_db, capsys):
+    _seed_module(fresh_db, MAC_A)
+    _seed_heartbeats(
+        fresh_db,
+        MAC_A,
+        # 60 days apart: always two different months.
+        [_now() - timedelta(days=130), _now() - timedelta(days=70), _now()],
+    )
+    assert _archive().run_cold_archive(days=30) == 2
+
+    # init_db rebuilds the view after its column migrations.
+    fresh_db.schema.init_db()
+    assert _exec(fresh_db, "SELECT COUNT(*) FROM module_heartbeats_all") == [(3,)]
+
+    (rel,) = _exec(
+        fresh_db, "SELECT path FROM cold_archive_manifest ORDER BY month LIMIT 1"
+    )[0]
+    os.remove(os.path.join(fresh_db.schema.archive_dir(), rel))
+    fresh_db.schema.init_db()
+    assert _exec(fresh_db, "SELECT COUNT(*) FROM module_heartbeats_all") == [(2,)]
+    assert "missing" in capsys.readouterr().out
+
+
+def test_delete_module_purges_its_archived_rows(client, fresh_db):
+    for mac in (MAC_A, MAC_B):
+        _seed_module(fresh_db, mac)
+        _seed_heartbeats(
+            fresh_db, mac, [_now() - timedelta(days=100), _now() - timedelta(hours=1)]
+        )
+    assert _archive().run_cold_archive(days=30) == 2
+    (old_rel,) = _exec(fresh_db, "SELECT path FROM cold_archive_manifest")[0]
+
+    assert client.delete(f"/modules/{MAC_A}").status_code == 200
+
+    assert _exec(
+        fresh_db, "SELECT module_id, COUNT(*) FROM module_heartbeats_all GROUP BY 1"
+    ) == [(MAC_B, 2)]
+    (new_rel, rows) = _exec(
+        fresh_db, "SELECT path, row_count FROM cold_archive_manifest"
+    )[0]
+    assert rows == 1 and new_rel != old_rel
+    assert not os.path.exists(os.path.join(fresh_db.schema.archive_dir(), old_rel))
+
+
+def test_failed_purge_leaves_the_archive_as_it_was(fresh_db, monkeypatch):
+    """A purge that fails part-way rolls the manifest back and removes the
+    rewrites it already wrote; the old files stay listed and on disk."""
+    for mac in (MAC_A, MAC_B):
+        _seed_module(fresh_db, mac)
+        _seed_heartbeats(
+            fresh_db,
+            mac,
+            [_now() - timedelta(days=130), _now() - timedelta(days=70), _now()],
+        )
+    assert _archive().run_cold_archive(days=30) == 4
+    root = fresh_db.schema.archive_dir()
+    manifest = _exec(fresh_db, "SELECT path FROM cold_archive_manifest ORDER BY 1")
+    files = sorted(
+        os.path.relpath(os.path.join(d, f), root)
+        for d, _, names in os.walk(root)
+        for f in names
+    )
+
+    def _boom(con):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(_archive(), "refresh_archive_views", _boom)
+    con = fresh_db.connection.get_conn()
+    try:
+        with pytest.raises(RuntimeError, match="disk full"):
+            _archive().purge_module(con, (MAC_A, "0"))
+    finally:
+        con.close()
+
+    assert (
+        _exec(fresh_db, "SELECT path FROM cold_archive_manifest ORDER BY 1") == manifest
+    )
+    assert files == sorted(
+        os.path.relpath(os.path.join(d, f), root)
+        for d, _, names in os.walk(root)
+        for f in names
+    )
+    assert _exec(fresh_db, "SELECT COUNT(*) FROM module_heartbeats_all") == [(6,)]
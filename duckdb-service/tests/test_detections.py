@@ -291,3 +291,31 @@ def test_history_requires_module_id(client):
 
 def test_history_invalid_module_id_is_400(client):
     assert client.get("/detections/history?module_id=not-a-mac").status_code == 400
+
+
+def test_history_columnar_is_the_row_shape_transposed(client):
+    client.post(
+        "/record_detections",
+        json={
+            "module_id": TEST_MAC,
+            "filename": "cap.jpg",
+            "detections": [
+                _detection("leafcutter", 1, "sealed", "cap-leafcutter-1.jpg"),
+                _detection("resin", 2, "empty", "cap-resin-2.jpg"),
+            ],
+        },
+    )
+    rows = _history(client).get_json()["detections"]
+    resp = client.get(f"/detections/history?module_id={TEST_MAC}&format=columnar")
+    assert resp.status_code == 200
+    cols = resp.get_json()["detections"]
+
+    assert set(cols) == set(rows[0])
+    for key, values in cols.items():
+        assert values == [r[key] for r in rows]
+    assert cols["bbox"] == [[0.1, 0.2, 0.3, 0.3]] * 2
+
+
+def test_history_unknown_format_is_400(client):
+    resp = client.get(f"/detections/history?module_id={TEST_MAC}&format=csv")
+    assert resp.status_code == 400
@@ -4,20 +4,31 @@ The webhook URL is a bearer credential. There must be no baked-in
 default, and an empty URL must mean "notifications disabled" — a clean
 skip with zero HTTP attempts, never an exception on a caller's path
 (registration, first image, silence watcher all call through here).
+
+The sender half: ``send_discord_message`` only enqueues; one background
+thread posts through a shared session, retries on 429/5xx and coalesces
+digest messages. Each test below imports its own generation of the
+module (own queue, own sender thread) against a fake session.
 """
 
 from __future__ import annotations
 
 import sys
+import threading
+import time
+import types
 
 import services.discord as discord
 
+URL = "https://discord.example/webhook"
+
 
 def _forbid_http(monkeypatch):
     def _fail(*args, **kwargs):  # pragma: no cover - only fires on regression
         raise AssertionError("HTTP attempted with empty DISCORD_WEBHOOK_URL")
 
     monkeypatch.setattr(discord.requests, "post", _fail)
+    monkeypatch.setattr(discord._session, "post", _fail)
 
 
 def test_default_is_empty_when_env_unset(monkeypatch):
@@ -34,3 +45,143 @@ def test_send_message_skips_http_when_unset(monkeypatch):
     monkeypatch.setattr(discord, "DISCORD_WEBHOOK_URL", "")
     _forbid_http(monkeypatch)
     discord.send_discord_message("module registered")  # must not raise
+
+
+class _FakeSession:
+    """Stands in for the sender's ``requests.Session``: records every
+    post and answers from ``responses`` (status, headers), then 204."""
+
+    def __init__(self, *responses, gate=None):
+        self.responses = list(responses)
+        self.gate = gate
+        self.posts = []
+
+    def post(self, url, json=None, timeout=None):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.posts.append(json["content"])
+        status, headers = self.responses.pop(0) if self.responses else (204, {})
+        return types.SimpleNamespace(status_code=status, headers=headers)
+
+
+def _fresh(monkeypatch, session, **env):
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", URL)
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    # setitem/delitem so the suite's own generation is back after the test.
+    monkeypatch.delitem(sys.modules, "services.discord")
+    import services.discord as fresh
+
+    monkeypatch.setitem(sys.modules, "services.discord", fresh)
+    monkeypatch.setattr(fresh, "_session", session)
+    sleeps = []
+    monkeypatch.setattr(fresh, "_sleep", sleeps.append)
+    return fresh, sleeps
+
+
+def test_send_returns_before_the_webhook_answers(monkeypatch):
+    gate = threading.Event()
+    session = _FakeSession(gate=gate)
+    fresh, _ = _fresh(monkeypatch, session)
+
+    started = time.monotonic()
+    fresh.send_discord_message("module registered")
+    assert time.monotonic() - started < 0.5
+    assert session.posts == []
+
+    gate.set()
+    assert fresh.flush(5)
+    assert session.posts == ["module registered"]
+    assert fresh.stats()["sent"] == 1
+
+
+def test_429_waits_retry_after_then_resends(monkeypatch):
+    session = _FakeSession((429, {"Retry-After": "2.5"}), (503, {}))
+    fresh, sleeps = _fresh(monkeypatch, session)
+
+    fresh.send_discord_message("backup complete")
+    assert fresh.flush(5)
+    assert session.posts == ["backup complete"] * 3
+    # Discord's Retry-After for the 429, then backoff for the 503.
+    assert sleeps == [2.5, 2.0]
+    assert fresh.stats()["retries"] == 2
+    assert fresh.stats()["sent"] == 1
+
+
+def test_other_client_errors_are_not_retried(monkeypatch):
+    session = _FakeSession((404, {}))
+    fresh, sleeps = _fresh(monkeypatch, session)
+
+    fresh.send_discord_message("webhook was deleted")
+    assert fresh.flush(5)
+    assert len(session.posts) == 1
+    assert sleeps == []
+    assert fresh.stats()["failed"] == 1
+
+
+def test_digest_coalesces_a_window_into_one_message(monkeypatch):
+    session = _FakeSession()
+    fresh, _ = _fresh(monkeypatch, session, DISCORD_DIGEST_WINDOW_S="30")
+    header = "🔴 **{n} modules down**"
+
+    for i in range(5):
+        fresh.send_discord_message(f"🔴 **hive-{i} is down**", digest=header)
+    fresh.send_discord_message("🟢 **hive-9 is back**", digest="🟢 **{n} back**")
+    fresh.send_discord_message("backup complete")
+    # Plain messages don't wait for the window; digests do.
+    deadline = time.monotonic() + 5
+    while not session.posts and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert session.posts == ["backup complete"]
+
+    assert fresh.flush(5)
+    down, back = session.posts[1:]
+    assert down.splitlines()[0] == "🔴 **5 modules down**"
+    assert down.count("is down") == 5
+    # A window holding one message sends it unchanged.
+    assert back == "🟢 **hive-9 is back**"
+    assert fresh.stats()["coalesced"] == 4
+
+
+def test_digest_window_closes_on_its_own(monkeypatch):
+    session = _FakeSession()
+    fresh, _ = _fresh(monkeypatch, session, DISCORD_DIGEST_WINDOW_S="0.2")
+
+    fresh.send_discord_message("a", digest="{n} down")
+    fresh.send_discord_message("b", digest="{n} down")
+    deadline = time.monotonic() + 5
+    while not session.posts and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert session.posts == ["2 down\na\nb"]
+
+
+def test_long_digest_is_split_under_discords_limit(monkeypatch):
+    session = _FakeSession()
+    fresh, _ = _fresh(monkeypatch, session)
+
+    for i in range(60):
+        fresh.send_discord_message(f"module-{i:02d} " + "x" * 80, digest="{n} down")
+    assert fresh.flush(5)
+    assert len(session.posts) > 1
+    assert all(len(post) <= 2000 for post in session.posts)
+    assert sum(post.count("module-") for post in session.posts) == 60
+
+
+def test_full_queue_drops_instead_of_blocking(monkeypatch):
+    gate = threading.Event()
+    session = _FakeSession(gate=gate)
+    fresh, _ = _fresh(monkeypatch, session, DISCORD_QUEUE_MAX="2")
+
+    fresh.send_discord_message("first")  # taken by the sender, stuck in post
+    deadline = time.monotonic() + 5
+    while fresh._queue.qsize() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    started = time.monotonic()
+    for i in range(5):
+        fresh.send_discord_message(f"queued {i}")
+    assert time.monotonic() - started < 0.5
+    assert fresh.stats()["dropped"] == 3
+
+    gate.set()
+    assert fresh.flush(5)
+    assert session.posts == ["first", "queued 0", "queued 1"]
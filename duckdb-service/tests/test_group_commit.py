@@ -0,0 +1,153 @@
+"""Tests for the group-commit write queue (db/group_commit.py).
+
+``db.group_commit`` resolves ``write_transaction`` → ``db.connection``
+lazily, so — like ``db.repository`` — it is deliberately NOT purged by
+the fixture; its counters are process-cumulative and these tests assert
+on deltas.
+"""
+
+import importlib
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def gc(fresh_db, monkeypatch):
+    mod = importlib.import_module("db.group_commit")
+    # A wide window makes coalescing deterministic on a slow CI box.
+    monkeypatch.setattr(mod, "GROUP_COMMIT_WINDOW_MS", 50.0)
+    monkeypatch.setattr(mod, "GROUP_COMMIT_ACK", "commit")
+    return mod
+
+
+def _count(fresh_db, sql):
+    con = fresh_db.connection.get_conn()
+    try:
+        return con.execute(sql).fetchone()[0]
+    finally:
+        con.close()
+
+
+def _insert_job(module_id, battery):
+    def _job(con):
+        con.execute(
+            "INSERT INTO module_heartbeats (module_id, battery) VALUES (?, ?)",
+            (module_id, battery),
+        )
+        return battery
+
+    return _job
+
+
+def _submit_concurrently(gc, jobs):
+    barrier = threading.Barrier(len(jobs))
+    results: list = [None] * len(jobs)
+
+    def _worker(i, job):
+        barrier.wait()
+        try:
+            results[i] = gc.submit(job)
+        except Exception as e:  # asserted on by the caller
+            results[i] = e
+
+    threads = [
+        threading.Thread(target=_worker, args=(i, job)) for i, job in enumerate(jobs)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    return results
+
+
+def test_concurrent_writes_share_commits(gc, fresh_db):
+    before = gc.stats()
+    results = _submit_concurrently(
+        gc, [_insert_job("aabbccddeeff", i) for i in range(40)]
+    )
+    after = gc.stats()
+
+    assert sorted(results) == list(range(40))
+    assert _count(fresh_db, "SELECT COUNT(*) FROM module_heartbeats") == 40
+    assert after["jobs"] - before["jobs"] == 40
+    # 40 concurrent writers, a 50 ms window: a handful of commits, not 40.
+    assert after["batches"] - before["batches"] < 10
+
+
+def test_failing_job_fails_alone(gc, fresh_db):
+    def _bad(con):
+        con.execute("INSERT INTO no_such_table VALUES (1)")
+
+    jobs = [_insert_job("aabbccddeeff", i) for i in range(5)] + [_bad]
+    results = _submit_concurrently(gc, jobs)
+
+    assert sorted(r for r in results if isinstance(r, int)) == list(range(5))
+    assert sum(isinstance(r, Exception) for r in results) == 1
+    assert _count(fresh_db, "SELECT COUNT(*) FROM module_heartbeats") == 5
+
+
+@pytest.mark.parametrize("window_ms", [50.0, 0.0])
+def test_submit_many_reports_each_job_in_order(gc, fresh_db, monkeypatch, window_ms):
+    monkeypatch.setattr(gc, "GROUP_COMMIT_WINDOW_MS", window_ms)
+
+    def _bad(con):
+        con.execute("INSERT INTO no_such_table VALUES (1)")
+
+    outcomes = gc.submit_many(
+        [_insert_job("aabbccddeeff", 1), _bad, _insert_job("aabbccddeeff", 3)]
+    )
+
+    assert [result for result, _ in outcomes] == [1, None, 3]
+    assert [error is None for _, error in outcomes] == [True, False, True]
+    assert _count(fresh_db, "SELECT COUNT(*) FROM module_heartbeats") == 2
+
+
+def test_enqueue_ack_returns_before_commit_and_flush_drains(gc, fresh_db, monkeypatch):
+    monkeypatch.setattr(gc, "GROUP_COMMIT_ACK", "enqueue")
+    assert gc.submit(_insert_job("aabbccddeeff", 1)) is None
+    # A caller that needs read-after-write opts back in per call.
+    assert gc.submit(_insert_job("aabbccddeeff", 2), wait=True) == 2
+    assert gc.flush(5) is True
+    assert _count(fresh_db, "SELECT COUNT(*) FROM module_heartbeats") == 2
+
+
+def test_zero_window_writes_synchronously_on_the_caller(gc, fresh_db, monkeypatch):
+    monkeypatch.setattr(gc, "GROUP_COMMIT_WINDOW_MS", 0.0)
+    before = gc.stats()["batches"]
+    assert gc.submit(_insert_job("aabbccddeeff", 7)) == 7
+    assert gc.stats()["batches"] == before
+    assert _count(fresh_db, "SELECT COUNT(*) FROM module_heartbeats") == 1
+
+
+def test_heartbeat_burst_is_group_committed(gc, app, fresh_db):
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_configs (id, name, lat, lng, first_online) "
+            "VALUES ('aabbccddeeff', 'Seed', 47.8, 9.6, '2024-01-01')"
+        )
+    finally:
+        con.close()
+
+    n = 25
+    barrier = threading.Barrier(n)
+    statuses: list[int] = []
+
+    def _post():
+        client = app.test_client()
+        barrier.wait()
+        resp = client.post("/heartbeat", data={"mac": "aabbccddeeff", "battery": "50"})
+        statuses.append(resp.status_code)
+
+    before = gc.stats()["batches"]
+    threads = [threading.Thread(target=_post) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+    assert statuses == [200] * n
+    assert _count(fresh_db, "SELECT COUNT(*) FROM module_heartbeats") == n
+    assert _count(fresh_db, "SELECT COUNT(*) FROM measurements") == n
+    assert gc.stats()["batches"] - before < n
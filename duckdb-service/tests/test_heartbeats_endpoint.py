@@ -739,6 +739,76 @@ def test_heartbeats_summary_clears_streak_after_recovery_not_latching(client, fr
     assert entry["last_hb_fail_code"] == 0
 
 
+# ---------- module_latest_heartbeat (incremental summary) ----------
+#
+# `/heartbeats_summary` reads a one-row-per-module table that `post_heartbeat`
+# upserts, instead of re-folding ARG_MAX over the whole history. These pin
+# that the upsert reproduces the fold, including its NULL-skipping.
+
+
+def test_summary_keeps_last_non_null_field_like_arg_max(client, fresh_db):
+    import time
+
+    _seed_module_at(fresh_db, CANONICAL_MAC)
+    client.post(
+        "/heartbeat", data={"mac": CANONICAL_MAC, "battery": "61", "rssi": "-70"}
+    )
+    time.sleep(0.01)
+    # Newer firmware omits battery: ARG_MAX skipped the NULL, so must we.
+    client.post("/heartbeat", data={"mac": CANONICAL_MAC, "rssi": "-55"})
+    entry = client.get("/heartbeats_summary").get_json()["summary"][CANONICAL_MAC]
+    assert entry["battery"] == 61
+    assert entry["rssi"] == -55
+
+    con = fresh_db.connection.get_conn()
+    try:
+        latest = con.execute(
+            "SELECT MAX(received_at) FROM module_heartbeats WHERE module_id = ?",
+            [CANONICAL_MAC],
+        ).fetchone()[0]
+    finally:
+        con.close()
+    assert entry["last_seen"] == latest.isoformat()
+
+
+def test_init_db_backfills_latest_heartbeat_from_history(client, fresh_db):
+    from datetime import datetime
+
+    _insert_heartbeats(
+        fresh_db, CANONICAL_MAC, [datetime(2026, 6, 1, h) for h in range(3)]
+    )
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute("UPDATE module_heartbeats SET boot_count = 10 + hour(received_at)")
+    finally:
+        con.close()
+    # Rows written behind the upsert's back (a pre-migration volume) are
+    # invisible until the boot-time backfill folds them in.
+    assert client.get("/heartbeats_summary").get_json()["summary"] == {}
+
+    fresh_db.schema.init_db()
+    entry = client.get("/heartbeats_summary").get_json()["summary"][CANONICAL_MAC]
+    assert entry["boot_count"] == 12
+    assert entry["last_seen"] == "2026-06-01T02:00:00"
+
+    # Idempotent: a second boot finds nothing missing.
+    fresh_db.schema.init_db()
+    con = fresh_db.connection.get_conn()
+    try:
+        n = con.execute("SELECT COUNT(*) FROM module_latest_heartbeat").fetchone()[0]
+    finally:
+        con.close()
+    assert n == 1
+
+
+def test_delete_module_drops_its_latest_heartbeat(client, fresh_db):
+    _seed_module_at(fresh_db, CANONICAL_MAC)
+    client.post("/heartbeat", data={"mac": CANONICAL_MAC, "battery": "50"})
+    assert CANONICAL_MAC in client.get("/heartbeats_summary").get_json()["summary"]
+    assert client.delete(f"/modules/{CANONICAL_MAC}").status_code == 200
+    assert client.get("/heartbeats_summary").get_json()["summary"] == {}
+
+
 def test_heartbeat_omitting_failure_streak_stores_null(client, fresh_db):
     # Pre-#172 firmware omits both fields. A mixed fleet during the OTA rollout
     # must not 500 and must store NULL, not 0 — a real 0-count streak (the
@@ -814,21 +884,23 @@ def test_heartbeat_omitting_stage_stores_null(client, fresh_db):
     assert hb["last_stage_before_reboot"] is None
 
 
-# ---------- derived heartbeat gaps: GET /heartbeats/<id>/gaps (#172 opt 3) ----
+# ---------- heartbeat gaps: GET /heartbeats/<id>/gaps (#172 opt 3) ----------
 #
 # Server-side complement to the device-reported streak above: the silent
 # windows the device could NOT report (power loss, hang, timeout — a failed
-# heartbeat never reaches the server). Derived from the persisted
-# `received_at` timeline. These seed real rows with a deliberate gap and assert
+# heartbeat never reaches the server). Kept in `heartbeat_gaps`: appended by
+# `/heartbeat`, filled from existing history by `backfill_heartbeat_gaps`
+# (ADR-034). These seed real rows with a deliberate gap and assert
 # the gap lands with the right bounds — behaviour, not envelope (CLAUDE.md
 # rule 5: an empty `gaps` list satisfies any shape-only assertion, which is
 # exactly what a silently-broken window function looks like).
 
 
 def _insert_heartbeats(fresh_db, mac, timestamps):
-    """Insert bare heartbeat rows at explicit received_at instants. The
-    `/heartbeat` POST stamps received_at=now(), so gaps can only be seeded by
-    writing the timeline directly."""
+    """Insert bare heartbeat rows at explicit received_at instants, then run
+    the history backfill over them. The `/heartbeat` POST stamps
+    received_at=now(), so gaps can only be seeded by writing the timeline
+    directly — which is the pre-existing-history case the backfill covers."""
     con = fresh_db.connection.get_conn()
     try:
         for ts in timestamps:
@@ -836,6 +908,19 @@ def _insert_heartbeats(fresh_db, mac, timestamps):
                 "INSERT INTO module_heartbeats (module_id, received_at) VALUES (?, ?)",
                 (mac, ts),
             )
+        fresh_db.schema.backfill_heartbeat_gaps(con)
+    finally:
+        con.close()
+
+
+def _backdate_latest(fresh_db, mac, received_at):
+    """Pretend the module's last heartbeat landed at `received_at`."""
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "UPDATE module_latest_heartbeat SET received_at = ? WHERE module_id = ?",
+            (received_at, mac),
+        )
     finally:
         con.close()
 
@@ -901,3 +986,61 @@ def test_heartbeat_gaps_unknown_module_empty(client, fresh_db):
     resp = client.get(f"/heartbeats/{CANONICAL_MAC}/gaps")
     assert resp.status_code == 200
     assert resp.get_json() == {"module_id": CANONICAL_MAC, "gaps": []}
+
+
+def test_heartbeat_post_records_gap_since_previous(client, fresh_db):
+    from datetime import datetime, timedelta, timezone
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    _seed_module_at(fresh_db, CANONICAL_MAC)
+    client.post("/heartbeat", data={"mac": CANONICAL_MAC})
+    prev = now.replace(microsecond=0) - timedelta(hours=3)
+    _backdate_latest(fresh_db, CANONICAL_MAC, prev)
+
+    client.post("/heartbeat", data={"mac": CANONICAL_MAC})
+
+    latest = client.get(f"/heartbeats/{CANONICAL_MAC}?limit=1").get_json()
+    (gap,) = client.get(f"/heartbeats/{CANONICAL_MAC}/gaps").get_json()["gaps"]
+    assert gap["gap_start"] == prev.isoformat()
+    assert gap["gap_end"] == latest["heartbeats"][0]["received_at"]
+    assert 3 * 3600 <= gap["gap_seconds"] < 3 * 3600 + 60
+
+
+def test_heartbeat_post_within_threshold_records_no_gap(client, fresh_db):
+    from datetime import datetime, timedelta, timezone
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    _seed_module_at(fresh_db, CANONICAL_MAC)
+    client.post("/heartbeat", data={"mac": CANONICAL_MAC})
+    _backdate_latest(fresh_db, CANONICAL_MAC, now - timedelta(minutes=80))
+    client.post("/heartbeat", data={"mac": CANONICAL_MAC})
+    assert client.get(f"/heartbeats/{CANONICAL_MAC}/gaps").get_json()["gaps"] == []
+
+
+def test_heartbeat_gaps_backfill_runs_once_at_boot(client, fresh_db):
+    from datetime import datetime, timedelta
+
+    base = datetime(2026, 6, 4, 0, 0, 0)
+    con = fresh_db.connection.get_conn()
+    try:
+        for ts in (base, base + timedelta(hours=5)):
+            con.execute(
+                "INSERT INTO module_heartbeats (module_id, received_at) VALUES (?, ?)",
+                (CANONICAL_MAC, ts),
+            )
+    finally:
+        con.close()
+    # The fixture's boot already recorded the backfill: history written
+    # behind the writer's back is not picked up again.
+    fresh_db.schema.init_db()
+    assert client.get(f"/heartbeats/{CANONICAL_MAC}/gaps").get_json()["gaps"] == []
+
+    # A DB from before the table: the next boot fills it from history.
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute("DELETE FROM schema_migrations")
+    finally:
+        con.close()
+    fresh_db.schema.init_db()
+    (gap,) = client.get(f"/heartbeats/{CANONICAL_MAC}/gaps").get_json()["gaps"]
+    assert gap["gap_seconds"] == 5 * 3600
@@ -0,0 +1,358 @@
+"""Tests for ``POST /ingest_upload`` (routes/ingest.py).
+
+The route applies what ``/record_image``, ``/add_progress_for_module``,
+``/record_detections`` and ``/modules/<id>/heartbeat`` each write, in one
+transaction. Assert the rows land where those routes put them, that the
+first-upload flag is decided before the upload's own progress rows, and
+that a bad body writes nothing.
+"""
+
+from __future__ import annotations
+
+TEST_MAC = "aabbccddeeff"
+
+CLASSIFICATION = {
+    "black_masked_bee": {"1": 0.5, "2": 0.25, "3": 0.0, "4": 1.0},
+}
+
+
+def _seed_module(fresh_db, module_id=TEST_MAC):
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_configs (id, name, lat, lng, first_online, "
+            "battery_level, image_count) "
+            "VALUES (?, 'Seed', 47.8, 9.6, '2024-01-01', NULL, 0)",
+            (module_id,),
+        )
+    finally:
+        con.close()
+
+
+def _scalar(fresh_db, sql, params=()):
+    con = fresh_db.connection.get_conn()
+    try:
+        return con.execute(sql, params).fetchone()[0]
+    finally:
+        con.close()
+
+
+def _ingest(client, **body):
+    return client.post(
+        "/ingest_upload",
+        json={"module_id": TEST_MAC, "filename": "cap.jpg", **body},
+    )
+
+
+def _full_body():
+    return {
+        "battery": 77,
+        "classification": CLASSIFICATION,
+        "detections": [
+            {
+                "bee_type": "leafcutter",
+                "nest_index": 1,
+                "bbox": [0.1, 0.2, 0.3, 0.3],
+                "state": "sealed",
+                "confidence": 0.9,
+                "snip_filename": "cap-leafcutter-1.jpg",
+            },
+            # Invalid state: skipped, as on /record_detections.
+            {"state": "bogus", "snip_filename": "x.jpg"},
+        ],
+    }
+
+
+def test_ingest_writes_every_part_of_the_upload(client, fresh_db):
+    _seed_module(fresh_db)
+    resp = _ingest(client, **_full_body())
+    assert resp.status_code == 200, resp.get_json()
+    assert resp.get_json() == {
+        "message": "Upload ingested",
+        "first_upload": True,
+        "inserted": 1,
+        "heartbeat": True,
+    }
+
+    assert (
+        _scalar(
+            fresh_db,
+            "SELECT filename FROM image_uploads WHERE module_id = ?",
+            (TEST_MAC,),
+        )
+        == "cap.jpg"
+    )
+    assert (
+        _scalar(
+            fresh_db,
+            "SELECT real_image_count FROM module_image_stats WHERE module_id = ?",
+            (TEST_MAC,),
+        )
+        == 1
+    )
+    con = fresh_db.connection.get_conn()
+    try:
+        sealed = [
+            r[0]
+            for r in con.execute(
+                "SELECT p.sealed FROM daily_progress p "
+                "JOIN nest_data n ON p.nest_id = n.nest_id "
+                "WHERE n.module_id = ? ORDER BY length(n.nest_id), n.nest_id",
+                (TEST_MAC,),
+            ).fetchall()
+        ]
+    finally:
+        con.close()
+    assert sealed == [50, 25, 0, 100]
+    detections = client.get(f"/detections?module_id={TEST_MAC}").get_json()
+    assert [d["snip_filename"] for d in detections["detections"]] == [
+        "cap-leafcutter-1.jpg"
+    ]
+    assert (
+        _scalar(
+            fresh_db,
+            "SELECT battery_level || '/' || image_count FROM module_configs WHERE id = ?",
+            (TEST_MAC,),
+        )
+        == "77/1"
+    )
+
+
+def test_first_upload_is_decided_before_the_uploads_own_progress(client, fresh_db):
+    _seed_module(fresh_db)
+    assert _ingest(client, **_full_body()).get_json()["first_upload"] is True
+    assert _ingest(client, **_full_body()).get_json()["first_upload"] is False
+
+
+def test_module_with_progress_history_is_not_first(client, fresh_db):
+    """Same rule as /record_image: progress rows from before the marker
+    existed mean the module has uploaded before."""
+    _seed_module(fresh_db)
+    client.post(
+        "/add_progress_for_module",
+        json={"module_id": TEST_MAC, "classification": CLASSIFICATION},
+    )
+    assert _ingest(client).get_json()["first_upload"] is False
+
+
+def test_parts_are_optional_and_unknown_module_takes_no_heartbeat(client, fresh_db):
+    resp = _ingest(client, battery=50)
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["heartbeat"] is False
+    assert body["inserted"] == 0
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM image_uploads") == 1
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM daily_progress") == 0
+
+
+def test_unregistered_module_still_records_image_and_detections(client, fresh_db):
+    """No `module_configs` row: progress would violate `nest_data`'s
+    foreign key, so it is skipped with the heartbeat, as the per-step
+    routes skip them, and the image and detections are still recorded."""
+    resp = _ingest(client, **_full_body())
+    assert resp.status_code == 200, resp.get_json()
+    assert resp.get_json()["heartbeat"] is False
+    assert resp.get_json()["inserted"] == 1
+
+    batch = client.post(
+        "/ingest_uploads",
+        json={
+            "uploads": [
+                {"module_id": TEST_MAC, "filename": "b.jpg", **_full_body()},
+            ]
+        },
+    )
+    assert batch.status_code == 200, batch.get_json()
+    assert "error" not in batch.get_json()["results"][0]
+
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM image_uploads") == 2
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM nest_detections") == 2
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM nest_data") == 0
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM daily_progress") == 0
+
+
+def test_canonicalises_legacy_colon_mac(client, fresh_db):
+    _seed_module(fresh_db)
+    resp = client.post(
+        "/ingest_upload",
+        json={"module_id": "AA:BB:CC:DD:EE:FF", "filename": "c.jpg", "battery": 5},
+    )
+    assert resp.status_code == 200
+    assert resp.get_json()["heartbeat"] is True
+    assert (
+        _scalar(
+            fresh_db,
+            "SELECT COUNT(*) FROM image_uploads WHERE module_id = ?",
+            (TEST_MAC,),
+        )
+        == 1
+    )
+
+
+def test_invalid_body_returns_400_and_writes_nothing(client, fresh_db):
+    _seed_module(fresh_db)
+    for body in (
+        {"filename": "x.jpg"},
+        {"module_id": TEST_MAC},
+        {"module_id": "not-a-mac", "filename": "x.jpg"},
+        {"module_id": TEST_MAC, "filename": "x.jpg", "battery": 101},
+        {"module_id": TEST_MAC, "filename": "x.jpg", "battery": True},
+        {"module_id": TEST_MAC, "filename": "x.jpg", "classification": [1]},
+        {"module_id": TEST_MAC, "filename": "x.jpg", "detections": {"a": 1}},
+    ):
+        resp = client.post("/ingest_upload", json=body)
+        assert resp.status_code == 400, body
+    assert client.post("/ingest_upload", data="nope").status_code == 400
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM image_uploads") == 0
+
+
+def test_failed_write_leaves_no_partial_upload(client, fresh_db, monkeypatch):
+    import importlib
+
+    ingest = importlib.import_module("routes.ingest")
+
+    def boom(con, *args):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(ingest, "_write_upload_heartbeat", boom)
+    _seed_module(fresh_db)
+    resp = _ingest(client, **_full_body())
+    assert resp.status_code == 500
+    for table in ("image_uploads", "daily_progress", "nest_detections"):
+        assert _scalar(fresh_db, f"SELECT COUNT(*) FROM {table}") == 0, table
+
+
+# ---------- idempotency keys and the batch route (outbox replays) ----------
+
+
+def test_repeated_ingest_key_writes_once_and_answers_the_same(client, fresh_db):
+    _seed_module(fresh_db)
+    first = _ingest(client, ingest_key="k-1", **_full_body()).get_json()
+    again = _ingest(client, ingest_key="k-1", **_full_body()).get_json()
+    assert first["first_upload"] is True
+    assert "replayed" not in first
+    assert again["replayed"] is True
+    assert (again["first_upload"], again["inserted"], again["heartbeat"]) == (
+        True,
+        1,
+        True,
+    )
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM image_uploads") == 1
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM nest_detections") == 1
+    assert (
+        _scalar(
+            fresh_db, "SELECT image_count FROM module_configs WHERE id = ?", (TEST_MAC,)
+        )
+        == 1
+    )
+
+
+def test_uploaded_at_stamps_the_rows_and_is_capped_at_now(client, fresh_db):
+    _seed_module(fresh_db)
+    _ingest(client, uploaded_at="2026-03-01T10:00:00+00:00")
+    _ingest(client, filename="later.jpg", uploaded_at="2999-01-01 00:00:00")
+    con = fresh_db.connection.get_conn()
+    try:
+        stamps = dict(
+            con.execute("SELECT filename, uploaded_at FROM image_uploads").fetchall()
+        )
+    finally:
+        con.close()
+    assert str(stamps["cap.jpg"]) == "2026-03-01 10:00:00"
+    assert stamps["later.jpg"].year < 2999
+    assert _ingest(client, uploaded_at="yesterday").status_code == 400
+
+
+def test_batch_applies_in_order_and_skips_invalid_uploads(client, fresh_db):
+    _seed_module(fresh_db)
+    resp = client.post(
+        "/ingest_uploads",
+        json={
+            "uploads": [
+                {"module_id": TEST_MAC, "filename": "a.jpg", "ingest_key": "a"},
+                {"module_id": "nope", "filename": "x.jpg", "ingest_key": "bad"},
+                {"module_id": TEST_MAC, "filename": "b.jpg", "ingest_key": "b"},
+                {"module_id": TEST_MAC, "filename": "a.jpg", "ingest_key": "a"},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert [r["ingest_key"] for r in results] == ["a", "bad", "b", "a"]
+    assert results[0]["first_upload"] is True
+    assert results[1]["error"] == "invalid module id"
+    assert results[2]["first_upload"] is False
+    assert results[3]["replayed"] is True
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM image_uploads") == 2
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM ingest_keys") == 2
+
+
+def test_batch_write_failure_fails_only_that_upload(client, fresh_db, monkeypatch):
+    import importlib
+
+    ingest = importlib.import_module("routes.ingest")
+    real = ingest._write_image_upload
+
+    def flaky(con, module_id, filename, uploaded_at):
+        if filename == "bad.jpg":
+            raise RuntimeError("constraint violated")
+        return real(con, module_id, filename, uploaded_at)
+
+    monkeypatch.setattr(ingest, "_write_image_upload", flaky)
+    _seed_module(fresh_db)
+    resp = client.post(
+        "/ingest_uploads",
+        json={
+            "uploads": [
+                {"module_id": TEST_MAC, "filename": "a.jpg", "ingest_key": "a"},
+                {"module_id": TEST_MAC, "filename": "bad.jpg", "ingest_key": "bad"},
+                {"module_id": TEST_MAC, "filename": "b.jpg", "ingest_key": "b"},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert [r["ingest_key"] for r in results] == ["a", "bad", "b"]
+    assert results[1]["write_failed"] is True
+    assert "constraint violated" in results[1]["error"]
+    assert "error" not in results[0] and "error" not in results[2]
+    con = fresh_db.connection.get_conn()
+    try:
+        rows = con.execute("SELECT filename FROM image_uploads").fetchall()
+    finally:
+        con.close()
+    assert {row[0] for row in rows} == {"a.jpg", "b.jpg"}
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM ingest_keys") == 2
+
+
+def test_batch_rejects_a_malformed_or_oversized_body(client, fresh_db, monkeypatch):
+    import importlib
+
+    ingest = importlib.import_module("routes.ingest")
+    monkeypatch.setattr(ingest, "INGEST_BATCH_MAX", 1)
+    assert client.post("/ingest_uploads", json={"uploads": {}}).status_code == 400
+    assert client.post("/ingest_uploads", json=[]).status_code == 400
+    body = {"uploads": [{"module_id": TEST_MAC, "filename": "a.jpg"}] * 2}
+    assert client.post("/ingest_uploads", json=body).status_code == 400
+    assert _scalar(fresh_db, "SELECT COUNT(*) FROM image_uploads") == 0
+
+
+def test_prune_drops_only_expired_keys(client, fresh_db):
+    import importlib
+
+    ingest = importlib.import_module("routes.ingest")
+    _seed_module(fresh_db)
+    _ingest(client, ingest_key="fresh")
+    _ingest(client, ingest_key="old", filename="old.jpg")
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "UPDATE ingest_keys SET ingested_at = ingested_at - INTERVAL 400 DAY "
+            "WHERE ingest_key = 'old'"
+        )
+    finally:
+        con.close()
+    assert ingest.prune_ingest_keys() == 1
+    assert (
+        _scalar(fresh_db, "SELECT string_agg(ingest_key) FROM ingest_keys") == "fresh"
+    )
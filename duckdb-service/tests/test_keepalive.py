@@ -0,0 +1,126 @@
+"""Tests for services/keepalive.py: HTTP/1.1 keep-alive on werkzeug.
+
+A tiny Flask app on a real threaded werkzeug server, talked to with
+``http.client`` so it's visible whether the socket survived a response.
+"""
+
+from __future__ import annotations
+
+import http.client
+import threading
+import time
+
+import pytest
+from flask import Flask, request
+from werkzeug.serving import make_server
+
+from services.keepalive import KeepAliveRequestHandler
+
+
+def _stub_app() -> Flask:
+    stub = Flask("keepalive-stub")
+
+    @stub.post("/echo")
+    def echo():
+        return {"got": request.get_json()}
+
+    @stub.post("/deny")
+    def deny():
+        # Answers without touching the body, like an auth check.
+        return {"error": "unauthorized"}, 401
+
+    @stub.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    return stub
+
+
+@pytest.fixture
+def server():
+    srv = make_server(
+        "127.0.0.1", 0, _stub_app(), threaded=True, request_handler=_FastIdle
+    )
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+
+
+class _FastIdle(KeepAliveRequestHandler):
+    timeout = 0.5
+
+
+def _conn(srv) -> http.client.HTTPConnection:
+    return http.client.HTTPConnection("127.0.0.1", srv.server_port, timeout=5)
+
+
+def _call(conn, method, path, body=None, headers=None):
+    conn.request(method, path, body=body, headers=headers or {})
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
+def test_consecutive_requests_share_one_socket(server):
+    conn = _conn(server)
+    resp, _ = _call(conn, "GET", "/ping")
+    assert resp.status == 200
+    assert resp.getheader("Connection") is None
+    sock = conn.sock
+    assert sock is not None
+    resp, body = _call(
+        conn,
+        "POST",
+        "/echo",
+        body=b'{"a": 1}',
+        headers={"Content-Type": "application/json"},
+    )
+    assert resp.status == 200
+    assert b'"a":1' in body.replace(b" ", b"")
+    assert conn.sock is sock
+
+
+def test_unread_body_does_not_leak_into_the_next_request(server):
+    conn = _conn(server)
+    resp, _ = _call(
+        conn,
+        "POST",
+        "/deny",
+        body=b'{"junk": "GET /ping HTTP/1.1"}',
+        headers={"Content-Type": "application/json"},
+    )
+    assert resp.status == 401
+    sock = conn.sock
+    resp, body = _call(conn, "GET", "/ping")
+    assert resp.status == 200
+    assert b'"ok"' in body
+    assert conn.sock is sock
+
+
+def test_chunked_request_keeps_werkzeugs_close(server):
+    conn = _conn(server)
+    conn.putrequest("POST", "/echo")
+    conn.putheader("Content-Type", "application/json")
+    conn.putheader("Transfer-Encoding", "chunked")
+    conn.endheaders()
+    conn.send(b"2\r\n{}\r\n0\r\n\r\n")
+    resp = conn.getresponse()
+    resp.read()
+    assert resp.status == 200
+    assert resp.getheader("Connection") == "close"
+
+
+def test_client_close_is_honoured(server):
+    conn = _conn(server)
+    resp, _ = _call(conn, "GET", "/ping", headers={"Connection": "close"})
+    assert resp.status == 200
+    assert resp.will_close
+
+
+def test_idle_connection_is_closed_after_the_timeout(server):
+    conn = _conn(server)
+    _call(conn, "GET", "/ping")
+    sock = conn.sock
+    time.sleep(_FastIdle.timeout + 0.5)
+    # The server has closed its end: the read sees EOF.
+    sock.settimeout(2)
+    assert sock.recv(1) == b""
@@ -0,0 +1,219 @@
+"""Tests for the measurement rollups and raw retention
+(``services/measurement_rollup.py``) and the read route serving from them.
+
+``_LAG`` is zeroed so a rollup run right after a seed picks the rows up
+(it otherwise leaves rows stamped within a second of its own clock for
+the next run).
+"""
+
+from __future__ import annotations
+
+import importlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+TEST_MAC_1 = "aabbccddeeff"
+URL = f"/modules/{TEST_MAC_1}/measurements?metric=battery_pct&interval={{}}&days=7"
+
+
+def _rollup():
+    return importlib.import_module("services.measurement_rollup")
+
+
+@pytest.fixture(autouse=True)
+def _no_lag(monkeypatch):
+    monkeypatch.setattr(_rollup(), "_LAG", timedelta(0))
+
+
+def _hour(hours_ago: int) -> datetime:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours_ago)
+
+
+def _seed_module(fresh_db):
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_configs (id, name, lat, lng, first_online) "
+            "VALUES (?, 'Rollup', 47.8, 9.6, '2024-01-01')",
+            (TEST_MAC_1,),
+        )
+    finally:
+        con.close()
+
+
+def _seed(fresh_db, ts, value, source="esp-heartbeat", metric="battery_pct"):
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO measurements "
+            "(module_mac, ts, metric, value, source) VALUES (?, ?, ?, ?, ?)",
+            (TEST_MAC_1, ts, metric, float(value), source),
+        )
+    finally:
+        con.close()
+
+
+def _rows(fresh_db, sql, params=()):
+    con = fresh_db.connection.get_conn()
+    try:
+        return con.execute(sql, params).fetchall()
+    finally:
+        con.close()
+
+
+def _non_empty(client, interval):
+    body = client.get(URL.format(interval)).get_json()
+    return [
+        (b["timestamp"], b["value"], b["sample_count"])
+        for b in body["buckets"]
+        if b["sample_count"]
+    ]
+
+
+def test_rollup_folds_rows_once_and_advances_the_watermark(fresh_db):
+    _seed_module(fresh_db)
+    _seed(fresh_db, _hour(3) + timedelta(minutes=5), 70)
+    _seed(fresh_db, _hour(3) + timedelta(minutes=50), 90)
+    _seed(fresh_db, _hour(2), 40, source="open-meteo")
+
+    assert _rollup().run_rollup() == 3
+    assert _rollup().run_rollup() == 0
+
+    hourly = _rows(
+        fresh_db,
+        "SELECT bucket, source, sample_count, value_sum, value_min, value_max "
+        "FROM measurements_hourly ORDER BY bucket, source",
+    )
+    assert hourly == [
+        (_hour(3), "esp-heartbeat", 2, 160.0, 70.0, 90.0),
+        (_hour(2), "open-meteo", 1, 40.0, 40.0, 40.0),
+    ]
+    daily = _rows(
+        fresh_db, "SELECT SUM(sample_count), SUM(value_sum) FROM measurements_daily"
+    )
+    assert daily == [(3, 200.0)]
+    (watermark,) = _rows(fresh_db, "SELECT watermark FROM measurements_rollup_state")[0]
+    assert watermark > datetime(1970, 1, 1)
+
+
+def test_late_rows_merge_into_an_existing_bucket(fresh_db):
+    _seed_module(fresh_db)
+    _seed(fresh_db, _hour(5) + timedelta(minutes=10), 50)
+    _rollup().run_rollup()
+
+    # A backfill arriving later for the same hour: merged, not re-read.
+    _seed(fresh_db, _hour(5) + timedelta(minutes=20), 20)
+    _seed(fresh_db, _hour(5) + timedelta(minutes=30), 80)
+    assert _rollup().run_rollup() == 2
+
+    assert _rows(
+        fresh_db,
+        "SELECT sample_count, value_sum, value_min, value_max FROM measurements_hourly",
+    ) == [(3, 150.0, 20.0, 80.0)]
+
+
+def test_read_matches_before_during_and_after_rollup(client, fresh_db):
+    _seed_module(fresh_db)
+    _seed(fresh_db, _hour(3) + timedelta(minutes=5), 75)
+    _seed(fresh_db, _hour(3) + timedelta(minutes=45), 85)
+    _seed(fresh_db, _hour(2) + timedelta(minutes=10), 60, source="open-meteo")
+
+    expected_hourly = [
+        (_hour(3).isoformat(), 80.0, 2),
+        (_hour(2).isoformat(), 60.0, 1),
+    ]
+    # Nothing rolled up yet: all from the raw tail.
+    assert _non_empty(client, "hourly") == expected_hourly
+
+    _rollup().run_rollup()
+    assert _non_empty(client, "hourly") == expected_hourly
+
+    # One more sample in an already-rolled-up bucket: rollup + tail add up.
+    _seed(fresh_db, _hour(2) + timedelta(minutes=40), 100)
+    assert _non_empty(client, "hourly") == [
+        (_hour(3).isoformat(), 80.0, 2),
+        (_hour(2).isoformat(), 80.0, 2),
+    ]
+    daily = _non_empty(client, "daily")
+    assert sum(n for _, _, n in daily) == 4
+    assert sum(v * n for _, v, n in daily) == 320.0
+
+
+def test_retention_drops_old_rolled_up_rows_but_not_backfill(client, fresh_db):
+    _seed_module(fresh_db)
+    old = _hour(72)
+    _seed(fresh_db, old, 30)
+    _seed(fresh_db, old + timedelta(minutes=1), 50, source="esp-heartbeat-backfill")
+    _seed(fresh_db, _hour(1), 90)
+    before = _non_empty(client, "hourly")
+
+    assert _rollup().run_retention(days=2) == 1
+
+    assert _rows(fresh_db, "SELECT source, value FROM measurements ORDER BY ts") == [
+        ("esp-heartbeat-backfill", 50.0),
+        ("esp-heartbeat", 90.0),
+    ]
+    # The chart still shows the dropped sample — from the rollup.
+    assert _non_empty(client, "hourly") == before
+
+
+def test_retention_keeps_the_newest_row_per_source(fresh_db):
+    # The weather worker resumes from MAX(ts) per module; a module quiet
+    # for longer than the window must not look like it never reported.
+    _seed_module(fresh_db)
+    _seed(fresh_db, _hour(24 * 10), 20, source="open-meteo")
+    _seed(fresh_db, _hour(24 * 9), 30, source="open-meteo")
+    assert _rollup().run_retention(days=2) == 1
+    assert _rows(fresh_db, "SELECT value FROM measurements") == [(30.0,)]
+
+
+def test_retention_is_off_by_default(fresh_db, monkeypatch):
+    monkeypatch.delenv("MEASUREMENTS_RETENTION_DAYS", raising=False)
+    _seed_module(fresh_db)
+    _seed(fresh_db, _hour(24 * 400), 30)
+    assert _rollup().run_retention() == 0
+    assert _rows(fresh_db, "SELECT COUNT(*) FROM measurements") == [(1,)]
+
+
+def test_delete_module_clears_its_rollups(client, fresh_db):
+    _seed_module(fresh_db)
+    _seed(fresh_db, _hour(2), 30)
+    _rollup().run_rollup()
+    assert client.delete(f"/modules/{TEST_MAC_1}").status_code == 200
+    for table in ("measurements_hourly", "measurements_daily"):
+        assert _rows(fresh_db, f"SELECT COUNT(*) FROM {table}") == [(0,)]
+
+
+def test_migration_adds_ingested_at_to_an_old_measurements_table(fresh_db):
+    """A pre-rollup `measurements` (indices included) gains `ingested_at`;
+    its rows are stamped at migration time, so the first run rolls up the
+    whole history."""
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute("DROP TABLE measurements")
+        con.execute(
+            "CREATE TABLE measurements (module_mac VARCHAR(20) NOT NULL, "
+            "ts TIMESTAMP NOT NULL, metric VARCHAR(40) NOT NULL, "
+            "value DOUBLE NOT NULL, source VARCHAR(40) NOT NULL)"
+        )
+        con.execute(
+            "CREATE INDEX idx_measurements_module_metric_ts "
+            "ON measurements(module_mac, metric, ts)"
+        )
+        con.execute(
+            "INSERT INTO measurements VALUES (?, ?, 'battery_pct', 55.0, 'esp-heartbeat')",
+            (TEST_MAC_1, _hour(24 * 200)),
+        )
+    finally:
+        con.close()
+
+    fresh_db.schema.init_db()
+    fresh_db.schema.init_db()
+
+    assert _rows(
+        fresh_db, "SELECT COUNT(*) FROM measurements WHERE ingested_at IS NOT NULL"
+    ) == [(1,)]
+    assert _rollup().run_rollup() == 1
+    assert _rows(fresh_db, "SELECT value_sum FROM measurements_daily") == [(55.0,)]
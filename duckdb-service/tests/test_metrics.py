@@ -0,0 +1,104 @@
+"""Tests for the timing histograms and the admin-gated GET /metrics route.
+
+``services.metrics`` is a leaf module holding process-cumulative state; it is
+not in the fixture's purge list, so these tests assert on presence and on
+deltas, never on absolute counts.
+"""
+
+import re
+
+from services import metrics
+
+VALID_KEY = "hf_dev_key_2026"  # dev fallback resolved when HIGHFIVE_API_KEY unset
+
+
+def _scrape(client):
+    resp = client.get("/metrics", headers={"X-Admin-Key": VALID_KEY})
+    assert resp.status_code == 200
+    assert resp.content_type.startswith("text/plain; version=0.0.4")
+    return resp.get_data(as_text=True)
+
+
+def _count(text, name, **labels):
+    body = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    series = f"{name}_count{{{body}}}" if body else f"{name}_count"
+    pattern = rf"^{re.escape(series)} (\d+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return int(match.group(1)) if match else 0
+
+
+def test_fingerprint_strips_literals_and_whitespace():
+    a = metrics.fingerprint(
+        "SELECT *  FROM module_configs\n WHERE id = 'aabbccddeeff' AND battery > 42"
+    )
+    b = metrics.fingerprint(
+        "SELECT * FROM module_configs WHERE id = 'ffeeddccbbaa' AND battery > 7"
+    )
+    assert a == b == "SELECT * FROM module_configs WHERE id = ? AND battery > ?"
+    # Identifiers with digits and IN-lists of any length collapse too.
+    assert metrics.fingerprint("SELECT bee_type1 FROM t WHERE x IN (?, ?, ?)") == (
+        "SELECT bee_type1 FROM t WHERE x IN (?+)"
+    )
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = metrics.Histogram("t_seconds", "test", ("mode",), (0.1, 1.0))
+    h.observe(0.05, "read")
+    h.observe(0.5, "read")
+    h.observe(3.0, "read")
+    lines = list(h.render())
+    assert 't_seconds_bucket{mode="read",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{mode="read",le="1.0"} 2' in lines
+    assert 't_seconds_bucket{mode="read",le="+Inf"} 3' in lines
+    assert 't_seconds_count{mode="read"} 3' in lines
+    assert any(line.startswith('t_seconds_sum{mode="read"} 3.55') for line in lines)
+
+
+def test_metrics_requires_admin_key(client):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"X-Admin-Key": "nope"}).status_code == 401
+    bearer = client.get("/metrics", headers={"Authorization": f"Bearer {VALID_KEY}"})
+    assert bearer.status_code == 200
+
+
+def test_requests_record_lock_sql_and_json_timings(client):
+    before = _scrape(client)
+    assert client.get("/modules").status_code == 200
+    after = _scrape(client)
+
+    assert _count(after, "db_lock_wait_seconds", mode="read") > _count(
+        before, "db_lock_wait_seconds", mode="read"
+    )
+    assert _count(after, "db_lock_hold_seconds", mode="read") > 0
+    assert _count(after, "db_cursor_open_seconds") > 0
+    assert 'db_query_seconds_count{statement="SELECT' in after
+    assert 'db_query_rows_count{statement="SELECT' in after
+    assert (
+        _count(
+            after,
+            "http_request_seconds",
+            endpoint="modules.get_modules",
+            method="GET",
+            status="200",
+        )
+        > 0
+    )
+    assert _count(after, "http_json_serialize_seconds", endpoint="modules.get_modules")
+
+
+def test_group_commit_counters_are_exposed(client, fresh_db):
+    client.post(
+        "/new_module",
+        json={
+            "esp_id": "aabbccddeeff",
+            "module_name": "Metrics",
+            "latitude": 47.8,
+            "longitude": 9.6,
+            "battery_level": 80,
+        },
+    )
+    client.post("/heartbeat", data={"mac": "aabbccddeeff", "battery": "70"})
+    text = _scrape(client)
+    assert re.search(r"^db_group_commit_jobs_total \d+", text, re.MULTILINE)
+    assert "# TYPE db_group_commit_pending_jobs gauge" in text
+    assert _count(text, "db_lock_hold_seconds", mode="write") > 0
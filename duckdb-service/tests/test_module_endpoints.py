@@ -235,7 +235,7 @@ def test_record_image_inserts_row(client, fresh_db):
         json={"module_id": TEST_MAC_1, "filename": "esp_capture_001.jpg"},
     )
     assert resp.status_code == 200
-    assert resp.get_json() == {"message": "Image recorded"}
+    assert resp.get_json() == {"message": "Image recorded", "first_upload": True}
 
     rows = _fetch_image_uploads(fresh_db, TEST_MAC_1)
     assert len(rows) == 1
@@ -546,6 +546,7 @@ def test_delete_module_clears_every_referencing_table(client, fresh_db):
     _seed_nest(fresh_db, "nest-1", TEST_MAC_1)
     _seed_progress(fresh_db, "prog-1", "nest-1")
     _seed_image_upload(fresh_db, TEST_MAC_1, "x.jpg", "2024-06-01 12:00:00")
+    client.post("/record_image", json={"module_id": TEST_MAC_1, "filename": "y.jpg"})
     _seed_heartbeat(fresh_db, TEST_MAC_1)
     _seed_measurement(fresh_db, TEST_MAC_1)
 
@@ -556,6 +557,7 @@ def test_delete_module_clears_every_referencing_table(client, fresh_db):
     assert _count(fresh_db, "SELECT COUNT(*) FROM image_uploads WHERE module_id=?", (TEST_MAC_1,)) == 0
     assert _count(fresh_db, "SELECT COUNT(*) FROM module_heartbeats WHERE module_id=?", (TEST_MAC_1,)) == 0
     assert _count(fresh_db, "SELECT COUNT(*) FROM measurements WHERE module_mac=?", (TEST_MAC_1,)) == 0
+    assert _count(fresh_db, "SELECT COUNT(*) FROM module_image_stats WHERE module_id=?", (TEST_MAC_1,)) == 0
 
 
 def test_delete_module_matches_legacy_decimal_mac(client, fresh_db):
@@ -591,6 +593,122 @@ def test_delete_module_unknown_returns_404(client, fresh_db):
 
 def test_delete_module_invalid_id_returns_400(client):
     assert client.delete("/modules/not-a-mac").status_code == 400
+# ---------- module_image_stats (GET /modules aggregates) ----------
+
+
+def _modules_by_id(client):
+    return {m["id"]: m for m in client.get("/modules").get_json()["modules"]}
+
+
+def test_record_and_delete_image_maintain_module_stats(client, fresh_db):
+    _seed_module(fresh_db, TEST_MAC_1)
+    _seed_module(fresh_db, TEST_MAC_2)
+    for name in ("a.jpg", "b.jpg"):
+        assert (
+            client.post(
+                "/record_image", json={"module_id": TEST_MAC_1, "filename": name}
+            ).status_code
+            == 200
+        )
+
+    mods = _modules_by_id(client)
+    assert mods[TEST_MAC_1]["real_image_count"] == 2
+    assert mods[TEST_MAC_1]["last_image_at"] is not None
+    # A module without uploads has no stats row and still reads as 0/None.
+    assert mods[TEST_MAC_2]["real_image_count"] == 0
+    assert mods[TEST_MAC_2]["last_image_at"] is None
+
+    assert client.delete("/image_uploads/a.jpg").status_code == 200
+    assert _modules_by_id(client)[TEST_MAC_1]["real_image_count"] == 1
+    assert client.delete("/image_uploads/b.jpg").status_code == 200
+    mods = _modules_by_id(client)
+    assert mods[TEST_MAC_1]["real_image_count"] == 0
+    assert mods[TEST_MAC_1]["last_image_at"] is None
+    assert client.delete("/image_uploads/b.jpg").status_code == 404
+
+
+def test_delete_image_upload_recomputes_last_image_at(client, fresh_db):
+    _seed_module(fresh_db, TEST_MAC_1)
+    _seed_image_upload(fresh_db, TEST_MAC_1, "old.jpg", "2024-06-01 12:00:00")
+    _seed_image_upload(fresh_db, TEST_MAC_1, "new.jpg", "2024-06-02 12:00:00")
+    fresh_db.schema.init_db()  # boot-time backfill picks up the raw rows
+
+    assert _modules_by_id(client)[TEST_MAC_1]["real_image_count"] == 2
+    assert client.delete("/image_uploads/new.jpg").status_code == 200
+    mod = _modules_by_id(client)[TEST_MAC_1]
+    assert mod["real_image_count"] == 1
+    assert mod["last_image_at"] == "Sat, 01 Jun 2024 12:00:00 GMT"
+
+
+def test_reconcile_image_stats_repairs_drift(client, fresh_db):
+    import importlib
+
+    image_stats = importlib.import_module("services.image_stats")
+    _seed_module(fresh_db, TEST_MAC_1)
+    client.post("/record_image", json={"module_id": TEST_MAC_1, "filename": "a.jpg"})
+    # Written behind the routes' backs: the stats don't know about it.
+    _seed_image_upload(fresh_db, TEST_MAC_1, "b.jpg", "2030-01-01 00:00:00")
+    assert _modules_by_id(client)[TEST_MAC_1]["real_image_count"] == 1
+
+    assert image_stats.reconcile_image_stats() == {"modules": 1, "drifted": 1}
+    mod = _modules_by_id(client)[TEST_MAC_1]
+    assert mod["real_image_count"] == 2
+    assert mod["last_image_at"] == "Tue, 01 Jan 2030 00:00:00 GMT"
+    assert image_stats.reconcile_image_stats() == {"modules": 1, "drifted": 0}
+
+
+def test_record_image_first_upload_marker(client, fresh_db):
+    """`first_upload` is true exactly once per module and survives the
+    module's images being deleted again (the ping already went out)."""
+    _seed_module(fresh_db, TEST_MAC_1)
+
+    def record(name):
+        return client.post(
+            "/record_image", json={"module_id": TEST_MAC_1, "filename": name}
+        ).get_json()["first_upload"]
+
+    assert record("a.jpg") is True
+    assert record("b.jpg") is False
+    client.delete("/image_uploads/a.jpg")
+    client.delete("/image_uploads/b.jpg")
+    assert record("c.jpg") is False
+
+
+def test_record_image_first_upload_false_for_module_with_progress(client, fresh_db):
+    """A module with classified progress but no `image_uploads` history
+    (uploads from before that table existed) isn't announced as new."""
+    _seed_module(fresh_db, TEST_MAC_1)
+    _seed_nest(fresh_db, 1, TEST_MAC_1)
+    _seed_progress(fresh_db, 1, 1)
+
+    resp = client.post(
+        "/record_image", json={"module_id": TEST_MAC_1, "filename": "a.jpg"}
+    )
+    assert resp.get_json()["first_upload"] is False
+
+
+def test_reconcile_image_stats_keeps_first_upload_marker(client, fresh_db):
+    import importlib
+
+    image_stats = importlib.import_module("services.image_stats")
+    _seed_module(fresh_db, TEST_MAC_1)
+    client.post("/record_image", json={"module_id": TEST_MAC_1, "filename": "a.jpg"})
+    # Delete behind the routes' backs, then reconcile: the aggregates
+    # reset, the marker stays.
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute("DELETE FROM image_uploads")
+    finally:
+        con.close()
+
+    assert image_stats.reconcile_image_stats() == {"modules": 1, "drifted": 1}
+    assert _modules_by_id(client)[TEST_MAC_1]["real_image_count"] == 0
+    resp = client.post(
+        "/record_image", json={"module_id": TEST_MAC_1, "filename": "b.jpg"}
+    )
+    assert resp.get_json()["first_upload"] is False
+
+
 # ---------- GET /image_uploads pagination ----------
 
 
@@ -683,3 +801,137 @@ def test_image_uploads_without_limit_returns_all_with_total(client, fresh_db):
     body = client.get("/image_uploads").get_json()
     assert body["total"] == 2
     assert len(body["images"]) == 2
+
+
+def test_image_uploads_columnar_is_the_row_shape_transposed(client, fresh_db):
+    _seed_module(fresh_db, TEST_MAC_1)
+    _seed_image_upload(fresh_db, TEST_MAC_1, "a.jpg", "2024-06-01 12:00:00")
+    _seed_image_upload(fresh_db, TEST_MAC_1, "b.jpg", "2024-06-02 12:00:00.5")
+
+    rows = client.get("/image_uploads?limit=5").get_json()
+    body = client.get("/image_uploads?limit=5&format=columnar").get_json()
+    assert body["total"] == rows["total"] == 2
+    assert body["images"] == {
+        key: [r[key] for r in rows["images"]]
+        for key in ("module_id", "filename", "uploaded_at")
+    }
+    assert body["images"]["uploaded_at"] == [
+        "2024-06-02 12:00:00.500000",
+        "2024-06-01 12:00:00",
+    ]
+    assert client.get("/image_uploads?format=xml").status_code == 400
+
+
+def test_image_uploads_unpaginated_streams_the_same_bytes(client, fresh_db):
+    """Without `limit` the list is streamed; the body must match the
+    materialized page (same rows, same `total`) byte for byte."""
+    _seed_module(fresh_db, TEST_MAC_1)
+    for day in range(1, 4):
+        _seed_image_upload(
+            fresh_db, TEST_MAC_1, f"{day}.jpg", f"2024-06-0{day} 12:00:00"
+        )
+
+    streamed = client.get(f"/image_uploads?module_id={TEST_MAC_1}")
+    paged = client.get(f"/image_uploads?module_id={TEST_MAC_1}&limit=500")
+    assert streamed.get_data() == paged.get_data()
+    assert streamed.get_json()["total"] == 3
+
+
+def _walk_cursor(client, query):
+    """Follow `next_cursor` from `cursor=` to the end; return the pages."""
+    pages, cursor = [], ""
+    while cursor is not None:
+        body = client.get(f"/image_uploads?{query}&cursor={cursor}").get_json()
+        pages.append(body)
+        cursor = body["next_cursor"]
+    return pages
+
+
+def test_image_uploads_cursor_walk_matches_offset_pages(client, fresh_db):
+    """Following `next_cursor` yields exactly the offset pages — including
+    across a run of tied timestamps, where the cursor's `id` half decides
+    — and ends with `next_cursor: null`."""
+    _seed_module(fresh_db, TEST_MAC_1)
+    for i, ts in enumerate(
+        ["2024-06-01 12:00:00"] * 3 + ["2024-06-02 12:00:00"] * 3 + ["2024-06-03"]
+    ):
+        _seed_image_upload(fresh_db, TEST_MAC_1, f"{i}.jpg", ts)
+    fresh_db.schema.init_db()  # stats backfill, the cursor-mode total source
+
+    pages = _walk_cursor(client, "limit=2")
+    offset_pages = [
+        client.get(f"/image_uploads?limit=2&offset={n}").get_json()
+        for n in range(0, 8, 2)
+    ]
+    assert [p["images"] for p in pages] == [p["images"] for p in offset_pages]
+    assert [i["filename"] for p in pages for i in p["images"]] == [
+        "6.jpg", "5.jpg", "4.jpg", "3.jpg", "2.jpg", "1.jpg", "0.jpg",
+    ]  # fmt: skip
+    assert [p["total"] for p in pages] == [7] * 4
+    assert pages[-1]["next_cursor"] is None
+    # The offset mode hands out the same cursor, so a client can switch.
+    assert offset_pages[0]["next_cursor"] == pages[0]["next_cursor"]
+
+
+def test_image_uploads_cursor_respects_module_filter(client, fresh_db):
+    _seed_module(fresh_db, TEST_MAC_1)
+    _seed_module(fresh_db, TEST_MAC_2)
+    for day in range(1, 4):
+        _seed_image_upload(
+            fresh_db, TEST_MAC_1, f"a{day}.jpg", f"2024-06-0{day} 12:00:00"
+        )
+        _seed_image_upload(
+            fresh_db, TEST_MAC_2, f"b{day}.jpg", f"2024-06-0{day} 12:00:00"
+        )
+    fresh_db.schema.init_db()
+
+    pages = _walk_cursor(client, f"module_id={TEST_MAC_1}&limit=2")
+    assert [i["filename"] for p in pages for i in p["images"]] == [
+        "a3.jpg",
+        "a2.jpg",
+        "a1.jpg",
+    ]
+    assert {p["total"] for p in pages} == {3}
+    assert client.get("/image_uploads?cursor=").get_json()["total"] == 6
+
+
+def test_image_uploads_cursor_total_comes_from_module_stats(client, fresh_db):
+    """Cursor mode reads `total` from `module_image_stats` rather than
+    COUNT(*): a row written behind the routes' backs shows up in the page
+    but not in the total until the stats are reconciled."""
+    _seed_module(fresh_db, TEST_MAC_1)
+    client.post("/record_image", json={"module_id": TEST_MAC_1, "filename": "a.jpg"})
+    _seed_image_upload(fresh_db, TEST_MAC_1, "b.jpg", "2030-01-01 00:00:00")
+
+    body = client.get("/image_uploads?cursor=").get_json()
+    assert len(body["images"]) == 2
+    assert body["total"] == 1
+    assert client.get("/image_uploads?limit=5").get_json()["total"] == 2
+
+
+def test_image_uploads_columnar_carries_the_same_cursor(client, fresh_db):
+    _seed_module(fresh_db, TEST_MAC_1)
+    for day in range(1, 4):
+        _seed_image_upload(
+            fresh_db, TEST_MAC_1, f"{day}.jpg", f"2024-06-0{day} 12:00:00.25"
+        )
+
+    rows = client.get("/image_uploads?limit=2").get_json()
+    cols = client.get("/image_uploads?limit=2&format=columnar").get_json()
+    assert cols["next_cursor"] == rows["next_cursor"] is not None
+    assert cols["images"]["filename"] == ["3.jpg", "2.jpg"]
+    rest = client.get(
+        f"/image_uploads?limit=2&format=columnar&cursor={cols['next_cursor']}"
+    ).get_json()
+    assert rest["images"]["filename"] == ["1.jpg"]
+    assert rest["next_cursor"] is None
+
+
+def test_image_uploads_cursor_rejects_garbage_and_offset(client, fresh_db):
+    for bad in ("not-a-cursor", "%%%", "MjAyNC0wNi0wMQ"):
+        resp = client.get(f"/image_uploads?cursor={bad}")
+        assert resp.status_code == 400
+        assert resp.get_json() == {"error": "invalid cursor"}
+    resp = client.get("/image_uploads?cursor=&offset=10")
+    assert resp.status_code == 400
+    assert "mutually exclusive" in resp.get_json()["error"]
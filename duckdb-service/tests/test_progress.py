@@ -202,6 +202,102 @@ def test_add_progress_reuses_existing_nests(client, fresh_db):
     assert all(p["sealed"] == 25 for p in progress)
 
 
+def test_add_progress_allocates_nest_ids_past_existing_rows(client, fresh_db):
+    """`nest_id_seq` is re-synced at boot, so nests written behind its
+    back (seed data, a restored backup) never get their id handed out
+    again — and nests created across `nest-999`/`nest-1000` are paired
+    the same on their first upload as on every later one."""
+    _seed_module(fresh_db, TEST_MAC_1)
+    _seed_module(fresh_db, TEST_MAC_2)
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO nest_data (nest_id, module_id, beeType) "
+            f"VALUES ('nest-998', '{TEST_MAC_1}', 'orchard')"
+        )
+    finally:
+        con.close()
+    fresh_db.schema.init_db()
+
+    payload = {
+        "module_id": TEST_MAC_2,
+        "classification": {"leafcutter_bee": {"0": 1, "1": 0, "2": 0, "3": 0}},
+    }
+    assert client.post("/add_progress_for_module", json=payload).status_code == 200
+    assert client.post("/add_progress_for_module", json=payload).status_code == 200
+
+    rows = _query(
+        fresh_db,
+        "SELECT p.nest_id, p.sealed FROM daily_progress p "
+        "JOIN nest_data n USING (nest_id) WHERE n.module_id = ? ORDER BY p.sealed DESC",
+        (TEST_MAC_2,),
+    )
+    nest_ids = {r["nest_id"] for r in rows}
+    assert nest_ids == {"nest-999", "nest-1000", "nest-1001", "nest-1002"}
+    # Both uploads put the 100 on the same nest: the first in string order.
+    assert [r["nest_id"] for r in rows[:2]] == ["nest-1000", "nest-1000"]
+
+
+def test_add_progress_keeps_string_order_pairing_past_nest_999(client, fresh_db):
+    """More than 999 nests: an existing module whose ids span
+    `nest-999`/`nest-1000` keeps the pairing it has always had, by plain
+    string order of `nest_id`, so its history stays on the same nests."""
+    _seed_module(fresh_db, TEST_MAC_1)
+    _seed_module(fresh_db, TEST_MAC_2)
+    con = fresh_db.connection.get_conn()
+    try:
+        # 996 nests elsewhere, then this module's four across the boundary.
+        con.execute(
+            "INSERT INTO nest_data (nest_id, module_id, beeType) "
+            "SELECT printf('nest-%03d', i), ?, 'orchard' FROM range(1, 997) t(i)",
+            (TEST_MAC_1,),
+        )
+        con.execute(
+            "INSERT INTO nest_data (nest_id, module_id, beeType) "
+            "SELECT unnest(?), ?, 'leafcutter'",
+            (["nest-997", "nest-998", "nest-999", "nest-1000"], TEST_MAC_2),
+        )
+    finally:
+        con.close()
+    fresh_db.schema.init_db()
+
+    payload = {
+        "module_id": TEST_MAC_2,
+        "classification": {"leafcutter_bee": {"0": 0.1, "1": 0.2, "2": 0.3, "3": 0.4}},
+    }
+    assert client.post("/add_progress_for_module", json=payload).status_code == 200
+
+    rows = _query(
+        fresh_db,
+        "SELECT nest_id, sealed FROM daily_progress ORDER BY sealed",
+    )
+    assert [(r["nest_id"], r["sealed"]) for r in rows] == [
+        ("nest-1000", 10),
+        ("nest-997", 20),
+        ("nest-998", 30),
+        ("nest-999", 40),
+    ]
+    assert len(_query(fresh_db, "SELECT nest_id FROM nest_data")) == 1000
+
+
+def test_add_progress_sequence_progress_ids(client, fresh_db, monkeypatch):
+    import sys
+
+    monkeypatch.setattr(sys.modules["routes.progress"], "PROGRESS_ID_KIND", "sequence")
+    _seed_module(fresh_db, TEST_MAC_1)
+    payload = {
+        "module_id": TEST_MAC_1,
+        "classification": {"leafcutter_bee": {"0": 1}},
+    }
+    assert client.post("/add_progress_for_module", json=payload).status_code == 200
+
+    ids = [
+        r["progress_id"]
+        for r in _query(fresh_db, "SELECT progress_id FROM daily_progress")
+    ]
+    assert sorted(ids) == ["prog-001", "prog-002", "prog-003", "prog-004"]
+
+
 # ------------- robustness + filters (2026-07 audit, for #205) -------------
 
 
@@ -345,3 +441,88 @@ def test_date_filters_reject_non_dashed_forms_identically_on_every_python(
     # The documented form is still accepted.
     assert client.get("/progress?since=2026-07-19").status_code == 200
     assert client.get("/progress?until=2026-07-19").status_code == 200
+
+
+def test_get_progress_columnar_is_the_row_shape_transposed(client, fresh_db):
+    _seed_progress_matrix(fresh_db)
+    query = f"/progress?module_id={TEST_MAC_1}&limit=2"
+    rows = client.get(query).get_json()["progress"]
+    cols = client.get(query + "&format=columnar").get_json()["progress"]
+
+    assert set(cols) == set(rows[0])
+    for key, values in cols.items():
+        assert values == [r[key] for r in rows]
+    assert cols["progress_id"] == ["p2", "p3"]
+
+
+def test_get_progress_columnar_empty_keeps_column_names(client):
+    cols = client.get("/progress?format=columnar").get_json()["progress"]
+    assert cols["progress_id"] == [] and cols["sealed"] == []
+
+
+def test_get_progress_unknown_format_returns_400(client):
+    assert client.get("/progress?format=arrow").status_code == 400
+
+
+# ------------- streamed unbounded read -------------
+
+
+def _seed_many_progress_rows(fresh_db, n):
+    _seed_module(fresh_db, TEST_MAC_1)
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO nest_data (nest_id, module_id, beeType) "
+            f"VALUES ('nest-001', '{TEST_MAC_1}', 'resin')"
+        )
+        con.execute(
+            "INSERT INTO daily_progress "
+            "(progress_id, nest_id, date, empty, sealed, hatched) "
+            "SELECT printf('p%05d', i), 'nest-001', DATE '2020-01-01' + i::INTEGER, "
+            "0, (i % 101)::INTEGER, 0 FROM range(?) t(i)",
+            (n,),
+        )
+    finally:
+        con.close()
+
+
+def test_get_progress_unbounded_streams_the_same_bytes(client, fresh_db):
+    """The un-limited call streams in `STREAM_BATCH_ROWS` batches; the body
+    must be byte-identical to the materialized `jsonify` path (here, a
+    `limit` that keeps every row) — across several batch boundaries."""
+    _seed_many_progress_rows(fresh_db, 2500)
+
+    streamed = client.get("/progress", buffered=False)
+    chunks = list(streamed.response)
+    streamed.close()
+    # Opening bracket, three 1000-row batches, closing bracket.
+    assert len(chunks) == 5
+    materialized = client.get("/progress?limit=100000")
+    assert streamed.mimetype == "application/json"
+    assert (
+        b"".join(c if isinstance(c, bytes) else c.encode() for c in chunks)
+        == materialized.get_data()
+    )
+    assert len(materialized.get_json()["progress"]) == 2500
+
+
+def test_abandoned_stream_releases_the_read_lock(client, fresh_db):
+    """A client that goes away mid-stream must not leave the read lock
+    held — `lock.exclusive()` (backups) would wait on it forever."""
+    import threading
+
+    _seed_many_progress_rows(fresh_db, 2500)
+    resp = client.get("/progress", buffered=False)
+    next(iter(resp.response))  # first chunk only
+    resp.close()
+
+    entered = threading.Event()
+
+    def _exclusive():
+        with fresh_db.connection.lock.exclusive():
+            entered.set()
+
+    t = threading.Thread(target=_exclusive)
+    t.start()
+    assert entered.wait(5)
+    t.join(5)
@@ -131,3 +131,65 @@ def test_write_transaction_rolls_back_partial_writes(fresh_db):
         f"found stranded row(s): {rows!r}. If this fires, the helper "
         f"likely lost its explicit BEGIN — see PR B chapter-11 entry."
     )
+
+
+def _seed_uploads(fresh_db, n):
+    con = fresh_db.connection.get_conn()
+    try:
+        # Every fifth row shares a timestamp, so `id` has to break ties.
+        con.execute(
+            "INSERT INTO image_uploads (module_id, filename, uploaded_at) "
+            "SELECT 'hive-001', printf('f%05d.jpg', i), "
+            "TIMESTAMP '2024-01-01' + to_seconds((i // 5)::BIGINT) FROM range(?) t(i)",
+            (n,),
+        )
+    finally:
+        con.close()
+
+
+def test_iter_batches_pages_by_key_in_order(fresh_db):
+    _seed_uploads(fresh_db, 2345)
+    repo = importlib.import_module("db.repository")
+    batches = list(
+        repo.iter_batches(
+            "SELECT filename, uploaded_at, id FROM image_uploads WHERE module_id = ?",
+            ("hive-001",),
+            key=("uploaded_at", "id"),
+            descending=True,
+            batch_size=100,
+            page_size=700,
+        )
+    )
+    assert all(len(batch) <= 100 for batch in batches)
+    names = [row[0] for batch in batches for row in batch]
+    assert names == [f"f{i:05d}.jpg" for i in reversed(range(2345))]
+
+
+def test_iter_batches_holds_no_lock_between_batches(fresh_db):
+    """A paused stream (a slow client) must not hold the read lock: a
+    waiting `lock.exclusive()` would stall it and every new reader."""
+    import threading
+
+    _seed_uploads(fresh_db, 300)
+    repo = importlib.import_module("db.repository")
+    stream = repo.iter_batches(
+        "SELECT filename, id FROM image_uploads",
+        key=("id",),
+        batch_size=50,
+        page_size=100,
+    )
+    first = next(stream)
+
+    entered = threading.Event()
+
+    def _exclusive():
+        with fresh_db.connection.lock.exclusive():
+            entered.set()
+
+    t = threading.Thread(target=_exclusive)
+    t.start()
+    assert entered.wait(5)
+    t.join(5)
+
+    rest = [row for batch in stream for row in batch]
+    assert len(first) + len(rest) == 300
@@ -0,0 +1,371 @@
+"""Tests for the dashboard response cache (``routes/_cache.py``) and the
+per-table write counters it validates against (``db/table_versions.py``).
+
+``routes._cache`` is not in the fixture's purge list, so its one
+``cache`` instance outlives each test's database. That is safe — every
+new database handle bumps the epoch every entry carries — but it means
+these tests assert on ``X-Cache`` and on counter deltas, never on the
+absolute contents of the cache.
+"""
+
+import re
+
+import pytest
+
+from routes import _cache
+from routes._cache import ResponseCache, _Entry
+
+VALID_KEY = "hf_dev_key_2026"
+TEST_MAC_1 = "aabbccddeeff"
+
+
+def _versions():
+    from db import table_versions
+
+    return table_versions
+
+
+def _seed_module(fresh_db, module_id=TEST_MAC_1):
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO module_configs (id, name, lat, lng, first_online) "
+            "VALUES (?, 'Cache', 47.8, 9.6, '2024-01-01')",
+            (module_id,),
+        )
+    finally:
+        con.close()
+
+
+def _seed_nest(fresh_db, nest_id, module_id=TEST_MAC_1):
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO nest_data (nest_id, module_id, beeType) "
+            "VALUES (?, ?, 'blackmasked')",
+            (nest_id, module_id),
+        )
+    finally:
+        con.close()
+
+
+# ---------- table_versions.classify ----------
+
+
+@pytest.mark.parametrize(
+    "sql,expected",
+    [
+        ("SELECT * FROM module_configs", (None, set())),
+        ("INSERT INTO nest_data VALUES (1)", (None, {"nest_data"})),
+        (
+            "INSERT OR REPLACE INTO module_configs VALUES (1)",
+            (None, {"module_configs"}),
+        ),
+        ("UPDATE module_configs SET name = 'x'", (None, {"module_configs"})),
+        ("DELETE FROM measurements WHERE 1", (None, {"measurements"})),
+        (
+            "INSERT INTO module_configs (id) VALUES (?) "
+            "ON CONFLICT (id) DO UPDATE SET name = excluded.name",
+            (None, {"module_configs"}),
+        ),
+        # Table names inside string literals and comments are not writes.
+        ("SELECT 'DELETE FROM nest_data' -- UPDATE x SET", (None, set())),
+        ("BEGIN TRANSACTION", ("begin", set())),
+        ("COMMIT", ("commit", set())),
+        ("ROLLBACK", ("rollback", set())),
+        ("ALTER TABLE nest_data ADD COLUMN x INT", (None, {"*"})),
+        ("CREATE TEMP TABLE scratch AS SELECT 1", (None, set())),
+    ],
+)
+def test_classify_finds_written_tables(sql, expected):
+    control, tables = _versions().classify(sql)
+    assert (control, set(tables)) == expected
+
+
+def test_autocommit_write_bumps_only_its_table(fresh_db):
+    tv = _versions()
+    _seed_module(fresh_db)
+    before = tv.current(("nest_data", "measurements"))
+    _seed_nest(fresh_db, "nest-001")
+    after = tv.current(("nest_data", "measurements"))
+    assert after[1] == before[1] + 1
+    assert after[2] == before[2]
+    assert after[0] == before[0]
+
+
+def test_transaction_bumps_at_commit_and_not_on_rollback(fresh_db):
+    tv = _versions()
+    _seed_module(fresh_db)
+    start = tv.current(("nest_data",))
+
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute("BEGIN TRANSACTION")
+        con.execute(
+            "INSERT INTO nest_data (nest_id, module_id, beeType) "
+            "VALUES ('nest-001', ?, 'resin')",
+            (TEST_MAC_1,),
+        )
+        # Not visible to other readers yet, so not bumped yet either.
+        assert tv.current(("nest_data",)) == start
+        con.execute("ROLLBACK")
+        assert tv.current(("nest_data",)) == start
+
+        con.execute("BEGIN TRANSACTION")
+        con.execute(
+            "INSERT INTO nest_data (nest_id, module_id, beeType) "
+            "VALUES ('nest-002', ?, 'resin')",
+            (TEST_MAC_1,),
+        )
+        con.commit()
+    finally:
+        con.close()
+    assert tv.current(("nest_data",))[1] == start[1] + 1
+
+
+def test_write_transaction_bumps_on_success_only(fresh_db):
+    tv = _versions()
+    from db.repository import write_transaction
+
+    _seed_module(fresh_db)
+    start = tv.current(("nest_data",))
+
+    with pytest.raises(RuntimeError):
+        with write_transaction() as con:
+            con.execute(
+                "INSERT INTO nest_data (nest_id, module_id, beeType) "
+                "VALUES ('nest-001', ?, 'resin')",
+                (TEST_MAC_1,),
+            )
+            raise RuntimeError("abort")
+    assert tv.current(("nest_data",)) == start
+
+    with write_transaction() as con:
+        con.execute(
+            "INSERT INTO nest_data (nest_id, module_id, beeType) "
+            "VALUES ('nest-001', ?, 'resin')",
+            (TEST_MAC_1,),
+        )
+    assert tv.current(("nest_data",))[1] == start[1] + 1
+
+
+# ---------- @cached routes ----------
+
+
+def test_second_read_is_a_hit_until_its_table_is_written(client, fresh_db):
+    _seed_module(fresh_db)
+    first = client.get("/modules")
+    assert first.headers["X-Cache"] == "miss"
+    second = client.get("/modules")
+    assert second.headers["X-Cache"] == "hit"
+    assert second.get_json() == first.get_json()
+
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "UPDATE module_configs SET name = 'Renamed' WHERE id = ?", (TEST_MAC_1,)
+        )
+    finally:
+        con.close()
+    third = client.get("/modules")
+    assert third.headers["X-Cache"] == "miss"
+    assert [m["name"] for m in third.get_json()["modules"]] == ["Renamed"]
+
+
+def test_write_to_an_unrelated_table_keeps_the_entry(client, fresh_db):
+    _seed_module(fresh_db)
+    client.get("/modules")
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO measurements (module_mac, ts, metric, value, source) "
+            "VALUES (?, '2024-06-01 00:00:00', 'battery_pct', 50.0, 'test')",
+            (TEST_MAC_1,),
+        )
+    finally:
+        con.close()
+    assert client.get("/modules").headers["X-Cache"] == "hit"
+
+
+def test_query_string_order_does_not_split_the_key(client, fresh_db):
+    _seed_module(fresh_db)
+    _seed_nest(fresh_db, "nest-001")
+    a = client.get(f"/progress?limit=10&module_id={TEST_MAC_1}")
+    b = client.get(f"/progress?module_id={TEST_MAC_1}&limit=10")
+    assert a.headers["X-Cache"] == "miss"
+    assert b.headers["X-Cache"] == "hit"
+    assert (
+        client.get(f"/progress?limit=11&module_id={TEST_MAC_1}").headers["X-Cache"]
+        == "miss"
+    )
+
+
+def test_streamed_response_is_cached_once_fully_sent(client, fresh_db):
+    _seed_module(fresh_db)
+    _seed_nest(fresh_db, "nest-001")
+
+    # Hung up before the body was read: nothing to keep.
+    partial = client.get("/nests", buffered=False)
+    partial.close()
+    first = client.get("/nests")
+    assert first.headers["X-Cache"] == "miss"
+    first.get_data()
+
+    full = client.get("/nests")
+    assert full.headers["X-Cache"] == "hit"
+    assert [n["nest_id"] for n in full.get_json()["nests"]] == ["nest-001"]
+
+    _seed_nest(fresh_db, "nest-002")
+    after = client.get("/nests")
+    assert after.headers["X-Cache"] == "miss"
+    assert len(after.get_json()["nests"]) == 2
+
+
+def test_error_responses_are_not_cached(client, fresh_db):
+    assert client.get("/progress?limit=bogus").status_code == 400
+    resp = client.get("/progress?limit=bogus")
+    assert resp.status_code == 400
+    assert resp.headers["X-Cache"] == "miss"
+
+
+def test_zero_budget_turns_the_cache_off(client, fresh_db, monkeypatch):
+    monkeypatch.setattr(_cache.cache, "max_bytes", 0)
+    _seed_module(fresh_db)
+    client.get("/modules")
+    resp = client.get("/modules")
+    assert resp.status_code == 200
+    assert "X-Cache" not in resp.headers
+
+
+def test_cache_counters_are_exposed(client, fresh_db):
+    _seed_module(fresh_db)
+    client.get("/modules")
+    client.get("/modules")
+    resp = client.get("/metrics", headers={"X-Admin-Key": VALID_KEY})
+    text = resp.get_data(as_text=True)
+    assert re.search(
+        r'^response_cache_requests_total\{endpoint="modules.get_modules",'
+        r'result="hit"\} \d+',
+        text,
+        re.MULTILINE,
+    )
+    assert "# TYPE response_cache_bytes gauge" in text
+    assert re.search(r"^response_cache_evictions_total \d+", text, re.MULTILINE)
+
+
+# ---------- ETag / If-None-Match ----------
+
+
+def test_matching_if_none_match_is_a_304_without_touching_duckdb(
+    client, fresh_db, monkeypatch
+):
+    _seed_module(fresh_db)
+    first = client.get("/modules")
+    etag = first.headers["ETag"]
+
+    def _no_db():
+        raise AssertionError("a 304 must not open a cursor")
+
+    monkeypatch.setattr(fresh_db.connection, "get_conn", _no_db)
+    resp = client.get("/modules", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+    assert resp.data == b""
+
+
+def test_etag_changes_when_a_read_table_is_written(client, fresh_db):
+    _seed_module(fresh_db)
+    etag = client.get("/modules").headers["ETag"]
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "UPDATE module_configs SET name = 'Renamed' WHERE id = ?", (TEST_MAC_1,)
+        )
+    finally:
+        con.close()
+    resp = client.get("/modules", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+
+def test_etag_depends_on_the_query_and_path(client, fresh_db):
+    _seed_module(fresh_db)
+    _seed_nest(fresh_db, "nest-001")
+    a = client.get(f"/modules/{TEST_MAC_1}/progress_count").headers["ETag"]
+    b = client.get("/modules/001122334455/progress_count").headers["ETag"]
+    assert a != b
+    resp = client.get(
+        "/modules/001122334455/progress_count", headers={"If-None-Match": a}
+    )
+    assert resp.status_code == 200
+
+
+def test_etag_is_emitted_with_the_body_cache_off(client, fresh_db, monkeypatch):
+    monkeypatch.setattr(_cache.cache, "max_bytes", 0)
+    _seed_module(fresh_db)
+    etag = client.get(f"/heartbeats/{TEST_MAC_1}").headers["ETag"]
+    resp = client.get(f"/heartbeats/{TEST_MAC_1}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+
+def test_error_responses_carry_no_etag(client, fresh_db):
+    resp = client.get("/modules/not-a-mac/progress_count")
+    assert resp.status_code == 400
+    assert "ETag" not in resp.headers
+
+
+# ---------- ResponseCache ----------
+
+
+def test_lru_evicts_least_recently_used_by_bytes():
+    cache = ResponseCache(max_bytes=3 * (100 + 256), max_entry_bytes=1 << 20)
+    for key in ("a", "b", "c"):
+        assert cache.lookup(key, (1,), "e") == ("fill", None)
+        cache.store(key, _Entry((1,), b"x" * 100, 200, "application/json"), "e")
+    # Touch "a" so "b" is now the oldest.
+    assert cache.lookup("a", (1,), "e")[0] == "hit"
+    cache.lookup("d", (1,), "e")
+    cache.store("d", _Entry((1,), b"x" * 100, 200, "application/json"), "e")
+
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= cache.max_bytes
+    assert cache.lookup("b", (1,), "e")[0] == "fill"
+    assert cache.lookup("a", (1,), "e")[0] == "hit"
+
+
+def test_oversized_entry_is_served_but_not_kept():
+    cache = ResponseCache(max_bytes=1 << 20, max_entry_bytes=500)
+    cache.lookup("big", (1,), "e")
+    cache.store("big", _Entry((1,), b"x" * 1000, 200, "application/json"), "e")
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["requests"][("e", "oversize")] == 1
+    # The fill was released: the next request fills again, not waits.
+    assert cache.lookup("big", (1,), "e") == ("fill", None)
+
+
+def test_stale_entry_is_dropped_and_newer_one_left_alone():
+    cache = ResponseCache(max_bytes=1 << 20, max_entry_bytes=1 << 20)
+    cache.lookup("k", (1, 5), "e")
+    cache.store("k", _Entry((1, 5), b"{}", 200, "application/json"), "e")
+
+    # A request that snapshotted older versions must not see it...
+    assert cache.lookup("k", (1, 4), "e")[0] == "fill"
+    cache.release("k", (1, 4))
+    assert cache.stats()["entries"] == 1
+    # ...and one past the next write drops it.
+    assert cache.lookup("k", (1, 6), "e")[0] == "fill"
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["requests"][("e", "stale")] == 1
+
+
+def test_concurrent_miss_waits_for_the_fill():
+    cache = ResponseCache(max_bytes=1 << 20, max_entry_bytes=1 << 20)
+    assert cache.lookup("k", (1,), "e")[0] == "fill"
+    state, event = cache.lookup("k", (1,), "e")
+    assert state == "wait"
+    assert not event.is_set()
+    cache.store("k", _Entry((1,), b"{}", 200, "application/json"), "e")
+    assert event.is_set()
+    assert cache.lookup("k", (1,), "e")[0] == "hit"
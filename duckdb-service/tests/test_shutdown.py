@@ -0,0 +1,63 @@
+"""Tests for services/shutdown.py: SIGTERM runs the atexit handlers.
+
+Each case runs a child interpreter that registers an atexit marker and
+then sends itself SIGTERM, as ``docker compose stop`` does to PID 1.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from services import shutdown
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="SIGTERM can't be caught on Windows"
+)
+
+_SERVICE_ROOT = Path(__file__).resolve().parent.parent
+
+_CHILD = """
+import atexit, os, signal, sys, time
+from services import shutdown
+atexit.register(lambda: print("atexit ran", flush=True))
+if sys.argv[1] == "install":
+    shutdown.install()
+os.kill(os.getpid(), signal.SIGTERM)
+time.sleep(10)
+"""
+
+
+def _run_child(mode: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", _CHILD, mode],
+        cwd=_SERVICE_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+
+
+def test_sigterm_exits_cleanly_through_atexit():
+    result = _run_child("install")
+    assert result.returncode == 0, result.stderr
+    assert "atexit ran" in result.stdout
+
+
+def test_default_sigterm_skips_atexit():
+    # The premise: without the handler, a compose stop loses the drain.
+    result = _run_child("default")
+    assert result.returncode != 0
+    assert "atexit ran" not in result.stdout
+
+
+def test_install_is_a_noop_off_the_main_thread():
+    installed = []
+    worker = threading.Thread(target=lambda: installed.append(shutdown.install()))
+    worker.start()
+    worker.join()
+    assert installed == [False]
@@ -0,0 +1,179 @@
+"""Tests for the event-driven silence watcher (``services/silence_watcher.py``).
+
+Deterministic tests drive ``check_silence(now=...)`` with an explicit
+clock; one test lets the real timer thread fire on a shortened threshold.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+MAC = "aabbccddeeff"
+THRESHOLD = timedelta(hours=3)
+REALERT = timedelta(hours=6)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _register(client, mac=MAC, name="Hive"):
+    resp = client.post(
+        "/new_module",
+        json={
+            "esp_id": mac,
+            "module_name": name,
+            "latitude": 47.8,
+            "longitude": 9.6,
+            "battery_level": 80,
+        },
+    )
+    assert resp.status_code == 200, resp.get_json()
+
+
+def _alerts(fresh_db):
+    # Registration posts its own "new module" message; keep the watcher's.
+    return [m for m in fresh_db.discord_calls if m.startswith(("🔴", "🟢"))]
+
+
+def _alert_state(fresh_db, mac=MAC):
+    con = fresh_db.connection.get_conn()
+    try:
+        return con.execute(
+            "SELECT last_silence_alert_at FROM module_configs WHERE id = ?", (mac,)
+        ).fetchone()[0]
+    finally:
+        con.close()
+
+
+def test_alerts_once_at_threshold_then_realerts(client, fresh_db):
+    watcher = fresh_db.silence_watcher
+    _register(client)
+    start = _now()
+
+    watcher.check_silence(start + THRESHOLD - timedelta(minutes=1))
+    assert _alerts(fresh_db) == []
+
+    at = start + THRESHOLD + timedelta(seconds=1)
+    watcher.check_silence(at)
+    assert len(_alerts(fresh_db)) == 1
+    assert "**Hive is down**" in _alerts(fresh_db)[0]
+    assert _alert_state(fresh_db) == at
+
+    # Suppressed until the re-alert interval has passed.
+    watcher.check_silence(at + REALERT - timedelta(minutes=1))
+    assert len(_alerts(fresh_db)) == 1
+    watcher.check_silence(at + REALERT)
+    assert len(_alerts(fresh_db)) == 2
+
+
+def test_failed_alert_write_leaves_state_and_retries(client, fresh_db, monkeypatch):
+    """The alert is only remembered (and sent) once its write commits; a
+    failed write is retried `WRITE_RETRY_S` later instead of being lost."""
+    watcher = fresh_db.silence_watcher
+    _register(client)
+    at = _now() + THRESHOLD + timedelta(seconds=1)
+
+    def failing():
+        raise RuntimeError("database is locked")
+
+    with monkeypatch.context() as m:
+        m.setattr(watcher, "write_transaction", failing)
+        with pytest.raises(RuntimeError):
+            watcher.check_silence(at)
+    assert _alerts(fresh_db) == []
+    assert _alert_state(fresh_db) is None
+    assert watcher._modules[MAC].alerted_at is None
+
+    watcher.check_silence(at + timedelta(seconds=watcher.WRITE_RETRY_S - 1))
+    assert _alerts(fresh_db) == []
+    retry = at + timedelta(seconds=watcher.WRITE_RETRY_S)
+    watcher.check_silence(retry)
+    assert len(_alerts(fresh_db)) == 1
+    assert _alert_state(fresh_db) == retry
+    assert watcher._modules[MAC].alerted_at == retry
+
+
+def test_heartbeat_moves_the_deadline_and_clears_an_alert(client, fresh_db):
+    watcher = fresh_db.silence_watcher
+    _register(client)
+    watcher.check_silence(_now() + THRESHOLD + timedelta(seconds=1))
+    assert len(_alerts(fresh_db)) == 1
+
+    client.post("/heartbeat", data={"mac": MAC})
+    # Due at once: the recovery goes out on the next tick, not 15 min later.
+    watcher.check_silence(_now())
+    assert len(_alerts(fresh_db)) == 2
+    assert "**Hive is back**" in _alerts(fresh_db)[1]
+    assert _alert_state(fresh_db) is None
+
+    # The heartbeat's own threshold, not the registration's.
+    heard = _now()
+    watcher.check_silence(heard + THRESHOLD - timedelta(seconds=5))
+    assert len(_alerts(fresh_db)) == 2
+
+
+def test_upload_counts_as_liveness(client, fresh_db):
+    watcher = fresh_db.silence_watcher
+    _register(client)
+    # Last heard from two hours ago: an hour left before the threshold.
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "UPDATE module_configs SET last_seen_at = ?",
+            (_now() - timedelta(hours=2),),
+        )
+    finally:
+        con.close()
+    watcher.load()
+
+    resp = client.post("/record_image", json={"module_id": MAC, "filename": "a.jpg"})
+    assert resp.status_code == 200, resp.get_json()
+    watcher.check_silence(_now() + timedelta(hours=1, minutes=1))
+    assert _alerts(fresh_db) == []
+
+
+def test_unregistered_and_deleted_modules_never_alert(client, fresh_db):
+    watcher = fresh_db.silence_watcher
+    _register(client)
+    watcher.touch("112233445566")  # no module_configs row: ignored
+    assert client.delete(f"/modules/{MAC}").status_code == 200
+    watcher.check_silence(_now() + THRESHOLD + REALERT)
+    assert _alerts(fresh_db) == []
+
+
+def test_boot_load_keeps_alert_suppression(client, fresh_db):
+    watcher = fresh_db.silence_watcher
+    _register(client)
+    alerted = _now() - timedelta(hours=1)
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "UPDATE module_configs SET last_seen_at = ?, last_silence_alert_at = ?",
+            (_now() - timedelta(hours=10), alerted),
+        )
+    finally:
+        con.close()
+
+    assert watcher.load() == 1
+    # Silent, but alerted an hour ago (before a restart): no repeat yet.
+    watcher.check_silence(_now())
+    assert _alerts(fresh_db) == []
+    watcher.check_silence(alerted + REALERT)
+    assert len(_alerts(fresh_db)) == 1
+
+
+def test_timer_fires_within_seconds_of_the_threshold(client, fresh_db, monkeypatch):
+    watcher = fresh_db.silence_watcher
+    monkeypatch.setattr(watcher, "SILENCE_THRESHOLD_S", 0.5)
+    _register(client)
+    heard = time.monotonic()
+    deadline = heard + 5
+    while not _alerts(fresh_db) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _alerts(fresh_db), "timer thread never fired"
+    assert 0.5 <= time.monotonic() - heard < 2.5
+    assert "**Hive is down**" in _alerts(fresh_db)[0]
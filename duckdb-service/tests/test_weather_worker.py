@@ -5,22 +5,31 @@ Covers:
 * ``fetch_open_meteo`` — URL/param shape, null-value handling, window
   filtering, retry-on-failure
 * ``run_weather_fetch`` — live-tick path, idempotency on re-run,
-  ``(0,0)`` skip, error tolerance, ``WEATHER_WORKER_ENABLED=false`` gate
+  ``(0,0)`` skip, error tolerance, ``WEATHER_WORKER_ENABLED=false`` gate,
+  one fetch per grid cell, locations packed per call, concurrent calls
 * ``run_weather_backfill`` — historical backfill, source tagging,
-  idempotency
+  idempotency, gap-only inserts, the on-disk archive cache
+* Both paths against a local HTTP stand-in for Open-Meteo (packing,
+  cache hits on re-runs and on new modules at a known location)
 * Bucket-content assertion (CLAUDE.md PR-120 rule): the GET endpoint
   returns the seeded weather VALUE in the expected hour bucket, not
   just an envelope with the right shape.
 
-HTTP is faked via ``monkeypatch.setattr(weather_worker.requests, ...)``
-per the existing ``conftest`` convention (``responses`` /
-``requests-mock`` are not in the project's deps).
+HTTP is faked via ``monkeypatch.setattr(weather_worker._session, "get",
+...)`` (the worker's pooled session), per the existing ``conftest`` convention (``responses`` /
+``requests-mock`` are not in the project's deps). The stand-in tests
+instead point ``OPEN_METEO_*_URL`` at a ``ThreadingHTTPServer`` on
+localhost, so the real session, URL encoding and JSON decoding run.
 """
 
 from __future__ import annotations
 
 import importlib
+import json
+import threading
 from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 import requests
@@ -116,6 +125,15 @@ def _build_hourly_payload(start_hour: datetime, n_hours: int, base_temp: float =
     }
 
 
+def _archive_payload(params):
+    """An Archive response covering ``start_date`` through ``end_date``
+    (inclusive, as the API reads them)."""
+    start = datetime.fromisoformat(params["start_date"] + "T00:00:00")
+    end = datetime.fromisoformat(params["end_date"] + "T00:00:00")
+    n_hours = int((end - start).total_seconds() // 3600) + 24
+    return _build_hourly_payload(start, n_hours=n_hours)
+
+
 @pytest.fixture
 def weather_worker(fresh_db, monkeypatch):
     """Import the worker AFTER fresh_db has set up the DB so the
@@ -137,7 +155,7 @@ def test_fetch_open_meteo_forecast_url_and_params(weather_worker, monkeypatch):
         captured["timeout"] = timeout
         return _FakeResponse({"hourly": {"time": [], "temperature_2m": []}})
 
-    monkeypatch.setattr(weather_worker.requests, "get", fake_get)
+    monkeypatch.setattr(weather_worker._session, "get", fake_get)
     start = datetime(2026, 5, 20, 0, 0, 0)
     end = datetime(2026, 5, 21, 0, 0, 0)
     weather_worker.fetch_open_meteo(47.8, 9.6, mode="forecast", start=start, end=end)
@@ -160,7 +178,7 @@ def test_fetch_open_meteo_archive_url_and_date_params(weather_worker, monkeypatc
         captured["params"] = params
         return _FakeResponse({"hourly": {"time": [], "temperature_2m": []}})
 
-    monkeypatch.setattr(weather_worker.requests, "get", fake_get)
+    monkeypatch.setattr(weather_worker._session, "get", fake_get)
     start = datetime(2025, 6, 1, 0, 0, 0)
     end = datetime(2025, 6, 11, 0, 0, 0)
     weather_worker.fetch_open_meteo(47.8, 9.6, mode="archive", start=start, end=end)
@@ -184,7 +202,7 @@ def test_fetch_open_meteo_drops_null_values(weather_worker, monkeypatch):
         }
     }
     monkeypatch.setattr(
-        weather_worker.requests,
+        weather_worker._session,
         "get",
         lambda *a, **k: _FakeResponse(payload),
     )
@@ -218,7 +236,7 @@ def test_fetch_open_meteo_filters_outside_window(weather_worker, monkeypatch):
         }
     }
     monkeypatch.setattr(
-        weather_worker.requests, "get", lambda *a, **k: _FakeResponse(payload)
+        weather_worker._session, "get", lambda *a, **k: _FakeResponse(payload)
     )
     rows = weather_worker.fetch_open_meteo(
         47.8, 9.6, mode="forecast", start=start, end=end
@@ -241,7 +259,7 @@ def test_fetch_open_meteo_retries_once_then_raises(weather_worker, monkeypatch):
         calls["n"] += 1
         raise requests.ConnectionError("boom")
 
-    monkeypatch.setattr(weather_worker.requests, "get", fake_get)
+    monkeypatch.setattr(weather_worker._session, "get", fake_get)
     with pytest.raises(requests.ConnectionError):
         weather_worker.fetch_open_meteo(
             47.8,
@@ -276,7 +294,7 @@ def test_run_weather_fetch_writes_rows_with_open_meteo_source(
     h_minus_1 = now - timedelta(hours=1)
     payload = _build_hourly_payload(h_minus_2, n_hours=2, base_temp=12.0)
     monkeypatch.setattr(
-        weather_worker.requests, "get", lambda *a, **k: _FakeResponse(payload)
+        weather_worker._session, "get", lambda *a, **k: _FakeResponse(payload)
     )
 
     weather_worker.run_weather_fetch()
@@ -313,7 +331,7 @@ def test_run_weather_fetch_skips_modules_at_null_island(
         calls["n"] += 1
         return _FakeResponse({"hourly": {"time": []}})
 
-    monkeypatch.setattr(weather_worker.requests, "get", fake_get)
+    monkeypatch.setattr(weather_worker._session, "get", fake_get)
     weather_worker.run_weather_fetch()
     assert calls["n"] == 0
     assert _count_rows(fresh_db, source="open-meteo") == 0
@@ -342,7 +360,7 @@ def test_run_weather_fetch_swallows_http_errors_per_module(
             raise requests.ConnectionError("boom")
         return _FakeResponse(good_payload)
 
-    monkeypatch.setattr(weather_worker.requests, "get", fake_get)
+    monkeypatch.setattr(weather_worker._session, "get", fake_get)
     weather_worker.run_weather_fetch()
 
     # First MAC: no rows. Second MAC: 1 hour × 3 metrics = 3 rows.
@@ -350,6 +368,40 @@ def test_run_weather_fetch_swallows_http_errors_per_module(
     assert _count_rows(fresh_db, module_mac="001122334455", source="open-meteo") == 3
 
 
+def test_run_weather_fetch_isolates_a_failing_insert_per_cell(
+    fresh_db, weather_worker, monkeypatch, capsys
+):
+    """One bad row must not drop the whole tick: when the shared insert
+    fails, each grid cell is inserted on its own."""
+    _seed_module(fresh_db, module_id="aabbccddeeff")
+    _seed_module(fresh_db, module_id="001122334455", lat=48.0, lng=10.0)
+
+    now = datetime.now(timezone.utc).replace(
+        tzinfo=None, minute=0, second=0, microsecond=0
+    )
+    payload = _build_hourly_payload(now - timedelta(hours=1), n_hours=1)
+    monkeypatch.setattr(
+        weather_worker._session, "get", lambda *a, **k: _FakeResponse(payload)
+    )
+    real_insert = weather_worker._bulk_insert
+    calls = []
+
+    def insert(rows, source):
+        calls.append(len(rows))
+        if any(mac == "aabbccddeeff" for mac, *_ in rows):
+            raise ValueError("Conversion Error: bad value")
+        return real_insert(rows, source)
+
+    monkeypatch.setattr(weather_worker, "_bulk_insert", insert)
+    weather_worker.run_weather_fetch()
+
+    # The shared insert, then one per cell.
+    assert calls == [6, 3, 3]
+    assert _count_rows(fresh_db, module_mac="aabbccddeeff") == 0
+    assert _count_rows(fresh_db, module_mac="001122334455", source="open-meteo") == 3
+    assert "insert failed for aabbccddeeff" in capsys.readouterr().out
+
+
 def test_run_weather_fetch_is_idempotent_on_rerun(
     fresh_db, weather_worker, monkeypatch
 ):
@@ -363,7 +415,7 @@ def test_run_weather_fetch_is_idempotent_on_rerun(
     )
     payload = _build_hourly_payload(now - timedelta(hours=2), n_hours=2)
     monkeypatch.setattr(
-        weather_worker.requests, "get", lambda *a, **k: _FakeResponse(payload)
+        weather_worker._session, "get", lambda *a, **k: _FakeResponse(payload)
     )
 
     weather_worker.run_weather_fetch()
@@ -411,7 +463,7 @@ def test_run_weather_fetch_no_duplicates_when_temperature_is_null(
         }
     }
     monkeypatch.setattr(
-        weather_worker.requests, "get", lambda *a, **k: _FakeResponse(payload)
+        weather_worker._session, "get", lambda *a, **k: _FakeResponse(payload)
     )
 
     weather_worker.run_weather_fetch()
@@ -438,7 +490,7 @@ def test_run_weather_fetch_disabled_when_flag_is_false(
 
     calls = {"n": 0}
     monkeypatch.setattr(
-        weather_worker.requests,
+        weather_worker._session,
         "get",
         lambda *a, **k: (
             calls.__setitem__("n", calls["n"] + 1) or _FakeResponse({"hourly": {}})
@@ -449,6 +501,72 @@ def test_run_weather_fetch_disabled_when_flag_is_false(
     assert _count_rows(fresh_db, source="open-meteo") == 0
 
 
+def test_run_weather_fetch_fetches_each_grid_cell_once(
+    fresh_db, weather_worker, monkeypatch
+):
+    """Modules at the same garden share a coarsened grid cell: one
+    Open-Meteo call covers all of them, and each still gets only the
+    hours after its own watermark."""
+    _seed_module(fresh_db, module_id="aabbccddeeff", lat=47.81, lng=9.64)
+    _seed_module(fresh_db, module_id="aabbccddee00", lat=47.81, lng=9.64)
+    _seed_module(fresh_db, module_id="001122334455", lat=48.0, lng=10.0)
+
+    now = datetime.now(timezone.utc).replace(
+        tzinfo=None, minute=0, second=0, microsecond=0
+    )
+    # One garden module already has weather up to h-2; the other is new.
+    con = fresh_db.connection.get_conn()
+    try:
+        con.execute(
+            "INSERT INTO measurements (module_mac, ts, metric, value, source) "
+            "VALUES ('aabbccddee00', ?, 'temperature_c', 10.0, 'open-meteo')",
+            (now - timedelta(hours=2),),
+        )
+    finally:
+        con.close()
+
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append((params["latitude"], params["longitude"]))
+        payload = _build_hourly_payload(now - timedelta(hours=3), 3)
+        # Several locations in one call: one body per location.
+        return _FakeResponse([payload, payload])
+
+    monkeypatch.setattr(weather_worker._session, "get", fake_get)
+    weather_worker.run_weather_fetch()
+
+    # Both cells in one packed call (modules are read in id order).
+    assert calls == [("48.0000,47.8100", "10.0000,9.6400")]
+    # New modules: 3 h × 3 metrics. The watermarked one: h-1 only.
+    assert _count_rows(fresh_db, module_mac="aabbccddeeff", source="open-meteo") == 9
+    assert _count_rows(fresh_db, module_mac="001122334455", source="open-meteo") == 9
+    assert _count_rows(fresh_db, module_mac="aabbccddee00", source="open-meteo") == 4
+
+
+def test_run_weather_fetch_runs_cells_concurrently(
+    fresh_db, weather_worker, monkeypatch
+):
+    """Distinct calls are made on the pool, not one after another:
+    each fake call waits for the other to start."""
+    monkeypatch.setattr(weather_worker, "_LOCATIONS_PER_REQUEST", 1)
+    _seed_module(fresh_db, module_id="aabbccddeeff", lat=47.81, lng=9.64)
+    _seed_module(fresh_db, module_id="001122334455", lat=48.0, lng=10.0)
+    now = datetime.now(timezone.utc).replace(
+        tzinfo=None, minute=0, second=0, microsecond=0
+    )
+    both_started = threading.Barrier(2, timeout=5)
+
+    def fake_get(url, params=None, timeout=None):
+        both_started.wait()
+        return _FakeResponse(_build_hourly_payload(now - timedelta(hours=1), 1))
+
+    monkeypatch.setattr(weather_worker._session, "get", fake_get)
+    weather_worker.run_weather_fetch()
+
+    assert _count_rows(fresh_db, source="open-meteo") == 6
+
+
 # ---------- run_weather_backfill (historical) ----------
 
 
@@ -460,19 +578,13 @@ def test_run_weather_backfill_writes_backfill_source(
     over `metric` still collapse them together per ADR-016/017."""
     _seed_module(fresh_db, first_online="2024-01-01")
 
-    # Cover the request window with a small canned response. The worker
-    # chunks by 30 days, so over a many-day window it makes multiple
-    # calls — accept whatever range is asked and return the same
-    # 24-hour payload pinned at the start_date the worker requested.
+    # The worker chunks by calendar month, so over a window that crosses
+    # a month boundary it makes one call per month — answer whatever
+    # range is asked with an hourly series covering it.
     def fake_get(url, params=None, timeout=None):
-        start_date = params["start_date"]
-        # The worker passes `start_date` as YYYY-MM-DD; build a one-day
-        # response so each chunk contributes a deterministic 24 rows ×
-        # 3 metrics.
-        start_dt = datetime.fromisoformat(start_date + "T00:00:00")
-        return _FakeResponse(_build_hourly_payload(start_dt, n_hours=24))
+        return _FakeResponse(_archive_payload(params))
 
-    monkeypatch.setattr(weather_worker.requests, "get", fake_get)
+    monkeypatch.setattr(weather_worker._session, "get", fake_get)
 
     result = weather_worker.run_weather_backfill(days=10)
     assert result["modules_touched"] >= 1
@@ -488,18 +600,17 @@ def test_run_weather_backfill_is_idempotent_on_rerun(
     fresh_db, weather_worker, monkeypatch
 ):
     """Running the backfill twice produces the same row count — the
-    in-loop `existing` set filter elides timestamps already present
+    anti-join in `_insert_backfill_gaps` elides timestamps already present
     for ``source='open-meteo-backfill'``."""
     _seed_module(fresh_db, first_online="2024-01-01")
 
     def fake_get(url, params=None, timeout=None):
-        start_dt = datetime.fromisoformat(params["start_date"] + "T00:00:00")
-        return _FakeResponse(_build_hourly_payload(start_dt, n_hours=24))
+        return _FakeResponse(_archive_payload(params))
 
     # days must exceed _ARCHIVE_LAG_DAYS (5) or the requested window
     # falls entirely inside ERA5's lag and the worker has nothing to
     # fetch — the test would assert against zero rows otherwise.
-    monkeypatch.setattr(weather_worker.requests, "get", fake_get)
+    monkeypatch.setattr(weather_worker._session, "get", fake_get)
     weather_worker.run_weather_backfill(days=15)
     first = _count_rows(fresh_db, source="open-meteo-backfill")
     weather_worker.run_weather_backfill(days=15)
@@ -509,6 +620,38 @@ def test_run_weather_backfill_is_idempotent_on_rerun(
     assert second == first
 
 
+def test_run_weather_backfill_fills_only_the_missing_hours(
+    fresh_db, weather_worker, monkeypatch
+):
+    """Hours deleted after a first run are the only ones a second run
+    writes, per module."""
+    _seed_module(fresh_db, module_id="aabbccddeeff")
+    _seed_module(fresh_db, module_id="001122334455", lat=48.0, lng=10.0)
+    monkeypatch.setattr(
+        weather_worker._session,
+        "get",
+        lambda url, params=None, timeout=None: _FakeResponse(_archive_payload(params)),
+    )
+    weather_worker.run_weather_backfill(days=15)
+    full = _count_rows(fresh_db, source="open-meteo-backfill")
+
+    con = fresh_db.connection.get_conn()
+    try:
+        # Every third hour of one module.
+        con.execute(
+            "DELETE FROM measurements WHERE module_mac = 'aabbccddeeff' "
+            "AND hour(ts) % 3 = 0"
+        )
+    finally:
+        con.close()
+    missing = full - _count_rows(fresh_db, source="open-meteo-backfill")
+
+    result = weather_worker.run_weather_backfill(days=15)
+    assert result["rows_written"] == missing > 0
+    assert result["modules_touched"] == 1
+    assert _count_rows(fresh_db, source="open-meteo-backfill") == full
+
+
 # ---------- admin endpoint integration ----------
 
 
@@ -518,10 +661,9 @@ def test_admin_endpoint_invokes_backfill(client, fresh_db, weather_worker, monke
     _seed_module(fresh_db, first_online="2024-01-01")
 
     def fake_get(url, params=None, timeout=None):
-        start_dt = datetime.fromisoformat(params["start_date"] + "T00:00:00")
-        return _FakeResponse(_build_hourly_payload(start_dt, n_hours=24))
+        return _FakeResponse(_archive_payload(params))
 
-    monkeypatch.setattr(weather_worker.requests, "get", fake_get)
+    monkeypatch.setattr(weather_worker._session, "get", fake_get)
 
     # days=10 puts the window outside ERA5's ~5-day archive lag, so
     # the worker actually has data to fetch.
@@ -537,7 +679,7 @@ def test_run_weather_backfill_rejects_concurrent_callers(
     fresh_db, weather_worker, monkeypatch
 ):
     """A second concurrent backfill must not race the first: both would
-    read the same `existing` ts set and silently double-insert chunks
+    anti-join against the same stored hours and silently double-insert chunks
     (``measurements`` has no UNIQUE constraint per ADR-016).
 
     Acquire the backfill lock externally, then call the public function
@@ -546,7 +688,7 @@ def test_run_weather_backfill_rejects_concurrent_callers(
     """
     _seed_module(fresh_db, first_online="2024-01-01")
     monkeypatch.setattr(
-        weather_worker.requests,
+        weather_worker._session,
         "get",
         lambda *a, **k: _FakeResponse({"hourly": {"time": []}}),
     )
@@ -572,3 +714,136 @@ def test_admin_endpoint_rejects_invalid_days(client):
 
     resp = client.post("/admin/weather/backfill?days=foo")
     assert resp.status_code == 400
+
+
+# ---------- against a local Open-Meteo stand-in ----------
+
+
+class _OpenMeteo(BaseHTTPRequestHandler):
+    """Just enough of Forecast and Archive: comma-separated locations,
+    ``past_days`` or ``start_date``/``end_date``, a JSON list back when
+    more than one location was asked for. Each location's temperature
+    is its latitude, so a test can tell which body went to which cell."""
+
+    calls: list[tuple[str, int]] = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        lats = [float(v) for v in query["latitude"][0].split(",")]
+        if "past_days" in query:
+            end = datetime.now(timezone.utc).replace(
+                tzinfo=None, minute=0, second=0, microsecond=0
+            )
+            start = end - timedelta(days=int(query["past_days"][0]))
+        else:
+            start = datetime.fromisoformat(query["start_date"][0])
+            end = datetime.fromisoformat(query["end_date"][0]) + timedelta(days=1)
+        n_hours = int((end - start).total_seconds() // 3600)
+        bodies = []
+        for lat in lats:
+            body = _build_hourly_payload(start, n_hours)
+            body["hourly"]["temperature_2m"] = [lat] * n_hours
+            bodies.append(body)
+        type(self).calls.append((url.path, len(lats)))
+        raw = json.dumps(bodies if len(bodies) > 1 else bodies[0]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture
+def stand_in(fresh_db, monkeypatch):
+    """The worker imported with both endpoints on a localhost server.
+    Yields ``(worker, calls)``; ``calls`` is ``[(path, locations)]``."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OpenMeteo)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setenv("OPEN_METEO_FORECAST_URL", f"{base}/v1/forecast")
+    monkeypatch.setenv("OPEN_METEO_ARCHIVE_URL", f"{base}/v1/archive")
+    monkeypatch.setenv("WEATHER_WORKER_ENABLED", "true")
+    monkeypatch.setattr(_OpenMeteo, "calls", [])
+    try:
+        yield importlib.import_module("services.weather_worker"), _OpenMeteo.calls
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _temperatures(fresh_db, source):
+    con = fresh_db.connection.get_conn()
+    try:
+        rows = con.execute(
+            "SELECT module_mac, MIN(value), MAX(value), COUNT(*) FROM measurements "
+            "WHERE metric = 'temperature_c' AND source = ? GROUP BY module_mac",
+            [source],
+        ).fetchall()
+    finally:
+        con.close()
+    return {mac: (lo, hi, n) for mac, lo, hi, n in rows}
+
+
+def test_stand_in_live_tick_packs_locations(fresh_db, stand_in, monkeypatch):
+    worker, calls = stand_in
+    monkeypatch.setattr(worker, "_LOCATIONS_PER_REQUEST", 2)
+    monkeypatch.setattr(worker, "_DEFAULT_LOOKBACK_DAYS", 1)
+    _seed_module(fresh_db, module_id="000000000001", lat=47.81, lng=9.64)
+    _seed_module(fresh_db, module_id="000000000002", lat=48.0, lng=10.0)
+    _seed_module(fresh_db, module_id="000000000003", lat=49.5, lng=11.0)
+
+    worker.run_weather_fetch()
+
+    # Three cells, two per call.
+    assert sorted(calls) == [("/v1/forecast", 1), ("/v1/forecast", 2)]
+    hours = worker._DEFAULT_LOOKBACK_DAYS * 24
+    assert _temperatures(fresh_db, "open-meteo") == {
+        "000000000001": (47.81, 47.81, hours),
+        "000000000002": (48.0, 48.0, hours),
+        "000000000003": (49.5, 49.5, hours),
+    }
+
+
+def test_stand_in_backfill_is_packed_and_served_from_the_cache(
+    fresh_db, stand_in, monkeypatch
+):
+    worker, calls = stand_in
+    # Fixed clock: a 10-day window is the end of February plus 1-2 March
+    # (the archive lag ends it at midnight on the 3rd).
+    monkeypatch.setattr(worker, "_now_utc", lambda: datetime(2026, 3, 8, 12))
+    _seed_module(fresh_db, module_id="000000000001", lat=47.81, lng=9.64)
+    _seed_module(fresh_db, module_id="000000000002", lat=48.0, lng=10.0)
+    window_hours = 4 * 24 + 12
+
+    first = worker.run_weather_backfill(days=10)
+    assert first["errors"] == []
+    assert first["rows_written"] == 2 * 3 * window_hours
+    # One call per month, both cells in it.
+    assert calls == [("/v1/archive", 2), ("/v1/archive", 2)]
+    assert _temperatures(fresh_db, "open-meteo-backfill") == {
+        "000000000001": (47.81, 47.81, window_hours),
+        "000000000002": (48.0, 48.0, window_hours),
+    }
+
+    # Re-run: February comes from disk; only March, still inside the
+    # archive's reach, goes to the network — and writes nothing new.
+    calls.clear()
+    again = worker.run_weather_backfill(days=10)
+    assert again["rows_written"] == 0
+    assert calls == [("/v1/archive", 2)]
+
+    # A new module at a known garden costs no February fetch either.
+    calls.clear()
+    _seed_module(fresh_db, module_id="000000000003", lat=47.81, lng=9.64)
+    third = worker.run_weather_backfill(days=10)
+    assert third["rows_written"] == 3 * window_hours
+    assert calls == [("/v1/archive", 2)]
+    assert _temperatures(fresh_db, "open-meteo-backfill")["000000000003"] == (
+        47.81,
+        47.81,
+        window_hours,
+    )
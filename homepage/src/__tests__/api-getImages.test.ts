@@ -16,6 +16,7 @@ const wirePage = {
     { module_id: VALID_ID, filename: 'b.jpg', uploaded_at: '2024-06-02 12:00:00' },
     { module_id: VALID_ID, filename: 'a.jpg', uploaded_at: '2024-06-01 12:00:00' },
   ],
+  next_cursor: 'MjAyNC0wNi0wMVQxMjowMDowMHwx',
   total: 7,
 };
 
@@ -41,6 +42,25 @@ describe('api.getImages wire-shape round trip', () => {
     // so it must survive the round trip intact.
     expect(page.total).toBe(7);
     expect(page.images.map((i) => i.filename)).toEqual(['b.jpg', 'a.jpg']);
+    expect(page.next_cursor).toBe(wirePage.next_cursor);
+  });
+
+  it('forwards cursor verbatim, including the empty first-page cursor', async () => {
+    (globalThis.fetch as ReturnType<typeof vi.fn>).mockResolvedValue({
+      ok: true,
+      status: 200,
+      json: async () => ({ images: [], next_cursor: null, total: 0 }),
+    });
+
+    await api.getImages(VALID_ID, { limit: 5, cursor: '' });
+    await api.getImages(VALID_ID, { limit: 5, cursor: wirePage.next_cursor });
+
+    const calls = (globalThis.fetch as ReturnType<typeof vi.fn>).mock.calls;
+    const first = new URL(String(calls[0][0]));
+    const second = new URL(String(calls[1][0]));
+    expect(first.searchParams.get('cursor')).toBe('');
+    expect(second.searchParams.get('cursor')).toBe(wirePage.next_cursor);
+    expect(second.searchParams.has('offset')).toBe(false);
   });
 
   it('forwards module_id/limit/offset verbatim to the backend URL', async () => {
@@ -86,6 +106,7 @@ describe('api.getImages wire-shape round trip', () => {
 
     const page = await api.getImages(VALID_ID, { limit: 2, offset: 0 });
     expect(page.total).toBe(2);
+    expect(page.next_cursor).toBeNull();
   });
 
   it('throws on a non-2xx response (AdminPage catches as an error state)', async () => {
@@ -87,6 +87,7 @@ export default function AdminPage() {
   const [modules, setModules] = useState<Module[]>([]);
   const [images, setImages] = useState<ImageUpload[]>([]);
   const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loadingMore, setLoadingMore] = useState(false);
   const [selectedModule, setSelectedModule] = useState<string>('');
   const [loading, setLoading] = useState(true);
@@ -147,10 +148,11 @@ export default function AdminPage() {
       setError(null);
       const page = await api.getImages(selectedModule || undefined, {
         limit: PAGE_SIZE,
-        offset: 0,
+        cursor: '',
       });
       setImages(page.images);
       setTotal(page.total);
+      setNextCursor(page.next_cursor ?? null);
     } catch (err) {
       setError('Failed to load images. Is the image service running?');
       console.error('Failed to load images:', err);
@@ -159,20 +161,23 @@ export default function AdminPage() {
     }
   };
 
-  // Append the next page, offset by what's already loaded. `total` is
-  // refreshed from each response so the "Load more" button hides once
-  // everything is loaded. Note: this is offset paging, so row identity
-  // across pages is not transaction-consistent under a concurrent
-  // delete — acceptable for a low-concurrency admin tool.
+  // Append the page after the last loaded row. Keyset (cursor) paging:
+  // the server resumes strictly after that row's (uploaded_at, id), so a
+  // delete or a new upload between clicks can no longer shift the window
+  // and skip or repeat a row the way offset paging did, and a deep page
+  // costs the server no more than the first. The button hides once
+  // `next_cursor` comes back null.
   const loadMore = async () => {
+    if (!nextCursor) return;
     try {
       setLoadingMore(true);
       const page = await api.getImages(selectedModule || undefined, {
         limit: PAGE_SIZE,
-        offset: images.length,
+        cursor: nextCursor,
       });
       setImages((prev) => [...prev, ...page.images]);
       setTotal(page.total);
+      setNextCursor(page.next_cursor ?? null);
     } catch (err) {
       setError('Failed to load more images. Is the image service running?');
       console.error('Failed to load more images:', err);
@@ -598,16 +603,18 @@ export default function AdminPage() {
           </div>
         )}
 
-        {/* Load more — shown while fewer than `total` rows are loaded.
+        {/* Load more — shown while the server reports a next page.
             Fetches the next PAGE_SIZE newest-first and appends them. */}
-        {!loading && !error && images.length < total && (
+        {!loading && !error && nextCursor && (
           <div className="flex justify-center mt-8">
             <button
               onClick={loadMore}
               disabled={loadingMore}
               className="px-6 py-2.5 bg-amber-500 hover:bg-amber-600 disabled:opacity-60 disabled:cursor-not-allowed text-white text-sm font-medium rounded-lg transition-colors"
             >
-              {loadingMore ? 'Loading…' : `Load more (${total - images.length} left)`}
+              {loadingMore
+                ? 'Loading…'
+                : `Load more (${Math.max(total - images.length, 0)} left)`}
             </button>
           </div>
         )}
@@ -319,20 +319,23 @@ class ApiService {
   }
 
   /**
-   * Fetch a page of image uploads, newest first. Pass `limit`/`offset`
-   * for "load more" pagination; omit both to fetch every row (slow on a
-   * large table — prefer paging). Returns the `{ images, total }`
-   * envelope; `total` is the full count ignoring the page window, so the
-   * caller can tell whether more rows remain. The `total` fallback keeps
-   * old wire responses (pre-pagination, no `total` field) working.
+   * Fetch a page of image uploads, newest first. Pass `limit` plus
+   * `cursor` for "load more" pagination — `''` for the first page, then
+   * the previous page's `next_cursor` — or the legacy `offset`; omit
+   * all to fetch every row (slow on a large table — prefer paging).
+   * Returns the `{ images, next_cursor, total }` envelope; `total` is
+   * the full count ignoring the page window. The `total` / `next_cursor`
+   * fallbacks keep old wire responses (pre-pagination / pre-cursor)
+   * working.
    */
   async getImages(
     moduleId?: string,
-    opts?: { limit?: number; offset?: number },
+    opts?: { limit?: number; cursor?: string; offset?: number },
   ): Promise<ImageUploadsPage> {
     const params = new URLSearchParams();
     if (moduleId) params.set('module_id', moduleId);
     if (opts?.limit != null) params.set('limit', String(opts.limit));
+    if (opts?.cursor != null) params.set('cursor', opts.cursor);
     if (opts?.offset != null) params.set('offset', String(opts.offset));
     const qs = params.toString();
     const url = `${this.baseUrl}/images${qs ? `?${qs}` : ''}`;
@@ -342,7 +345,11 @@ class ApiService {
     });
     if (!response.ok) throw new Error('Failed to fetch images');
     const data = await response.json();
-    return { images: data.images, total: data.total ?? data.images.length };
+    return {
+      images: data.images,
+      total: data.total ?? data.images.length,
+      next_cursor: data.next_cursor ?? null,
+    };
   }
 
   async deleteImage(filename: string): Promise<void> {
@@ -8,7 +8,6 @@ import shutil
 import time
 from queue import Empty
 
-import requests as http_requests
 from flask import (
     Flask,
     Response,
@@ -20,6 +19,9 @@ from flask import (
 )
 from pydantic import ValidationError
 
+from services import http_pool, metrics
+from services.content_etag import content_etag
+from services.detect_queue import DetectQueue
 from services.discord import send_discord_message
 from services.duckdb import DuckDBService
 from services.hole_detection import HoleDetector
@@ -29,6 +31,7 @@ from services.log_ring import init_persistence as init_log_persistence
 from services.log_ring import install as install_log_ring
 from services.log_ring import log_event, subscribe, unsubscribe
 from services.module_id import ModuleId
+from services.outbox import Outbox
 from services.paths import safe_child_path
 from services.prod_guard import require_prod_key
 from services.sidecar import LogSidecarEnvelope
@@ -217,6 +220,31 @@ upload_pipeline = UploadPipeline(
     snip_folder=SNIP_FOLDER,
 )
 
+# Durable outbox for the upload's duckdb-service writes (services/outbox.py):
+# /upload appends them and returns, and a drainer thread replays them, in
+# order and batched, through `upload_pipeline.replay`. So an upload neither
+# waits on nor loses rows to a duckdb-service restart. Enabled when OUTBOX_DIR
+# is set (compose sets it; unset = record each upload synchronously).
+OUTBOX_DIR = os.getenv("OUTBOX_DIR")
+upload_outbox = None
+if OUTBOX_DIR:
+    upload_outbox = Outbox(OUTBOX_DIR, handler=upload_pipeline.replay)
+    upload_pipeline.outbox = upload_outbox
+    metrics.register_collector(upload_outbox.collect_metrics)
+
+# Background hole detection (services/detect_queue.py): /upload answers once
+# the image and sidecar are on disk, and DETECT_WORKERS threads run the model,
+# the snips and the record step from an on-disk job journal, so the module's
+# radio and a Flask thread aren't held for the model run. Jobs left at a
+# restart run after it. Enabled when DETECT_JOURNAL_DIR is set (compose sets
+# it; unset = detect inline before answering).
+DETECT_JOURNAL_DIR = os.getenv("DETECT_JOURNAL_DIR")
+detect_queue = None
+if DETECT_JOURNAL_DIR:
+    detect_queue = DetectQueue(DETECT_JOURNAL_DIR, upload_pipeline.run_job)
+    upload_pipeline.jobs = detect_queue
+    metrics.register_collector(detect_queue.collect_metrics)
+
 
 @app.get("/health")
 def health():
@@ -293,6 +321,26 @@ def stream_logs():
     )
 
 
+# Prometheus-text counters (services/metrics.py), e.g. connection reuse to
+# duckdb-service (services/http_pool.py). Gated like /logs. Takes the key as
+# X-Admin-Key or as `Authorization: Bearer <key>`, which is what a Prometheus
+# scrape_config `authorization:` block sends (same as duckdb-service's).
+@app.get("/metrics")
+def get_metrics():
+    auth = request.headers.get("Authorization", "")
+    if auth.lower().startswith("bearer "):
+        provided = auth[7:].strip()
+    else:
+        provided = request.headers.get("X-Admin-Key", "")
+    if not hmac.compare_digest(provided, _logs_resolve_key()):
+        return jsonify({"error": "unauthorized"}), 401
+    return Response(
+        metrics.render(),
+        status=200,
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.post("/upload")
 def upload_image():
     mac = request.form.get("mac") or request.args.get("mac")
@@ -367,7 +415,9 @@ def upload_image():
             "message": f"Image {result.filename} uploaded successfully",
             "mac": canonical_mac,
             "battery": battery,
+            # null while `queued`: detection runs after this answer.
             "classification": result.classification,
+            "queued": result.queued,
         }
     ), 200
 
@@ -425,9 +475,12 @@ def list_images():
     Query params, all optional and forwarded verbatim to duckdb-service:
       * module_id — filter to one module's uploads
       * limit     — page size (most-recent-first); omit for all rows
-      * offset    — rows to skip, for "load more" pagination
+      * cursor    — keyset pagination: the previous page's ``next_cursor``
+                    (``cursor=`` for page one)
+      * offset    — rows to skip; the legacy "load more" pagination
 
-    Returns duckdb's ``{"images": [...], "total": N}`` envelope as-is.
+    Returns duckdb's ``{"images": [...], "next_cursor": ..., "total": N}``
+    envelope as-is; ``next_cursor`` is opaque and is handed back unchanged.
 
     The timeout is deliberately generous (15s, not the old 5s): paginated
     pages return in ~50ms, but an un-paginated caller against a large
@@ -436,15 +489,15 @@ def list_images():
     UI (the actual incident behind this change).
     """
     params = {}
-    for key in ("module_id", "limit", "offset"):
+    for key in ("module_id", "limit", "cursor", "offset"):
         value = request.args.get(key)
         if value is not None:
             params[key] = value
     try:
-        resp = http_requests.get(
+        resp = duckdb_service.session.get(
             f"{DUCKDB_SERVICE_URL}/image_uploads",
             params=params,
-            timeout=15,
+            timeout=http_pool.timeout(15),
         )
         return jsonify(resp.json()), resp.status_code
     except Exception as e:
@@ -474,8 +527,9 @@ def delete_image(filename):
     if file_path is None:
         return jsonify({"error": "Invalid filename"}), 400
     try:
-        resp = http_requests.delete(
-            f"{DUCKDB_SERVICE_URL}/image_uploads/{filename}", timeout=5
+        resp = duckdb_service.session.delete(
+            f"{DUCKDB_SERVICE_URL}/image_uploads/{filename}",
+            timeout=http_pool.timeout(5),
         )
     except Exception as e:
         print(
@@ -529,7 +583,11 @@ def serve_image(filename):
     file_path = safe_child_path(UPLOAD_FOLDER, filename)
     if file_path is None or not os.path.isfile(file_path):
         return jsonify({"error": "Image not found"}), 404
-    return send_from_directory(UPLOAD_FOLDER, filename, mimetype="image/jpeg")
+    # Content-hash ETag (services/content_etag.py); `send_from_directory`
+    # answers a matching If-None-Match with a 304 itself.
+    return send_from_directory(
+        UPLOAD_FOLDER, filename, mimetype="image/jpeg", etag=content_etag(file_path)
+    )
 
 
 @app.get("/snips/<path:filename>")
@@ -543,13 +601,21 @@ def serve_snip(filename):
 
     Snips are always written as ``.jpg`` (``UploadPipeline._persist_and_
     record_snips``); the suffix check + explicit mimetype mirror
-    ``serve_image`` for the same reason (2026-08 audit, for #228)."""
+    ``serve_image`` for the same reason (2026-08 audit, for #228).
+
+    Cached like an upload: ``no-cache`` plus the content-hash ETag, so a
+    browser revalidates and usually gets a 304. A snip's name derives from
+    its upload's, which can come back after a delete (and
+    ``delete_image`` leaves the old snips behind), so one URL's bytes can
+    change and must not be cached as immutable."""
     if not filename.lower().endswith(".jpg"):
         return jsonify({"error": "Snip not found"}), 404
     file_path = safe_child_path(SNIP_FOLDER, filename)
     if file_path is None or not os.path.isfile(file_path):
         return jsonify({"error": "Snip not found"}), 404
-    return send_from_directory(SNIP_FOLDER, filename, mimetype="image/jpeg")
+    return send_from_directory(
+        SNIP_FOLDER, filename, mimetype="image/jpeg", etag=content_etag(file_path)
+    )
 
 
 if __name__ == "__main__":
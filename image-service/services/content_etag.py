@@ -0,0 +1,49 @@
+"""Content-hash ETags for the JPEGs ``GET /images`` and ``GET /snips`` serve.
+
+Werkzeug's default ETag is ``mtime-size-adler32(filename)``: it changes
+when a file is merely touched or restored from a backup, and it stays the
+same when a snip is rewritten in place within the same second at the
+same size. A SHA-256 of the bytes changes exactly when the content does,
+so a browser (or the backend proxy) revalidating with ``If-None-Match``
+gets a ``304`` for as long as the picture really is the same.
+
+Hashing reads the whole file, so digests are memoized per
+``(path, mtime_ns, size)`` — a rewrite changes the stat and rehashes, a
+repeat request costs one ``stat``. The memo is a small LRU; the
+dashboard's working set is the latest snip per nest, not the archive.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+_MAX_ENTRIES = 4096
+_CHUNK = 64 * 1024
+
+_lock = threading.Lock()
+_digests: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+
+
+def content_etag(path: str) -> str:
+    """Hex SHA-256 of the file at ``path`` (unquoted, as Werkzeug's
+    ``send_file(etag=...)`` expects). Raises ``OSError`` like ``open``."""
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    with _lock:
+        digest = _digests.get(key)
+        if digest is not None:
+            _digests.move_to_end(key)
+            return digest
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _lock:
+        _digests[key] = digest
+        while len(_digests) > _MAX_ENTRIES:
+            _digests.popitem(last=False)
+    return digest
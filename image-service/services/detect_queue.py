@@ -0,0 +1,169 @@
+"""Background hole detection: ``/upload`` answers once the image is on disk.
+
+``UploadPipeline.run`` used to run the ONNX model, encode a JPEG per snip,
+write the snips and record the upload before answering. All of that
+happened while the ESP32 kept its radio on for the reply, and it held a
+Flask thread for the whole model run. With a ``DetectQueue``, ``run``
+persists the image and sidecar, appends a job here, and answers. A
+bounded pool of ``DETECT_WORKERS`` threads (default 2) runs the rest
+(``UploadPipeline.run_job``: detect, snips, record).
+
+* **Journal.** Jobs are kept in an ``Outbox`` (``services/outbox.py``)
+  under ``DETECT_JOURNAL_DIR``, so ``submit`` returns once the job is
+  fsynced. Jobs still queued or running at a restart run after it. The
+  outbox's drainer hands over up to ``DETECT_WORKERS`` jobs at a time,
+  and they run side by side on the pool. The journal moves past the
+  batch when all of its jobs have finished. A crash mid-batch therefore
+  runs those jobs again. That is harmless: snips are written under the
+  same names, and the job's ``ingest_key`` makes duckdb-service answer a
+  second recording without writing it again.
+* **Failures.** A job that raises is logged, counted, and handed back to
+  the journal as ``Rejected``: it goes to the back of the queue, and the
+  rest of its batch counts as done, so it never holds up the jobs behind
+  it. After ``OUTBOX_MAX_ATTEMPTS`` runs (default 5) it is moved to
+  ``rejected.jsonl`` in the journal directory
+  (``detect_jobs_dead_lettered_total``). Detection already degrades to
+  the stub classification instead of raising, so what is left is mostly
+  a duckdb-service or disk error that a later run can get past. Without
+  an outbox, ``run_job`` re-raises a failed ``/ingest_upload`` for this
+  reason instead of logging it and dropping the upload.
+* **Metrics.** ``detect_jobs_pending_records`` is the queue depth: jobs
+  journaled but not finished, including the ones running.
+  ``detect_jobs_running`` counts the jobs on the pool right now.
+  ``detect_job_latency_seconds`` times a job from ``/upload`` to done
+  (successful runs only); ``detect_job_run_seconds`` times every run.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from services import metrics
+from services.outbox import Outbox, Rejected
+
+DETECT_WORKERS = int(os.getenv("DETECT_WORKERS", "2"))
+
+JOB_LATENCY = metrics.histogram(
+    "detect_job_latency_seconds",
+    "Time from /upload to the end of its background detection job.",
+)
+JOB_RUN = metrics.histogram(
+    "detect_job_run_seconds",
+    "Time a background detection job spent running (detect, snips, record).",
+)
+
+
+class DetectQueue:
+    """A journaled queue of detection jobs, run on a bounded thread pool.
+
+    ``run(job)`` gets the dict given to ``submit`` (JSON-serializable).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        run: Callable[[dict], None],
+        *,
+        workers: int = DETECT_WORKERS,
+        **outbox_options,
+    ) -> None:
+        self.run = run
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="detect"
+        )
+        self._lock = threading.Lock()
+        self._running = 0
+        self._failed = 0
+        self._journal = Outbox(
+            directory,
+            self._run_batch,
+            batch_max=self.workers,
+            name="detect_jobs",
+            **outbox_options,
+        )
+
+    def submit(self, job: dict) -> None:
+        """Journal ``job``; returns once it is fsynced, not when it has run."""
+        self._journal.append({**job, "enqueued_at": time.time()})
+
+    def _run_batch(self, jobs: list[dict]) -> None:
+        # Returns when every job has finished, so the journal only moves
+        # past jobs that ran to the end; the ones that raised go back.
+        errors = list(self._pool.map(self._run_one, jobs))
+        failed = [i for i, error in enumerate(errors) if error is not None]
+        if failed:
+            raise Rejected(
+                failed,
+                "; ".join(
+                    f"filename={jobs[i].get('filename')}: {errors[i]}" for i in failed
+                ),
+            )
+
+    def _run_one(self, job: dict) -> str | None:
+        """Run ``job``; returns None, or the error it raised."""
+        started = time.monotonic()
+        with self._lock:
+            self._running += 1
+        try:
+            self.run(job)
+        except Exception as exc:
+            with self._lock:
+                self._failed += 1
+            print(
+                f"[detect] job failed for filename={job.get('filename')}: {exc!r}",
+                flush=True,
+            )
+            return repr(exc)
+        finally:
+            with self._lock:
+                self._running -= 1
+            JOB_RUN.observe(time.monotonic() - started)
+        enqueued_at = job.get("enqueued_at")
+        if isinstance(enqueued_at, (int, float)):
+            JOB_LATENCY.observe(max(0.0, time.time() - enqueued_at))
+        return None
+
+    def stats(self) -> dict[str, int]:
+        """The journal's counters (``pending`` is the queue depth), plus
+        ``running`` and ``failed`` jobs."""
+        out = self._journal.stats()
+        with self._lock:
+            out["running"] = self._running
+            out["failed"] = self._failed
+        return out
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every job submitted so far has run."""
+        return self._journal.flush(timeout)
+
+    def close(self) -> None:
+        """Stop taking jobs from the journal. Queued jobs stay journaled."""
+        self._journal.close()
+        self._pool.shutdown(wait=True)
+
+    def collect_metrics(self):
+        """Exposition lines for ``metrics.register_collector``."""
+        yield from self._journal.collect_metrics()
+        snapshot = self.stats()
+        yield from metrics.counter_lines(
+            "detect_jobs_running",
+            "Detection jobs running on the worker pool.",
+            snapshot["running"],
+            kind="gauge",
+        )
+        yield from metrics.counter_lines(
+            "detect_jobs_workers",
+            "Size of the detection worker pool.",
+            self.workers,
+            kind="gauge",
+        )
+        yield from metrics.counter_lines(
+            "detect_jobs_failed_total",
+            "Detection job runs that raised (each is retried until dead-lettered).",
+            snapshot["failed"],
+        )
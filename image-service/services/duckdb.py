@@ -2,25 +2,37 @@ import os
 
 import requests
 
+from services import http_pool
+
 
 class DuckDBService:
-    def __init__(self, base_url: str | None = None, timeout: float = 5.0):
+    def __init__(
+        self,
+        base_url: str | None = None,
+        timeout: float = 5.0,
+        session: requests.Session | None = None,
+    ):
         self.base_url = (
             base_url or os.getenv("DUCKDB_SERVICE_URL") or "http://duckdb-service:8000"
         ).rstrip("/")
+        # Read timeout; the connect timeout is the pool's (services/http_pool.py).
         self.timeout = timeout
+        # The shared keep-alive session unless one is injected.
+        self.session = session or http_pool.session
 
     def health(self) -> dict:
-        r = requests.get(f"{self.base_url}/health", timeout=self.timeout)
+        r = self.session.get(
+            f"{self.base_url}/health", timeout=http_pool.timeout(self.timeout)
+        )
         r.raise_for_status()
         return r.json()
 
     def query(self, sql: str) -> dict:
         # Internal use only. Prefer specific endpoints over raw SQL for public access.
-        r = requests.post(
+        r = self.session.post(
             f"{self.base_url}/query",
             json={"sql": sql},
-            timeout=self.timeout,
+            timeout=http_pool.timeout(self.timeout),
         )
         r.raise_for_status()
         return r.json()
@@ -30,29 +42,29 @@ class DuckDBService:
 
         Used by image-service to detect a module's first upload.
         """
-        r = requests.get(
+        r = self.session.get(
             f"{self.base_url}/modules/{module_id}/progress_count",
-            timeout=self.timeout,
+            timeout=http_pool.timeout(self.timeout),
         )
         r.raise_for_status()
         return int(r.json().get("count", 0))
 
     def add_progress_for_module(self, payload: dict) -> dict:
         """POST classification results for a module to duckdb-service."""
-        r = requests.post(
+        r = self.session.post(
             f"{self.base_url}/add_progress_for_module",
             json=payload,
-            timeout=self.timeout,
+            timeout=http_pool.timeout(self.timeout),
         )
         r.raise_for_status()
         return r.json()
 
     def record_image(self, module_id: str, filename: str) -> dict:
         """Insert an image_uploads row for a successful /upload."""
-        r = requests.post(
+        r = self.session.post(
             f"{self.base_url}/record_image",
             json={"module_id": module_id, "filename": filename},
-            timeout=self.timeout,
+            timeout=http_pool.timeout(self.timeout),
         )
         r.raise_for_status()
         return r.json()
@@ -66,18 +78,82 @@ class DuckDBService:
         ``nest_index``, ``bbox`` ([x, y, w, h] normalized), ``state``
         ("empty"/"sealed"), ``confidence`` and ``snip_filename``.
         """
-        r = requests.post(
+        r = self.session.post(
             f"{self.base_url}/record_detections",
             json={
                 "module_id": module_id,
                 "filename": filename,
                 "detections": detections,
             },
-            timeout=self.timeout,
+            timeout=http_pool.timeout(self.timeout),
         )
         r.raise_for_status()
         return r.json()
 
+    def ingest_upload(
+        self,
+        module_id: str,
+        filename: str,
+        *,
+        battery: int,
+        classification: dict,
+        detections: list[dict],
+        ingest_key: str | None = None,
+        uploaded_at: str | None = None,
+    ) -> dict | None:
+        """Record one upload's whole outcome in a single round-trip.
+
+        ``POST /ingest_upload`` applies what ``record_image``,
+        ``add_progress_for_module``, ``record_detections`` and
+        ``heartbeat`` each write, in one duckdb-service transaction, and
+        answers ``{"first_upload", "inserted", "heartbeat"}``. Returns None
+        on 404/405 — a duckdb-service that predates the route — so the
+        caller can fall back to the per-step calls. Raises on other
+        non-success statuses. ``ingest_key`` and ``uploaded_at`` are sent
+        only when given (see ``ingest_uploads``).
+        """
+        body = {
+            "module_id": module_id,
+            "filename": filename,
+            "battery": battery,
+            "classification": classification,
+            "detections": detections,
+        }
+        if ingest_key is not None:
+            body["ingest_key"] = ingest_key
+        if uploaded_at is not None:
+            body["uploaded_at"] = uploaded_at
+        r = self.session.post(
+            f"{self.base_url}/ingest_upload",
+            json=body,
+            timeout=http_pool.timeout(self.timeout),
+        )
+        if r.status_code in (404, 405):
+            return None
+        r.raise_for_status()
+        return r.json()
+
+    def ingest_uploads(self, uploads: list[dict]) -> list[dict] | None:
+        """Record a batch of uploads with one ``POST /ingest_uploads``.
+
+        Each entry is an ``/ingest_upload`` body, normally carrying an
+        ``ingest_key`` so a replayed entry is a no-op. Returns the
+        per-upload results in input order (an ``/ingest_upload`` answer or
+        ``{"error": ...}``), or None on 404/405 (a duckdb-service that
+        predates the route). Raises on other non-success statuses.
+        """
+        r = self.session.post(
+            f"{self.base_url}/ingest_uploads",
+            json={"uploads": uploads},
+            # Called off the request path (the outbox drainer), so waiting
+            # out a big batch is cheaper than timing out and resending it.
+            timeout=http_pool.timeout(max(self.timeout, 30.0)),
+        )
+        if r.status_code in (404, 405):
+            return None
+        r.raise_for_status()
+        return r.json().get("results", [])
+
     def heartbeat(self, module_id: str, battery: int) -> bool:
         """Record a module heartbeat (battery + image_count++).
 
@@ -86,10 +162,10 @@ class DuckDBService:
         on the first call after a NULL. Returns True on 2xx, False on
         404 (unknown module). Raises on other non-success statuses.
         """
-        r = requests.post(
+        r = self.session.post(
             f"{self.base_url}/modules/{module_id}/heartbeat",
             json={"battery": battery},
-            timeout=self.timeout,
+            timeout=http_pool.timeout(self.timeout),
         )
         if r.status_code == 404:
             return False
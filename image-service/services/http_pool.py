@@ -0,0 +1,188 @@
+"""One keep-alive, pooled HTTP session for every call to duckdb-service.
+
+``DuckDBService`` and the ``/images`` / ``DELETE /images/<file>`` proxies
+used to call module-level ``requests.get/post/delete``, and each of those
+builds a throwaway ``Session``, so every call opened (and closed) its own
+TCP connection. That is a handshake per call, several per ``/upload``.
+They now share ``session``. Its connection pool keeps connections to
+duckdb-service open between calls, which duckdb-service's
+``KeepAliveRequestHandler`` (its ``services/keepalive.py``) allows.
+
+* **Pool size** is ``DUCKDB_HTTP_POOL_SIZE`` (default 32) idle
+  connections per host. The threaded Flask server runs one thread per
+  request, so this is about as many requests as can be talking to
+  duckdb-service at once. The pool never blocks: a burst past it opens
+  extra connections, which are closed when returned.
+* **Timeouts** are ``(connect, read)``. Connecting to a container on the
+  same compose network is instant or it is down, so the connect timeout
+  is short (``DUCKDB_HTTP_CONNECT_TIMEOUT_S``, default 2 s). Each caller
+  keeps its own read timeout (see ``timeout()``).
+* **Retry with backoff** (``DUCKDB_HTTP_RETRIES``, default 2, backoff
+  0.2 s, 0.4 s, ...). A failed *connect* is retried for any method,
+  because the request never left this process. Read errors and
+  502/503/504 are retried only for idempotent GET/HEAD/DELETE. A
+  replayed DELETE whose first attempt already landed answers 404, and
+  the proxy already treats that as "row already gone". A POST
+  (``/ingest_upload``, ``/record_image``) is never replayed after it
+  may have been received, since that would record the upload twice.
+
+Connection reuse shows on image-service's ``GET /metrics``:
+``duckdb_http_requests_total`` counts requests sent (retries included)
+and ``duckdb_http_connections_opened_total`` counts TCP connects.
+``duckdb_http_connections_reused_total`` is the difference.
+
+A ``Session`` is shared across the request threads. That is safe here
+because the pool is urllib3's (thread-safe) and duckdb-service sets no
+cookies, so the session's cookie jar stays empty.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from services import metrics
+
+DUCKDB_HTTP_POOL_SIZE = int(os.getenv("DUCKDB_HTTP_POOL_SIZE", "32"))
+DUCKDB_HTTP_CONNECT_TIMEOUT_S = float(os.getenv("DUCKDB_HTTP_CONNECT_TIMEOUT_S", "2"))
+DUCKDB_HTTP_RETRIES = int(os.getenv("DUCKDB_HTTP_RETRIES", "2"))
+
+_BACKOFF_S = 0.2
+_RETRY_STATUSES = (502, 503, 504)
+_IDEMPOTENT = frozenset({"GET", "HEAD", "DELETE"})
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "connections_opened": 0, "retries": 0}
+
+
+def _bump(**deltas: int) -> None:
+    with _stats_lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+
+
+def stats() -> dict[str, int]:
+    """Counters since process start: requests sent, TCP connections
+    opened and reused, retries."""
+    with _stats_lock:
+        out = dict(_stats)
+    out["connections_reused"] = max(0, out["requests"] - out["connections_opened"])
+    return out
+
+
+def timeout(read_s: float) -> tuple[float, float]:
+    """A ``(connect, read)`` timeout for a call that may take ``read_s``."""
+    return (DUCKDB_HTTP_CONNECT_TIMEOUT_S, read_s)
+
+
+# ---------- counting pool ----------
+# urllib3 opens the socket in ``connect()`` and sends every attempt,
+# retries included, through ``urlopen()``. Counting those two gives
+# connections opened vs. requests sent.
+
+
+class _CountingConnect:
+    def connect(self) -> None:
+        _bump(connections_opened=1)
+        super().connect()
+
+
+class _CountingUrlopen:
+    def urlopen(self, *args, **kwargs):
+        _bump(requests=1)
+        return super().urlopen(*args, **kwargs)
+
+
+class _HTTPConnection(_CountingConnect, HTTPConnection):
+    pass
+
+
+class _HTTPSConnection(_CountingConnect, HTTPSConnection):
+    pass
+
+
+class _HTTPPool(_CountingUrlopen, HTTPConnectionPool):
+    ConnectionCls = _HTTPConnection
+
+
+class _HTTPSPool(_CountingUrlopen, HTTPSConnectionPool):
+    ConnectionCls = _HTTPSConnection
+
+
+class _Retry(Retry):
+    def increment(self, *args, **kwargs):
+        # Raises MaxRetryError once the budget is spent, so only a retry
+        # that will actually happen is counted.
+        new_retry = super().increment(*args, **kwargs)
+        _bump(retries=1)
+        return new_retry
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _HTTPPool,
+            "https": _HTTPSPool,
+        }
+
+
+def build_session(
+    pool_size: int = DUCKDB_HTTP_POOL_SIZE, retries: int = DUCKDB_HTTP_RETRIES
+) -> requests.Session:
+    """A ``Session`` with the counting keep-alive pool and retry policy."""
+    adapter = _PooledAdapter(
+        pool_connections=4,
+        pool_maxsize=pool_size,
+        pool_block=False,
+        max_retries=_Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=_BACKOFF_S,
+            status_forcelist=_RETRY_STATUSES,
+            allowed_methods=_IDEMPOTENT,
+            # Hand the final 5xx back to the caller, which already has
+            # status handling, rather than raising on it.
+            raise_on_status=False,
+        ),
+    )
+    s = requests.Session()
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+session = build_session()
+
+
+def _collect_metrics():
+    snapshot = stats()
+    for key, text in (
+        ("requests", "HTTP requests sent to duckdb-service, retries included."),
+        ("connections_opened", "TCP connections opened to duckdb-service."),
+        (
+            "connections_reused",
+            "Requests to duckdb-service on a kept-alive connection.",
+        ),
+        ("retries", "Requests to duckdb-service retried after an error or 5xx."),
+    ):
+        yield from metrics.counter_lines(
+            f"duckdb_http_{key}_total", text, snapshot[key]
+        )
+    yield from metrics.counter_lines(
+        "duckdb_http_pool_maxsize",
+        "Idle keep-alive connections kept per duckdb-service host.",
+        DUCKDB_HTTP_POOL_SIZE,
+        kind="gauge",
+    )
+
+
+metrics.register_collector(_collect_metrics)
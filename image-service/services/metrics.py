@@ -0,0 +1,144 @@
+"""In-process counters and histograms, rendered as Prometheus text on ``/metrics``.
+
+The same exposition helpers as duckdb-service's ``services/metrics.py``. A
+module that has something to report either registers a collector, a
+function yielding exposition lines that runs at scrape time (see
+``services/http_pool.py``), or observes into a ``histogram`` (see
+``services/detect_queue.py``). Deliberately dependency-free (no
+``prometheus_client``). Values are process-cumulative and reset on
+restart, which Prometheus' ``rate()``/``histogram_quantile()`` handle
+natively.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+# Wider than duckdb-service's: what is timed here is a model run plus
+# however long the job queued behind others, not a single SQL statement.
+SECONDS_BUCKETS = (
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(
+        self, name: str, help_text: str, labels: tuple[str, ...], buckets: tuple
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[idx] += 1
+            series[-1] += value
+
+    def snapshot(self) -> dict[tuple[str, ...], list[float]]:
+        with self._lock:
+            return {k: list(v) for k, v in self._series.items()}
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, series in sorted(self.snapshot().items()):
+            base = list(zip(self.labels, label_values, strict=True))
+            running = 0
+            for bound, count in zip(self.buckets, series, strict=False):
+                running += count
+                yield _sample(
+                    f"{self.name}_bucket", base + [("le", _num(bound))], running
+                )
+            running += series[len(self.buckets)]
+            yield _sample(f"{self.name}_bucket", base + [("le", "+Inf")], running)
+            yield _sample(f"{self.name}_sum", base, series[-1])
+            yield _sample(f"{self.name}_count", base, running)
+
+
+_registry: dict[str, Histogram] = {}
+_registry_lock = threading.Lock()
+_collectors: list[Callable[[], Iterable[str]]] = []
+
+
+def histogram(
+    name: str,
+    help_text: str,
+    labels: tuple[str, ...] = (),
+    buckets: tuple = SECONDS_BUCKETS,
+) -> Histogram:
+    """Get-or-create a histogram. Idempotent, so module reloads are safe."""
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Histogram(name, help_text, labels, buckets)
+        return metric
+
+
+def register_collector(fn: Callable[[], Iterable[str]]) -> None:
+    with _registry_lock:
+        if fn not in _collectors:
+            _collectors.append(fn)
+
+
+def render() -> str:
+    """Every histogram and collector in Prometheus text exposition format 0.0.4."""
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+        collectors = list(_collectors)
+    lines: list[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for collect in collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+
+def counter_lines(name: str, help_text: str, value: float, kind: str = "counter"):
+    """Exposition lines for a single unlabelled counter/gauge."""
+    return [
+        f"# HELP {name} {help_text}",
+        f"# TYPE {name} {kind}",
+        f"{name} {_num(value)}",
+    ]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return repr(value)
+    return str(value)
+
+
+def _sample(name: str, labels: list[tuple[str, str]], value: float) -> str:
+    if labels:
+        body = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+        return f"{name}{{{body}}} {_num(value)}"
+    return f"{name} {_num(value)}"
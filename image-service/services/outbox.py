@@ -0,0 +1,509 @@
+"""Durable on-disk outbox for the writes image-service owes duckdb-service.
+
+``/upload`` used to record each upload with a synchronous call to
+duckdb-service, made on the request thread. A duckdb-service restart
+during an upload wave cost every upload in it the full timeout, and the
+failed writes were only logged (``_ingest_upload``, ``_record_image_upload``)
+or swallowed (``_record_progress``, ``_record_heartbeat``). The rows were
+gone for good. With an outbox, the pipeline appends the upload's writes
+here and returns. A drainer thread sends them on.
+
+* **Append-only segment files** under ``OUTBOX_DIR``
+  (``segment-<n>.jsonl``, one JSON record per line). A new segment is
+  started past ``OUTBOX_SEGMENT_BYTES`` (default 4 MiB). A segment is
+  deleted once the drainer has delivered all of it.
+* **Group fsync.** ``append`` writes the line and waits for the syncer
+  thread. That thread fsyncs at most every ``OUTBOX_FSYNC_MS`` (default
+  5) for everything appended meanwhile. When ``append`` returns, the
+  record survives a crash, and an upload wave shares one fsync per
+  window instead of one each.
+* **In-order drain with batching.** The drainer hands up to
+  ``OUTBOX_BATCH_MAX`` (default 50) records, oldest first, to
+  ``handler``. If the handler returns, the batch is delivered and the
+  read position moves past it. If it raises (duckdb-service down, 5xx),
+  the same records are retried after an exponential backoff capped at
+  ``OUTBOX_RETRY_MAX_S`` (default 30 s), and nothing behind them
+  overtakes them: an outage costs latency, never records. After a
+  failure the batch size halves, down to one record, and grows back
+  after a success.
+* **Rejected records go to the back, then to a dead letter.** A
+  handler that got through but was refused for particular records
+  raises ``Rejected`` with their indices. The rest of the batch counts
+  as delivered. The refused records are appended again at the tail with
+  an attempt count, so they retry later without blocking what queued
+  behind them. A record refused ``OUTBOX_MAX_ATTEMPTS`` times (default
+  5) is moved to ``rejected.jsonl`` in the outbox directory and logged.
+  It is counted in ``<name>_dead_lettered_total``, and can be inspected
+  or replayed by hand from there.
+* **At-least-once delivery.** The read position (``cursor.json``) is
+  saved after each delivered batch but not fsynced. A crash can
+  therefore replay a batch that was already delivered. ``handler`` must
+  make that harmless; the pipeline sends an idempotency key with every
+  record (see duckdb-service's ``ingest_keys``).
+
+A line torn by a crash mid-write is the one record whose ``append`` had
+not returned. It is cut off when the outbox is reopened.
+
+``stats()`` and ``/metrics`` (``outbox_*``) show the backlog and the
+drainer's progress.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from collections.abc import Callable
+
+from services import metrics
+
+OUTBOX_FSYNC_MS = float(os.getenv("OUTBOX_FSYNC_MS", "5"))
+OUTBOX_BATCH_MAX = int(os.getenv("OUTBOX_BATCH_MAX", "50"))
+OUTBOX_SEGMENT_BYTES = int(os.getenv("OUTBOX_SEGMENT_BYTES", str(4 << 20)))
+OUTBOX_RETRY_MAX_S = float(os.getenv("OUTBOX_RETRY_MAX_S", "30"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+
+_RETRY_BASE_S = 0.5
+_SEGMENT_RE = re.compile(r"^segment-(\d{12})\.jsonl$")
+_CURSOR = "cursor.json"
+_DEAD_LETTER = "rejected.jsonl"
+# Attempt count carried by a requeued record; stripped before `handler`.
+_ATTEMPTS = "_outbox_attempts"
+
+
+def _segment_name(n: int) -> str:
+    return f"segment-{n:012d}.jsonl"
+
+
+class Rejected(Exception):
+    """Raised by a handler that reached its receiver but had the records at
+    ``indices`` (into the batch) refused. Every other record in the batch
+    counts as delivered."""
+
+    def __init__(self, indices, reason: str = "") -> None:
+        super().__init__(reason or "rejected")
+        self.indices = sorted(set(indices))
+
+
+class Outbox:
+    """A durable FIFO of JSON records, drained in order by ``handler``.
+
+    ``handler(records)`` gets a list of the dicts given to ``append``, in
+    append order; returning means delivered, raising ``Rejected`` means
+    those records were refused (see the module docstring), raising
+    anything else means retry the whole batch.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        handler: Callable[[list[dict]], None],
+        *,
+        fsync_ms: float = OUTBOX_FSYNC_MS,
+        batch_max: int = OUTBOX_BATCH_MAX,
+        segment_bytes: int = OUTBOX_SEGMENT_BYTES,
+        retry_max_s: float = OUTBOX_RETRY_MAX_S,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        name: str = "outbox",
+    ) -> None:
+        self.directory = directory
+        # Log tag and metric prefix, for a second outbox in the process.
+        self.name = name
+        self.handler = handler
+        self.fsync_s = fsync_ms / 1000.0
+        self.batch_max = max(1, batch_max)
+        self.segment_bytes = segment_bytes
+        self.retry_max_s = retry_max_s
+        self.max_attempts = max(1, max_attempts)
+
+        self._lock = threading.Lock()
+        # Appenders wait on this for their fsync; the syncer and the
+        # drainer wait on it for new records.
+        self._cond = threading.Condition(self._lock)
+        self._appended = 0  # records written since open
+        self._synced = 0  # ...of which fsynced
+        self._closed = False
+        self._stopped = threading.Event()  # wakes the drainer's retry wait
+        self._stats = {
+            "appended": 0,
+            "delivered": 0,
+            "batches": 0,
+            "failures": 0,
+            "requeued": 0,
+            "dead_lettered": 0,
+            "fsyncs": 0,
+        }
+
+        os.makedirs(directory, exist_ok=True)
+        segments = self._segments()
+        self._write_seg = segments[-1] if segments else 1
+        self._repair_tail(self._write_seg)
+        self._file = open(self._path(self._write_seg), "ab")
+        self._read_seg, self._read_off = self._load_cursor(segments)
+        self._pending = self._count_pending()
+
+        self._syncer = threading.Thread(
+            target=self._sync_loop, name="outbox-sync", daemon=True
+        )
+        self._drainer = threading.Thread(
+            target=self._drain_loop, name="outbox-drain", daemon=True
+        )
+        self._syncer.start()
+        self._drainer.start()
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def append(self, record: dict) -> None:
+        """Persist ``record``; returns once it is fsynced."""
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("outbox is closed")
+            if self._file.tell() >= self.segment_bytes:
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()
+            self._appended += 1
+            self._pending += 1
+            self._stats["appended"] += 1
+            seq = self._appended
+            self._cond.notify_all()
+            while self._synced < seq and not self._closed:
+                self._cond.wait()
+
+    def _rotate(self) -> None:
+        # Under the lock. Everything in the old segment is fsynced before
+        # the new one exists, so the drainer may treat it as final.
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._write_seg += 1
+        self._file = open(self._path(self._write_seg), "ab")
+        self._synced = self._appended
+        self._cond.notify_all()
+
+    def _sync_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._synced == self._appended and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            # Let the rest of the window's appends join this fsync.
+            if self.fsync_s > 0:
+                time.sleep(self.fsync_s)
+            with self._cond:
+                target = self._appended
+                fd = self._file.fileno()
+                try:
+                    os.fsync(fd)
+                except OSError as exc:
+                    # Disk trouble: report it and keep the appenders
+                    # waiting for the next attempt rather than lying.
+                    print(f"[{self.name}] fsync failed: {exc}", flush=True)
+                    continue
+                self._stats["fsyncs"] += 1
+                self._synced = max(self._synced, target)
+                self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------------------
+
+    def _drain_loop(self) -> None:
+        batch_max = self.batch_max
+        failures = 0
+        while True:
+            with self._cond:
+                while self._pending == 0 and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            batch, attempts, next_pos, finished = self._read_batch(batch_max)
+            if not batch:
+                # Only blank or corrupt lines were ahead; they're skipped.
+                self._advance(next_pos, 0, finished)
+                continue
+            try:
+                self.handler(batch)
+            except Rejected as exc:
+                refused = [i for i in exc.indices if 0 <= i < len(batch)]
+                try:
+                    # Before the cursor moves: a crash in between replays
+                    # the batch, which the handler must tolerate anyway.
+                    worst = self._set_aside(batch, attempts, refused, str(exc))
+                except (OSError, RuntimeError) as err:
+                    print(f"[{self.name}] could not requeue: {err}", flush=True)
+                    self._stopped.wait(self.retry_max_s)
+                    continue
+                failures = 0
+                self._advance(next_pos, len(batch), finished, len(refused))
+                if worst:
+                    # Don't spin on a lone record the receiver keeps refusing.
+                    self._stopped.wait(
+                        min(self.retry_max_s, _RETRY_BASE_S * 2 ** (worst - 1))
+                    )
+                continue
+            except Exception as exc:
+                failures += 1
+                with self._lock:
+                    self._stats["failures"] += 1
+                wait = min(self.retry_max_s, _RETRY_BASE_S * 2 ** (failures - 1))
+                print(
+                    f"[{self.name}] delivering {len(batch)} record(s) failed "
+                    f"(attempt {failures}, retry in {wait:.1f}s): {exc}",
+                    flush=True,
+                )
+                batch_max = max(1, batch_max // 2)
+                self._stopped.wait(wait)
+                continue
+            failures = 0
+            batch_max = min(self.batch_max, batch_max * 2)
+            self._advance(next_pos, len(batch), finished)
+
+    def _set_aside(
+        self, batch: list[dict], attempts: list[int], refused: list[int], reason: str
+    ) -> int:
+        """Requeue the refused records at the tail, or dead-letter the ones
+        out of attempts. Returns the highest attempt count requeued (0 if
+        none was)."""
+        worst = 0
+        for i in refused:
+            tries = attempts[i] + 1
+            if tries >= self.max_attempts:
+                self._dead_letter(batch[i], tries, reason)
+                continue
+            self.append({**batch[i], _ATTEMPTS: tries})
+            worst = max(worst, tries)
+            with self._lock:
+                self._stats["requeued"] += 1
+        return worst
+
+    def _dead_letter(self, record: dict, tries: int, reason: str) -> None:
+        entry = {
+            "record": record,
+            "attempts": tries,
+            "reason": reason,
+            "rejected_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        with open(os.path.join(self.directory, _DEAD_LETTER), "ab") as f:
+            f.write((json.dumps(entry, separators=(",", ":")) + "\n").encode())
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            self._stats["dead_lettered"] += 1
+        print(
+            f"[{self.name}] gave up on a record after {tries} attempt(s), "
+            f"moved to {_DEAD_LETTER}: {reason}",
+            flush=True,
+        )
+
+    def _read_batch(
+        self, limit: int
+    ) -> tuple[list[dict], list[int], tuple[int, int], list[int]]:
+        """Up to ``limit`` records from the read position, how often each
+        was refused before, the position after them, and the segments read
+        to the end on the way (deleted only once the batch is delivered)."""
+        seg, off = self._read_seg, self._read_off
+        records: list[dict] = []
+        attempts: list[int] = []
+        finished: list[int] = []
+        while len(records) < limit:
+            # Checked before reading: once the next segment exists, this
+            # one gets no more lines (see `_rotate`).
+            final = os.path.exists(self._path(seg + 1))
+            try:
+                with open(self._path(seg), "rb") as f:
+                    f.seek(off)
+                    while len(records) < limit:
+                        line = f.readline()
+                        if not line.endswith(b"\n"):
+                            break  # end of file, or a line still being written
+                        off += len(line)
+                        record = self._parse(line, seg)
+                        if record is not None:
+                            attempts.append(int(record.pop(_ATTEMPTS, 0) or 0))
+                            records.append(record)
+                    at_end = f.read(1) == b""
+            except FileNotFoundError:
+                at_end = True
+            if not (final and at_end):
+                break
+            # Finished even if the batch filled on its last line, so that
+            # a drained outbox doesn't keep it until the next append.
+            finished.append(seg)
+            seg, off = seg + 1, 0
+        return records, attempts, (seg, off), finished
+
+    def _advance(
+        self,
+        pos: tuple[int, int],
+        consumed: int,
+        finished: list[int],
+        refused: int = 0,
+    ) -> None:
+        with self._lock:
+            self._read_seg, self._read_off = pos
+            self._pending = max(0, self._pending - consumed)
+            if consumed:
+                self._stats["delivered"] += consumed - refused
+                self._stats["batches"] += 1
+            if consumed == 0:
+                # Corrupt lines only: recount rather than drift.
+                self._pending = self._count_pending()
+        self._save_cursor(pos)
+        for seg in finished:
+            self._remove_segment(seg)
+
+    def _parse(self, line: bytes, seg: int) -> dict | None:
+        if not line.strip():
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if not isinstance(record, dict):
+            print(
+                f"[{self.name}] skipping unreadable record in {_segment_name(seg)}",
+                flush=True,
+            )
+            return None
+        return record
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    def _path(self, seg: int) -> str:
+        return os.path.join(self.directory, _segment_name(seg))
+
+    def _segments(self) -> list[int]:
+        found = []
+        for name in os.listdir(self.directory):
+            m = _SEGMENT_RE.match(name)
+            if m:
+                found.append(int(m.group(1)))
+        return sorted(found)
+
+    def _remove_segment(self, seg: int) -> None:
+        try:
+            os.unlink(self._path(seg))
+        except FileNotFoundError:
+            pass
+
+    def _repair_tail(self, seg: int) -> None:
+        """Cut a torn last line (a crash mid-append) off the live segment."""
+        path = self._path(seg)
+        try:
+            with open(path, "rb+") as f:
+                data = f.read()
+                if data and not data.endswith(b"\n"):
+                    f.truncate(data.rfind(b"\n") + 1)
+        except FileNotFoundError:
+            pass
+
+    def _load_cursor(self, segments: list[int]) -> tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, _CURSOR), encoding="utf-8") as f:
+                saved = json.load(f)
+            seg, off = int(saved["segment"]), int(saved["offset"])
+        except (OSError, ValueError, KeyError, TypeError):
+            seg, off = 0, 0
+        if seg in segments or (not segments and seg == self._write_seg):
+            return seg, off
+        # No (usable) cursor, or its segment is already gone: start at the
+        # oldest segment left.
+        return (segments[0] if segments else self._write_seg), 0
+
+    def _save_cursor(self, pos: tuple[int, int]) -> None:
+        tmp = os.path.join(self.directory, _CURSOR + ".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"segment": pos[0], "offset": pos[1]}, f)
+            os.replace(tmp, os.path.join(self.directory, _CURSOR))
+        except OSError as exc:
+            # Costs a replay of what was delivered since, after a restart.
+            print(f"[{self.name}] could not save cursor: {exc}", flush=True)
+
+    def _count_pending(self) -> int:
+        count = 0
+        seg, off = self._read_seg, self._read_off
+        for n in self._segments():
+            if n < seg:
+                continue
+            try:
+                with open(self._path(n), "rb") as f:
+                    if n == seg:
+                        f.seek(off)
+                    count += sum(1 for line in f if line.strip())
+            except FileNotFoundError:
+                pass
+        return count
+
+    # ------------------------------------------------------------------
+    # Control and introspection
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict[str, int]:
+        """Counters since open, plus ``pending``: records not yet delivered."""
+        with self._lock:
+            out = dict(self._stats)
+            out["pending"] = self._pending
+        return out
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every record appended so far is delivered.
+        Returns False on timeout (e.g. duckdb-service still down)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._pending == 0:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    def close(self) -> None:
+        """Stop both threads and close the live segment. Undelivered
+        records stay on disk for the next open."""
+        with self._cond:
+            if self._closed:
+                return
+            try:
+                os.fsync(self._file.fileno())
+                self._synced = self._appended
+            except OSError:
+                pass
+            self._closed = True
+            self._cond.notify_all()
+        self._stopped.set()
+        self._syncer.join(timeout=5)
+        self._drainer.join(timeout=5)
+        with self._lock:
+            self._file.close()
+
+    def collect_metrics(self):
+        """Exposition lines for ``metrics.register_collector``, prefixed
+        with the outbox's ``name``."""
+        snapshot = self.stats()
+        yield from metrics.counter_lines(
+            f"{self.name}_pending_records",
+            f"Records waiting in the {self.name} for delivery.",
+            snapshot["pending"],
+            kind="gauge",
+        )
+        for key, text in (
+            ("appended", "Records appended."),
+            ("delivered", "Records delivered."),
+            ("batches", "Batches delivered."),
+            ("failures", "Deliveries that failed and will be retried."),
+            ("requeued", "Refused records put back at the tail for a retry."),
+            ("dead_lettered", "Refused records given up on, kept in rejected.jsonl."),
+            ("fsyncs", "fsyncs, each covering every append since the last."),
+        ):
+            yield from metrics.counter_lines(
+                f"{self.name}_{key}_total", f"{self.name}: {text}", snapshot[key]
+            )
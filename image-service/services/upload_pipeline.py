@@ -1,21 +1,42 @@
 """Upload pipeline for image-service.
 
 Encapsulates the multi-step `/upload` workflow (content validation + image
-persistence, first-upload detection, sidecar persistence, classification,
-progress + heartbeat recording, optional Discord notification) behind a
-class with injected collaborators. The pipeline is deliberately Flask-free:
-callers parse the HTTP request, build an `UploadRequest`, and consume an
+persistence, sidecar persistence, classification, recording the upload in
+duckdb-service, optional Discord notification) behind a class with
+injected collaborators. The pipeline is deliberately Flask-free: callers
+parse the HTTP request, build an `UploadRequest`, and consume an
 `UploadResult`. Content validation (`_persist_image`'s `probe_jpeg` call)
 runs before the first network round-trip to duckdb-service (2026-08 audit,
 for #228 — a rejected upload must not still amplify to a duckdb-service
 call on every attempt).
 
-Behavior is preserved exactly from the original inline `/upload` handler:
-- Failure tolerance: the first-upload check, progress POST, and heartbeat
-  POST all silently swallow `requests.RequestException`. The
-  `_record_image_upload` step (added for #58) is non-fatal too but logs
-  the failure so the on-call can see it — without the DB row the upload
-  is invisible to admin and dashboard.
+Behavior is preserved from the original inline `/upload` handler, except
+that the DB writes are one round-trip:
+- One `POST /ingest_upload` records the image row, progress, detection
+  rows and heartbeat in a single duckdb-service transaction and answers
+  `first_upload` (an O(1) marker lookup). Against a duckdb-service that
+  predates it (404), the per-step calls run instead: `record_image` (whose
+  `first_upload` flag decides the ping, with the `progress_count` GET
+  only as the fallback when the flag is missing), progress, detections,
+  heartbeat.
+- With an outbox (`services/outbox.py`, enabled by `OUTBOX_DIR`), the
+  upload's writes are appended to the on-disk outbox instead, and `run`
+  returns without waiting for duckdb-service. The outbox's drainer hands
+  them back to `replay`, which sends them in batches through `POST
+  /ingest_uploads` with an idempotency key each, and sends the
+  first-upload ping once duckdb-service has answered. Nothing is lost
+  while duckdb-service is down; the rows arrive late instead.
+- With a detection queue (`services/detect_queue.py`, enabled by
+  `DETECT_JOURNAL_DIR`), `run` stops after the image and sidecar are on
+  disk: it journals a job and returns `queued` with no classification.
+  A worker pool then runs `run_job` — detection, snips and the record
+  step above — off the request thread. The job carries the upload's
+  `ingest_key` and `uploaded_at`, so a job run twice records it once.
+- Failure tolerance: every duckdb-service call is non-fatal. A failed
+  ingest, `record_image` or `record_detections` call is logged so the
+  on-call can see it — without the DB rows the upload is invisible to
+  admin and dashboard; the first-upload check, progress POST and
+  heartbeat POST swallow `requests.RequestException` silently.
 - Sidecar shape: written via `LogSidecarEnvelope` (unchanged).
 - Discord message format: identical to the original.
 - Filenames written to the upload volume are the client's name after
@@ -31,17 +52,26 @@ from __future__ import annotations
 
 import json
 import os
+import uuid
 from collections.abc import Callable
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import Any
 
-from requests import RequestException
+from requests import HTTPError, RequestException
 
 from services.hole_detection import BEE_TYPE_WIRE_TO_DB, DetectionResult, HoleDetector
 from services.image_guard import probe_jpeg
+from services.outbox import Rejected
 from services.paths import reserve_filename, sanitize_upload_filename
 from services.sidecar import LogSidecarEnvelope
 
+
+def _utc_now_iso() -> str:
+    """Naive UTC, second precision: the `uploaded_at` duckdb-service takes."""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+
+
 # Type-only hint for the werkzeug FileStorage. Importing werkzeug here is
 # acceptable per the brief — werkzeug is the file-upload abstraction Flask
 # already pulls in, and it's not a Flask import. We keep it as `Any` at
@@ -64,7 +94,9 @@ class UploadResult:
     """Outputs of one /upload invocation."""
 
     filename: str
-    classification: dict
+    # None while the upload is `queued` for background detection.
+    classification: dict | None
+    queued: bool = False
 
 
 class UploadPipeline:
@@ -84,6 +116,8 @@ class UploadPipeline:
         classify: Callable[[], dict],
         detector: HoleDetector | None = None,
         snip_folder: str | None = None,
+        outbox=None,
+        jobs=None,
     ):
         self.upload_folder = upload_folder
         self.duckdb_service = duckdb_service
@@ -96,19 +130,65 @@ class UploadPipeline:
         # Where per-nest snips are written. Defaults to a `snips/` subdir of the
         # upload folder so the existing image-serving volume carries them too.
         self.snip_folder = snip_folder or os.path.join(upload_folder, "snips")
+        # `services.outbox.Outbox` whose handler is `self.replay`, or None
+        # to record each upload synchronously.
+        self.outbox = outbox
+        # `services.detect_queue.DetectQueue` whose runner is `self.run_job`,
+        # or None to detect before `run` returns.
+        self.jobs = jobs
 
     def run(self, req: UploadRequest) -> UploadResult:
         # `_persist_image` (which probes the bytes are a valid, in-bounds
-        # JPEG — 2026-08 audit, for #228) runs FIRST, before
-        # `_check_first_upload`'s network round-trip to duckdb-service
-        # (senior-review P1): a rejected upload must not still amplify to
-        # a GET against duckdb-service on every attempt. An
-        # `InvalidImageError` here propagates straight out of `run()`
-        # to `app.py`'s catch, with zero network calls made.
+        # JPEG — 2026-08 audit, for #228) runs FIRST, before any network
+        # round-trip to duckdb-service (senior-review P1): a rejected
+        # upload must not still amplify to a duckdb-service call on every
+        # attempt. An `InvalidImageError` here propagates straight out of
+        # `run()` to `app.py`'s catch, with zero network calls made.
         file_path, stored_filename = self._persist_image(req)
-        is_first = self._check_first_upload(req.mac)
-        self._record_image_upload(req.mac, stored_filename)
         self._persist_sidecar(req, file_path, stored_filename)
+        if self.jobs is not None:
+            # The model run and everything after it go to the background
+            # queue; the module gets its 200 now. The key and timestamp are
+            # fixed here, so a job run twice (a crash mid-run) records the
+            # upload once, dated when it arrived.
+            self.jobs.submit(
+                {
+                    "mac": req.mac,
+                    "battery": req.battery,
+                    "filename": stored_filename,
+                    "ingest_key": uuid.uuid4().hex,
+                    "uploaded_at": _utc_now_iso(),
+                }
+            )
+            return UploadResult(
+                filename=stored_filename, classification=None, queued=True
+            )
+        classification = self._process(req.mac, req.battery, file_path, stored_filename)
+        return UploadResult(filename=stored_filename, classification=classification)
+
+    def run_job(self, job: dict) -> None:
+        """Finish an upload `run` queued: the `DetectQueue`'s job runner."""
+        self._process(
+            job["mac"],
+            job["battery"],
+            os.path.join(self.upload_folder, job["filename"]),
+            job["filename"],
+            ingest_key=job.get("ingest_key"),
+            uploaded_at=job.get("uploaded_at"),
+        )
+
+    def _process(
+        self,
+        mac: str,
+        battery: int,
+        file_path: str,
+        stored_filename: str,
+        *,
+        ingest_key: str | None = None,
+        uploaded_at: str | None = None,
+    ) -> dict:
+        """Detect, write the snips and record the upload; returns the
+        classification. Inline from `run`, or on a `DetectQueue` worker."""
         # Hole detection (#165, ADR-027): the learned detector locates holes and
         # crops a real per-nest snip from each, but defers empty/sealed — so it
         # returns an empty `classification` (`detection.ok` is False) and the
@@ -117,12 +197,155 @@ class UploadPipeline:
         # value and the upload never 500s on a detection problem.
         detection = self._detect(file_path)
         classification = detection.classification if detection.ok else self.classify()
-        self._record_progress(req.mac, classification)
-        self._persist_and_record_snips(req.mac, stored_filename, detection)
-        self._record_heartbeat(req.mac, req.battery)
+        rows = self._persist_snips(stored_filename, detection)
+        if self.outbox is not None:
+            self._enqueue(
+                mac,
+                battery,
+                stored_filename,
+                classification,
+                rows,
+                ingest_key=ingest_key,
+                uploaded_at=uploaded_at,
+            )
+            return classification
+        # Everything the upload writes to duckdb-service goes in ONE
+        # `POST /ingest_upload`: image row, progress, detection rows and
+        # heartbeat, in one transaction, answering "first upload?" on the
+        # way. Only a duckdb-service that predates the route gets the
+        # per-step calls (`_record_per_step`).
+        is_first = self._ingest_upload(
+            mac,
+            battery,
+            stored_filename,
+            classification,
+            rows,
+            ingest_key=ingest_key,
+            uploaded_at=uploaded_at,
+        )
+        if is_first is None:
+            is_first = self._record_per_step(
+                mac, battery, stored_filename, classification, rows
+            )
         if is_first:
-            self._notify_first_sighting(req.mac, req.battery, stored_filename)
-        return UploadResult(filename=stored_filename, classification=classification)
+            self._notify_first_sighting(mac, battery, stored_filename)
+        return classification
+
+    def replay(self, records: list[dict]) -> None:
+        """Deliver a batch of outbox records (`_enqueue`) to duckdb-service.
+
+        The outbox's handler. Raising (duckdb-service down, 5xx) makes the
+        outbox retry the same records later; that is safe because each one
+        carries its `ingest_key`, and duckdb-service answers a key it has
+        already recorded without writing again. An upload duckdb-service
+        rejects (400) would be rejected on every retry, so it is logged and
+        dropped instead. One whose write failed (`write_failed`, or a 500
+        for a batch of one) raises `Rejected`: the outbox retries it from
+        the back of the queue and dead-letters it after
+        `OUTBOX_MAX_ATTEMPTS`, so it can't hold up the uploads behind it.
+        The first-upload ping goes out only for a record applied now, never
+        for a replay of one already recorded.
+
+        Against a duckdb-service that predates `/ingest_uploads` the records
+        go through the per-step calls, once each, with their old
+        best-effort failure handling: those routes take no idempotency key.
+        """
+        try:
+            results = self.duckdb_service.ingest_uploads(records)
+        except HTTPError as exc:
+            # A larger batch is retried smaller by the outbox, down to one.
+            status = exc.response.status_code if exc.response is not None else None
+            if status == 500 and len(records) == 1:
+                raise Rejected([0], f"duckdb-service answered 500: {exc}") from exc
+            raise
+        if results is None:
+            for record in records:
+                if self._record_per_step(
+                    record["module_id"],
+                    record["battery"],
+                    record["filename"],
+                    record["classification"],
+                    record["detections"],
+                ):
+                    self._notify_first_sighting(
+                        record["module_id"], record["battery"], record["filename"]
+                    )
+            return
+        failed: list[int] = []
+        for i, (record, result) in enumerate(zip(records, results, strict=True)):
+            if result.get("write_failed"):
+                failed.append(i)
+            elif "error" in result:
+                print(
+                    f"[outbox] duckdb-service rejected mac={record['module_id']} "
+                    f"filename={record['filename']}: {result['error']}",
+                    flush=True,
+                )
+            elif result.get("first_upload") is True and not result.get("replayed"):
+                self._notify_first_sighting(
+                    record["module_id"], record["battery"], record["filename"]
+                )
+        if failed:
+            raise Rejected(
+                failed,
+                "; ".join(
+                    f"{records[i]['filename']}: {results[i]['error']}" for i in failed
+                ),
+            )
+
+    def _enqueue(
+        self,
+        mac: str,
+        battery: int,
+        filename: str,
+        classification: dict,
+        rows: list[dict],
+        *,
+        ingest_key: str | None = None,
+        uploaded_at: str | None = None,
+    ) -> None:
+        """Append the upload's `/ingest_uploads` entry to the outbox.
+
+        `ingest_key` makes a redelivery harmless; `uploaded_at` (UTC) dates
+        the rows to when the upload arrived rather than when the outbox got
+        them through. Both are made here unless a queued job brings its
+        own. Returns once the record is fsynced.
+        """
+        self.outbox.append(
+            {
+                "ingest_key": ingest_key or uuid.uuid4().hex,
+                "module_id": mac,
+                "filename": filename,
+                "battery": battery,
+                "classification": classification,
+                "detections": rows,
+                "uploaded_at": uploaded_at or _utc_now_iso(),
+            }
+        )
+
+    def _record_per_step(
+        self,
+        mac: str,
+        battery: int,
+        filename: str,
+        classification: dict,
+        rows: list[dict],
+    ) -> bool:
+        """The pre-`/ingest_upload` sequence, one round-trip per write.
+
+        `record_image` goes first: it answers "first upload?" from
+        duckdb-service's per-module marker, which must be read before this
+        upload's progress rows exist. The `progress_count` GET (a COUNT
+        over the module's whole progress history) is only the fallback for
+        a failed call or a duckdb-service that doesn't send the flag yet.
+        """
+        is_first = self._record_image_upload(mac, filename)
+        if is_first is None:
+            is_first = self._check_first_upload(mac)
+        self._record_progress(mac, classification)
+        self._record_detections(mac, filename, rows)
+        self._record_heartbeat(mac, battery)
+        return is_first
 
     # ------------------------------------------------------------------
     # Steps
@@ -175,22 +398,30 @@ class UploadPipeline:
             raise
         return file_path, stored_filename
 
-    def _record_image_upload(self, mac: str, filename: str) -> None:
+    def _record_image_upload(self, mac: str, filename: str) -> bool | None:
         """Insert image_uploads row in duckdb-service.
 
+        Returns duckdb-service's ``first_upload`` flag (True only for the
+        module's first recorded upload), or None when the call failed or
+        the response doesn't carry the flag — the caller then falls back
+        to ``_check_first_upload``.
+
         Logs on failure rather than swallowing silently: the file is on disk,
         classification will still run, and the caller still sees 200 — but the
         missing DB row would make this upload invisible to the admin page and
         the dashboard's ``last_image_at``, so the on-call needs to see it.
         """
         try:
-            self.duckdb_service.record_image(mac, filename)
+            body = self.duckdb_service.record_image(mac, filename)
         except RequestException as exc:
             print(
                 f"[record_image] duckdb-service failed for mac={mac} "
                 f"filename={filename}: {exc}",
                 flush=True,
             )
+            return None
+        first = body.get("first_upload") if isinstance(body, dict) else None
+        return first if isinstance(first, bool) else None
 
     def _persist_sidecar(
         self, req: UploadRequest, file_path: str, stored_filename: str
@@ -243,19 +474,20 @@ class UploadPipeline:
             return DetectionResult()
         return self.detector.detect(file_path)
 
-    def _persist_and_record_snips(
-        self, mac: str, source_filename: str, detection: DetectionResult
-    ) -> None:
-        """Write each snip JPEG to the snip folder and record detection rows.
+    def _persist_snips(
+        self, source_filename: str, detection: DetectionResult
+    ) -> list[dict]:
+        """Write each snip JPEG to the snip folder; return the detection rows.
 
         Best-effort and non-fatal, mirroring ``_record_image_upload``: the
         upload itself already succeeded, so a failure to persist snips logs and
-        moves on rather than turning a 200 into a 500. Snip filenames are
-        derived from the source upload + bee type + nest index so a re-upload of
-        the same capture is idempotent on disk and history accrues per upload
-        (enabling the phase-3 time-lapse, #166)."""
+        moves on rather than turning a 200 into a 500 — a snip that couldn't be
+        written gets no row. Snip filenames are derived from the source upload +
+        bee type + nest index so a re-upload of the same capture is idempotent
+        on disk and history accrues per upload (enabling the phase-3 time-lapse,
+        #166)."""
         if not detection.snips:
-            return
+            return []
         base = os.path.splitext(os.path.basename(source_filename))[0]
         try:
             os.makedirs(self.snip_folder, exist_ok=True)
@@ -264,7 +496,7 @@ class UploadPipeline:
                 f"[snips] could not create snip folder {self.snip_folder}: {exc}",
                 flush=True,
             )
-            return
+            return []
 
         rows: list[dict] = []
         for snip in detection.snips:
@@ -288,7 +520,70 @@ class UploadPipeline:
                     "snip_filename": snip_filename,
                 }
             )
+        return rows
 
+    def _ingest_upload(
+        self,
+        mac: str,
+        battery: int,
+        filename: str,
+        classification: dict,
+        rows: list[dict],
+        *,
+        ingest_key: str | None = None,
+        uploaded_at: str | None = None,
+    ) -> bool | None:
+        """Record the upload in duckdb-service with one `POST /ingest_upload`.
+
+        Returns its ``first_upload`` flag, or None when duckdb-service
+        predates the route (the caller then makes the per-step calls).
+        A failed call is logged like ``_record_image_upload`` — the whole
+        upload is now missing from the DB, not just its image row — and
+        counts as "not first" (no Discord spam on a flaky network). It is
+        not retried per step: the ingest is one transaction, so a failure
+        wrote nothing, but a timeout may have committed it anyway.
+
+        A queued job passes its ``ingest_key``/``uploaded_at``, so a job
+        run again after a crash is answered as a replay, which is "not
+        first" too. The same key makes a failed call safe to repeat, so a
+        queued job re-raises it instead: `/upload` has already answered,
+        and the `DetectQueue` journal retries the job (or dead-letters it)
+        rather than losing the upload.
+        """
+        # Only sent when set: the inline path stays the call it always was.
+        extra = {
+            k: v
+            for k, v in (("ingest_key", ingest_key), ("uploaded_at", uploaded_at))
+            if v is not None
+        }
+        try:
+            body = self.duckdb_service.ingest_upload(
+                mac,
+                filename,
+                battery=battery,
+                classification=classification,
+                detections=rows,
+                **extra,
+            )
+        except RequestException as exc:
+            print(
+                f"[ingest_upload] duckdb-service failed for mac={mac} "
+                f"filename={filename}: {exc}",
+                flush=True,
+            )
+            if ingest_key is not None:
+                raise
+            return False
+        if body is None:
+            return None
+        if not isinstance(body, dict) or body.get("replayed"):
+            return False
+        return body.get("first_upload") is True
+
+    def _record_detections(
+        self, mac: str, source_filename: str, rows: list[dict]
+    ) -> None:
+        """POST one capture's detection rows (``_persist_snips``). Logs on failure."""
         if not rows:
             return
         try:
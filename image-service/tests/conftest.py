@@ -60,23 +60,32 @@ def client(app):
 def mocked_duckdb_http(app, monkeypatch: pytest.MonkeyPatch):
     """Capture all outbound HTTP traffic to duckdb-service.
 
-    Patches `requests.post` (used by /add_progress_for_module and
-    /modules/<id>/heartbeat) and `requests.get` (used by
-    /modules/<id>/progress_count). All outbound calls now route through
-    `services.duckdb.DuckDBService`, so we patch the requests binding in
-    that module.
+    Patches the shared session's `post` (used by /ingest_upload and, on
+    the per-step fallback, /record_image, /add_progress_for_module,
+    /record_detections and /modules/<id>/heartbeat) and `get` (used by
+    /modules/<id>/progress_count). All outbound calls route through
+    `services.http_pool.session`, so we patch that one object.
 
     Returns a dict with:
         - "posts": list of {"url", "json", "kwargs"}
         - "gets":  list of {"url", "kwargs"}
         - "progress_count": int returned by GET /progress_count (mutable)
         - "heartbeat_status": int returned by POST /heartbeat (mutable)
+        - "first_upload": bool returned by POST /record_image, or None to
+          answer like a duckdb-service without the flag (mutable). POST
+          /ingest_upload returns it too; there None means "derive it from
+          progress_count", as the real route does
+        - "ingest_upload": False to answer POST /ingest_upload with 404,
+          like a duckdb-service that predates it — the pipeline then makes
+          the per-step calls (mutable)
     """
     state = {
         "posts": [],
         "gets": [],
         "progress_count": 0,
         "heartbeat_status": 200,
+        "first_upload": None,
+        "ingest_upload": True,
     }
 
     class _Resp:
@@ -95,6 +104,23 @@ def mocked_duckdb_http(app, monkeypatch: pytest.MonkeyPatch):
         state["posts"].append({"url": url, "json": json, "kwargs": kwargs})
         if url.endswith("/heartbeat"):
             return _Resp(state["heartbeat_status"], {"ok": True} if state["heartbeat_status"] < 400 else {"error": "x"})
+        if url.endswith("/ingest_upload"):
+            if not state["ingest_upload"]:
+                return _Resp(404, {"error": "Not Found"})
+            first = state["first_upload"]
+            if first is None:
+                first = state["progress_count"] == 0
+            return _Resp(
+                200,
+                {
+                    "message": "Upload ingested",
+                    "first_upload": first,
+                    "inserted": len(json.get("detections") or []),
+                    "heartbeat": state["heartbeat_status"] < 400,
+                },
+            )
+        if url.endswith("/record_image") and state["first_upload"] is not None:
+            return _Resp(200, {"ok": True, "first_upload": state["first_upload"]})
         # /add_progress_for_module and any other POST
         return _Resp(200, {"ok": True})
 
@@ -104,11 +130,11 @@ def mocked_duckdb_http(app, monkeypatch: pytest.MonkeyPatch):
             return _Resp(200, {"count": state["progress_count"]})
         return _Resp(200, {"ok": True})
 
-    # All outbound HTTP from image-service now routes through
-    # services.duckdb.DuckDBService, so we only need to patch its `requests`.
-    import services.duckdb as duckdb_svc_mod
-    monkeypatch.setattr(duckdb_svc_mod.requests, "post", fake_post)
-    monkeypatch.setattr(duckdb_svc_mod.requests, "get", fake_get)
+    # All outbound HTTP from image-service goes through the shared pooled
+    # session (services/http_pool.py), so that is the one thing to patch.
+    from services import http_pool
+    monkeypatch.setattr(http_pool.session, "post", fake_post)
+    monkeypatch.setattr(http_pool.session, "get", fake_get)
     return state
 
 
@@ -0,0 +1,64 @@
+"""Conditional GETs on the served JPEGs: content-hash ETags and 304s
+(`services/content_etag.py`)."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+from services.content_etag import content_etag
+
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 64 + b"\xff\xd9"
+
+
+def test_image_etag_is_the_content_hash(client, tmp_upload_dir: Path):
+    (tmp_upload_dir / "cap.jpg").write_bytes(JPEG)
+    resp = client.get("/images/cap.jpg")
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == f'"{hashlib.sha256(JPEG).hexdigest()}"'
+    assert "no-cache" in resp.headers["Cache-Control"]
+
+
+def test_matching_if_none_match_is_a_304(client, tmp_upload_dir: Path):
+    (tmp_upload_dir / "cap.jpg").write_bytes(JPEG)
+    etag = client.get("/images/cap.jpg").headers["ETag"]
+    resp = client.get("/images/cap.jpg", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.data == b""
+
+    # New bytes under the same name: the old tag no longer matches.
+    (tmp_upload_dir / "cap.jpg").write_bytes(JPEG + b"\x00")
+    resp = client.get("/images/cap.jpg", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+
+def test_snips_are_revalidated_since_a_name_can_be_reused(client, tmp_upload_dir: Path):
+    snip = tmp_upload_dir / "snips" / "cap-blackmasked-0.jpg"
+    snip.write_bytes(JPEG)
+    resp = client.get("/snips/cap-blackmasked-0.jpg")
+    assert resp.status_code == 200
+    cache_control = resp.headers["Cache-Control"]
+    assert "no-cache" in cache_control
+    assert "immutable" not in cache_control
+    etag = resp.headers["ETag"]
+    resp = client.get("/snips/cap-blackmasked-0.jpg", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    # The upload was deleted and its name reused: new bytes, new tag.
+    snip.write_bytes(JPEG + b"\x00")
+    resp = client.get("/snips/cap-blackmasked-0.jpg", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+
+
+def test_digest_is_recomputed_when_the_file_changes(tmp_path: Path):
+    path = tmp_path / "a.jpg"
+    path.write_bytes(b"one")
+    first = content_etag(str(path))
+    assert first == content_etag(str(path))
+    # Keep the mtime: the size change alone must invalidate the memo.
+    st = os.stat(path)
+    path.write_bytes(b"two!")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert content_etag(str(path)) == hashlib.sha256(b"two!").hexdigest()
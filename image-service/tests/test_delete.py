@@ -28,7 +28,7 @@ def installed_image(tmp_upload_dir: Path) -> Path:
 
 
 def _patch_duckdb_delete(app_module, monkeypatch, response: _Resp | Exception):
-    """Wire app.http_requests.delete to return ``response`` (or raise it)."""
+    """Wire the shared session's delete to return ``response`` (or raise it)."""
     calls: list[dict] = []
 
     def fake_delete(url, **kwargs):
@@ -37,7 +37,7 @@ def _patch_duckdb_delete(app_module, monkeypatch, response: _Resp | Exception):
             raise response
         return response
 
-    monkeypatch.setattr(app_module.http_requests, "delete", fake_delete)
+    monkeypatch.setattr(app_module.duckdb_service.session, "delete", fake_delete)
     return calls
 
 
@@ -0,0 +1,145 @@
+"""Tests for background hole detection (services/detect_queue.py).
+
+Real journal files in ``tmp_path`` and a real worker pool; the job runner
+is a plain function, so concurrency, restarts and the metrics are
+observed directly.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+import pytest
+
+from services import detect_queue, metrics
+from services.detect_queue import DetectQueue
+from services.outbox import Outbox
+
+
+@pytest.fixture
+def open_queue(tmp_path):
+    opened: list[DetectQueue] = []
+
+    def _open(run, **kwargs):
+        kwargs.setdefault("fsync_ms", 0)
+        queue = DetectQueue(str(tmp_path / "jobs"), run, **kwargs)
+        opened.append(queue)
+        return queue
+
+    yield _open
+    for queue in opened:
+        queue.close()
+
+
+def _latency_count() -> int:
+    # A series is [per-bucket counts..., +Inf count, sum].
+    series = detect_queue.JOB_LATENCY.snapshot().get(())
+    return int(sum(series[:-1])) if series else 0
+
+
+def test_jobs_run_in_the_background_on_a_bounded_pool(open_queue):
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0, "done": []}
+
+    def run(job):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+            state["done"].append(job["n"])
+
+    queue = open_queue(run, workers=3)
+    started = time.monotonic()
+    for n in range(9):
+        queue.submit({"n": n})
+    # `submit` only journals: nine 20 ms jobs haven't run by now.
+    assert time.monotonic() - started < 0.1
+    assert queue.flush(timeout=5)
+
+    assert sorted(state["done"]) == list(range(9))
+    assert 1 < state["peak"] <= 3
+
+
+def test_journaled_jobs_run_after_a_restart(open_queue, tmp_path):
+    """Jobs journaled before a crash (never run) run when the queue reopens."""
+
+    def down(records):
+        raise ConnectionError("process about to die")
+
+    journal = Outbox(str(tmp_path / "jobs"), down, fsync_ms=0, name="detect_jobs")
+    for n in range(4):
+        journal.append({"n": n})
+    journal.close()
+
+    ran: list[int] = []
+    queue = open_queue(lambda job: ran.append(job["n"]), workers=2)
+    assert queue.flush(timeout=5)
+    assert sorted(ran) == [0, 1, 2, 3]
+
+
+def test_failing_job_is_retried_then_dead_lettered_behind_the_rest(
+    open_queue, tmp_path, capsys
+):
+    """A job that always raises doesn't block the jobs behind it: they
+    complete, and it is retried up to the cap, then set aside."""
+    calls: list[int] = []
+
+    def run(job):
+        calls.append(job["n"])
+        if job["n"] == 1:
+            raise ValueError("bug")
+
+    queue = open_queue(run, workers=2, max_attempts=3, retry_max_s=0.01)
+    for n in range(5):
+        queue.submit({"n": n, "filename": f"{n}.jpg"})
+    assert queue.flush(timeout=5)
+
+    assert sorted(n for n in calls if n != 1) == [0, 2, 3, 4]
+    assert calls.count(1) == 3
+    stats = queue.stats()
+    assert (stats["failed"], stats["dead_lettered"]) == (3, 1)
+    assert "[detect] job failed for filename=1.jpg" in capsys.readouterr().out
+    dead = (tmp_path / "jobs" / "rejected.jsonl").read_text().splitlines()
+    assert [json.loads(line)["record"]["n"] for line in dead] == [1]
+    text = "\n".join(queue.collect_metrics())
+    assert "detect_jobs_dead_lettered_total 1" in text
+    assert "detect_jobs_failed_total 3" in text
+
+
+def test_job_that_fails_once_completes_on_its_retry(open_queue):
+    calls: list[int] = []
+
+    def run(job):
+        calls.append(job["n"])
+        if calls.count(job["n"]) == 1 and job["n"] == 0:
+            raise OSError("disk hiccup")
+
+    queue = open_queue(run, workers=1, retry_max_s=0.01)
+    queue.submit({"n": 0})
+    queue.submit({"n": 1})
+    assert queue.flush(timeout=5)
+
+    assert calls == [0, 1, 0]
+    assert queue.stats()["dead_lettered"] == 0
+
+
+def test_queue_depth_and_latency_metrics(open_queue):
+    release = threading.Event()
+    queue = open_queue(lambda job: release.wait(5), workers=1)
+    before = _latency_count()
+    queue.submit({"n": 1})
+    queue.submit({"n": 2})
+
+    text = "\n".join(queue.collect_metrics())
+    assert "detect_jobs_pending_records 2" in text
+    assert "detect_jobs_workers 1" in text
+
+    release.set()
+    assert queue.flush(timeout=5)
+    assert _latency_count() == before + 2
+    assert 'detect_job_latency_seconds_bucket{le="+Inf"}' in metrics.render()
+    assert "detect_jobs_pending_records 0" in "\n".join(queue.collect_metrics())
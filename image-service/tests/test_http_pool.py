@@ -0,0 +1,135 @@
+"""Tests for the shared duckdb-service session (services/http_pool.py).
+
+Runs real requests against a local HTTP/1.1 server so keep-alive, the
+retry policy and the counters are exercised through urllib3 rather than
+mocked.
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from services import http_pool
+
+
+@pytest.fixture
+def upstream():
+    """A stand-in duckdb-service that keeps connections alive, as its
+    KeepAliveRequestHandler does. ``answers`` is a list of statuses to
+    return next (200 once it is empty); ``hits`` counts requests."""
+    state = {"answers": [], "hits": 0}
+
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _answer(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            state["hits"] += 1
+            status = state["answers"].pop(0) if state["answers"] else 200
+            body = json.dumps({"ok": status < 400}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = do_DELETE = _answer
+
+        def log_message(self, *_args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}/echo"
+    yield state
+    server.shutdown()
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(http_pool, "_BACKOFF_S", 0)
+
+
+def _delta(before: dict[str, int]) -> dict[str, int]:
+    after = http_pool.stats()
+    return {k: after[k] - before[k] for k in after}
+
+
+def test_consecutive_calls_reuse_one_connection(upstream):
+    session = http_pool.build_session()
+    before = http_pool.stats()
+    for _ in range(5):
+        assert session.get(upstream["url"], timeout=http_pool.timeout(5)).ok
+    delta = _delta(before)
+    assert delta["requests"] == 5
+    assert delta["connections_opened"] == 1
+    assert delta["connections_reused"] == 4
+
+
+def test_idempotent_call_is_retried_on_503(upstream, no_backoff):
+    session = http_pool.build_session()
+    upstream["answers"] = [503, 503]
+    before = http_pool.stats()
+    resp = session.get(upstream["url"], timeout=http_pool.timeout(5))
+    assert resp.status_code == 200
+    assert upstream["hits"] == 3
+    assert _delta(before)["retries"] == 2
+
+
+def test_final_5xx_is_returned_not_raised(upstream, no_backoff):
+    session = http_pool.build_session(retries=1)
+    upstream["answers"] = [503, 503]
+    resp = session.delete(upstream["url"], timeout=http_pool.timeout(5))
+    assert resp.status_code == 503
+    assert upstream["hits"] == 2
+
+
+def test_post_is_not_replayed_after_the_server_saw_it(upstream, no_backoff):
+    """A replayed /ingest_upload would record the upload twice."""
+    session = http_pool.build_session()
+    upstream["answers"] = [503]
+    before = http_pool.stats()
+    resp = session.post(upstream["url"], json={}, timeout=http_pool.timeout(5))
+    assert resp.status_code == 503
+    assert upstream["hits"] == 1
+    assert _delta(before)["retries"] == 0
+
+
+def test_failed_connect_is_retried_for_any_method(no_backoff):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    # Nothing listens on `port` now: every connect is refused.
+    session = http_pool.build_session(retries=2)
+    before = http_pool.stats()
+    with pytest.raises(requests.ConnectionError):
+        session.post(f"http://127.0.0.1:{port}/x", timeout=http_pool.timeout(5))
+    assert _delta(before)["retries"] == 2
+
+
+def test_duckdb_service_uses_the_shared_session_with_split_timeouts(app, upload_env):
+    assert app.duckdb_service.session is http_pool.session
+    app.duckdb_service.record_image("aabbccddeeff", "x.jpg")
+    assert upload_env["duckdb_posts"][-1]["kwargs"]["timeout"] == (
+        http_pool.DUCKDB_HTTP_CONNECT_TIMEOUT_S,
+        5.0,
+    )
+
+
+def test_metrics_endpoint_is_gated_and_shows_reuse(client, monkeypatch):
+    monkeypatch.setenv("HIGHFIVE_API_KEY", "k")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"X-Admin-Key": "bad"}).status_code == 401
+    resp = client.get("/metrics", headers={"Authorization": "Bearer k"})
+    assert resp.status_code == 200
+    assert resp.content_type.startswith("text/plain; version=0.0.4")
+    body = resp.get_data(as_text=True)
+    assert "# TYPE duckdb_http_connections_reused_total counter" in body
+    assert "duckdb_http_requests_total " in body
+    assert client.get("/metrics", headers={"X-Admin-Key": "k"}).status_code == 200
@@ -0,0 +1,48 @@
+"""Tests for GET /images — the paginated proxy onto duckdb's /image_uploads."""
+
+from __future__ import annotations
+
+
+class _Resp:
+    status_code = 200
+
+    def __init__(self, payload: dict):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+def test_list_images_forwards_cursor_and_returns_next_cursor(app, client, monkeypatch):
+    calls: list[dict] = []
+    page = {"images": [], "next_cursor": "MjAyNHwx", "total": 3}
+
+    def fake_get(url, **kwargs):
+        calls.append({"url": url, **kwargs})
+        return _Resp(page)
+
+    monkeypatch.setattr(app.duckdb_service.session, "get", fake_get)
+
+    resp = client.get("/images?module_id=aabbccddeeff&limit=2&cursor=abc_-")
+
+    assert resp.status_code == 200
+    assert resp.get_json() == page
+    assert calls[0]["url"].endswith("/image_uploads")
+    assert calls[0]["params"] == {
+        "module_id": "aabbccddeeff",
+        "limit": "2",
+        "cursor": "abc_-",
+    }
+
+
+def test_list_images_forwards_empty_cursor_to_start_a_walk(app, client, monkeypatch):
+    calls: list[dict] = []
+
+    def fake_get(url, **kwargs):
+        calls.append(kwargs["params"])
+        return _Resp({"images": [], "next_cursor": None, "total": 0})
+
+    monkeypatch.setattr(app.duckdb_service.session, "get", fake_get)
+
+    assert client.get("/images?cursor=").status_code == 200
+    assert calls == [{"cursor": ""}]
@@ -0,0 +1,242 @@
+"""Tests for the durable upload outbox (services/outbox.py).
+
+Real files in ``tmp_path`` and real threads; the handler is a plain
+function that records batches, so delivery order, retries and what
+survives a reopen are observed directly.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+
+import pytest
+
+from services.outbox import Outbox, Rejected
+
+
+class _Sink:
+    """Handler that records delivered records; fails while ``down``."""
+
+    def __init__(self, down: bool = False):
+        self.down = down
+        self.batches: list[list[dict]] = []
+        self.attempts = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, records: list[dict]) -> None:
+        with self.lock:
+            self.attempts += 1
+            if self.down:
+                raise ConnectionError("duckdb-service down")
+            self.batches.append(records)
+
+    @property
+    def delivered(self) -> list[int]:
+        return [r["n"] for batch in self.batches for r in batch]
+
+
+@pytest.fixture
+def open_outbox(tmp_path):
+    opened: list[Outbox] = []
+
+    def _open(handler, **kwargs):
+        kwargs.setdefault("fsync_ms", 0)
+        kwargs.setdefault("retry_max_s", 0.05)
+        box = Outbox(str(tmp_path / "outbox"), handler, **kwargs)
+        opened.append(box)
+        return box
+
+    yield _open
+    for box in opened:
+        box.close()
+
+
+def test_records_are_delivered_in_order_and_batched(open_outbox):
+    sink = _Sink(down=True)
+    box = open_outbox(sink, batch_max=4)
+    for n in range(10):
+        box.append({"n": n})
+    sink.down = False
+
+    assert box.flush(timeout=5)
+    assert sink.delivered == list(range(10))
+    assert all(len(batch) <= 4 for batch in sink.batches)
+    assert box.stats()["pending"] == 0
+
+
+def test_failed_batch_is_retried_and_nothing_overtakes_it(open_outbox):
+    sink = _Sink(down=True)
+    box = open_outbox(sink, batch_max=8)
+    for n in range(5):
+        box.append({"n": n})
+    # Let the drainer fail a few times, backing off between attempts.
+    while box.stats()["failures"] < 3:
+        threading.Event().wait(0.01)
+    assert sink.batches == []
+
+    sink.down = False
+    assert box.flush(timeout=5)
+    assert sink.delivered == [0, 1, 2, 3, 4]
+    stats = box.stats()
+    assert stats["delivered"] == 5 and stats["failures"] >= 3
+
+
+def test_undelivered_records_survive_a_reopen(open_outbox, tmp_path):
+    down = _Sink(down=True)
+    box = open_outbox(down)
+    for n in range(3):
+        box.append({"n": n})
+    box.close()
+
+    sink = _Sink()
+    reopened = open_outbox(sink)
+    assert reopened.flush(timeout=5)
+    assert sink.delivered == [0, 1, 2]
+
+
+def test_delivered_records_are_not_replayed_after_reopen(open_outbox):
+    sink = _Sink()
+    box = open_outbox(sink)
+    box.append({"n": 1})
+    assert box.flush(timeout=5)
+    box.append({"n": 2})
+    assert box.flush(timeout=5)
+    box.close()
+
+    again = _Sink()
+    reopened = open_outbox(again)
+    reopened.append({"n": 3})
+    assert reopened.flush(timeout=5)
+    assert again.delivered == [3]
+
+
+def test_torn_tail_is_cut_and_corrupt_lines_are_skipped(open_outbox, tmp_path):
+    directory = tmp_path / "outbox"
+    directory.mkdir()
+    segment = directory / "segment-000000000001.jsonl"
+    # A good record, garbage, and a line torn by a crash mid-append.
+    segment.write_bytes(b'{"n":1}\nnot json\n{"n":2}\n{"n":')
+
+    sink = _Sink()
+    box = open_outbox(sink)
+    box.append({"n": 3})
+    assert box.flush(timeout=5)
+    assert sink.delivered == [1, 2, 3]
+
+
+def test_segments_rotate_and_are_deleted_once_delivered(open_outbox, tmp_path):
+    sink = _Sink(down=True)
+    box = open_outbox(sink, segment_bytes=64, batch_max=3)
+    for n in range(20):
+        box.append({"n": n, "pad": "x" * 20})
+    segments = [p for p in os.listdir(tmp_path / "outbox") if p.startswith("segment-")]
+    assert len(segments) > 3
+
+    sink.down = False
+    assert box.flush(timeout=5)
+    assert sink.delivered == list(range(20))
+    left = [p for p in os.listdir(tmp_path / "outbox") if p.startswith("segment-")]
+    assert len(left) == 1  # only the live segment
+
+
+def test_append_waits_for_fsync_and_fsyncs_are_shared(open_outbox, monkeypatch):
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(
+        "services.outbox.os.fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd))
+    )
+    sink = _Sink(down=True)
+    box = open_outbox(sink, fsync_ms=20)
+
+    threads = [threading.Thread(target=box.append, args=({"n": n},)) for n in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert box.stats()["appended"] == 16
+    # One window's appends share an fsync.
+    assert 1 <= box.stats()["fsyncs"] < 16
+    assert len(fsyncs) >= 1
+
+
+def test_cursor_is_persisted_after_delivery(open_outbox, tmp_path):
+    sink = _Sink()
+    box = open_outbox(sink)
+    box.append({"n": 1})
+    assert box.flush(timeout=5)
+    cursor = json.loads((tmp_path / "outbox" / "cursor.json").read_text())
+    assert cursor == {"segment": 1, "offset": len(b'{"n":1}\n')}
+
+
+def test_outbox_metrics(open_outbox):
+    box = open_outbox(_Sink(down=True))
+    box.append({"n": 1})
+    text = "\n".join(box.collect_metrics())
+    assert "outbox_pending_records 1" in text
+    assert "outbox_appended_total 1" in text
+    assert "# TYPE outbox_delivered_total counter" in text
+
+
+def test_refused_record_is_dead_lettered_without_blocking_the_rest(
+    open_outbox, tmp_path
+):
+    tries: list[int] = []
+    delivered: list[int] = []
+
+    def handler(records):
+        refused = []
+        for i, record in enumerate(records):
+            assert "_outbox_attempts" not in record
+            if record["n"] == 1:
+                tries.append(1)
+                refused.append(i)
+            else:
+                delivered.append(record["n"])
+        if refused:
+            raise Rejected(refused, "always refused")
+
+    box = open_outbox(handler, batch_max=8, max_attempts=3)
+    for n in range(4):
+        box.append({"n": n})
+    assert box.flush(timeout=5)
+
+    assert delivered == [0, 2, 3]
+    assert len(tries) == 3
+    stats = box.stats()
+    assert (stats["delivered"], stats["requeued"], stats["dead_lettered"]) == (
+        3,
+        2,
+        1,
+    )
+    lines = (tmp_path / "outbox" / "rejected.jsonl").read_text().splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert entry["record"] == {"n": 1}
+    assert (entry["attempts"], entry["reason"]) == (3, "always refused")
+    assert "outbox_dead_lettered_total 1" in "\n".join(box.collect_metrics())
+
+
+def test_refused_record_that_passes_on_a_retry_is_delivered(open_outbox):
+    seen: list[int] = []
+
+    def handler(records):
+        seen.extend(r["n"] for r in records)
+        if seen.count(1) == 1 and any(r["n"] == 1 for r in records):
+            raise Rejected([i for i, r in enumerate(records) if r["n"] == 1])
+
+    box = open_outbox(handler, max_attempts=3)
+    box.append({"n": 1})
+    box.append({"n": 2})
+    assert box.flush(timeout=5)
+    assert seen.count(1) == 2
+    assert box.stats()["dead_lettered"] == 0
+
+
+def test_append_after_close_raises(open_outbox):
+    box = open_outbox(_Sink())
+    box.close()
+    with pytest.raises(RuntimeError):
+        box.append({"n": 1})
@@ -121,14 +121,40 @@ def test_upload_happy_path_saves_image_and_returns_classification(
     # No logs field => no sidecar should be written.
     assert not (tmp_upload_dir / "bee01.jpg.log.json").exists()
 
-    # Outbound POSTs to duckdb-service: /record_image, /add_progress_for_module
-    # and /heartbeat.
+    # One outbound POST to duckdb-service: /ingest_upload carries the image
+    # row (#58), the classification, the (here: no) detection rows and the
+    # battery for the heartbeat. No per-step calls, no progress_count GET.
     posts = upload_env["duckdb_posts"]
-    assert len(posts) == 3
+    assert [p["url"].rsplit("/", 1)[-1] for p in posts] == ["ingest_upload"]
+    ingest = posts[0]["json"]
+    # Wire field is canonical ``module_id`` (was the legacy ``modul_id`` typo).
+    assert ingest["module_id"] == TEST_MAC
+    assert ingest["filename"] == "bee01.jpg"
+    assert ingest["battery"] == 80
+    assert ingest["classification"] == body["classification"]
+    assert ingest["detections"] == []
+    assert upload_env["duckdb_gets"] == []
+
+
+def test_upload_falls_back_to_per_step_calls_on_older_duckdb_service(
+    client, upload_env
+):
+    """A duckdb-service without /ingest_upload (404) gets the per-step
+    sequence: /record_image, /add_progress_for_module, /heartbeat."""
+    upload_env["duckdb_http"]["ingest_upload"] = False
+    resp = client.post(
+        "/upload",
+        data=_make_form(filename="bee01.jpg"),
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200, resp.get_json()
+
+    posts = upload_env["duckdb_posts"]
+    assert len(posts) == 4
+    assert posts[0]["url"].endswith("/ingest_upload")
 
     progress_calls = [p for p in posts if p["url"].endswith("/add_progress_for_module")]
     assert len(progress_calls) == 1
-    # Wire field is now canonical ``module_id`` (was the legacy ``modul_id`` typo).
     assert progress_calls[0]["json"]["module_id"] == TEST_MAC
     assert "classification" in progress_calls[0]["json"]
 
@@ -146,7 +172,8 @@ def test_upload_happy_path_saves_image_and_returns_classification(
         "filename": "bee01.jpg",
     }
 
-    # progress_count is fetched once per upload via GET.
+    # progress_count is fetched once per upload via GET (no `first_upload`
+    # flag on this duckdb-service's /record_image).
     gets = upload_env["duckdb_gets"]
     progress_count_calls = [
         g for g in gets if g["url"].endswith(f"/modules/{TEST_MAC}/progress_count")
@@ -164,15 +191,10 @@ def test_upload_canonicalises_legacy_colon_mac(client, upload_env):
     assert resp.status_code == 200, resp.get_json()
     assert resp.get_json()["mac"] == TEST_MAC
 
-    # Downstream POSTs see the canonical form, not the colon-separated input.
+    # The downstream POST sees the canonical form, not the colon-separated input.
     posts = upload_env["duckdb_posts"]
-    progress_calls = [p for p in posts if p["url"].endswith("/add_progress_for_module")]
-    assert progress_calls[0]["json"]["module_id"] == TEST_MAC
-    heartbeat_urls = [p["url"] for p in posts if p["url"].endswith("/heartbeat")]
-    assert any(f"/modules/{TEST_MAC}/heartbeat" in u for u in heartbeat_urls)
-    record_image_calls = [p for p in posts if p["url"].endswith("/record_image")]
-    assert len(record_image_calls) == 1
-    assert record_image_calls[0]["json"]["module_id"] == TEST_MAC
+    assert len(posts) == 1
+    assert posts[0]["json"]["module_id"] == TEST_MAC
 
 
 def test_upload_invalid_mac_returns_400(client, upload_env):
@@ -501,6 +523,23 @@ def test_upload_non_first_upload_does_not_trigger_discord(client, upload_env):
     assert upload_env["discord"] == []
 
 
+def test_upload_uses_record_image_first_upload_flag(client, upload_env):
+    """A duckdb-service that answers /record_image with `first_upload`
+    saves the per-upload progress_count GET (per-step fallback path)."""
+    upload_env["duckdb_http"]["ingest_upload"] = False
+    upload_env["duckdb_http"]["first_upload"] = True
+
+    resp = client.post(
+        "/upload",
+        data=_make_form(filename="flagged.jpg"),
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    gets = upload_env["duckdb_http"]["gets"]
+    assert not [g for g in gets if g["url"].endswith("/progress_count")]
+    assert len(upload_env["discord"]) == 1
+
+
 def test_upload_heartbeat_called_with_battery_value(client, upload_env):
     """Heartbeat receives the exact integer battery value."""
     resp = client.post(
@@ -510,23 +549,25 @@ def test_upload_heartbeat_called_with_battery_value(client, upload_env):
     )
     assert resp.status_code == 200
 
-    heartbeats = [
-        p for p in upload_env["duckdb_posts"] if p["url"].endswith("/heartbeat")
+    ingests = [
+        p for p in upload_env["duckdb_posts"] if p["url"].endswith("/ingest_upload")
     ]
-    assert len(heartbeats) == 1
-    assert heartbeats[0]["json"] == {"battery": 42}
+    assert len(ingests) == 1
+    assert ingests[0]["json"]["battery"] == 42
 
 
 def test_upload_survives_progress_count_failure(client, upload_env, monkeypatch):
     """A duckdb-service hiccup on /progress_count must not fail the upload."""
     from requests import ConnectionError as RequestsConnectionError
 
-    import services.duckdb as duckdb_svc_mod
+    from services import http_pool
+
+    upload_env["duckdb_http"]["ingest_upload"] = False
 
     def boom_get(url, **kwargs):
         raise RequestsConnectionError("duckdb-service down")
 
-    monkeypatch.setattr(duckdb_svc_mod.requests, "get", boom_get)
+    monkeypatch.setattr(http_pool.session, "get", boom_get)
 
     resp = client.post(
         "/upload",
@@ -544,12 +585,18 @@ def test_upload_survives_record_image_failure(client, upload_env, monkeypatch, c
     the failure MUST be logged so the on-call can see an orphaned file."""
     from requests import ConnectionError as RequestsConnectionError
 
-    import services.duckdb as duckdb_svc_mod
+    from services import http_pool
 
     posts = upload_env["duckdb_posts"]
 
     def selective_post(url, json=None, **kwargs):
         posts.append({"url": url, "json": json, "kwargs": kwargs})
+        if url.endswith("/ingest_upload"):
+            # Per-step fallback path: an older duckdb-service.
+            class _NotFound:
+                status_code = 404
+
+            return _NotFound()
         if url.endswith("/record_image"):
             raise RequestsConnectionError("record_image boom")
 
@@ -564,7 +611,7 @@ def test_upload_survives_record_image_failure(client, upload_env, monkeypatch, c
 
         return _R()
 
-    monkeypatch.setattr(duckdb_svc_mod.requests, "post", selective_post)
+    monkeypatch.setattr(http_pool.session, "post", selective_post)
 
     resp = client.post(
         "/upload",
@@ -581,12 +628,18 @@ def test_upload_survives_heartbeat_failure(client, upload_env, monkeypatch):
     """A duckdb-service hiccup on /heartbeat must not fail the upload."""
     from requests import ConnectionError as RequestsConnectionError
 
-    import services.duckdb as duckdb_svc_mod
+    from services import http_pool
 
     posts = upload_env["duckdb_posts"]
 
     def selective_post(url, json=None, **kwargs):
         posts.append({"url": url, "json": json, "kwargs": kwargs})
+        if url.endswith("/ingest_upload"):
+            # Per-step fallback path: an older duckdb-service.
+            class _NotFound:
+                status_code = 404
+
+            return _NotFound()
         if url.endswith("/heartbeat"):
             raise RequestsConnectionError("heartbeat boom")
 
@@ -601,7 +654,7 @@ def test_upload_survives_heartbeat_failure(client, upload_env, monkeypatch):
 
         return _R()
 
-    monkeypatch.setattr(duckdb_svc_mod.requests, "post", selective_post)
+    monkeypatch.setattr(http_pool.session, "post", selective_post)
 
     resp = client.post(
         "/upload",
@@ -611,6 +664,36 @@ def test_upload_survives_heartbeat_failure(client, upload_env, monkeypatch):
     assert resp.status_code == 200
 
 
+def test_upload_survives_ingest_failure_and_logs_it(
+    client, upload_env, monkeypatch, capsys
+):
+    """A duckdb-service hiccup on /ingest_upload must not fail the upload;
+    it is logged (the upload is missing from the DB) and not fanned out
+    into per-step calls."""
+    from requests import ConnectionError as RequestsConnectionError
+
+    from services import http_pool
+
+    posts = upload_env["duckdb_posts"]
+
+    def boom_post(url, json=None, **kwargs):
+        posts.append({"url": url, "json": json, "kwargs": kwargs})
+        raise RequestsConnectionError("ingest boom")
+
+    monkeypatch.setattr(http_pool.session, "post", boom_post)
+
+    resp = client.post(
+        "/upload",
+        data=_make_form(filename="lost.jpg"),
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    assert len(posts) == 1
+    out = capsys.readouterr().out
+    assert "[ingest_upload]" in out and "lost.jpg" in out
+    assert upload_env["discord"] == []
+
+
 # ---------------- size cap + rate guard (2026-07 audit, for #203) ----------------
 
 
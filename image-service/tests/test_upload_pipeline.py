@@ -17,9 +17,13 @@ import json
 import struct
 from pathlib import Path
 
-from requests import RequestException
+import pytest
+import requests
+from requests import HTTPError, RequestException
 
+from services.detect_queue import DetectQueue
 from services.hole_detection import DetectionResult, Snip
+from services.outbox import Rejected
 from services.upload_pipeline import UploadPipeline, UploadRequest
 
 # Canonical 12-hex-char ModuleId fixtures.
@@ -81,8 +85,20 @@ class _FakeDuckDB:
         heartbeat_raises: bool = False,
         record_image_raises: bool = False,
         record_detections_raises: bool = False,
+        first_upload: bool | None = None,
+        ingest: bool = False,
+        ingest_raises: bool = False,
     ):
         self.progress_count = progress_count
+        # False => answers like a duckdb-service that predates
+        # `/ingest_upload`, so the pipeline makes the per-step calls.
+        self.ingest = ingest
+        self.ingest_raises = ingest_raises
+        # Filenames `/ingest_uploads` answers with `write_failed`.
+        self.write_fails: set[str] = set()
+        # None => record_image answers like a duckdb-service that predates
+        # the `first_upload` flag, so the pipeline falls back to the GET.
+        self.first_upload = first_upload
         self.progress_count_raises = progress_count_raises
         self.add_progress_raises = add_progress_raises
         self.heartbeat_raises = heartbeat_raises
@@ -93,6 +109,9 @@ class _FakeDuckDB:
         self.heartbeat_calls: list[tuple[str, int]] = []
         self.record_image_calls: list[tuple[str, str]] = []
         self.record_detections_calls: list[tuple[str, str, list]] = []
+        self.ingest_calls: list[dict] = []
+        self.ingest_batches: list[list[dict]] = []
+        self._ingested_keys: set[str] = set()
 
     def get_progress_count(self, mac: str) -> int:
         self.progress_count_calls.append(mac)
@@ -116,7 +135,9 @@ class _FakeDuckDB:
         self.record_image_calls.append((module_id, filename))
         if self.record_image_raises:
             raise RequestException("boom")
-        return {"message": "Image recorded"}
+        if self.first_upload is None:
+            return {"message": "Image recorded"}
+        return {"message": "Image recorded", "first_upload": self.first_upload}
 
     def record_detections(
         self, module_id: str, filename: str, detections: list
@@ -126,6 +147,95 @@ class _FakeDuckDB:
             raise RequestException("boom")
         return {"message": "Detections recorded", "inserted": len(detections)}
 
+    def ingest_upload(
+        self,
+        module_id: str,
+        filename: str,
+        *,
+        battery: int,
+        classification: dict,
+        detections: list,
+        **keyed,
+    ) -> dict | None:
+        self.ingest_calls.append(
+            {
+                "module_id": module_id,
+                "filename": filename,
+                "battery": battery,
+                "classification": classification,
+                "detections": detections,
+                **keyed,
+            }
+        )
+        if not self.ingest:
+            return None
+        if self.ingest_raises:
+            raise RequestException("boom")
+        first = self.first_upload
+        if first is None:
+            first = self.progress_count == 0
+        key = keyed.get("ingest_key")
+        replayed = key is not None and key in self._ingested_keys
+        if key is not None:
+            self._ingested_keys.add(key)
+        return {
+            "message": "Upload ingested",
+            "first_upload": first,
+            "inserted": len(detections),
+            "heartbeat": True,
+            **({"replayed": True} if replayed else {}),
+        }
+
+    def ingest_uploads(self, uploads: list[dict]) -> list[dict] | None:
+        self.ingest_batches.append(uploads)
+        if not self.ingest:
+            return None
+        if self.ingest_raises:
+            raise RequestException("boom")
+        results = []
+        for upload in uploads:
+            key = upload.get("ingest_key")
+            if not upload.get("filename"):
+                results.append({"ingest_key": key, "error": "filename required"})
+                continue
+            if upload["filename"] in self.write_fails:
+                results.append(
+                    {"ingest_key": key, "error": "disk full", "write_failed": True}
+                )
+                continue
+            replayed = key in self._ingested_keys
+            self._ingested_keys.add(key)
+            results.append(
+                {
+                    "ingest_key": key,
+                    "first_upload": bool(self.first_upload),
+                    "inserted": len(upload["detections"]),
+                    "heartbeat": True,
+                    **({"replayed": True} if replayed else {}),
+                }
+            )
+        return results
+
+
+class _ListQueue:
+    """Stand-in for `services.detect_queue.DetectQueue`: keeps submitted jobs."""
+
+    def __init__(self):
+        self.jobs: list[dict] = []
+
+    def submit(self, job: dict) -> None:
+        self.jobs.append(json.loads(json.dumps(job)))
+
+
+class _ListOutbox:
+    """Stand-in for `services.outbox.Outbox`: keeps appended records."""
+
+    def __init__(self):
+        self.records: list[dict] = []
+
+    def append(self, record: dict) -> None:
+        self.records.append(json.loads(json.dumps(record)))
+
 
 def _make_pipeline(
     upload_dir: Path,
@@ -386,6 +496,28 @@ def test_pipeline_non_first_upload_skips_discord(tmp_path: Path):
     assert duckdb.record_image_calls == [(TEST_MAC_2, "later.jpg")]
 
 
+@pytest.mark.parametrize("first_upload", [True, False])
+def test_pipeline_first_upload_flag_skips_progress_count(
+    tmp_path: Path, first_upload: bool
+):
+    """When record_image carries `first_upload`, that flag alone decides the
+    Discord ping — no `progress_count` round-trip per upload."""
+    # progress_count contradicts the flag, so a fallback would show.
+    duckdb = _FakeDuckDB(
+        first_upload=first_upload, progress_count=5 if first_upload else 0
+    )
+    discord: list[str] = []
+    pipeline = _make_pipeline(tmp_path, duckdb, discord_sink=discord)
+
+    req = UploadRequest(
+        mac=TEST_MAC_1, battery=70, image=_FakeImage("flag.jpg"), logs_raw=None
+    )
+    pipeline.run(req)
+
+    assert duckdb.progress_count_calls == []
+    assert len(discord) == (1 if first_upload else 0)
+
+
 def test_pipeline_tolerates_duckdb_failures_and_skips_discord(tmp_path: Path):
     """All four duckdb calls raising RequestException => upload still completes,
     Discord skipped (couldn't determine first-upload), no exception bubbles up."""
@@ -449,6 +581,394 @@ def test_pipeline_malformed_logs_writes_parse_error_sidecar(tmp_path: Path):
     assert sidecar["image"] == "bad.jpg"
 
 
+# ---------------- combined ingest (POST /ingest_upload) ----------------
+
+
+def test_pipeline_ingests_the_whole_upload_in_one_call(tmp_path: Path):
+    """A duckdb-service with `/ingest_upload` gets one call carrying the
+    image row, classification, detection rows and battery — and nothing else."""
+    duckdb = _FakeDuckDB(ingest=True, first_upload=True)
+    discord: list[str] = []
+    pipeline = UploadPipeline(
+        upload_folder=str(tmp_path),
+        duckdb_service=duckdb,
+        send_discord=lambda msg: discord.append(msg),
+        classify=lambda: {"stub": {"1": 0}},
+        detector=_FakeDetector(_sealed_detection()),
+        snip_folder=str(tmp_path / "snips"),
+    )
+
+    pipeline.run(
+        UploadRequest(
+            mac=TEST_MAC_1, battery=64, image=_FakeImage("cap.jpg"), logs_raw=None
+        )
+    )
+
+    assert len(duckdb.ingest_calls) == 1
+    call = duckdb.ingest_calls[0]
+    assert (call["module_id"], call["filename"], call["battery"]) == (
+        TEST_MAC_1,
+        "cap.jpg",
+        64,
+    )
+    assert call["classification"] == {"leafcutter_bee": {"2": 1}}
+    assert [r["snip_filename"] for r in call["detections"]] == [
+        "cap-leafcutter_bee-2.jpg"
+    ]
+    assert call["detections"][0]["bee_type"] == "leafcutter"
+    # No per-step round-trips.
+    assert duckdb.record_image_calls == []
+    assert duckdb.progress_count_calls == []
+    assert duckdb.add_progress_calls == []
+    assert duckdb.record_detections_calls == []
+    assert duckdb.heartbeat_calls == []
+    assert len(discord) == 1
+
+
+def test_pipeline_ingest_first_upload_flag_decides_discord(tmp_path: Path):
+    duckdb = _FakeDuckDB(ingest=True, first_upload=False)
+    discord: list[str] = []
+    pipeline = _make_pipeline(tmp_path, duckdb, discord_sink=discord)
+    pipeline.run(
+        UploadRequest(
+            mac=TEST_MAC_2, battery=10, image=_FakeImage("b.jpg"), logs_raw=None
+        )
+    )
+    assert discord == []
+
+
+def test_pipeline_ingest_failure_logs_and_does_not_fan_out(tmp_path: Path, capsys):
+    """A failed ingest is logged and not replayed as per-step calls (a
+    timeout may already have committed it); no Discord on a flaky network."""
+    duckdb = _FakeDuckDB(ingest=True, ingest_raises=True, first_upload=True)
+    discord: list[str] = []
+    pipeline = _make_pipeline(tmp_path, duckdb, discord_sink=discord)
+
+    result = pipeline.run(
+        UploadRequest(
+            mac=TEST_MAC_3, battery=50, image=_FakeImage("lost.jpg"), logs_raw=None
+        )
+    )
+
+    assert result.filename == "lost.jpg"
+    assert (tmp_path / "lost.jpg").exists()
+    out = capsys.readouterr().out
+    assert "[ingest_upload]" in out and "lost.jpg" in out
+    assert duckdb.record_image_calls == []
+    assert duckdb.add_progress_calls == []
+    assert discord == []
+
+
+def test_pipeline_falls_back_to_per_step_calls_on_older_duckdb(tmp_path: Path):
+    """Without `/ingest_upload` the pipeline probes once, then makes the
+    per-step calls with the same payloads."""
+    duckdb = _FakeDuckDB(first_upload=True)  # ingest unsupported
+    pipeline = UploadPipeline(
+        upload_folder=str(tmp_path),
+        duckdb_service=duckdb,
+        send_discord=lambda msg: None,
+        classify=lambda: {},
+        detector=_FakeDetector(_sealed_detection()),
+        snip_folder=str(tmp_path / "snips"),
+    )
+    pipeline.run(
+        UploadRequest(
+            mac=TEST_MAC_4, battery=33, image=_FakeImage("old.jpg"), logs_raw=None
+        )
+    )
+
+    assert len(duckdb.ingest_calls) == 1
+    assert duckdb.record_image_calls == [(TEST_MAC_4, "old.jpg")]
+    assert duckdb.add_progress_calls[0]["classification"] == {
+        "leafcutter_bee": {"2": 1}
+    }
+    assert duckdb.record_detections_calls[0][2] == duckdb.ingest_calls[0]["detections"]
+    assert duckdb.heartbeat_calls == [(TEST_MAC_4, 33)]
+
+
+# ---------------- outbox (services/outbox.py) ----------------
+
+
+def test_pipeline_with_outbox_appends_and_makes_no_calls(tmp_path: Path):
+    """With an outbox, `run` only appends the upload's `/ingest_uploads`
+    entry: no duckdb-service round-trip, no Discord ping yet."""
+    duckdb = _FakeDuckDB(ingest=True, first_upload=True)
+    discord: list[str] = []
+    outbox = _ListOutbox()
+    pipeline = UploadPipeline(
+        upload_folder=str(tmp_path),
+        duckdb_service=duckdb,
+        send_discord=lambda msg: discord.append(msg),
+        classify=lambda: {},
+        detector=_FakeDetector(_sealed_detection()),
+        snip_folder=str(tmp_path / "snips"),
+        outbox=outbox,
+    )
+
+    result = pipeline.run(
+        UploadRequest(
+            mac=TEST_MAC_1, battery=71, image=_FakeImage("q.jpg"), logs_raw=None
+        )
+    )
+
+    assert result.filename == "q.jpg"
+    assert duckdb.ingest_calls == [] and duckdb.ingest_batches == []
+    assert duckdb.record_image_calls == [] and duckdb.heartbeat_calls == []
+    assert discord == []
+    [record] = outbox.records
+    assert (record["module_id"], record["filename"], record["battery"]) == (
+        TEST_MAC_1,
+        "q.jpg",
+        71,
+    )
+    assert record["classification"] == {"leafcutter_bee": {"2": 1}}
+    assert record["detections"][0]["snip_filename"] == "q-leafcutter_bee-2.jpg"
+    assert len(record["ingest_key"]) == 32
+    assert record["uploaded_at"][:4].isdigit() and "+" not in record["uploaded_at"]
+
+
+def test_pipeline_replay_batches_and_pings_only_fresh_first_uploads(
+    tmp_path: Path, capsys
+):
+    """`replay` sends the whole batch in one call; a first upload pings
+    Discord once, not again when the same key is redelivered; a rejected
+    record is logged and dropped rather than raised (it would never pass)."""
+    duckdb = _FakeDuckDB(ingest=True, first_upload=True)
+    discord: list[str] = []
+    outbox = _ListOutbox()
+    pipeline = _make_pipeline(tmp_path, duckdb, discord_sink=discord)
+    pipeline.outbox = outbox
+    for name in ("a.jpg", "b.jpg"):
+        pipeline.run(
+            UploadRequest(
+                mac=TEST_MAC_2, battery=5, image=_FakeImage(name), logs_raw=None
+            )
+        )
+    bad = dict(outbox.records[0], ingest_key="bad", filename="")
+
+    pipeline.replay(outbox.records + [bad])
+    pipeline.replay(outbox.records[:1])  # redelivered after a lost answer
+
+    assert [len(batch) for batch in duckdb.ingest_batches] == [3, 1]
+    assert len(discord) == 2
+    assert "a.jpg" in discord[0] and "b.jpg" in discord[1]
+    assert "[outbox] duckdb-service rejected" in capsys.readouterr().out
+
+
+def test_pipeline_replay_raises_while_duckdb_is_down(tmp_path: Path):
+    """A failed batch must raise so the outbox keeps it and retries."""
+    duckdb = _FakeDuckDB(ingest=True, ingest_raises=True)
+    pipeline = _make_pipeline(tmp_path, duckdb)
+    with pytest.raises(RequestException):
+        pipeline.replay([{"ingest_key": "k", "filename": "x.jpg"}])
+
+
+def test_pipeline_replay_rejects_only_the_records_whose_write_failed(
+    tmp_path: Path,
+):
+    """A `write_failed` result raises `Rejected` with its index, after the
+    rest of the batch was handled, so the outbox requeues just that one."""
+    duckdb = _FakeDuckDB(ingest=True, first_upload=True)
+    duckdb.write_fails = {"b.jpg"}
+    discord: list[str] = []
+    pipeline = _make_pipeline(tmp_path, duckdb, discord_sink=discord)
+    records = [
+        dict(
+            module_id=TEST_MAC_2,
+            battery=5,
+            filename=name,
+            classification={},
+            detections=[],
+            ingest_key=name,
+        )
+        for name in ("a.jpg", "b.jpg", "c.jpg")
+    ]
+
+    with pytest.raises(Rejected) as info:
+        pipeline.replay(records)
+
+    assert info.value.indices == [1]
+    assert "b.jpg: disk full" in str(info.value)
+    assert len(discord) == 2
+
+
+def test_pipeline_replay_rejects_a_lone_record_answered_with_500(
+    tmp_path: Path, monkeypatch
+):
+    """A 500 for a batch of one is that record's fault: `Rejected`. A 500
+    for a bigger batch raises as-is so the outbox retries it smaller."""
+    duckdb = _FakeDuckDB(ingest=True)
+    response = requests.Response()
+    response.status_code = 500
+
+    def fail(uploads):
+        raise HTTPError("500 Server Error", response=response)
+
+    monkeypatch.setattr(duckdb, "ingest_uploads", fail)
+    pipeline = _make_pipeline(tmp_path, duckdb)
+    record = {"ingest_key": "k", "filename": "x.jpg"}
+
+    with pytest.raises(Rejected):
+        pipeline.replay([record])
+    with pytest.raises(HTTPError) as info:
+        pipeline.replay([record, record])
+    assert not isinstance(info.value, Rejected)
+
+
+def test_pipeline_replay_uses_per_step_calls_on_older_duckdb(tmp_path: Path):
+    duckdb = _FakeDuckDB(first_upload=True)  # no /ingest_uploads
+    discord: list[str] = []
+    outbox = _ListOutbox()
+    pipeline = _make_pipeline(tmp_path, duckdb, discord_sink=discord)
+    pipeline.outbox = outbox
+    pipeline.run(
+        UploadRequest(
+            mac=TEST_MAC_3, battery=44, image=_FakeImage("o.jpg"), logs_raw=None
+        )
+    )
+
+    pipeline.replay(outbox.records)
+
+    assert duckdb.record_image_calls == [(TEST_MAC_3, "o.jpg")]
+    assert duckdb.heartbeat_calls == [(TEST_MAC_3, 44)]
+    assert len(discord) == 1
+
+
+# ---------------- background detection (services/detect_queue.py) ----------------
+
+
+def test_pipeline_with_detect_queue_answers_before_detection(tmp_path: Path):
+    """With a queue, `run` saves the image and sidecar, journals a job and
+    returns `queued`: no detection, no snips, no duckdb-service call yet."""
+    duckdb = _FakeDuckDB(ingest=True, first_upload=True)
+    detector = _FakeDetector(_sealed_detection())
+    jobs = _ListQueue()
+    pipeline = UploadPipeline(
+        upload_folder=str(tmp_path),
+        duckdb_service=duckdb,
+        send_discord=lambda msg: None,
+        classify=lambda: {},
+        detector=detector,
+        snip_folder=str(tmp_path / "snips"),
+        jobs=jobs,
+    )
+
+    result = pipeline.run(
+        UploadRequest(
+            mac=TEST_MAC_1, battery=90, image=_FakeImage("j.jpg"), logs_raw='{"a": 1}'
+        )
+    )
+
+    assert result.queued is True and result.classification is None
+    assert (tmp_path / "j.jpg").exists()
+    assert (tmp_path / "j.jpg.log.json").exists()
+    assert detector.detect_calls == []
+    assert not (tmp_path / "snips").exists()
+    assert duckdb.ingest_calls == []
+    [job] = jobs.jobs
+    assert (job["mac"], job["battery"], job["filename"]) == (TEST_MAC_1, 90, "j.jpg")
+    assert len(job["ingest_key"]) == 32 and job["uploaded_at"]
+
+
+def test_pipeline_run_job_detects_and_records_once(tmp_path: Path):
+    """`run_job` does the rest with the job's key; running the same job
+    again (a crash mid-batch) is a replay: no second Discord ping."""
+    duckdb = _FakeDuckDB(ingest=True, first_upload=True)
+    detector = _FakeDetector(_sealed_detection())
+    discord: list[str] = []
+    jobs = _ListQueue()
+    pipeline = UploadPipeline(
+        upload_folder=str(tmp_path),
+        duckdb_service=duckdb,
+        send_discord=lambda msg: discord.append(msg),
+        classify=lambda: {},
+        detector=detector,
+        snip_folder=str(tmp_path / "snips"),
+        jobs=jobs,
+    )
+    pipeline.run(
+        UploadRequest(
+            mac=TEST_MAC_2, battery=12, image=_FakeImage("k.jpg"), logs_raw=None
+        )
+    )
+    [job] = jobs.jobs
+
+    pipeline.run_job(job)
+    pipeline.run_job(job)
+
+    assert detector.detect_calls == [str(tmp_path / "k.jpg")] * 2
+    assert (tmp_path / "snips" / "k-leafcutter_bee-2.jpg").exists()
+    first, again = duckdb.ingest_calls
+    assert first["ingest_key"] == again["ingest_key"] == job["ingest_key"]
+    assert first["uploaded_at"] == job["uploaded_at"]
+    assert first["classification"] == {"leafcutter_bee": {"2": 1}}
+    assert len(discord) == 1
+
+
+def test_pipeline_run_job_is_retried_by_the_queue_while_duckdb_is_down(
+    tmp_path: Path,
+):
+    """Without an outbox, a queued job whose ingest fails raises, so the
+    journal runs it again instead of dropping an upload `/upload` has
+    already answered; the retry records it with the same key."""
+    duckdb = _FakeDuckDB(ingest=True, ingest_raises=True, first_upload=True)
+    discord: list[str] = []
+    pipeline = UploadPipeline(
+        upload_folder=str(tmp_path),
+        duckdb_service=duckdb,
+        send_discord=lambda msg: discord.append(msg),
+        classify=lambda: {},
+        detector=_FakeDetector(_sealed_detection()),
+        snip_folder=str(tmp_path / "snips"),
+    )
+
+    def run(job):
+        try:
+            pipeline.run_job(job)
+        finally:
+            duckdb.ingest_raises = False  # back up for the retry
+
+    queue = DetectQueue(str(tmp_path / "jobs"), run, fsync_ms=0, retry_max_s=0.01)
+    pipeline.jobs = queue
+    try:
+        pipeline.run(
+            UploadRequest(
+                mac=TEST_MAC_3, battery=40, image=_FakeImage("d.jpg"), logs_raw=None
+            )
+        )
+        assert queue.flush(timeout=5)
+        stats = queue.stats()
+    finally:
+        queue.close()
+
+    first, retry = duckdb.ingest_calls
+    assert first["ingest_key"] == retry["ingest_key"]
+    assert (stats["failed"], stats["dead_lettered"]) == (1, 0)
+    assert len(discord) == 1
+
+
+def test_pipeline_run_job_goes_through_the_outbox_with_the_jobs_key(
+    tmp_path: Path,
+):
+    duckdb = _FakeDuckDB(ingest=True)
+    outbox = _ListOutbox()
+    jobs = _ListQueue()
+    pipeline = _make_pipeline(tmp_path, duckdb)
+    pipeline.outbox, pipeline.jobs = outbox, jobs
+    pipeline.run(
+        UploadRequest(
+            mac=TEST_MAC_3, battery=1, image=_FakeImage("m.jpg"), logs_raw=None
+        )
+    )
+
+    pipeline.run_job(jobs.jobs[0])
+
+    [record] = outbox.records
+    assert record["ingest_key"] == jobs.jobs[0]["ingest_key"]
+    assert record["uploaded_at"] == jobs.jobs[0]["uploaded_at"]
+    assert duckdb.ingest_calls == []
+
+
 # ---------------- filename identity (2026-07 audit, for #202) ----------------
 
 